@@ -0,0 +1,50 @@
+from fastapi import Depends, Header, HTTPException, status
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.permission import Permission, permission_mask
+from app.core.permission_cache import permission_cache
+from app.database import get_session
+from app.models import User
+
+
+def get_and_set_current_user(
+    x_user_id: int = Header(...), session: Session = Depends(get_session)
+):
+    """
+    Resolve the user performing the request and register it in the session
+    transaction (`set_current_user_id`) so the audit triggers can record it.
+    """
+    user = session.get(User, x_user_id)
+    if user is None or not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid user"
+        )
+    session.execute(text("SELECT set_current_user_id(:user_id)"), {"user_id": user.id})
+    return user
+
+
+def require_permissions(*permissions: Permission):
+    """
+    Dependency that lets the request through only if the user in X-User-Id is
+    active and has all of `permissions`, and returns the user's id. The check
+    uses the permission cache, so it needs no query once the user's
+    permissions are cached.
+    """
+    required = permission_mask(permissions)
+
+    def dependency(
+        x_user_id: int = Header(...), session: Session = Depends(get_session)
+    ) -> int:
+        mask = permission_cache.mask(session, x_user_id)
+        if mask is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid user"
+            )
+        if mask & required != required:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN, detail="Permission denied"
+            )
+        return x_user_id
+
+    return dependency
@@ -0,0 +1,289 @@
+"""
+Command line entry points for operational jobs.
+
+    python -m app.cli load-blacklist --blacklist-id 1 --user-id 1 lpb.csv
+    python -m app.cli rescreen --workers 8 --chunk-size 5000
+    python -m app.cli screening-worker
+    python -m app.cli blacklist-search-maintenance --non-match-retention-days 90
+    python -m app.cli generate-alerts
+    python -m app.cli audit-log-maintenance --retention-months 24
+    python -m app.cli ingest-transactions transactions.csv
+"""
+
+import argparse
+import logging
+import os
+import sys
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.database import SessionLocal
+from app.services.audit_archive import maintain_audit_log
+from app.services.blacklist_alerts import generate_alerts
+from app.services.blacklist_load import load_blacklist, read_csv_rows, read_xlsx_rows
+from app.services.rescreen import RescreenProgress, rescreen
+from app.services.screening_queue import run_worker
+from app.services.transaction_ingest import (
+    ingest_transactions,
+    read_csv_records,
+    read_ndjson_records,
+)
+
+
+def load_blacklist_command(args: argparse.Namespace) -> int:
+    file_format = args.format or ("xlsx" if args.path.endswith(".xlsx") else "csv")
+    with SessionLocal() as session:
+        session.execute(
+            text("SELECT set_current_user_id(:user_id)"), {"user_id": args.user_id}
+        )
+        if file_format == "xlsx":
+            with open(args.path, "rb") as stream:
+                result = load_blacklist(
+                    session, args.blacklist_id, read_xlsx_rows(stream)
+                )
+        else:
+            with open(args.path, encoding="utf-8-sig", newline="") as stream:
+                result = load_blacklist(
+                    session, args.blacklist_id, read_csv_rows(stream)
+                )
+        session.commit()
+
+    print(
+        "Loaded {} entries with {} matches in {:.2f}s ({:.0f} rows/s)".format(
+            result.loaded,
+            result.matches,
+            result.elapsed_seconds,
+            result.rows_per_second,
+        )
+    )
+    return 0
+
+
+def print_progress(progress: RescreenProgress) -> None:
+    print(
+        "{}/{} persons, {} hits, {:.0f} rows/s".format(
+            progress.processed,
+            progress.total,
+            progress.hits,
+            progress.rows_per_second,
+        ),
+        file=sys.stderr,
+    )
+
+
+def rescreen_command(args: argparse.Namespace) -> int:
+    with SessionLocal() as session:
+        result = rescreen(
+            session,
+            chunk_size=args.chunk_size,
+            workers=args.workers,
+            blacklist_id=args.blacklist_id,
+            dry_run=args.dry_run,
+            progress=None if args.quiet else print_progress,
+        )
+        if not args.dry_run:
+            session.commit()
+
+    print(
+        "Rescreened {} persons with {} hits in {:.2f}s ({:.0f} rows/s)".format(
+            result.processed,
+            result.hits,
+            result.elapsed_seconds,
+            result.rows_per_second,
+        )
+    )
+    return 0
+
+
+def screening_worker_command(args: argparse.Namespace) -> int:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    try:
+        run_worker(
+            args.batch_size, args.poll_seconds, args.max_attempts, args.retry_seconds
+        )
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def blacklist_search_maintenance_command(args: argparse.Namespace) -> int:
+    with SessionLocal() as session:
+        row = session.execute(
+            text(
+                "SELECT * FROM maintain_blacklist_search(:months_ahead, :retention_days)"
+            ),
+            {
+                "months_ahead": args.months_ahead,
+                "retention_days": args.non_match_retention_days,
+            },
+        ).one()
+        session.commit()
+
+    print(
+        "Created {} history partitions, deleted {} non-matches and {} history "
+        "non-matches".format(
+            row.partitions_created, row.searches_deleted, row.history_deleted
+        )
+    )
+    return 0
+
+
+def generate_alerts_command(args: argparse.Namespace) -> int:
+    with SessionLocal() as session:
+        created = generate_alerts(session, args.min_score)
+        session.commit()
+
+    print("Created {} alerts".format(created))
+    return 0
+
+
+def audit_log_maintenance_command(args: argparse.Namespace) -> int:
+    with SessionLocal() as session:
+        result = maintain_audit_log(
+            session, args.months_ahead, args.retention_months, args.archive_dir
+        )
+
+    print(
+        "Created {} audit log partitions, archived {} partitions with {} rows".format(
+            result.partitions_created, len(result.archives), result.rows_archived
+        )
+    )
+    for path in result.archives:
+        print("  {}".format(path))
+    return 0
+
+
+def ingest_transactions_command(args: argparse.Namespace) -> int:
+    file_format = args.format or ("ndjson" if args.path.endswith(".ndjson") else "csv")
+    with SessionLocal() as session:
+        if file_format == "ndjson":
+            with open(args.path, "rb") as stream:
+                result = ingest_transactions(
+                    session, read_ndjson_records(stream), args.batch_size
+                )
+        else:
+            with open(args.path, encoding="utf-8-sig", newline="") as stream:
+                result = ingest_transactions(
+                    session, read_csv_records(stream), args.batch_size
+                )
+
+    for batch in result.batches:
+        if batch.error:
+            print(
+                "batch {} (lines {}-{}): {}".format(
+                    batch.batch, batch.first_line, batch.last_line, batch.error
+                ),
+                file=sys.stderr,
+            )
+        for reject in batch.rejects:
+            print("line {}: {}".format(reject.line, reject.error), file=sys.stderr)
+    print(
+        "Ingested {} transactions, rejected {}, in {:.2f}s ({:.0f} rows/s)".format(
+            result.accepted,
+            result.rejected,
+            result.elapsed_seconds,
+            result.rows_per_second,
+        )
+    )
+    return 1 if result.rejected else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    load = subparsers.add_parser(
+        "load-blacklist", help="Bulk load a blacklist publication (CSV or XLSX)"
+    )
+    load.add_argument("path")
+    load.add_argument("--blacklist-id", type=int, required=True)
+    load.add_argument(
+        "--user-id", type=int, required=True, help="User recorded in the audit log"
+    )
+    load.add_argument("--format", choices=["csv", "xlsx"])
+    load.set_defaults(handler=load_blacklist_command)
+
+    screen = subparsers.add_parser(
+        "rescreen", help="Screen every natural person against the blacklists"
+    )
+    screen.add_argument("--blacklist-id", type=int, help="Only this list")
+    screen.add_argument("--chunk-size", type=int, default=5000)
+    screen.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    screen.add_argument(
+        "--dry-run", action="store_true", help="Count the hits without saving them"
+    )
+    screen.add_argument("--quiet", action="store_true", help="No progress output")
+    screen.set_defaults(handler=rescreen_command)
+
+    worker = subparsers.add_parser(
+        "screening-worker", help="Screen the persons queued in async screening mode"
+    )
+    worker.add_argument(
+        "--batch-size", type=int, default=settings.SCREENING_WORKER_BATCH_SIZE
+    )
+    worker.add_argument(
+        "--poll-seconds", type=float, default=settings.SCREENING_WORKER_POLL_SECONDS
+    )
+    worker.add_argument(
+        "--max-attempts", type=int, default=settings.SCREENING_QUEUE_MAX_ATTEMPTS
+    )
+    worker.add_argument(
+        "--retry-seconds", type=float, default=settings.SCREENING_QUEUE_RETRY_SECONDS
+    )
+    worker.set_defaults(handler=screening_worker_command)
+
+    maintenance = subparsers.add_parser(
+        "blacklist-search-maintenance",
+        help="Create blacklist search history partitions and purge old non-matches",
+    )
+    maintenance.add_argument("--months-ahead", type=int, default=3)
+    maintenance.add_argument(
+        "--non-match-retention-days",
+        type=int,
+        help="Defaults to the blacklist_search_non_match_retention_days config",
+    )
+    maintenance.set_defaults(handler=blacklist_search_maintenance_command)
+
+    alerts = subparsers.add_parser(
+        "generate-alerts", help="Raise pending alerts for the new blacklist matches"
+    )
+    alerts.add_argument(
+        "--min-score",
+        type=float,
+        help="Defaults to the blacklist_alert_min_score config",
+    )
+    alerts.set_defaults(handler=generate_alerts_command)
+
+    audit = subparsers.add_parser(
+        "audit-log-maintenance",
+        help="Create audit log partitions and archive the old ones",
+    )
+    audit.add_argument(
+        "--months-ahead", type=int, default=settings.AUDIT_LOG_PARTITIONS_AHEAD
+    )
+    audit.add_argument(
+        "--retention-months",
+        type=int,
+        default=settings.AUDIT_LOG_RETENTION_MONTHS,
+        help="Months kept in the database, 0 keeps them all",
+    )
+    audit.add_argument("--archive-dir", default=settings.AUDIT_LOG_ARCHIVE_DIR)
+    audit.set_defaults(handler=audit_log_maintenance_command)
+
+    ingest = subparsers.add_parser(
+        "ingest-transactions", help="Bulk ingest transactions (CSV or NDJSON)"
+    )
+    ingest.add_argument("path")
+    ingest.add_argument("--format", choices=["csv", "ndjson"])
+    ingest.add_argument(
+        "--batch-size", type=int, default=settings.TRANSACTION_INGEST_BATCH_SIZE
+    )
+    ingest.set_defaults(handler=ingest_transactions_command)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+"""
+Base of the in-process caches of database state that are kept until the data
+changes. A statement trigger notifies `channel` on every change and `listen`
+drops the cache when a notification arrives. Subclasses also expire entries
+after `ttl_seconds` in case the listener is not running or lost its
+connection.
+"""
+
+import logging
+import select
+import threading
+from typing import Optional
+
+from app.database import listen_connection
+
+logger = logging.getLogger(__name__)
+
+
+class NotifiedCache:
+    channel: str
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        # bumped by invalidate, so a load that raced with a change is not kept
+        self._generation = 0
+        self._stop = threading.Event()
+        self._listener: Optional[threading.Thread] = None
+
+    def _clear(self) -> None:
+        raise NotImplementedError
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._clear()
+
+    def listen(self, poll_seconds: float = 5) -> None:
+        """
+        Drop the cache on every notification on `channel` until `stop` is
+        called. Reconnects after connection errors.
+        """
+        while not self._stop.is_set():
+            try:
+                with listen_connection(self.channel) as connection:
+                    # changes made while we were not listening
+                    self.invalidate()
+                    while not self._stop.is_set():
+                        if select.select([connection], [], [], poll_seconds)[0]:
+                            connection.poll()
+                            if connection.notifies:
+                                connection.notifies.clear()
+                                self.invalidate()
+            except Exception:
+                logger.exception(
+                    "Cache listener of %s lost its connection", self.channel
+                )
+                self.invalidate()
+                self._stop.wait(poll_seconds)
+
+    def start(self, poll_seconds: float = 5) -> None:
+        """
+        Run `listen` in a daemon thread.
+        """
+        if self._listener is not None and self._listener.is_alive():
+            return
+        self._stop.clear()
+        self._listener = threading.Thread(
+            target=self.listen,
+            args=(poll_seconds,),
+            name="{}-cache-listener".format(self.channel),
+            daemon=True,
+        )
+        self._listener.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        if self._listener is not None:
+            self._listener.join(timeout)
+            self._listener = None
@@ -1,4 +1,6 @@
 import os
+from typing import Literal
+
 from pydantic_settings import BaseSettings
 
 
@@ -12,6 +14,66 @@ class Settings(BaseSettings):
     DB_NAME: str = os.getenv("DB_NAME", "holocron")
 
     DATABASE_URL: str = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}"
+    ASYNC_DATABASE_URL: str = (
+        f"postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}"
+    )
+    # Open a new asyncpg connection per session instead of pooling them. Pooled
+    # connections belong to the event loop that opened them, and TestClient runs
+    # a new loop per request.
+    DB_ASYNC_NULL_POOL: bool = False
+
+    # Connection pools, per engine and per process (app/database.py)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: float = 30
+    # connections older than this are replaced at checkout, -1 keeps them
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # 0 disables it
+    DB_STATEMENT_TIMEOUT_MS: int = 0
+    # SQL logging: "statements" logs every statement, "debug" also the rows
+    DB_ECHO: Literal["off", "statements", "debug"] = "off"
+    # Behind PgBouncer in transaction pooling mode: no prepared statement cache
+    # (consecutive transactions may run on different server connections) and no
+    # statement_timeout startup parameter, which PgBouncer rejects; set it on
+    # the database role instead.
+    DB_PGBOUNCER: bool = False
+
+    # Log requests slower than this with their statements, 0 disables it
+    # (app/core/metrics.py)
+    SLOW_REQUEST_LOG_MS: float = 0
+
+    # Monthly audit_log partitions (app/services/audit_archive.py): created
+    # this many months ahead, and the ones older than the retention archived
+    # to compressed files in the archive directory, 0 keeps them all
+    AUDIT_LOG_PARTITIONS_AHEAD: int = 3
+    AUDIT_LOG_RETENTION_MONTHS: int = 24
+    AUDIT_LOG_ARCHIVE_DIR: str = "archive/audit_log"
+
+    # Python cache of the config table (app/core/config_cache.py)
+    CONFIG_CACHE_TTL_SECONDS: float = 300
+
+    # Effective permissions of each user (app/core/permission_cache.py)
+    PERMISSION_CACHE_TTL_SECONDS: float = 300
+
+    # Product and transaction type ids (app/core/transaction_lookups.py)
+    TRANSACTION_LOOKUP_CACHE_TTL_SECONDS: float = 300
+
+    # Rows per COPY and commit of the transaction ingestion
+    # (app/services/transaction_ingest.py)
+    TRANSACTION_INGEST_BATCH_SIZE: int = 50000
+
+    # In-process blacklist name index (app/services/screening_index.py)
+    SCREENING_INDEX_MAX_DISTANCE: int = 2
+    # Refreshed when the lists change, and after this in any case
+    SCREENING_INDEX_TTL_SECONDS: float = 300
+
+    # Asynchronous screening worker (app/services/screening_queue.py)
+    SCREENING_WORKER_BATCH_SIZE: int = 100
+    SCREENING_WORKER_POLL_SECONDS: float = 5
+    SCREENING_QUEUE_MAX_ATTEMPTS: int = 5
+    # Delay before the first retry of a failed screening, doubled each time
+    SCREENING_QUEUE_RETRY_SECONDS: float = 30
 
 
 settings = Settings()
@@ -0,0 +1,76 @@
+"""
+Cached, typed access to the `config` table.
+
+The whole table is loaded on first use and kept until it changes: the
+statement trigger on `config` (sql/05_config.sql) notifies the `config`
+channel, see app/core/cache.py. Values are also reloaded every `ttl_seconds`.
+"""
+
+import time
+from typing import Dict, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.cache import NotifiedCache
+from app.core.config import settings
+
+# same spellings as PostgreSQL's boolean input
+TRUE_VALUES = {"t", "true", "y", "yes", "on", "1"}
+FALSE_VALUES = {"f", "false", "n", "no", "off", "0"}
+
+
+class ConfigCache(NotifiedCache):
+    channel = "config"
+
+    def __init__(self, ttl_seconds: float):
+        super().__init__(ttl_seconds)
+        self._values: Optional[Dict[str, str]] = None
+        self._loaded_at: Optional[float] = None
+
+    def values(self, session: Session) -> Dict[str, str]:
+        values = self._values
+        if values is None or time.monotonic() - self._loaded_at >= self.ttl_seconds:
+            generation = self._generation
+            values = dict(session.execute(text("SELECT name, value FROM config")).all())
+            with self._lock:
+                if generation == self._generation:
+                    self._values = values
+                    self._loaded_at = time.monotonic()
+        return values
+
+    def get(
+        self, session: Session, name: str, default: Optional[str] = None
+    ) -> Optional[str]:
+        return self.values(session).get(name, default)
+
+    def get_int(
+        self, session: Session, name: str, default: Optional[int] = None
+    ) -> Optional[int]:
+        value = self.get(session, name)
+        return default if value is None else int(value)
+
+    def get_float(
+        self, session: Session, name: str, default: Optional[float] = None
+    ) -> Optional[float]:
+        value = self.get(session, name)
+        return default if value is None else float(value)
+
+    def get_bool(
+        self, session: Session, name: str, default: Optional[bool] = None
+    ) -> Optional[bool]:
+        value = self.get(session, name)
+        if value is None:
+            return default
+        value = value.strip().lower()
+        if value in TRUE_VALUES:
+            return True
+        if value in FALSE_VALUES:
+            return False
+        raise ValueError("invalid boolean config {}: {!r}".format(name, value))
+
+    def _clear(self) -> None:
+        self._values = None
+
+
+config_cache = ConfigCache(ttl_seconds=settings.CONFIG_CACHE_TTL_SECONDS)
@@ -0,0 +1,229 @@
+"""
+Per-request database instrumentation.
+
+`RequestMetricsMiddleware` gives each HTTP request a `RequestStats` in a
+context variable. The cursor events of every engine, sync and asyncpg, add
+each statement's count and time to the stats of the request that runs it, in
+the endpoint, its dependencies or the threadpool. When the request ends, its
+duration, statement count and database time go into per-route histograms,
+exposed in the Prometheus text format by `render_metrics` (GET
+/internal/metrics). Along with them the slowest statement of each route is
+kept as a fingerprint, the statement with its literals replaced by `?`.
+
+With SLOW_REQUEST_LOG_MS set, requests that take longer are logged with all
+their statements and times.
+"""
+
+import logging
+import re
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Engine, event
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+PARAMETER = re.compile(r"%\(\w+\)s|\$\d+|(?<!:):\w+")
+# lists of values or parameters, as in IN (...) or a multi-row VALUES
+VALUE_LIST = re.compile(r"\?(?:\s*,\s*\?)+")
+ROW_LIST = re.compile(r"\(\?\)(?:\s*,\s*\(\?\))+")
+WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint(statement: str, max_length: int = 200) -> str:
+    statement = STRING_LITERAL.sub("?", statement)
+    statement = PARAMETER.sub("?", statement)
+    statement = NUMBER_LITERAL.sub("?", statement)
+    statement = VALUE_LIST.sub("?", statement)
+    statement = ROW_LIST.sub("(?)", statement)
+    return WHITESPACE.sub(" ", statement).strip()[:max_length]
+
+
+class RequestStats:
+    __slots__ = ("queries", "db_seconds", "slowest", "statements")
+
+    def __init__(self, keep_statements: bool):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.slowest: Tuple[float, Optional[str]] = (0.0, None)
+        self.statements: Optional[List[Tuple[str, float]]] = (
+            [] if keep_statements else None
+        )
+
+    def observe(self, statement: str, seconds: float) -> None:
+        self.queries += 1
+        self.db_seconds += seconds
+        if seconds >= self.slowest[0]:
+            self.slowest = (seconds, statement)
+        if self.statements is not None:
+            self.statements.append((statement, seconds))
+
+
+current_request: ContextVar[Optional[RequestStats]] = ContextVar(
+    "current_request", default=None
+)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_request.get() is not None:
+        context._query_started = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current_request.get()
+    started = getattr(context, "_query_started", None)
+    if stats is not None and started is not None:
+        stats.observe(statement, time.perf_counter() - started)
+
+
+class Histogram:
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = buckets
+        # per label value: count per bucket (+Inf last), sum
+        self.series: Dict[str, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, label: str, value: float) -> None:
+        counts, total = self.series.setdefault(
+            label, ([0] * (len(self.buckets) + 1), [0.0])
+        )
+        counts[bisect_left(self.buckets, value)] += 1
+        total[0] += value
+
+    def render(self, name: str, help_text: str) -> List[str]:
+        lines = [
+            "# HELP {} {}".format(name, help_text),
+            "# TYPE {} histogram".format(name),
+        ]
+        for label, (counts, total) in sorted(self.series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                lines.append(
+                    '{}_bucket{{route="{}",le="{}"}} {}'.format(
+                        name,
+                        label,
+                        "+Inf" if bound == float("inf") else bound,
+                        cumulative,
+                    )
+                )
+            lines.append('{}_sum{{route="{}"}} {}'.format(name, label, total[0]))
+            lines.append('{}_count{{route="{}"}} {}'.format(name, label, cumulative))
+        return lines
+
+
+class RouteMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.duration = Histogram(DURATION_BUCKETS)
+        self.db_time = Histogram(DURATION_BUCKETS)
+        self.queries = Histogram(QUERY_BUCKETS)
+        # route -> (seconds, fingerprint) of its slowest statement
+        self.slowest: Dict[str, Tuple[float, str]] = {}
+
+    def observe(self, route: str, seconds: float, stats: RequestStats) -> None:
+        slowest_seconds, slowest_statement = stats.slowest
+        with self._lock:
+            self.duration.observe(route, seconds)
+            self.db_time.observe(route, stats.db_seconds)
+            self.queries.observe(route, stats.queries)
+            if (
+                slowest_statement is not None
+                and slowest_seconds > self.slowest.get(route, (0.0, None))[0]
+            ):
+                self.slowest[route] = (slowest_seconds, fingerprint(slowest_statement))
+
+    def render(self) -> str:
+        with self._lock:
+            lines = self.duration.render(
+                "http_request_duration_seconds", "Time to serve the request."
+            )
+            lines += self.db_time.render(
+                "http_request_db_seconds",
+                "Time spent in database statements per request.",
+            )
+            lines += self.queries.render(
+                "http_request_db_queries", "Database statements per request."
+            )
+            lines += [
+                "# HELP http_route_slowest_statement_seconds Slowest statement "
+                "of the route.",
+                "# TYPE http_route_slowest_statement_seconds gauge",
+            ]
+            for route, (seconds, statement) in sorted(self.slowest.items()):
+                labels = 'route="{}",statement="{}"'.format(route, _escape(statement))
+                lines.append(
+                    "http_route_slowest_statement_seconds{{{}}} {}".format(
+                        labels, seconds
+                    )
+                )
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+route_metrics = RouteMetrics()
+
+
+def render_metrics() -> str:
+    return route_metrics.render()
+
+
+class RequestMetricsMiddleware:
+    """
+    ASGI middleware recording the database statements of each HTTP request,
+    see the module docstring.
+    """
+
+    def __init__(self, app, slow_request_ms: Optional[float] = None):
+        self.app = app
+        self.slow_request_ms = (
+            settings.SLOW_REQUEST_LOG_MS if slow_request_ms is None else slow_request_ms
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stats = RequestStats(keep_statements=self.slow_request_ms > 0)
+        token = current_request.set(stats)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            seconds = time.perf_counter() - started
+            current_request.reset(token)
+            route = scope.get("route")
+            label = "{} {}".format(
+                scope["method"], route.path if route is not None else "unmatched"
+            )
+            route_metrics.observe(label, seconds, stats)
+            if self.slow_request_ms > 0 and seconds * 1000 >= self.slow_request_ms:
+                log_slow_request(label, seconds, stats)
+
+
+def log_slow_request(route: str, seconds: float, stats: RequestStats) -> None:
+    logger.warning(
+        "Slow request %s: %.1f ms, %d statements in %.1f ms\n%s",
+        route,
+        seconds * 1000,
+        stats.queries,
+        stats.db_seconds * 1000,
+        "\n".join(
+            "  {:8.2f} ms  {}".format(statement_seconds * 1000, fingerprint(statement))
+            for statement, statement_seconds in stats.statements
+        ),
+    )
@@ -1,5 +1,6 @@
 # permission.py
 from enum import Enum
+from typing import Iterable, List
 
 
 class Permission(str, Enum):
@@ -65,3 +66,19 @@ class Permission(str, Enum):
             "remove_role": "Allows removing roles from users.",
         }
         return descriptions.get(self.value, "No description available.")
+
+
+# One bit per permission, in declaration order. Masks are only kept in
+# process, so adding permissions anywhere in the enum is safe.
+PERMISSION_BITS = {permission: 1 << i for i, permission in enumerate(Permission)}
+
+
+def permission_mask(permissions: Iterable[str]) -> int:
+    mask = 0
+    for permission in permissions:
+        mask |= PERMISSION_BITS[Permission(permission)]
+    return mask
+
+
+def mask_permissions(mask: int) -> List[Permission]:
+    return [permission for permission, bit in PERMISSION_BITS.items() if mask & bit]
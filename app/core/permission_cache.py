@@ -0,0 +1,66 @@
+"""
+Effective permissions of each user, cached in process as a bitmask
+(app/core/permission.py).
+
+A user's mask is loaded on first use, in the same single query as the user's
+is_active flag, and kept until the permissions of any user may have changed:
+the statement triggers on user_role, role_permission and "user"
+(sql/02_authorization.sql) notify the `permissions` channel, see
+app/core/cache.py. Entries also expire after `ttl_seconds`.
+"""
+
+import time
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.cache import NotifiedCache
+from app.core.config import settings
+from app.core.permission import permission_mask
+
+PERMISSIONS_QUERY = text(
+    """
+    SELECT
+      u.is_active,
+      array_remove(array_agg(DISTINCT rp.permission::TEXT), NULL)
+    FROM
+      "user" u
+      LEFT JOIN user_role ur ON ur.user_id = u.id
+      LEFT JOIN role_permission rp ON rp.role_id = ur.role_id
+    WHERE
+      u.id = :user_id
+    GROUP BY
+      u.id
+    """
+)
+
+
+class PermissionCache(NotifiedCache):
+    channel = "permissions"
+
+    def __init__(self, ttl_seconds: float):
+        super().__init__(ttl_seconds)
+        self._masks: Dict[int, Tuple[Optional[int], float]] = {}
+
+    def _clear(self) -> None:
+        self._masks = {}
+
+    def mask(self, session: Session, user_id: int) -> Optional[int]:
+        """
+        Permission mask of `user_id`, None if the user does not exist or is
+        not active.
+        """
+        entry = self._masks.get(user_id)
+        if entry is not None and time.monotonic() - entry[1] < self.ttl_seconds:
+            return entry[0]
+        generation = self._generation
+        row = session.execute(PERMISSIONS_QUERY, {"user_id": user_id}).first()
+        mask = permission_mask(row[1]) if row is not None and row[0] else None
+        with self._lock:
+            if generation == self._generation:
+                self._masks[user_id] = (mask, time.monotonic())
+        return mask
+
+
+permission_cache = PermissionCache(ttl_seconds=settings.PERMISSION_CACHE_TTL_SECONDS)
@@ -0,0 +1,85 @@
+"""
+Connection pools that measure how long checkouts wait for a connection.
+
+`TimedQueuePool` and `TimedAsyncQueuePool` are the default pools of the
+synchronous and asyncpg engines with the time spent in `_do_get` recorded in
+a `PoolMetrics`: the wait for a free connection when every one is in use, or
+the time to open a new one. The metrics live on the class because SQLAlchemy rebuilds the pool instance
+on `dispose()`.
+"""
+
+import threading
+import time
+from typing import Dict, Optional
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+
+class PoolMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def observe(self, wait_seconds: float, timed_out: bool) -> None:
+        with self._lock:
+            self.checkouts += 1
+            if timed_out:
+                self.timeouts += 1
+            self.wait_seconds_total += wait_seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, wait_seconds)
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": round(self.wait_seconds_total, 6),
+                "wait_seconds_max": round(self.wait_seconds_max, 6),
+            }
+
+
+class _TimedPool:
+    metrics: PoolMetrics
+
+    def _do_get(self):
+        started = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            self.metrics.observe(time.perf_counter() - started, timed_out)
+
+
+class TimedQueuePool(_TimedPool, QueuePool):
+    metrics = PoolMetrics()
+
+
+class TimedAsyncQueuePool(_TimedPool, AsyncAdaptedQueuePool):
+    metrics = PoolMetrics()
+
+
+def pool_stats(pool: Pool) -> Dict[str, Optional[float]]:
+    """
+    Size and usage of `pool` plus the checkout metrics of timed pools. The
+    usage counts are None for pools that do not keep connections (NullPool).
+    """
+    stats = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            in_use=pool.checkedout(),
+            overflow=max(pool.overflow(), 0),
+        )
+    else:
+        stats.update(size=None, checked_in=None, in_use=None, overflow=None)
+    if isinstance(pool, _TimedPool):
+        stats.update(pool.metrics.snapshot())
+    return stats
@@ -0,0 +1,33 @@
+"""
+Direct JSON encoding of plain rows for read-only lists.
+
+An endpoint that returns ORM instances or pydantic models pays for the
+identity map, the validation into the response_model and its dump before the
+JSON encoding. A list whose query selects exactly the fields of its
+response_model (`schema_columns`) can encode the rows straight away with
+`rows_response`: the output is the same, the response_model is kept for the
+documentation. Only for columns orjson encodes as pydantic does (no Decimal).
+"""
+
+from typing import Dict, Optional, Sequence, Type
+
+import orjson
+from fastapi import Response
+from pydantic import BaseModel
+from sqlalchemy import Row
+
+
+def schema_columns(schema: Type[BaseModel], model) -> list:
+    return [getattr(model, name) for name in schema.model_fields]
+
+
+def rows_response(
+    rows: Sequence[Row], headers: Optional[Dict[str, str]] = None
+) -> Response:
+    keys = list(rows[0]._fields) if rows else []
+    return Response(
+        # datetimes in UTC end in Z, as pydantic writes them
+        orjson.dumps([dict(zip(keys, row)) for row in rows], option=orjson.OPT_UTC_Z),
+        media_type="application/json",
+        headers=headers,
+    )
@@ -0,0 +1,55 @@
+"""
+Cached sets of the product and transaction type ids that a transaction may
+reference, so the transaction ingestion validates each row with two set
+lookups instead of querying the tables.
+
+Both sets are loaded on first use and kept until the tables change: the
+statement triggers on `product` and `transaction_type` (sql/20_transaction.sql)
+notify the `transaction_lookups` channel, see app/core/cache.py. They are also
+reloaded every `ttl_seconds`.
+"""
+
+import time
+from typing import FrozenSet, NamedTuple, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.cache import NotifiedCache
+from app.core.config import settings
+
+
+class TransactionLookups(NamedTuple):
+    product_ids: FrozenSet[int]
+    transaction_type_ids: FrozenSet[int]
+
+
+class TransactionLookupCache(NotifiedCache):
+    channel = "transaction_lookups"
+
+    def __init__(self, ttl_seconds: float):
+        super().__init__(ttl_seconds)
+        self._lookups: Optional[TransactionLookups] = None
+        self._loaded_at: Optional[float] = None
+
+    def lookups(self, session: Session) -> TransactionLookups:
+        lookups = self._lookups
+        if lookups is None or time.monotonic() - self._loaded_at >= self.ttl_seconds:
+            generation = self._generation
+            lookups = TransactionLookups(
+                frozenset(session.scalars(text("SELECT id FROM product"))),
+                frozenset(session.scalars(text("SELECT id FROM transaction_type"))),
+            )
+            with self._lock:
+                if generation == self._generation:
+                    self._lookups = lookups
+                    self._loaded_at = time.monotonic()
+        return lookups
+
+    def _clear(self) -> None:
+        self._lookups = None
+
+
+transaction_lookups = TransactionLookupCache(
+    ttl_seconds=settings.TRANSACTION_LOOKUP_CACHE_TTL_SECONDS
+)
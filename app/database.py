@@ -1,11 +1,122 @@
 # app/database.py (1-15)
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from contextlib import contextmanager
+from functools import lru_cache
+from uuid import uuid4
+
+from sqlalchemy import Engine, create_engine
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from sqlalchemy.pool import NullPool
 from app.core.config import settings
+from app.core.pool import TimedAsyncQueuePool, TimedQueuePool
+
+ECHO = {"off": False, "statements": True, "debug": "debug"}
+
+
+def _pool_options(poolclass):
+    return {
+        "poolclass": poolclass,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+def _connect_args():
+    """
+    psycopg2 connection arguments. psycopg2 does not prepare statements, so
+    PgBouncer mode only leaves the statement timeout out.
+    """
+    if settings.DB_STATEMENT_TIMEOUT_MS and not settings.DB_PGBOUNCER:
+        return {
+            "options": "-c statement_timeout={}".format(
+                settings.DB_STATEMENT_TIMEOUT_MS
+            )
+        }
+    return {}
+
+
+def _async_connect_args():
+    connect_args = {}
+    if settings.DB_STATEMENT_TIMEOUT_MS and not settings.DB_PGBOUNCER:
+        connect_args["server_settings"] = {
+            "statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)
+        }
+    if settings.DB_PGBOUNCER:
+        # asyncpg prepares every statement: keep no cache, and give each one a
+        # unique name so that two clients sharing a server connection never clash
+        connect_args["statement_cache_size"] = 0
+        connect_args["prepared_statement_cache_size"] = 0
+        connect_args["prepared_statement_name_func"] = lambda: "__asyncpg_{}__".format(
+            uuid4()
+        )
+    return connect_args
+
+
+@lru_cache(maxsize=None)
+def get_engine() -> Engine:
+    """
+    Synchronous engine: the routers and jobs built on psycopg2 features (COPY,
+    LISTEN) or CPU bound work, which run in the threadpool. Created on first
+    use, so that importing the application does not load the driver.
+    """
+    return create_engine(
+        settings.DATABASE_URL,
+        echo=ECHO[settings.DB_ECHO],
+        connect_args=_connect_args(),
+        **_pool_options(TimedQueuePool),
+    )
+
+
+@lru_cache(maxsize=None)
+def get_async_engine() -> AsyncEngine:
+    """
+    Asynchronous engine (asyncpg) for the `async def` routers, so that waiting
+    on the database does not block the event loop. Created on first use.
+    """
+    return create_async_engine(
+        settings.ASYNC_DATABASE_URL,
+        echo=ECHO[settings.DB_ECHO],
+        connect_args=_async_connect_args(),
+        **(
+            {"poolclass": NullPool}
+            if settings.DB_ASYNC_NULL_POOL
+            else _pool_options(TimedAsyncQueuePool)
+        ),
+    )
+
+
+def __getattr__(name):
+    # `engine` and `async_engine` are kept as module attributes
+    if name == "engine":
+        return get_engine()
+    if name == "async_engine":
+        return get_async_engine()
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+
+class _Session(Session):
+    # bound to the engine when it first needs a connection
+    def get_bind(self, mapper=None, **kwargs):
+        if self.bind is None:
+            self.bind = get_engine()
+        return super().get_bind(mapper, **kwargs)
+
+
+class _AsyncSession(Session):
+    def get_bind(self, mapper=None, **kwargs):
+        if self.bind is None:
+            self.bind = get_async_engine().sync_engine
+        return super().get_bind(mapper, **kwargs)
+
 
-engine = create_engine(settings.DATABASE_URL, echo=True)
 Base = declarative_base()
-SessionLocal = sessionmaker(bind=engine, expire_on_commit=False)
+SessionLocal = sessionmaker(class_=_Session, expire_on_commit=False)
+AsyncSessionLocal = async_sessionmaker(
+    sync_session_class=_AsyncSession, expire_on_commit=False
+)
 
 
 def get_session():
@@ -14,3 +125,25 @@ def get_session():
         yield session
     finally:
         session.close()
+
+
+async def get_async_session():
+    async with AsyncSessionLocal() as session:
+        yield session
+
+
+@contextmanager
+def listen_connection(channel: str):
+    """
+    Autocommit DBAPI connection that LISTENs on `channel`. It is discarded on
+    exit instead of going back to the pool.
+    """
+    connection = get_engine().raw_connection()
+    try:
+        driver_connection = connection.driver_connection
+        driver_connection.autocommit = True
+        with driver_connection.cursor() as cursor:
+            cursor.execute("LISTEN {}".format(channel))
+        yield driver_connection
+    finally:
+        connection.invalidate()
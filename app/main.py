@@ -1,25 +1,60 @@
 import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from app.routers import (
+    audit,
     user,
     permission,
     role,
     profile,
     product,
     risk,
+    config,
     blacklist,
+    screening,
     transaction,
+    internal,
 )
 from app.core.config import settings
+from app.core.config_cache import config_cache
+from app.core.metrics import RequestMetricsMiddleware
+from app.core.permission_cache import permission_cache
+from app.core.transaction_lookups import transaction_lookups
+from app.services.screening_index import screening_index
 
-app = FastAPI(title=settings.PROJECT_NAME, version=settings.PROJECT_VERSION)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    config_cache.start()
+    permission_cache.start()
+    transaction_lookups.start()
+    screening_index.start()
+    yield
+    screening_index.stop()
+    transaction_lookups.stop()
+    permission_cache.stop()
+    config_cache.stop()
+
+
+app = FastAPI(
+    title=settings.PROJECT_NAME,
+    version=settings.PROJECT_VERSION,
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
+app.add_middleware(RequestMetricsMiddleware)
 
 # Routers with prefixes
 app.include_router(user.router)
 app.include_router(permission.router)
 app.include_router(role.router)
+app.include_router(config.router)
+app.include_router(blacklist.router)
+app.include_router(screening.router)
+app.include_router(audit.router)
+app.include_router(transaction.router)
+app.include_router(internal.router)
 # app.include_router(profile.router, prefix="/profile", tags=["profile"])
 # app.include_router(product.router, prefix="/product", tags=["product"])
 # app.include_router(risk.router, prefix="/risk", tags=["risk"])
-# app.include_router(blacklist.router, prefix="/blacklist", tags=["blacklist"])
-# app.include_router(transaction.router, prefix="/transaction", tags=["transaction"])
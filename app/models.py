@@ -1,52 +1,471 @@
-from sqlalchemy import MetaData
-from sqlalchemy.ext.automap import automap_base
-from .database import engine
+"""
+ORM models of the tables the application reads and writes.
+
+The tables are created by the numbered scripts in sql/, which stay the source
+of truth: the models are declared here instead of being reflected, so importing
+the application needs no database. app/tests/test_models.py checks them against
+the schema the scripts build.
+"""
+
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    Column,
+    Computed,
+    Date,
+    ForeignKey,
+    Integer,
+    Numeric,
+    String,
+    Text,
+    func,
+)
+from sqlalchemy.dialects.postgresql import ENUM, JSONB, TIMESTAMP
+from sqlalchemy.orm import relationship
+
+from app.core.permission import Permission
+from app.database import Base
+
+# Types created by the sql/ scripts
+PermissionType = ENUM(
+    *(permission.value for permission in Permission),
+    name="permission_type",
+    create_type=False,
+)
+PersonType = ENUM("natural", "juridical", name="person_type", create_type=False)
+AlertState = ENUM(
+    "pending",
+    "suppressed",
+    "discarded",
+    "closed",
+    "reported",
+    name="alert_state",
+    create_type=False,
+)
+OperationType = ENUM(
+    "INSERT", "UPDATE", "DELETE", name="operation_type_enum", create_type=False
+)
+RiskMatrixStatus = ENUM(
+    "development",
+    "active",
+    "historical",
+    name="risk_matrix_status",
+    create_type=False,
+)
+
+# Generated columns of the natural and juridical person details
+FULL_NAME = (
+    "upper(TRIM(BOTH FROM replace(((name || COALESCE((' '::text || first_last_name),"
+    " ''::text)) || COALESCE((' '::text || second_last_name), ''::text)),"
+    " '  '::text, ' '::text)))"
+)
+NAME_KEY = (
+    "name_key((((name || ' '::text) || first_last_name) ||"
+    " COALESCE((' '::text || second_last_name), ''::text)))"
+)
+PHONETIC_KEY = (
+    "name_phonetic_key((((name || ' '::text) || first_last_name) ||"
+    " COALESCE((' '::text || second_last_name), ''::text)))"
+)
+LEGAL_NAME_KEY = "legal_name_key(legal_name)"
+
+
+def timestamp(nullable=False):
+    """
+    Timestamp column that defaults to the time of the insert.
+    """
+    return Column(
+        TIMESTAMP(timezone=True),
+        nullable=nullable,
+        server_default=func.current_timestamp(),
+    )
 
-# Create a MetaData instance
-metadata = MetaData()
-metadata.reflect(bind=engine)
-AutomapBase = automap_base()
-AutomapBase.prepare(autoload_with=engine)
 
 # Authorization
-User = AutomapBase.classes.user
-Role = AutomapBase.classes.role
-RolePermission = AutomapBase.classes.role_permission
-UserRole = AutomapBase.classes.user_role
+class User(Base):
+    __tablename__ = "user"
+
+    id = Column(Integer, primary_key=True)
+    username = Column(String(50), nullable=False, unique=True)
+    email = Column(String(255), nullable=False, unique=True)
+    name = Column(String(100))
+    is_active = Column(Boolean, server_default="true")
+    created_at = timestamp()
+    updated_at = timestamp()
+
+
+class Role(Base):
+    __tablename__ = "role"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String(50), nullable=False, unique=True)
+    description = Column(Text)
+    created_at = timestamp()
+    updated_at = timestamp()
+
+    # never loaded implicitly: load it with selectinload(Role.role_permissions)
+    role_permissions = relationship(
+        "RolePermission",
+        lazy="raise",
+        order_by="RolePermission.id",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
+
+    @property
+    def permissions(self):
+        return [Permission(rp.permission) for rp in self.role_permissions]
+
+
+class RolePermission(Base):
+    __tablename__ = "role_permission"
+
+    id = Column(Integer, primary_key=True)
+    role_id = Column(Integer, ForeignKey("role.id", ondelete="CASCADE"), nullable=False)
+    permission = Column(PermissionType, nullable=False)
+    created_at = timestamp()
+
+
+class UserRole(Base):
+    __tablename__ = "user_role"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("user.id", ondelete="CASCADE"), nullable=False)
+    role_id = Column(Integer, ForeignKey("role.id", ondelete="CASCADE"), nullable=False)
+    created_at = timestamp()
+
+
+# Audit
+class AuditLog(Base):
+    """
+    Partitioned by month of changed_at, written by the audit triggers.
+    """
+
+    __tablename__ = "audit_log"
+
+    id = Column(BigInteger, primary_key=True)
+    table_name = Column(String(100), nullable=False)
+    operation_type = Column(OperationType, nullable=False)
+    record_id = Column(Integer, nullable=False)
+    changed_data = Column(JSONB)
+    changed_at = Column(
+        TIMESTAMP(timezone=True),
+        primary_key=True,
+        server_default=func.current_timestamp(),
+    )
+    changed_by = Column(
+        Integer, ForeignKey("user.id", ondelete="SET NULL"), nullable=False
+    )
 
 
 # Blacklist
-Blacklist = AutomapBase.classes.blacklist
-BlacklistPerson = AutomapBase.classes.blacklist_person
-BlacklistPersonAttribute = AutomapBase.classes.blacklist_person_attribute
-BlacklistPersonAttributeValue = AutomapBase.classes.blacklist_person_attribute_value
-BlacklistNaturalPersonDetails = AutomapBase.classes.blacklist_natural_person_details
-BlacklistJuridicalPersonDetails = AutomapBase.classes.blacklist_juridical_person_details
-BlacklistAlert = AutomapBase.classes.blacklist_alert
-BlacklistSearch = AutomapBase.classes.blacklist_search
+class Blacklist(Base):
+    __tablename__ = "blacklist"
+
+    id = Column(Integer, primary_key=True)
+    short_name = Column(String(10), nullable=False, unique=True)
+    description = Column(Text)
+    created_at = timestamp()
+    updated_at = timestamp()
+
+
+class BlacklistPerson(Base):
+    __tablename__ = "blacklist_person"
+
+    id = Column(Integer, primary_key=True)
+    blacklist_id = Column(Integer, ForeignKey("blacklist.id"), nullable=False)
+    type = Column(PersonType, nullable=False)
+    official_registration_number = Column(Text, nullable=False)
+    created_at = timestamp()
+    updated_at = timestamp()
+    deleted_at = Column(TIMESTAMP(timezone=True))
+    official_deletion_number = Column(Text)
+
+
+class BlacklistPersonAttribute(Base):
+    __tablename__ = "blacklist_person_attribute"
+
+    id = Column(Integer, primary_key=True)
+    attribute_name = Column(String(50), nullable=False, unique=True)
+    description = Column(Text)
+    created_at = timestamp()
+    updated_at = timestamp()
+
+
+class BlacklistPersonAttributeValue(Base):
+    __tablename__ = "blacklist_person_attribute_value"
+
+    id = Column(Integer, primary_key=True)
+    blacklist_person_id = Column(
+        Integer, ForeignKey("blacklist_person.id", ondelete="CASCADE"), nullable=False
+    )
+    attribute_id = Column(
+        Integer,
+        ForeignKey("blacklist_person_attribute.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    value = Column(Text)
+    created_at = timestamp()
+    updated_at = timestamp()
+
+
+class BlacklistNaturalPersonDetails(Base):
+    __tablename__ = "blacklist_natural_person_details"
+
+    id = Column(
+        Integer, ForeignKey("blacklist_person.id", ondelete="CASCADE"), primary_key=True
+    )
+    curp = Column(String(18))
+    rfc = Column(String(13))
+    name = Column(Text, nullable=False)
+    first_last_name = Column(Text, nullable=False)
+    second_last_name = Column(Text)
+    date_of_birth = Column(Date)
+    created_at = timestamp()
+    full_name = Column(Text, Computed(FULL_NAME, persisted=True))
+    name_key = Column(Text, Computed(NAME_KEY, persisted=True))
+    phonetic_key = Column(Text, Computed(PHONETIC_KEY, persisted=True))
+
+
+class BlacklistJuridicalPersonDetails(Base):
+    __tablename__ = "blacklist_juridical_person_details"
+
+    id = Column(
+        Integer, ForeignKey("blacklist_person.id", ondelete="CASCADE"), primary_key=True
+    )
+    rfc = Column(String(13))
+    legal_name = Column(Text, nullable=False)
+    incorporation_date = Column(Date)
+    created_at = timestamp()
+    legal_name_key = Column(Text, Computed(LEGAL_NAME_KEY, persisted=True))
+
+
+class BlacklistSearch(Base):
+    __tablename__ = "blacklist_search"
+
+    id = Column(Integer, primary_key=True)
+    person_id = Column(Integer, ForeignKey("person.id"))
+    blacklist_person_id = Column(Integer, ForeignKey("blacklist_person.id"))
+    match = Column(Boolean)
+    match_score = Column(Numeric(5, 4))
+    search_date = Column(Date, nullable=False)
+    created_at = timestamp()
+    match_details = Column(JSONB)
+
+
+class BlacklistAlert(Base):
+    __tablename__ = "blacklist_alert"
+
+    id = Column(Integer, primary_key=True)
+    blacklist_search_id = Column(
+        Integer, ForeignKey("blacklist_search.id"), nullable=False
+    )
+    state = Column(AlertState, nullable=False)
+    date = Column(Date, nullable=False)
+    created_at = timestamp()
+    updated_at = timestamp()
+    updated_by = Column(Integer, ForeignKey("user.id"))
+    match_score = Column(Numeric(5, 4))
+    match_details = Column(JSONB)
+
 
 # Person
-Person = AutomapBase.classes.person
-NaturalPersonDetails = AutomapBase.classes.natural_person_details
-JuridicalPersonDetails = AutomapBase.classes.juridical_person_details
+class Person(Base):
+    __tablename__ = "person"
+
+    id = Column(Integer, primary_key=True)
+    type = Column(PersonType, nullable=False)
+    active = Column(Boolean, server_default="true")
+    created_at = timestamp()
+    updated_at = timestamp()
+    deleted_at = Column(TIMESTAMP(timezone=True))
+
+
+class NaturalPersonDetails(Base):
+    __tablename__ = "natural_person_details"
+
+    person_id = Column(
+        Integer, ForeignKey("person.id", ondelete="CASCADE"), primary_key=True
+    )
+    curp = Column(String(18))
+    rfc = Column(String(13))
+    name = Column(Text, nullable=False)
+    first_last_name = Column(Text, nullable=False)
+    second_last_name = Column(Text)
+    date_of_birth = Column(Date)
+    created_at = timestamp()
+    full_name = Column(Text, Computed(FULL_NAME, persisted=True))
+    name_key = Column(Text, Computed(NAME_KEY, persisted=True))
+    phonetic_key = Column(Text, Computed(PHONETIC_KEY, persisted=True))
+
+
+class JuridicalPersonDetails(Base):
+    __tablename__ = "juridical_person_details"
+
+    person_id = Column(
+        Integer, ForeignKey("person.id", ondelete="CASCADE"), primary_key=True
+    )
+    rfc = Column(String(13))
+    legal_name = Column(Text, nullable=False)
+    incorporation_date = Column(Date)
+    created_at = timestamp()
+    legal_name_key = Column(Text, Computed(LEGAL_NAME_KEY, persisted=True))
+
 
 # Product
-ProductType = AutomapBase.classes.product_type
-Product = AutomapBase.classes.product
-ProductAttribute = AutomapBase.classes.product_attribute
-ProductAttributeValue = AutomapBase.classes.product_attribute_value
+class ProductType(Base):
+    __tablename__ = "product_type"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String(255), nullable=False)
+    description = Column(Text)
+    created_at = timestamp(nullable=True)
+    updated_at = timestamp(nullable=True)
+
+
+class Product(Base):
+    __tablename__ = "product"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String(255), nullable=False)
+    description = Column(Text)
+    person_id = Column(Integer, ForeignKey("person.id"))
+    product_type_id = Column(Integer, ForeignKey("product_type.id"), nullable=False)
+    created_at = timestamp(nullable=True)
+    updated_at = timestamp(nullable=True)
+
+
+class ProductAttribute(Base):
+    __tablename__ = "product_attribute"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String(255), nullable=False)
+    description = Column(Text)
+    data_type = Column(String(50), nullable=False)
+    created_at = timestamp(nullable=True)
+    updated_at = timestamp(nullable=True)
+
+
+class ProductAttributeValue(Base):
+    __tablename__ = "product_attribute_value"
+
+    id = Column(Integer, primary_key=True)
+    product_id = Column(Integer, ForeignKey("product.id"), nullable=False)
+    attribute_id = Column(Integer, ForeignKey("product_attribute.id"), nullable=False)
+    value = Column(Text, nullable=False)
+    created_at = timestamp(nullable=True)
+    updated_at = timestamp(nullable=True)
+
 
 # Risk
-RiskMatrix = AutomapBase.classes.risk_matrix
-RiskAttributeValue = AutomapBase.classes.risk_attribute_value
-RiskCategoryValue = AutomapBase.classes.risk_attribute_categorical_value
-RiskLevel = AutomapBase.classes.risk_level
-Risk = AutomapBase.classes.risk
+class RiskMatrix(Base):
+    __tablename__ = "risk_matrix"
+
+    id = Column(Integer, primary_key=True)
+    profile_type_id = Column(Integer, nullable=False)
+    name = Column(String(255), nullable=False)
+    status = Column(
+        RiskMatrixStatus,
+        nullable=False,
+        server_default="development",
+    )
+    created_at = timestamp(nullable=True)
+    updated_at = timestamp(nullable=True)
+
+
+class RiskAttributeValue(Base):
+    __tablename__ = "risk_attribute_value"
+
+    id = Column(Integer, primary_key=True)
+    risk_matrix_id = Column(
+        Integer, ForeignKey("risk_matrix.id", ondelete="CASCADE"), nullable=False
+    )
+    attribute_id = Column(Integer, nullable=False)
+    risk_value = Column(Text)
+    weight = Column(Numeric(5, 2), nullable=False)
+
+
+class RiskCategoryValue(Base):
+    __tablename__ = "risk_attribute_categorical_value"
+
+    id = Column(Integer, primary_key=True)
+    profile_attr_categorical_value = Column(
+        Integer,
+        nullable=False,
+        unique=True,
+    )
+    risk_value = Column(Numeric(5, 2), nullable=False)
+
+
+class RiskLevel(Base):
+    __tablename__ = "risk_level"
+
+    id = Column(Integer, primary_key=True)
+    level = Column(String(50), nullable=False)
+    score_cut = Column(Numeric(5, 2), nullable=False)
+    is_lowest_level = Column(Boolean, nullable=False, server_default="false")
+    is_highest_level = Column(Boolean, nullable=False, server_default="false")
+
+
+class Risk(Base):
+    __tablename__ = "risk"
+
+    id = Column(Integer, primary_key=True)
+    profile_id = Column(Integer, nullable=False)
+    risk_matrix_id = Column(
+        Integer, ForeignKey("risk_matrix.id", ondelete="CASCADE"), nullable=False
+    )
+    evaluation_date = Column(Date, nullable=False)
+    score = Column(Numeric(5, 2), nullable=False)
+    risk_level_id = Column(Integer, ForeignKey("risk_level.id"), nullable=False)
+
 
 # Transaction
-TransactionType = AutomapBase.classes.transaction_type
-Transaction = AutomapBase.classes.transaction
+class TransactionType(Base):
+    __tablename__ = "transaction_type"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    name = Column(String(255), nullable=False)
+    description = Column(Text)
+    product_type_id = Column(Integer, ForeignKey("product_type.id"))
+    created_at = timestamp(nullable=True)
+    updated_at = timestamp(nullable=True)
+
+
+class Transaction(Base):
+    __tablename__ = "transaction"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    product_id = Column(Integer, ForeignKey("product.id"), nullable=False)
+    transaction_type_id = Column(
+        Integer, ForeignKey("transaction_type.id"), nullable=False
+    )
+    counterpart = Column(String(255), nullable=False)
+    amount = Column(Numeric(10, 2), nullable=False)
+    effective_date = Column(Date, nullable=False)
+    created_at = timestamp(nullable=True)
+
 
 # Transaction alerts
-UnusualOperations = AutomapBase.classes.unusual_operations
-RelevantOperations = AutomapBase.classes.relevant_operations
+class UnusualOperations(Base):
+    __tablename__ = "unusual_operations"
+
+    id = Column(Integer, primary_key=True)
+    operation_date = Column(Date, nullable=False)
+    customer_id = Column(Integer, nullable=False)
+    amount = Column(Numeric(15, 2), nullable=False)
+    description = Column(Text)
+    alert_level = Column(String(20))
+    reported_at = timestamp(nullable=True)
+
+
+class RelevantOperations(Base):
+    __tablename__ = "relevant_operations"
+
+    id = Column(Integer, primary_key=True)
+    operation_date = Column(Date, nullable=False)
+    customer_id = Column(Integer, nullable=False)
+    amount = Column(Numeric(15, 2), nullable=False)
+    operation_type = Column(String(50))
+    details = Column(Text)
+    reported_at = timestamp(nullable=True)
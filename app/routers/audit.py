@@ -0,0 +1,58 @@
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_async_session
+from app.schemas import AuditLogPage, OperationType
+from app.services.audit import list_audit_log, select_audit_log
+from app.services.export import ExportFormat, export_response
+
+router = APIRouter(prefix="/audit", tags=["Audit"])
+
+
+def audit_log_query(
+    table_name: Optional[str] = Query(None),
+    record_id: Optional[int] = Query(None),
+    changed_by: Optional[int] = Query(None),
+    operation_type: Optional[OperationType] = Query(None),
+    changed_from: Optional[datetime] = Query(None, description="Inclusive"),
+    changed_to: Optional[datetime] = Query(None, description="Exclusive"),
+) -> Select:
+    try:
+        return select_audit_log(
+            table_name, record_id, changed_by, operation_type, changed_from, changed_to
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/", response_model=AuditLogPage, summary="Audit trail")
+async def read_audit_log(
+    statement: Select = Depends(audit_log_query),
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(100, ge=1, le=1000),
+    session: AsyncSession = Depends(get_async_session),
+):
+    """
+    Changes to one record (`table_name` and `record_id`) or made by one user
+    (`changed_by`), oldest first. Follow `next_cursor` for the next page.
+    """
+    try:
+        return await list_audit_log(session, statement, cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/export", summary="Export the audit trail")
+async def export_audit_log(
+    statement: Select = Depends(audit_log_query),
+    file_format: ExportFormat = Query("ndjson"),
+):
+    """
+    The changes selected as in GET /audit/, all of them as NDJSON or CSV,
+    streamed oldest first.
+    """
+    return export_response(statement, file_format, "audit_log")
@@ -0,0 +1,209 @@
+import io
+import tempfile
+from datetime import date
+from typing import IO, List, Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.auth import get_and_set_current_user
+from app.database import get_session
+from app.models import Blacklist
+from app.schemas import (
+    AlertState,
+    BlacklistAlertGenerateResult,
+    BlacklistAlertPage,
+    BlacklistAlertTransition,
+    BlacklistAlertTransitionResult,
+    BlacklistLoadResult,
+    BlacklistNameMatch,
+    BlacklistPersonDetail,
+)
+from app.services.blacklist_alerts import (
+    generate_alerts,
+    list_alerts,
+    transition_alerts,
+)
+from app.services.blacklist_load import load_blacklist, read_csv_rows, read_xlsx_rows
+from app.services.blacklist_persons import get_blacklist_person, list_blacklist_persons
+from app.services.screening_index import screening_index
+
+router = APIRouter(prefix="/blacklists", tags=["Blacklist"])
+
+# Uploads bigger than this are spooled to disk while they are received
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+
+@router.post(
+    "/{blacklist_id}/load",
+    response_model=BlacklistLoadResult,
+    summary="Bulk load a list publication",
+)
+async def load_blacklist_publication(
+    blacklist_id: int,
+    request: Request,
+    file_format: Literal["csv", "xlsx"] = Query("csv"),
+    session: Session = Depends(get_session),
+    current_user=Depends(get_and_set_current_user),
+):
+    """
+    Load the natural persons of a list publication sent as the raw request
+    body (CSV or XLSX with a header row) and screen them against the persons.
+    """
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE) as body:
+        async for chunk in request.stream():
+            body.write(chunk)
+        body.seek(0)
+        # the session and the file are only used from the threadpool, a big
+        # load and its commit would block the event loop
+        return await run_in_threadpool(
+            load_publication, session, blacklist_id, file_format, body
+        )
+
+
+def load_publication(
+    session: Session, blacklist_id: int, file_format: str, body: IO[bytes]
+) -> BlacklistLoadResult:
+    if session.get(Blacklist, blacklist_id) is None:
+        raise HTTPException(status_code=404, detail="Blacklist not found")
+    try:
+        if file_format == "xlsx":
+            rows = read_xlsx_rows(body)
+        else:
+            rows = read_csv_rows(
+                io.TextIOWrapper(body, encoding="utf-8-sig", newline="")
+            )
+        result = load_blacklist(session, blacklist_id, rows)
+        session.commit()
+    except (ValueError, SQLAlchemyError) as e:
+        session.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    screening_index.invalidate()
+    return result
+
+
+@router.get(
+    "/search",
+    response_model=List[BlacklistNameMatch],
+    summary="Search the lists by name",
+)
+def search_blacklists(
+    name: str = Query(..., min_length=1),
+    max_distance: Optional[int] = Query(None, ge=0),
+    session: Session = Depends(get_session),
+):
+    """
+    Manual list search: natural and juridical persons whose name is within
+    `max_distance` edits of `name`, served from the in-process name index.
+    """
+    try:
+        return screening_index.search(session, name, max_distance)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get(
+    "/persons",
+    response_model=List[BlacklistPersonDetail],
+    summary="Read list entries with their attributes",
+)
+def read_blacklist_persons(
+    ids: Optional[List[int]] = Query(None, max_length=500),
+    blacklist_id: Optional[int] = Query(None),
+    attribute: Optional[List[str]] = Query(
+        None, description="`name:value`, the entries must have every one given"
+    ),
+    limit: int = Query(100, ge=1, le=500),
+    session: Session = Depends(get_session),
+):
+    """
+    List entries by id, list or attribute values, with their natural or
+    juridical details and their attributes.
+    """
+    attributes = {}
+    for item in attribute or []:
+        name, separator, value = item.partition(":")
+        if not separator or not name:
+            raise HTTPException(
+                status_code=400, detail="Invalid attribute filter: {}".format(item)
+            )
+        attributes[name] = value
+    return list_blacklist_persons(session, ids, blacklist_id, attributes, limit)
+
+
+@router.get(
+    "/persons/{blacklist_person_id}",
+    response_model=BlacklistPersonDetail,
+    summary="Read a list entry with its attributes",
+)
+def read_blacklist_person(
+    blacklist_person_id: int, session: Session = Depends(get_session)
+):
+    person = get_blacklist_person(session, blacklist_person_id)
+    if person is None:
+        raise HTTPException(status_code=404, detail="Blacklist person not found")
+    return person
+
+
+@router.get(
+    "/alerts",
+    response_model=BlacklistAlertPage,
+    summary="Alert inbox",
+)
+def read_blacklist_alerts(
+    state: AlertState = Query(AlertState.PENDING),
+    date_from: Optional[date] = Query(None),
+    date_to: Optional[date] = Query(None),
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(50, ge=1, le=500),
+    session: Session = Depends(get_session),
+):
+    """
+    Alerts in `state`, oldest first. Follow `next_cursor` for the next page.
+    """
+    try:
+        return list_alerts(session, state, date_from, date_to, cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post(
+    "/alerts/transitions",
+    response_model=BlacklistAlertTransitionResult,
+    summary="Change the state of many alerts",
+)
+def transition_blacklist_alerts(
+    transition: BlacklistAlertTransition,
+    session: Session = Depends(get_session),
+    current_user=Depends(get_and_set_current_user),
+):
+    """
+    Suppress, discard, close, report or reopen alerts in bulk. Alerts whose
+    current state does not allow the change are returned in `skipped`.
+    """
+    result = transition_alerts(
+        session, transition.alert_ids, transition.state, current_user.id
+    )
+    session.commit()
+    return result
+
+
+@router.post(
+    "/alerts/generate",
+    response_model=BlacklistAlertGenerateResult,
+    summary="Raise the alerts of new matches",
+)
+def generate_blacklist_alerts(
+    min_score: Optional[float] = Query(None, ge=0, le=1),
+    session: Session = Depends(get_session),
+    current_user=Depends(get_and_set_current_user),
+):
+    """
+    Turn the matching searches without an alert into pending alerts.
+    `min_score` defaults to the blacklist_alert_min_score config.
+    """
+    created = generate_alerts(session, min_score)
+    session.commit()
+    return BlacklistAlertGenerateResult(created=created)
@@ -0,0 +1,26 @@
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app.core.config_cache import config_cache
+from app.database import get_session
+from app.schemas import ConfigRead
+
+router = APIRouter(prefix="/config", tags=["Config"])
+
+
+@router.get("/", response_model=List[ConfigRead], summary="List config values")
+def read_configs(session: Session = Depends(get_session)):
+    values = config_cache.values(session)
+    return [
+        ConfigRead(name=name, value=value) for name, value in sorted(values.items())
+    ]
+
+
+@router.get("/{name}", response_model=ConfigRead, summary="Get a config value")
+def read_config(name: str, session: Session = Depends(get_session)):
+    value = config_cache.get(session, name)
+    if value is None:
+        raise HTTPException(status_code=404, detail="Config not found")
+    return ConfigRead(name=name, value=value)
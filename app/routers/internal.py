@@ -0,0 +1,42 @@
+from typing import Dict
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.core.metrics import render_metrics
+from app.core.pool import pool_stats
+from app.database import get_async_engine, get_engine
+from app.schemas import PoolStats
+
+router = APIRouter(prefix="/internal", tags=["Internal"])
+
+
+@router.get(
+    "/pool",
+    response_model=Dict[str, PoolStats],
+    summary="Database connection pool metrics",
+)
+async def read_pool_metrics():
+    """
+    Size and usage of the connection pools of this process, with the number
+    of checkouts, pool timeouts and the time checkouts waited for a connection.
+    """
+    return {
+        "sync": pool_stats(get_engine().pool),
+        "async": pool_stats(get_async_engine().pool),
+    }
+
+
+@router.get(
+    "/metrics",
+    response_class=PlainTextResponse,
+    summary="Request and database metrics in the Prometheus format",
+)
+def read_metrics():
+    """
+    Per route histograms of the request duration, the database time and the
+    number of statements, and the slowest statement of each route.
+    """
+    return PlainTextResponse(
+        render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -1,30 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 
 from app.models import (
     Role,
     RolePermission,
-    User,
-    UserRole,
 )
 from app.schemas import (
     RoleCreate,
     RoleRead,
 )
-from app.database import get_session
-from app.core.permission import Permission  # Import the Permission Enum
+from app.database import get_async_session
+from app.services.pagination import decode_id_cursor, encode_cursor
+from app.services.roles import get_role_with_permissions, select_roles
 
 router = APIRouter(prefix="/roles", tags=["Role"])
 
 
 # Utility Functions
-def get_role(db: Session, role_id: int):
-    return db.query(Role).filter(Role.id == role_id).first()
+async def get_role(db: AsyncSession, role_id: int):
+    return await get_role_with_permissions(db, role_id)
 
 
-def get_role_by_name(db: Session, name: str):
-    return db.query(Role).filter(Role.name == name).first()
+async def get_role_by_name(db: AsyncSession, name: str):
+    return await db.scalar(select(Role).where(Role.name == name))
 
 
 # Endpoints
@@ -36,82 +36,80 @@ def get_role_by_name(db: Session, name: str):
     status_code=status.HTTP_201_CREATED,
     summary="Create a new role",
 )
-def create_role(role: RoleCreate, db: Session = Depends(get_session)):
+async def create_role(role: RoleCreate, db: AsyncSession = Depends(get_async_session)):
     # Check if role name already exists
-    db_role = get_role_by_name(db, role.name)
+    db_role = await get_role_by_name(db, role.name)
     if db_role:
         raise HTTPException(
             status_code=400, detail="Role with this name already exists"
         )
 
-    # Create Role
-    db_role = Role(name=role.name, description=role.description)
+    # Create Role with its Permissions
+    db_role = Role(
+        name=role.name,
+        description=role.description,
+        role_permissions=[
+            RolePermission(permission=perm.value) for perm in role.permissions or []
+        ],
+    )
     db.add(db_role)
-    db.commit()
-    db.refresh(db_role)
-
-    # Assign Permissions
-    if role.permissions:
-        permissions = [
-            RolePermission(role_id=db_role.id, permission=perm.value)
-            for perm in role.permissions
-        ]
-        print(permissions)
-        db.bulk_save_objects(permissions)
-        db.commit()
-
-    # Refresh to get updated relationships
-    db.refresh(db_role)
-    db_role.permissions = [
-        Permission(rp.permission)
-        for rp in db.query(RolePermission)
-        .filter(RolePermission.role_id == db_role.id)
-        .all()
-    ]
+    await db.commit()
 
     return db_role
 
 
 @router.get("/", response_model=List[RoleRead], summary="List roles with pagination")
-def list_roles(skip: int = 0, limit: int = 10, db: Session = Depends(get_session)):
-    roles = db.query(Role).offset(skip).limit(limit).all()
-    for role in roles:
-        role.permissions = [
-            Permission(rp.permission)
-            for rp in db.query(RolePermission)
-            .filter(RolePermission.role_id == role.id)
-            .all()
-        ]
+async def list_roles(
+    response: Response,
+    cursor: Optional[str] = Query(None),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=1000),
+    db: AsyncSession = Depends(get_async_session),
+):
+    """
+    Roles in id order. When there are more, the X-Next-Cursor header holds
+    the `cursor` of the next page; `skip` is kept for older clients and
+    cannot be combined with `cursor`.
+    """
+    statement = select_roles().order_by(Role.id).offset(skip).limit(limit + 1)
+    if cursor is not None:
+        if skip:
+            raise HTTPException(
+                status_code=400, detail="skip cannot be used with cursor"
+            )
+        try:
+            after_id = decode_id_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        statement = statement.where(Role.id > after_id)
+    roles = (await db.scalars(statement)).all()
+    if len(roles) > limit:
+        roles = roles[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(roles[-1].id)
     return roles
 
 
 @router.get(
     "/{role_id}", response_model=RoleRead, summary="Retrieve a specific role by ID"
 )
-def read_role(role_id: int, db: Session = Depends(get_session)):
-    db_role = get_role(db, role_id)
+async def read_role(role_id: int, db: AsyncSession = Depends(get_async_session)):
+    db_role = await get_role(db, role_id)
     if not db_role:
         raise HTTPException(status_code=404, detail="Role not found")
-    db_role.permissions = [
-        Permission(rp.permission)
-        for rp in db.query(RolePermission)
-        .filter(RolePermission.role_id == db_role.id)
-        .all()
-    ]
     return db_role
 
 
 @router.put("/{role_id}", response_model=RoleRead, summary="Update an existing role")
-def update_role(
-    role_id: int, role_update: RoleCreate, db: Session = Depends(get_session)
+async def update_role(
+    role_id: int, role_update: RoleCreate, db: AsyncSession = Depends(get_async_session)
 ):
-    db_role = get_role(db, role_id)
+    db_role = await get_role(db, role_id)
     if not db_role:
         raise HTTPException(status_code=404, detail="Role not found")
 
     if role_update.name:
         # Check if new name is unique
-        existing_role = get_role_by_name(db, role_update.name)
+        existing_role = await get_role_by_name(db, role_update.name)
         if existing_role and existing_role.id != role_id:
             raise HTTPException(
                 status_code=400, detail="Role with this name already exists"
@@ -121,41 +119,30 @@ def update_role(
     if role_update.description is not None:
         db_role.description = role_update.description
 
-    db.commit()
-    db.refresh(db_role)
-
-    # Handle Permissions Update
+    # Apply the difference between the current and the new permissions
     if role_update.permissions is not None:
-        # Remove existing permissions
-        db.query(RolePermission).filter(RolePermission.role_id == role_id).delete()
-        db.commit()
-
-        # Add new permissions
-        new_permissions = [
-            RolePermission(role_id=role_id, permission=perm.value)
-            for perm in role_update.permissions
-        ]
-        db.bulk_save_objects(new_permissions)
-        db.commit()
-
-    # Refresh to get updated permissions
-    db_role = get_role(db, role_id)
-    db_role.permissions = [
-        Permission(rp.permission)
-        for rp in db.query(RolePermission)
-        .filter(RolePermission.role_id == db_role.id)
-        .all()
-    ]
+        new_permissions = {perm.value for perm in role_update.permissions}
+        for rp in list(db_role.role_permissions):
+            if rp.permission in new_permissions:
+                new_permissions.remove(rp.permission)
+            else:
+                db_role.role_permissions.remove(rp)
+        db_role.role_permissions.extend(
+            RolePermission(permission=permission)
+            for permission in sorted(new_permissions)
+        )
+
+    await db.commit()
     return db_role
 
 
 @router.delete(
     "/{role_id}", status_code=status.HTTP_204_NO_CONTENT, summary="Delete a role"
 )
-def delete_role(role_id: int, db: Session = Depends(get_session)):
-    db_role = get_role(db, role_id)
+async def delete_role(role_id: int, db: AsyncSession = Depends(get_async_session)):
+    db_role = await db.get(Role, role_id)
     if not db_role:
         raise HTTPException(status_code=404, detail="Role not found")
-    db.delete(db_role)
-    db.commit()
+    await db.delete(db_role)
+    await db.commit()
     return
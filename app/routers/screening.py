@@ -0,0 +1,22 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.database import get_session
+from app.schemas import ScreeningQueueStats
+from app.services.screening_queue import queue_stats
+
+router = APIRouter(prefix="/screening", tags=["Screening"])
+
+
+@router.get(
+    "/queue",
+    response_model=ScreeningQueueStats,
+    summary="Asynchronous screening queue metrics",
+)
+def read_screening_queue(session: Session = Depends(get_session)):
+    """
+    Persons waiting to be screened, how long the oldest one has waited and
+    how many ran out of attempts.
+    """
+    return queue_stats(session, settings.SCREENING_QUEUE_MAX_ATTEMPTS)
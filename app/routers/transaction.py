@@ -0,0 +1,60 @@
+import io
+import tempfile
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from app.auth import get_and_set_current_user
+from app.core.config import settings
+from app.database import get_session
+from app.schemas import TransactionIngestResult
+from app.services.transaction_ingest import (
+    ingest_transactions,
+    read_csv_records,
+    read_ndjson_records,
+)
+
+router = APIRouter(prefix="/transactions", tags=["Transaction"])
+
+# Uploads bigger than this are spooled to disk while they are received
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+
+@router.post(
+    "/ingest",
+    response_model=TransactionIngestResult,
+    summary="Bulk ingest transactions",
+)
+async def ingest_transaction_file(
+    request: Request,
+    file_format: Literal["csv", "ndjson"] = Query("csv"),
+    batch_size: int = Query(settings.TRANSACTION_INGEST_BATCH_SIZE, ge=1, le=500000),
+    session: Session = Depends(get_session),
+    current_user=Depends(get_and_set_current_user),
+):
+    """
+    Ingest the transactions sent as the raw request body, CSV with a header
+    row or one JSON object per line, with the columns product_id,
+    transaction_type_id, counterpart, amount and effective_date. Each batch of
+    `batch_size` rows is committed on its own; the report lists the rows
+    rejected in each batch.
+    """
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE) as body:
+        async for chunk in request.stream():
+            body.write(chunk)
+        body.seek(0)
+
+        try:
+            if file_format == "ndjson":
+                records = read_ndjson_records(body)
+            else:
+                records = read_csv_records(
+                    io.TextIOWrapper(body, encoding="utf-8-sig", newline="")
+                )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return await run_in_threadpool(
+            ingest_transactions, session, records, batch_size
+        )
@@ -1,12 +1,25 @@
-from typing import List
+from typing import List, Optional
 from fastapi import APIRouter, HTTPException, Depends, Query, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.exc import SQLAlchemyError
-from app.core.permission import Permission
-from app.models import User, Role, UserRole, RolePermission
-from app.schemas import UserCreate, UserUpdate, RoleRead
-from app.database import get_session
+from app.core.serialization import rows_response, schema_columns
+from app.models import User, Role, UserRole
+from app.schemas import (
+    BatchResult,
+    RoleRead,
+    UserBatchCreate,
+    UserCreate,
+    UserActivation,
+    UserRead,
+    UserRoleBatchCreate,
+    UserUpdate,
+)
+from app.database import get_async_session
+from app.services.export import ExportFormat, export_response
+from app.services.pagination import decode_id_cursor, encode_cursor
+from app.services.roles import select_roles
+from app.services.users import assign_roles, create_users
 
 # from app.auth import get_and_set_current_user
 
@@ -14,39 +27,79 @@ router = APIRouter(prefix="/users", tags=["User"])
 
 
 # Utility Functions
-def get_role(db: Session, role_id: int):
-    return db.query(Role).filter(Role.id == role_id).first()
+async def get_role(db: AsyncSession, role_id: int):
+    return await db.get(Role, role_id)
 
 
-@router.post("/")
-async def create_user(user: UserCreate, session: Session = Depends(get_session)):
+@router.post("/", response_model=UserRead)
+async def create_user(
+    user: UserCreate, session: AsyncSession = Depends(get_async_session)
+):
     new_user = User(**user.dict())
     session.add(new_user)
 
     try:
-        session.commit()
-        session.refresh(new_user)
+        await session.commit()
+        await session.refresh(new_user)
     except SQLAlchemyError as e:
-        session.rollback()
+        await session.rollback()
         raise HTTPException(status_code=400, detail=str(e))
 
     return new_user
 
 
-@router.get("/{user_id}")
-async def read_user(user_id: int, session: Session = Depends(get_session)):
-    result = session.execute(select(User).where(User.id == user_id))
+@router.post("/batch", response_model=BatchResult, summary="Create many users")
+async def create_users_batch(
+    batch: UserBatchCreate, session: AsyncSession = Depends(get_async_session)
+):
+    """
+    Create the users in one transaction. Each item reports the id of the
+    user created or why it was not.
+    """
+    return await create_users(session, batch.users)
+
+
+@router.post(
+    "/roles/batch",
+    response_model=BatchResult,
+    summary="Assign many roles to users",
+)
+async def assign_roles_batch(
+    batch: UserRoleBatchCreate, session: AsyncSession = Depends(get_async_session)
+):
+    """
+    Create the role assignments in one transaction. Each item reports the id
+    of the assignment created or why it was not.
+    """
+    return await assign_roles(session, batch.assignments)
+
+
+@router.get("/export", summary="Export all users")
+async def export_users(file_format: ExportFormat = Query("ndjson")):
+    """
+    Every user as NDJSON or CSV, streamed in id order.
+    """
+    return export_response(
+        select(*User.__table__.columns).order_by(User.id), file_format, "users"
+    )
+
+
+@router.get("/{user_id}", response_model=UserRead)
+async def read_user(user_id: int, session: AsyncSession = Depends(get_async_session)):
+    result = await session.execute(select(User).where(User.id == user_id))
     user = result.scalar_one_or_none()
     if user is None:
         raise HTTPException(status_code=404, detail="User not found")
     return user
 
 
-@router.put("/{user_id}")
+@router.put("/{user_id}", response_model=UserRead)
 async def update_user(
-    user_id: int, user_update: UserUpdate, session: Session = Depends(get_session)
+    user_id: int,
+    user_update: UserUpdate,
+    session: AsyncSession = Depends(get_async_session),
 ):
-    result = session.execute(select(User).where(User.id == user_id))
+    result = await session.execute(select(User).where(User.id == user_id))
     user = result.scalar_one_or_none()
     if user is None:
         raise HTTPException(status_code=404, detail="User not found")
@@ -55,10 +108,10 @@ async def update_user(
         setattr(user, key, value)
 
     try:
-        session.commit()
-        session.refresh(user)
+        await session.commit()
+        await session.refresh(user)
     except SQLAlchemyError as e:
-        session.rollback()
+        await session.rollback()
         raise HTTPException(
             status_code=400, detail="Error updating user: {}".format(str(e))
         )
@@ -67,70 +120,103 @@ async def update_user(
 
 
 @router.delete("/{user_id}", response_model=dict)
-async def delete_user(user_id: int, session: Session = Depends(get_session)):
-    result = session.execute(select(User).where(User.id == user_id))
+async def delete_user(user_id: int, session: AsyncSession = Depends(get_async_session)):
+    result = await session.execute(select(User).where(User.id == user_id))
     user = result.scalar_one_or_none()
     if user is None:
         raise HTTPException(status_code=404, detail="User not found")
 
-    session.delete(user)
-    session.commit()
+    await session.delete(user)
+    await session.commit()
     return {"detail": "User deleted successfully"}
 
 
-@router.get("/")
+@router.get("/", response_model=List[UserRead])
 async def list_users(
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
+    cursor: Optional[str] = Query(None),
     offset: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
 ):
-    result = session.execute(select(User).offset(offset).limit(limit))
-    return result.scalars().all()
-
-
-@router.get("/search/email/{email}")
-async def search_user_by_email(email: str, session: Session = Depends(get_session)):
-    result = session.execute(select(User).where(User.email == email))
+    """
+    Users in id order. When there are more, the X-Next-Cursor header holds
+    the `cursor` of the next page; `offset` is kept for older clients and
+    cannot be combined with `cursor`.
+    """
+    # plain rows: a read-only page does not need ORM instances
+    statement = (
+        select(*schema_columns(UserRead, User))
+        .order_by(User.id)
+        .offset(offset)
+        .limit(limit + 1)
+    )
+    if cursor is not None:
+        if offset:
+            raise HTTPException(
+                status_code=400, detail="offset cannot be used with cursor"
+            )
+        try:
+            after_id = decode_id_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        statement = statement.where(User.id > after_id)
+    rows = (await session.execute(statement)).all()
+    headers = {}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        headers["X-Next-Cursor"] = encode_cursor(rows[-1].id)
+    return rows_response(rows, headers)
+
+
+@router.get("/search/email/{email}", response_model=UserRead)
+async def search_user_by_email(
+    email: str, session: AsyncSession = Depends(get_async_session)
+):
+    result = await session.execute(select(User).where(User.email == email))
     user = result.scalar_one_or_none()
     if user is None:
         raise HTTPException(status_code=404, detail="User not found")
     return user
 
 
-@router.get("/search/username/{username}")
+@router.get("/search/username/{username}", response_model=UserRead)
 async def search_user_by_username(
-    username: str, session: Session = Depends(get_session)
+    username: str, session: AsyncSession = Depends(get_async_session)
 ):
-    result = session.execute(select(User).where(User.username == username))
+    result = await session.execute(select(User).where(User.username == username))
     user = result.scalar_one_or_none()
     if user is None:
         raise HTTPException(status_code=404, detail="User not found")
     return user
 
 
-@router.put("/{user_id}/activate")
-async def activate_user(user_id: int, session: Session = Depends(get_session)):
-    result = session.execute(select(User).where(User.id == user_id))
+@router.put("/{user_id}/activate", response_model=UserActivation)
+async def activate_user(
+    user_id: int, session: AsyncSession = Depends(get_async_session)
+):
+    result = await session.execute(select(User).where(User.id == user_id))
     user = result.scalar_one_or_none()
     if user is None:
         raise HTTPException(status_code=404, detail="User not found")
 
     user.is_active = True
-    session.commit()
-    session.refresh(user)
+    await session.commit()
+    await session.refresh(user)
     return {"detail": "User activated successfully", "user": user}
 
 
-@router.put("/{user_id}/deactivate")
-async def deactivate_user(user_id: int, session: Session = Depends(get_session)):
-    result = session.execute(select(User).where(User.id == user_id))
+@router.put("/{user_id}/deactivate", response_model=UserActivation)
+async def deactivate_user(
+    user_id: int, session: AsyncSession = Depends(get_async_session)
+):
+    result = await session.execute(select(User).where(User.id == user_id))
     user = result.scalar_one_or_none()
     if user is None:
         raise HTTPException(status_code=404, detail="User not found")
 
     user.is_active = False
-    session.commit()
-    session.refresh(user)
+    await session.commit()
+    await session.refresh(user)
     return {"detail": "User deactivated successfully", "user": user}
 
 
@@ -140,22 +226,22 @@ async def deactivate_user(user_id: int, session: Session = Depends(get_session))
     status_code=status.HTTP_201_CREATED,
     summary="Assign a role to a user",
 )
-def assign_role(user_id: int, role_id: int, db: Session = Depends(get_session)):
+async def assign_role(
+    user_id: int, role_id: int, db: AsyncSession = Depends(get_async_session)
+):
     # Fetch the user
-    db_user = db.query(User).filter(User.id == user_id).first()
+    db_user = await db.get(User, user_id)
     if not db_user:
         raise HTTPException(status_code=404, detail="User not found")
 
     # Fetch the role
-    db_role = get_role(db, role_id)
+    db_role = await get_role(db, role_id)
     if not db_role:
         raise HTTPException(status_code=404, detail="Role not found")
 
     # Check if role is already assigned
-    existing_assignment = (
-        db.query(UserRole)
-        .filter(UserRole.user_id == user_id, UserRole.role_id == role_id)
-        .first()
+    existing_assignment = await db.scalar(
+        select(UserRole).where(UserRole.user_id == user_id, UserRole.role_id == role_id)
     )
     if existing_assignment:
         raise HTTPException(status_code=400, detail="Role already assigned to user")
@@ -163,7 +249,7 @@ def assign_role(user_id: int, role_id: int, db: Session = Depends(get_session)):
     # Assign Role to User
     user_role = UserRole(user_id=user_id, role_id=role_id)
     db.add(user_role)
-    db.commit()
+    await db.commit()
 
     return {"detail": "Role assigned to user successfully"}
 
@@ -174,12 +260,12 @@ def assign_role(user_id: int, role_id: int, db: Session = Depends(get_session)):
     status_code=status.HTTP_200_OK,
     summary="Remove a role from a user",
 )
-def remove_role(user_id: int, role_id: int, db: Session = Depends(get_session)):
+async def remove_role(
+    user_id: int, role_id: int, db: AsyncSession = Depends(get_async_session)
+):
     # Fetch the user-role assignment
-    db_user_role = (
-        db.query(UserRole)
-        .filter(UserRole.user_id == user_id, UserRole.role_id == role_id)
-        .first()
+    db_user_role = await db.scalar(
+        select(UserRole).where(UserRole.user_id == user_id, UserRole.role_id == role_id)
     )
     if not db_user_role:
         raise HTTPException(
@@ -187,8 +273,8 @@ def remove_role(user_id: int, role_id: int, db: Session = Depends(get_session)):
         )
 
     # Remove the role assignment
-    db.delete(db_user_role)
-    db.commit()
+    await db.delete(db_user_role)
+    await db.commit()
 
     return {"detail": "Role removed from user successfully"}
 
@@ -199,22 +285,20 @@ def remove_role(user_id: int, role_id: int, db: Session = Depends(get_session)):
     status_code=status.HTTP_200_OK,
     summary="Get all roles assigned to a user",
 )
-def get_user_roles(user_id: int, db: Session = Depends(get_session)):
+async def get_user_roles(user_id: int, db: AsyncSession = Depends(get_async_session)):
     # Fetch the user
-    db_user = db.query(User).filter(User.id == user_id).first()
+    db_user = await db.get(User, user_id)
     if not db_user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    # Fetch all roles assigned to the user
-    user_roles = db.query(Role).join(UserRole).filter(UserRole.user_id == user_id).all()
-
-    # Optionally, include permissions for each role
-    for role in user_roles:
-        role.permissions = [
-            Permission(rp.permission)
-            for rp in db.query(RolePermission)
-            .filter(RolePermission.role_id == role.id)
-            .all()
-        ]
+    # Fetch all roles assigned to the user, with their permissions
+    user_roles = (
+        await db.scalars(
+            select_roles()
+            .join(UserRole)
+            .where(UserRole.user_id == user_id)
+            .order_by(Role.id)
+        )
+    ).all()
 
     return user_roles
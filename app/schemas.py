@@ -1,5 +1,7 @@
-from pydantic import BaseModel, EmailStr, constr, Field
-from typing import Optional, List
+from datetime import date, datetime
+from enum import Enum
+from pydantic import BaseModel, ConfigDict, EmailStr, constr, Field
+from typing import Dict, Optional, List
 from app.core.permission import Permission
 
 
@@ -19,6 +21,47 @@ class UserUpdate(BaseModel):
     name: Optional[constr(strip_whitespace=True, max_length=100)] = Field(default=None)
 
 
+class UserRead(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    username: str
+    email: str
+    name: Optional[str]
+    is_active: Optional[bool]
+    created_at: datetime
+    updated_at: datetime
+
+
+class UserActivation(BaseModel):
+    detail: str
+    user: UserRead
+
+
+class UserBatchCreate(BaseModel):
+    users: List[UserCreate] = Field(..., min_length=1, max_length=1000)
+
+
+class UserRoleAssignment(BaseModel):
+    user_id: int
+    role_id: int
+
+
+class UserRoleBatchCreate(BaseModel):
+    assignments: List[UserRoleAssignment] = Field(..., min_length=1, max_length=10000)
+
+
+class BatchItemResult(BaseModel):
+    index: int = Field(..., description="Position of the item in the request")
+    id: Optional[int] = Field(None, description="Id of the row created")
+    error: Optional[str] = None
+
+
+class BatchResult(BaseModel):
+    created: int
+    items: List[BatchItemResult]
+
+
 # Role Schemas
 class RoleBase(BaseModel):
     name: str = Field(..., example="admin")
@@ -34,5 +77,173 @@ class RoleCreate(RoleBase):
 
 
 class RoleRead(RoleBase):
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
     permissions: List[Permission] = []
+
+
+# Config Schemas
+class ConfigRead(BaseModel):
+    name: str
+    value: str
+
+
+# Blacklist Schemas
+class BlacklistLoadResult(BaseModel):
+    blacklist_id: int
+    loaded: int
+    matches: int
+    elapsed_seconds: float
+    rows_per_second: float
+
+
+class BlacklistNameMatch(BaseModel):
+    blacklist_person_id: int
+    type: str
+    name: str
+    distance: int
+    match_score: float
+
+
+class BlacklistPersonDetail(BaseModel):
+    id: int
+    blacklist_id: int
+    blacklist_short_name: str
+    type: str
+    official_registration_number: str
+    name: Optional[str]
+    curp: Optional[str]
+    rfc: Optional[str]
+    date_of_birth: Optional[date]
+    incorporation_date: Optional[date]
+    deleted_at: Optional[datetime]
+    attributes: Dict[str, Optional[str]]
+
+
+class AlertState(str, Enum):
+    PENDING = "pending"
+    SUPPRESSED = "suppressed"
+    DISCARDED = "discarded"
+    CLOSED = "closed"
+    REPORTED = "reported"
+
+
+class BlacklistAlertRead(BaseModel):
+    id: int
+    state: AlertState
+    date: date
+    blacklist_search_id: int
+    person_id: int
+    blacklist_person_id: int
+    match_score: float
+    created_at: datetime
+    updated_at: datetime
+    updated_by: Optional[int]
+    blacklist_person: BlacklistPersonDetail
+
+
+class BlacklistAlertPage(BaseModel):
+    items: List[BlacklistAlertRead]
+    next_cursor: Optional[str] = Field(
+        None, description="Pass as `cursor` to get the next page"
+    )
+
+
+class BlacklistAlertTransition(BaseModel):
+    alert_ids: List[int] = Field(..., min_length=1, max_length=10000)
+    state: AlertState
+
+
+class BlacklistAlertTransitionResult(BaseModel):
+    updated: List[int]
+    skipped: List[int] = Field(
+        ..., description="Alerts not found or whose state cannot change to `state`"
+    )
+
+
+class BlacklistAlertGenerateResult(BaseModel):
+    created: int
+
+
+# Audit Schemas
+class OperationType(str, Enum):
+    INSERT = "INSERT"
+    UPDATE = "UPDATE"
+    DELETE = "DELETE"
+
+
+class AuditLogRead(BaseModel):
+    id: int
+    table_name: str
+    operation_type: OperationType
+    record_id: int
+    changed_data: Optional[Dict] = Field(
+        None, description="The row, or only its changed columns on some UPDATEs"
+    )
+    changed_at: datetime
+    changed_by: int
+
+
+class AuditLogPage(BaseModel):
+    items: List[AuditLogRead]
+    next_cursor: Optional[str] = Field(
+        None, description="Pass as `cursor` to get the next page"
+    )
+
+
+# Transaction Schemas
+class TransactionReject(BaseModel):
+    line: int = Field(..., description="Line of the row in the uploaded file")
+    error: str
+
+
+class TransactionBatchReport(BaseModel):
+    batch: int
+    first_line: int
+    last_line: int
+    accepted: int
+    rejected: int
+    rejects: List[TransactionReject] = Field(
+        ..., description="The first rejected rows of the batch and why"
+    )
+    error: Optional[str] = Field(
+        None, description="Why the whole batch was rolled back, if it was"
+    )
+    elapsed_seconds: float
+
+
+class TransactionIngestResult(BaseModel):
+    accepted: int
+    rejected: int
+    batches: List[TransactionBatchReport]
+    elapsed_seconds: float
+    rows_per_second: float
+
+
+# Internal Schemas
+class PoolStats(BaseModel):
+    pool: str
+    size: Optional[int]
+    checked_in: Optional[int]
+    in_use: Optional[int]
+    overflow: Optional[int]
+    checkouts: Optional[int] = None
+    timeouts: Optional[int] = None
+    wait_seconds_total: Optional[float] = None
+    wait_seconds_max: Optional[float] = None
+
+
+# Screening Schemas
+class ScreeningQueueBatch(BaseModel):
+    processed: int
+    failed: int
+    matches: int
+    alerts: int
+
+
+class ScreeningQueueStats(BaseModel):
+    depth: int
+    failed: int
+    oldest_enqueued_at: Optional[datetime]
+    lag_seconds: float
@@ -0,0 +1,77 @@
+"""
+Queries over the audit trail (audit_log, sql/04_audit.sql).
+
+Every query is either the history of one record (table_name and record_id) or
+the changes made by one user (changed_by), optionally limited to a range of
+changed_at and to an operation type. Both are read in (changed_at, id) order
+from their index, idx_audit_log_record_changes or idx_audit_log_user_changes,
+so a page starts right after the cursor and an export never sorts, and a
+changed_at range only reads the partitions of its months.
+"""
+
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import Select, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.serialization import schema_columns
+from app.models import AuditLog
+from app.schemas import AuditLogPage, AuditLogRead, OperationType
+from app.services.pagination import decode_cursor, encode_cursor
+
+
+def select_audit_log(
+    table_name: Optional[str] = None,
+    record_id: Optional[int] = None,
+    changed_by: Optional[int] = None,
+    operation_type: Optional[OperationType] = None,
+    changed_from: Optional[datetime] = None,
+    changed_to: Optional[datetime] = None,
+) -> Select:
+    """
+    Audit rows matching the filters in (changed_at, id) order. `changed_from`
+    is inclusive and `changed_to` exclusive. Raises ValueError unless the
+    filters select a record or a user.
+    """
+    statement = select(*schema_columns(AuditLogRead, AuditLog)).order_by(
+        AuditLog.changed_at, AuditLog.id
+    )
+    by_record = table_name is not None and record_id is not None
+    by_user = changed_by is not None and table_name is None and record_id is None
+    if not (by_record or by_user):
+        raise ValueError("Filter by table_name and record_id, or by changed_by")
+    if by_record:
+        statement = statement.where(
+            AuditLog.table_name == table_name, AuditLog.record_id == record_id
+        )
+    if changed_by is not None:
+        statement = statement.where(AuditLog.changed_by == changed_by)
+    if operation_type is not None:
+        statement = statement.where(AuditLog.operation_type == operation_type.value)
+    if changed_from is not None:
+        statement = statement.where(AuditLog.changed_at >= changed_from)
+    if changed_to is not None:
+        statement = statement.where(AuditLog.changed_at < changed_to)
+    return statement
+
+
+async def list_audit_log(
+    session: AsyncSession,
+    statement: Select,
+    cursor: Optional[str] = None,
+    limit: int = 100,
+) -> AuditLogPage:
+    if cursor is not None:
+        changed_at, audit_id = decode_cursor(cursor, 2)
+        try:
+            after = (datetime.fromisoformat(changed_at), int(audit_id))
+        except (TypeError, ValueError):
+            raise ValueError("invalid cursor")
+        statement = statement.where(tuple_(AuditLog.changed_at, AuditLog.id) > after)
+    rows = (await session.execute(statement.limit(limit + 1))).all()
+    items = [AuditLogRead(**row._mapping) for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        next_cursor = encode_cursor(items[-1].changed_at.isoformat(), items[-1].id)
+    return AuditLogPage(items=items, next_cursor=next_cursor)
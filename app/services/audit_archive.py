@@ -0,0 +1,93 @@
+"""
+Maintenance of the monthly audit_log partitions (sql/04_audit.sql).
+
+`maintain_audit_log` creates the partitions of the coming months, detaches
+the ones older than the retention and writes each detached partition to
+`<archive_dir>/audit_log_YYYYMM.csv.gz`, a gzip compressed CSV with a header
+row, before dropping it. A partition stays detached until its file is
+written, so a failed run is completed by the next one. An archive is loaded
+back with
+
+    gunzip -c audit_log_YYYYMM.csv.gz | psql -c "COPY audit_log FROM STDIN WITH (FORMAT csv, HEADER)"
+"""
+
+import gzip
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Union
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+
+@dataclass
+class AuditLogMaintenance:
+    partitions_created: int
+    archives: List[Path] = field(default_factory=list)
+    rows_archived: int = 0
+
+
+def archive_partition(session: Session, partition: str, archive_dir: Path) -> int:
+    """
+    Write a detached partition to its archive file and drop it, inside the
+    session transaction. Returns the number of rows archived.
+    """
+    path = archive_dir / "{}.csv.gz".format(partition)
+    partial = path.with_name(path.name + ".partial")
+    table = session.get_bind().dialect.identifier_preparer.quote(partition)
+    cursor = session.connection().connection.cursor()
+    try:
+        with open(partial, "wb") as raw:
+            with gzip.GzipFile(filename=path.name, fileobj=raw, mode="wb") as stream:
+                cursor.copy_expert(
+                    "COPY {} TO STDOUT WITH (FORMAT csv, HEADER)".format(table), stream
+                )
+            raw.flush()
+            os.fsync(raw.fileno())
+        rows = cursor.rowcount
+    finally:
+        cursor.close()
+    os.replace(partial, path)
+    session.execute(text("DROP TABLE {}".format(table)))
+    return rows
+
+
+def maintain_audit_log(
+    session: Session,
+    months_ahead: int,
+    retention_months: int,
+    archive_dir: Union[str, Path],
+) -> AuditLogMaintenance:
+    """
+    Create the partitions for the next `months_ahead` months and archive the
+    ones older than `retention_months` full months (0 keeps them all). Commits
+    after each step, so the detached partitions are not attached back when an
+    archive fails.
+    """
+    result = AuditLogMaintenance(
+        partitions_created=session.execute(
+            text("SELECT create_audit_log_partitions(CURRENT_DATE, :months)"),
+            {"months": months_ahead + 1},
+        ).scalar_one()
+    )
+    session.commit()
+    if retention_months <= 0:
+        return result
+
+    detached = session.scalars(
+        text(
+            "SELECT detach_audit_log_partitions((date_trunc('month', CURRENT_DATE) "
+            "- make_interval(months => :months))::DATE)"
+        ),
+        {"months": retention_months},
+    ).all()
+    session.commit()
+
+    archive_dir = Path(archive_dir)
+    archive_dir.mkdir(parents=True, exist_ok=True)
+    for partition in detached:
+        result.rows_archived += archive_partition(session, partition, archive_dir)
+        session.commit()
+        result.archives.append(archive_dir / "{}.csv.gz".format(partition))
+    return result
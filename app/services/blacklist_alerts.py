@@ -0,0 +1,151 @@
+"""
+Blacklist alert inbox: generation, keyset pagination and bulk transitions.
+
+Alerts are read in (date, id) order within one state, so a page is an index
+range scan on idx_blacklist_alert_open (sql/12_blacklist_alert.sql) starting
+right after the last alert of the previous page, however deep the page is.
+Each alert comes with its list entry from the blacklist_person_detail view,
+attributes included, in the same query.
+"""
+
+import base64
+import binascii
+from datetime import date
+from typing import Dict, Optional, Sequence, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.schemas import (
+    AlertState,
+    BlacklistAlertPage,
+    BlacklistAlertRead,
+    BlacklistAlertTransitionResult,
+)
+
+# target state -> states it can be reached from
+TRANSITIONS: Dict[AlertState, Tuple[AlertState, ...]] = {
+    AlertState.PENDING: (AlertState.SUPPRESSED,),
+    AlertState.SUPPRESSED: (AlertState.PENDING,),
+    AlertState.DISCARDED: (AlertState.PENDING, AlertState.SUPPRESSED),
+    AlertState.CLOSED: (AlertState.PENDING, AlertState.SUPPRESSED),
+    AlertState.REPORTED: (AlertState.PENDING, AlertState.SUPPRESSED),
+}
+
+ALERTS_QUERY = """
+    SELECT
+      ba.id,
+      ba.state,
+      ba.date,
+      ba.blacklist_search_id,
+      bs.person_id,
+      bs.blacklist_person_id,
+      bs.match_score,
+      ba.created_at,
+      ba.updated_at,
+      ba.updated_by,
+      to_jsonb (d) AS blacklist_person
+    FROM
+      blacklist_alert ba
+      JOIN blacklist_search bs ON bs.id = ba.blacklist_search_id
+      JOIN blacklist_person_detail d ON d.id = bs.blacklist_person_id
+    WHERE
+      {}
+    ORDER BY
+      ba.date,
+      ba.id
+    LIMIT :limit
+"""
+
+TRANSITION_QUERY = text(
+    """
+    UPDATE
+      blacklist_alert
+    SET
+      state = :state,
+      updated_at = CURRENT_TIMESTAMP,
+      updated_by = :user_id
+    WHERE
+      id = ANY (:alert_ids)
+      AND state = ANY (CAST(:from_states AS alert_state[]))
+    RETURNING
+      id
+    """
+)
+
+
+def encode_cursor(alert_date: date, alert_id: int) -> str:
+    value = "{},{}".format(alert_date.isoformat(), alert_id)
+    return base64.urlsafe_b64encode(value.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[date, int]:
+    try:
+        alert_date, alert_id = base64.urlsafe_b64decode(cursor).decode().split(",")
+        return date.fromisoformat(alert_date), int(alert_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError("invalid cursor")
+
+
+def list_alerts(
+    session: Session,
+    state: AlertState,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    cursor: Optional[str] = None,
+    limit: int = 50,
+) -> BlacklistAlertPage:
+    conditions = ["ba.state = :state"]
+    params = {"state": state.value, "limit": limit + 1}
+    if date_from is not None:
+        conditions.append("ba.date >= :date_from")
+        params["date_from"] = date_from
+    if date_to is not None:
+        conditions.append("ba.date <= :date_to")
+        params["date_to"] = date_to
+    if cursor is not None:
+        conditions.append("(ba.date, ba.id) > (:after_date, :after_id)")
+        params["after_date"], params["after_id"] = decode_cursor(cursor)
+
+    rows = session.execute(
+        text(ALERTS_QUERY.format(" AND ".join(conditions))), params
+    ).all()
+    items = [BlacklistAlertRead(**row._mapping) for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        next_cursor = encode_cursor(items[-1].date, items[-1].id)
+    return BlacklistAlertPage(items=items, next_cursor=next_cursor)
+
+
+def transition_alerts(
+    session: Session, alert_ids: Sequence[int], state: AlertState, user_id: int
+) -> BlacklistAlertTransitionResult:
+    """
+    Move every alert of `alert_ids` whose current state allows it to `state`
+    with a single UPDATE. The caller owns the transaction.
+    """
+    updated = session.execute(
+        TRANSITION_QUERY,
+        {
+            "state": state.value,
+            "user_id": user_id,
+            "alert_ids": list(alert_ids),
+            "from_states": [s.value for s in TRANSITIONS[state]],
+        },
+    ).scalars()
+    updated_ids = set(updated)
+    return BlacklistAlertTransitionResult(
+        updated=sorted(updated_ids),
+        skipped=sorted(set(alert_ids) - updated_ids),
+    )
+
+
+def generate_alerts(session: Session, min_score: Optional[float] = None) -> int:
+    """
+    Raise pending alerts for the matches without one. The caller owns the
+    transaction.
+    """
+    return session.execute(
+        text("SELECT generate_blacklist_alerts(:min_score)"),
+        {"min_score": min_score},
+    ).scalar_one()
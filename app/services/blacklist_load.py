@@ -0,0 +1,117 @@
+"""
+Bulk load of blacklist publications (LPB, PEP, ...).
+
+The entries are streamed through COPY into a temporary staging table and then
+inserted by `load_blacklist_natural_person_staging` (sql/11_blacklist_load.sql)
+in a few set-based statements, audited and screened by their statement level
+triggers.
+"""
+
+import csv
+import time
+from datetime import date, datetime
+from typing import IO, Iterable, Iterator, Optional, Sequence
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.schemas import BlacklistLoadResult
+from app.services.copy import copy_rows
+
+STAGING_COLUMNS = (
+    "official_registration_number",
+    "curp",
+    "rfc",
+    "name",
+    "first_last_name",
+    "second_last_name",
+    "date_of_birth",
+)
+REQUIRED_COLUMNS = ("official_registration_number", "name", "first_last_name")
+
+
+def _project(header: Sequence, rows: Iterable[Sequence]) -> Iterator[tuple]:
+    """
+    Reorder the rows of a list file into STAGING_COLUMNS, ignoring extra columns.
+    """
+    positions = {
+        str(column).strip().lower(): i
+        for i, column in enumerate(header)
+        if column is not None
+    }
+    missing = [column for column in REQUIRED_COLUMNS if column not in positions]
+    if missing:
+        raise ValueError("Missing columns: {}".format(", ".join(missing)))
+
+    indexes = [positions.get(column) for column in STAGING_COLUMNS]
+    return _projected_rows(indexes, rows)
+
+
+def _projected_rows(indexes: Sequence, rows: Iterable[Sequence]) -> Iterator[tuple]:
+    for row in rows:
+        values = tuple(
+            _clean(row[i]) if i is not None and i < len(row) else None for i in indexes
+        )
+        if any(value is not None for value in values):
+            yield values
+
+
+def _clean(value) -> Optional[str]:
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    value = str(value).strip()
+    return value or None
+
+
+def read_csv_rows(stream: IO[str]) -> Iterator[tuple]:
+    reader = csv.reader(stream)
+    header = next(reader, None)
+    if header is None:
+        return iter(())
+    return _project(header, reader)
+
+
+def read_xlsx_rows(stream: IO[bytes]) -> Iterator[tuple]:
+    # openpyxl is only needed for spreadsheet publications
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(stream, read_only=True, data_only=True)
+    rows = workbook.active.iter_rows(values_only=True)
+    header = next(rows, None)
+    if header is None:
+        return iter(())
+    return _project(header, rows)
+
+
+def load_blacklist(
+    session: Session, blacklist_id: int, rows: Iterable[tuple]
+) -> BlacklistLoadResult:
+    """
+    Load the natural persons in `rows` into a blacklist and screen them.
+
+    `app.current_user_id` must be set on the session, it is recorded in the
+    audit log. The caller owns the transaction.
+    """
+    started = time.perf_counter()
+    session.execute(text("SELECT create_blacklist_natural_person_staging()"))
+
+    copy_rows(session, "blacklist_natural_person_staging", STAGING_COLUMNS, rows)
+
+    loaded, matches = session.execute(
+        text("SELECT * FROM load_blacklist_natural_person_staging(:blacklist_id)"),
+        {"blacklist_id": blacklist_id},
+    ).one()
+    session.execute(text("DROP TABLE blacklist_natural_person_staging"))
+
+    elapsed = time.perf_counter() - started
+    return BlacklistLoadResult(
+        blacklist_id=blacklist_id,
+        loaded=loaded,
+        matches=matches,
+        elapsed_seconds=round(elapsed, 3),
+        rows_per_second=round(loaded / elapsed, 1) if elapsed else 0.0,
+    )
@@ -0,0 +1,65 @@
+"""
+List entries with their details and attributes, read from the
+blacklist_person_detail view (sql/08_blacklist.sql). The attributes come from
+the blacklist_person_attribute_map read model, so any number of entries is
+one query whatever the number of attributes.
+"""
+
+import json
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.schemas import BlacklistPersonDetail
+
+DETAIL_QUERY = """
+    SELECT
+      *
+    FROM
+      blacklist_person_detail
+    WHERE
+      {}
+    ORDER BY
+      id
+    LIMIT :limit
+"""
+
+
+def get_blacklist_person(
+    session: Session, blacklist_person_id: int
+) -> Optional[BlacklistPersonDetail]:
+    persons = list_blacklist_persons(session, ids=[blacklist_person_id])
+    return persons[0] if persons else None
+
+
+def list_blacklist_persons(
+    session: Session,
+    ids: Optional[Sequence[int]] = None,
+    blacklist_id: Optional[int] = None,
+    attributes: Optional[Dict[str, str]] = None,
+    limit: int = 100,
+) -> List[BlacklistPersonDetail]:
+    """
+    Entries by id, list and attribute values (all of them must match, through
+    the GIN index of the attribute map).
+    """
+    conditions = ["TRUE"]
+    params = {"limit": limit}
+    if ids is not None:
+        conditions.append("id = ANY (:ids)")
+        params["ids"] = list(ids)
+    if blacklist_id is not None:
+        conditions.append("blacklist_id = :blacklist_id")
+        params["blacklist_id"] = blacklist_id
+    if attributes:
+        conditions.append(
+            "id IN (SELECT blacklist_person_id FROM blacklist_person_attribute_map "
+            "WHERE attributes @> CAST(:attributes AS JSONB))"
+        )
+        params["attributes"] = json.dumps(attributes)
+
+    rows = session.execute(
+        text(DETAIL_QUERY.format(" AND ".join(conditions))), params
+    ).all()
+    return [BlacklistPersonDetail(**row._mapping) for row in rows]
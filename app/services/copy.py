@@ -0,0 +1,57 @@
+"""
+Streaming COPY FROM STDIN for bulk writes.
+"""
+
+import csv
+import io
+from itertools import islice
+from typing import Iterable, Sequence
+
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+
+class CopyStream:
+    """
+    File-like object that serializes rows as CSV on demand for `copy_expert`,
+    so the rows are never held in memory. Rows are written `chunk_rows` at a
+    time with `writerows`, which loops in C.
+    """
+
+    chunk_rows = 1000
+
+    def __init__(self, rows: Iterable[tuple]):
+        self._rows = iter(rows)
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+        self._exhausted = False
+
+    def read(self, size: int = -1) -> str:
+        while not self._exhausted and (size < 0 or self._buffer.tell() < size):
+            written = self._buffer.tell()
+            self._writer.writerows(islice(self._rows, self.chunk_rows))
+            self._exhausted = self._buffer.tell() == written
+        data = self._buffer.getvalue()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return data
+
+
+def copy_rows(
+    session: Session, table: str, columns: Sequence[str], rows: Iterable[tuple]
+) -> None:
+    """
+    COPY `rows` into `table` inside the session transaction. None values are
+    written as NULL.
+    """
+    statement = "COPY {} ({}) FROM STDIN WITH (FORMAT csv)".format(
+        table, ", ".join(columns)
+    )
+    connection = session.connection()
+    cursor = connection.connection.cursor()
+    try:
+        cursor.copy_expert(statement, CopyStream(rows))
+    except connection.dialect.dbapi.Error as e:
+        raise DBAPIError(statement, None, e) from e
+    finally:
+        cursor.close()
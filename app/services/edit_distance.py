@@ -0,0 +1,57 @@
+"""
+Edit distance helpers matching the `fuzzystrmatch.levenshtein` results and the
+`match_score` stored in blacklist_search by the screening triggers.
+"""
+
+from decimal import ROUND_HALF_UP, Decimal
+
+SCORE_QUANTUM = Decimal("0.0001")  # blacklist_search.match_score is NUMERIC(5, 4)
+
+
+def levenshtein(a: str, b: str) -> int:
+    """
+    Levenshtein distance using the bit-parallel algorithm of Myers (Hyyrö's
+    formulation), one machine word per pattern held in a Python int.
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    if not b:
+        return len(a)
+
+    # the shorter string is the pattern
+    peq = {}
+    for i, char in enumerate(b):
+        peq[char] = peq.get(char, 0) | (1 << i)
+
+    size = len(b)
+    full = (1 << size) - 1
+    last = 1 << (size - 1)
+    pv = full
+    mv = 0
+    score = size
+    for char in a:
+        eq = peq.get(char, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | (~(xh | pv) & full)
+        mh = pv & xh
+        if ph & last:
+            score += 1
+        elif mh & last:
+            score -= 1
+        ph = ((ph << 1) | 1) & full
+        mh = (mh << 1) & full
+        pv = mh | (~(xv | ph) & full)
+        mv = ph & xv
+    return score
+
+
+def match_score(name: str, distance: int) -> float:
+    """
+    Score of a name match as computed by the screening triggers:
+    (length(name) - distance) / length(name), rounded like NUMERIC(5, 4).
+    """
+    if not name:
+        return 0.0
+    score = Decimal(len(name) - distance) / Decimal(len(name))
+    return float(score.quantize(SCORE_QUANTUM, rounding=ROUND_HALF_UP))
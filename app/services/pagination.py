@@ -0,0 +1,37 @@
+"""
+Opaque cursors for keyset pagination.
+
+A list ordered by a unique key returns, with each page, a cursor holding the
+key of its last row. The next page starts right after that key, which is an
+index range scan however deep the page is, instead of reading and discarding
+OFFSET rows.
+"""
+
+import base64
+import binascii
+import json
+from typing import Any, List
+
+
+def encode_cursor(*key: Any) -> str:
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+
+def decode_cursor(cursor: str, length: int = 1) -> List[Any]:
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError("invalid cursor")
+    if not isinstance(key, list) or len(key) != length:
+        raise ValueError("invalid cursor")
+    return key
+
+
+def decode_id_cursor(cursor: str) -> int:
+    """
+    The id of a cursor made by `encode_cursor(id)`.
+    """
+    (key,) = decode_cursor(cursor)
+    if type(key) is not int:
+        raise ValueError("invalid cursor")
+    return key
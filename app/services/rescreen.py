@@ -0,0 +1,297 @@
+"""
+Rescreening of the whole customer base against the blacklists.
+
+Applies the rules of `natural_person_details_tgr_fn` to every natural person
+again, typically after a list publication: exact full_name, name_key, CURP or
+RFC matches first and, for the persons without any, the list entries within
+`max_string_distance_to_match - 1` edits of the name or with the same
+phonetic_key.
+
+The persons are read in keyset chunks and screened by a pool of processes.
+Every worker holds the list entries in a NameIndex
+(app/services/screening_index.py), so a person costs a few dictionary lookups
+plus the bit-parallel distance of a handful of candidates instead of one
+`levenshtein()` per list entry. Only the hits are written back: COPY into a
+staging table, then upserted into blacklist_search like the triggers do.
+"""
+
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import date
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.services.copy import copy_rows
+from app.services.edit_distance import levenshtein, match_score
+from app.services.screening_index import NameIndex
+
+# (id, full_name, curp, rfc, name_key, phonetic_key)
+Record = Tuple[int, str, Optional[str], Optional[str], Optional[str], Optional[str]]
+
+BLACKLIST_QUERY = text(
+    """
+    SELECT
+      bl_npd.id,
+      bl_npd.full_name,
+      bl_npd.curp,
+      bl_npd.rfc,
+      bl_npd.name_key,
+      bl_npd.phonetic_key
+    FROM
+      blacklist_natural_person_details bl_npd
+      JOIN blacklist_person blp ON blp.id = bl_npd.id
+    WHERE
+      blp.deleted_at IS NULL
+      AND (CAST(:blacklist_id AS INTEGER) IS NULL OR blp.blacklist_id = :blacklist_id)
+    """
+)
+
+PERSONS_QUERY = text(
+    """
+    SELECT
+      npd.person_id,
+      npd.full_name,
+      npd.curp,
+      npd.rfc,
+      npd.name_key,
+      npd.phonetic_key
+    FROM
+      natural_person_details npd
+    WHERE
+      npd.person_id > :last_id
+    ORDER BY
+      npd.person_id
+    LIMIT :limit
+    """
+)
+
+SEARCH_COLUMNS = (
+    "person_id",
+    "blacklist_person_id",
+    "match",
+    "match_score",
+    "search_date",
+    "match_details",
+)
+
+STAGING_TABLE = text(
+    """
+    CREATE TEMP TABLE IF NOT EXISTS rescreen_search_staging (
+      person_id INTEGER,
+      blacklist_person_id INTEGER,
+      match BOOLEAN,
+      match_score NUMERIC(5, 4),
+      search_date DATE,
+      match_details JSONB
+    ) ON COMMIT DROP
+    """
+)
+
+# a pair keeps one row with its latest result, see sql/10_blacklist_search.sql
+UPSERT_QUERY = text(
+    """
+    INSERT INTO blacklist_search (person_id, blacklist_person_id, match, match_score, search_date, match_details)
+    SELECT
+      person_id,
+      blacklist_person_id,
+      match,
+      match_score,
+      search_date,
+      match_details
+    FROM
+      rescreen_search_staging
+    ON CONFLICT (person_id, blacklist_person_id)
+      DO UPDATE SET
+        match = EXCLUDED.match,
+        match_score = EXCLUDED.match_score,
+        search_date = EXCLUDED.search_date,
+        created_at = EXCLUDED.created_at,
+        match_details = EXCLUDED.match_details
+      WHERE
+        blacklist_search.search_date < EXCLUDED.search_date
+    """
+)
+
+
+@dataclass
+class RescreenProgress:
+    processed: int
+    total: int
+    hits: int
+    elapsed_seconds: float
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.processed / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+
+def _equals(a: Optional[str], b: Optional[str]) -> Optional[bool]:
+    # SQL semantics: comparing with NULL is NULL
+    if a is None or b is None:
+        return None
+    return a == b
+
+
+class BlacklistMatcher:
+    def __init__(self, entries: Sequence[Record], max_distance: int):
+        self.max_distance = max_distance
+        self.entries: Dict[int, Record] = {}
+        self.by_name: Dict[str, List[int]] = {}
+        self.by_key: Dict[str, List[int]] = {}
+        self.by_curp: Dict[str, List[int]] = {}
+        self.by_rfc: Dict[str, List[int]] = {}
+        self.by_phonetic_key: Dict[str, List[int]] = {}
+        self.index = NameIndex(max(max_distance, 0))
+        for entry in entries:
+            entry_id, full_name, curp, rfc, name_key, phonetic_key = entry
+            self.entries[entry_id] = entry
+            for lookup, value in (
+                (self.by_name, full_name),
+                (self.by_key, name_key),
+                (self.by_curp, curp),
+                (self.by_rfc, rfc),
+                (self.by_phonetic_key, phonetic_key),
+            ):
+                if value is not None:
+                    lookup.setdefault(value, []).append(entry_id)
+            self.index.add(entry_id, "natural", full_name)
+
+    def screen(self, person: Record) -> List[tuple]:
+        """
+        blacklist_search rows (without search_date) for one person.
+        """
+        person_id, full_name, curp, rfc, name_key, phonetic_key = person
+        exact = set(self.by_name.get(full_name, ()))
+        exact.update(self.by_key.get(name_key, ()))
+        exact.update(self.by_curp.get(curp, ()))
+        exact.update(self.by_rfc.get(rfc, ()))
+        hits = []
+        for entry_id in sorted(exact):
+            _, entry_name, entry_curp, entry_rfc, entry_key, _ = self.entries[entry_id]
+            details = {
+                "rfc_match": _equals(entry_rfc, rfc),
+                "curp_match": _equals(entry_curp, curp),
+                "name_match": entry_name == full_name,
+                "name_key_match": _equals(entry_key, name_key),
+            }
+            hits.append((person_id, entry_id, True, 1, json.dumps(details)))
+        if hits:
+            return hits
+
+        # names within the distance plus the names that sound the same
+        distances = {}
+        if self.max_distance >= 0:
+            for match in self.index.search(full_name, self.max_distance):
+                distances[match.blacklist_person_id] = match.distance
+        for entry_id in self.by_phonetic_key.get(phonetic_key, ()):
+            if entry_id not in distances:
+                distances[entry_id] = levenshtein(self.entries[entry_id][1], full_name)
+        for entry_id in sorted(distances):
+            _, _, entry_curp, entry_rfc, _, entry_phonetic_key = self.entries[entry_id]
+            details = {
+                "rfc_match": _equals(entry_rfc, rfc),
+                "curp_match": _equals(entry_curp, curp),
+                "name_match": True,
+                "levenshtein_distance": distances[entry_id],
+                "phonetic_match": _equals(entry_phonetic_key, phonetic_key),
+            }
+            score = max(0.0, match_score(full_name, distances[entry_id]))
+            hits.append((person_id, entry_id, True, score, json.dumps(details)))
+        return hits
+
+
+# Process pool workers build their matcher once, in the initializer
+_matcher: Optional[BlacklistMatcher] = None
+
+
+def _init_worker(entries: Sequence[Record], max_distance: int) -> None:
+    global _matcher
+    _matcher = BlacklistMatcher(entries, max_distance)
+
+
+def _screen_chunk(persons: Sequence[Record]) -> List[tuple]:
+    hits = []
+    for person in persons:
+        hits.extend(_matcher.screen(person))
+    return hits
+
+
+def rescreen(
+    session: Session,
+    chunk_size: int = 5000,
+    workers: int = 4,
+    blacklist_id: Optional[int] = None,
+    dry_run: bool = False,
+    progress: Optional[Callable[[RescreenProgress], None]] = None,
+) -> RescreenProgress:
+    """
+    Screen every natural person against the active entries of `blacklist_id`
+    (all the lists by default) and write the hits into blacklist_search.
+    The caller owns the transaction.
+    """
+    started = time.perf_counter()
+    min_distance = session.execute(
+        text("SELECT config_value('max_string_distance_to_match')::INTEGER")
+    ).scalar()
+    # same predicate as the triggers: levenshtein(...) < min_distance
+    max_distance = min_distance - 1 if min_distance is not None else -1
+    entries = [
+        tuple(row)
+        for row in session.execute(BLACKLIST_QUERY, {"blacklist_id": blacklist_id})
+    ]
+    total = session.execute(
+        text("SELECT count(*) FROM natural_person_details")
+    ).scalar()
+    search_date = date.today().isoformat()
+    if not dry_run:
+        session.execute(STAGING_TABLE)
+
+    state = RescreenProgress(processed=0, total=total, hits=0, elapsed_seconds=0.0)
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(entries, max_distance),
+    ) as pool:
+        pending = []
+        last_id = 0
+        exhausted = not entries
+        while not exhausted or pending:
+            # keep a bounded number of chunks in flight so memory stays flat
+            while not exhausted and len(pending) < 2 * workers:
+                persons = [
+                    tuple(row)
+                    for row in session.execute(
+                        PERSONS_QUERY, {"last_id": last_id, "limit": chunk_size}
+                    )
+                ]
+                if not persons:
+                    exhausted = True
+                    break
+                last_id = persons[-1][0]
+                pending.append((len(persons), pool.submit(_screen_chunk, persons)))
+            if not pending:
+                break
+
+            size, future = pending.pop(0)
+            hits = future.result()
+            if hits and not dry_run:
+                copy_rows(
+                    session,
+                    "rescreen_search_staging",
+                    SEARCH_COLUMNS,
+                    (hit[:4] + (search_date, hit[4]) for hit in hits),
+                )
+                session.execute(UPSERT_QUERY)
+                session.execute(text("TRUNCATE rescreen_search_staging"))
+            state.processed += size
+            state.hits += len(hits)
+            state.elapsed_seconds = time.perf_counter() - started
+            if progress is not None:
+                progress(state)
+
+    state.elapsed_seconds = time.perf_counter() - started
+    return state
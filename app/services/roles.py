@@ -0,0 +1,24 @@
+"""
+Role queries shared by the role and user routers. The permissions of every
+role come from one extra query (selectinload) whatever the number of roles;
+Role.role_permissions is never loaded implicitly, so a missing option raises
+instead of querying once per role.
+"""
+
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.models import Role
+
+
+def select_roles() -> Select:
+    return select(Role).options(selectinload(Role.role_permissions))
+
+
+async def get_role_with_permissions(db: AsyncSession, role_id: int):
+    return await db.scalar(
+        select_roles()
+        .where(Role.id == role_id)
+        .execution_options(populate_existing=True)
+    )
@@ -0,0 +1,271 @@
+"""
+In-process fuzzy index over the blacklist names for manual list searches.
+
+Answers "names within k edits" without scanning the lists: every name is split
+into `2 * max_distance + 1` segments. k edits touch at most k segments, so by
+the pigeonhole principle a name within k edits of the query keeps at least
+`segments - k` of them unchanged, shifted at most k positions. A query costs a
+few dozen dictionary lookups, and only the names sharing enough segments with
+it have their exact distance computed.
+
+Names are interned and stored once; list entries and postings live in arrays
+of machine integers instead of Python objects.
+"""
+
+import sys
+from collections import Counter
+import threading
+import time
+from array import array
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.cache import NotifiedCache
+from app.core.config import settings
+from app.schemas import BlacklistNameMatch
+from app.services.edit_distance import levenshtein, match_score
+
+PERSON_TYPES = ("natural", "juridical")
+
+LIVE_ENTRIES_QUERY = text(
+    """
+    SELECT
+      id
+    FROM
+      blacklist_person
+    WHERE
+      deleted_at IS NULL
+    """
+)
+
+ENTRIES_QUERY = text(
+    """
+    SELECT
+      blp.id,
+      blp.type,
+      coalesce(bl_npd.full_name, bl_jpd.legal_name)
+    FROM
+      blacklist_person blp
+      LEFT JOIN blacklist_natural_person_details bl_npd ON bl_npd.id = blp.id
+      LEFT JOIN blacklist_juridical_person_details bl_jpd ON bl_jpd.id = blp.id
+    WHERE
+      blp.id = ANY (:ids)
+      AND coalesce(bl_npd.full_name, bl_jpd.legal_name) IS NOT NULL
+    """
+)
+
+
+def normalize_name(name: str) -> str:
+    return " ".join(name.upper().split())
+
+
+class NameIndex:
+    def __init__(self, max_distance: int = 2):
+        self.max_distance = max_distance
+        self.segments = 2 * max_distance + 1
+        # unique names, the position in the list is the name id
+        self._names: List[str] = []
+        self._name_ids: Dict[str, int] = {}
+        # (length, segment number, segment text) -> name ids
+        self._segments: Dict[Tuple[int, int, str], array] = {}
+        # list entries as parallel arrays; entries sharing a name are chained
+        # through _entry_next starting at _first_entry[name id]
+        self._entry_ids = array("I")
+        self._entry_types = array("B")
+        self._entry_next = array("i")
+        self._entry_deleted = array("B")
+        self._first_entry = array("i")
+        self._entry_by_id: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._entry_by_id)
+
+    def entry_ids(self) -> Set[int]:
+        return set(self._entry_by_id)
+
+    def _partition(self, length: int) -> Iterable[Tuple[int, int, int]]:
+        """
+        Yield (segment number, start, size) of the even partition of a name of
+        `length` characters.
+        """
+        parts = self.segments
+        size, longer = divmod(length, parts)
+        start = 0
+        for number in range(parts):
+            segment_size = size + 1 if number >= parts - longer else size
+            yield number, start, segment_size
+            start += segment_size
+
+    def _add_name(self, name: str) -> int:
+        name_id = self._name_ids.get(name)
+        if name_id is not None:
+            return name_id
+
+        name = sys.intern(name)
+        name_id = len(self._names)
+        self._names.append(name)
+        self._name_ids[name] = name_id
+        self._first_entry.append(-1)
+        length = len(name)
+        for number, start, size in self._partition(length):
+            key = (length, number, name[start : start + size])
+            postings = self._segments.get(key)
+            if postings is None:
+                postings = self._segments[key] = array("I")
+            postings.append(name_id)
+        return name_id
+
+    def add(self, blacklist_person_id: int, person_type: str, name: str) -> None:
+        if blacklist_person_id in self._entry_by_id:
+            return
+        name_id = self._add_name(normalize_name(name))
+        entry = len(self._entry_ids)
+        self._entry_ids.append(blacklist_person_id)
+        self._entry_types.append(PERSON_TYPES.index(person_type))
+        self._entry_deleted.append(0)
+        self._entry_next.append(self._first_entry[name_id])
+        self._first_entry[name_id] = entry
+        self._entry_by_id[blacklist_person_id] = entry
+
+    def remove(self, blacklist_person_id: int) -> None:
+        entry = self._entry_by_id.pop(blacklist_person_id, None)
+        if entry is not None:
+            self._entry_deleted[entry] = 1
+
+    def _candidates(self, query: str, max_distance: int) -> List[int]:
+        """
+        Names sharing at least `segments - max_distance` segments with query.
+        """
+        hits = Counter()
+        length = len(query)
+        for indexed_length in range(
+            max(0, length - max_distance), length + max_distance + 1
+        ):
+            for number, start, size in self._partition(indexed_length):
+                found = set()
+                first = max(0, start - max_distance)
+                last = min(length - size, start + max_distance)
+                for position in range(first, last + 1):
+                    postings = self._segments.get(
+                        (indexed_length, number, query[position : position + size])
+                    )
+                    if postings is not None:
+                        found.update(postings)
+                hits.update(found)
+        required = self.segments - max_distance
+        return [name_id for name_id, count in hits.items() if count >= required]
+
+    def search(
+        self, name: str, max_distance: Optional[int] = None
+    ) -> List[BlacklistNameMatch]:
+        """
+        Return the list entries whose name is within `max_distance` edits of
+        `name`, best matches first.
+        """
+        if max_distance is None:
+            max_distance = self.max_distance
+        if max_distance > self.max_distance:
+            raise ValueError(
+                "max_distance must be at most {}".format(self.max_distance)
+            )
+
+        query = normalize_name(name)
+        matches = []
+        for name_id in self._candidates(query, max_distance):
+            candidate = self._names[name_id]
+            distance = levenshtein(candidate, query)
+            if distance > max_distance:
+                continue
+            entry = self._first_entry[name_id]
+            while entry != -1:
+                if not self._entry_deleted[entry]:
+                    matches.append(
+                        BlacklistNameMatch(
+                            blacklist_person_id=self._entry_ids[entry],
+                            type=PERSON_TYPES[self._entry_types[entry]],
+                            name=candidate,
+                            distance=distance,
+                            match_score=match_score(query, distance),
+                        )
+                    )
+                entry = self._entry_next[entry]
+        matches.sort(key=lambda match: (match.distance, match.blacklist_person_id))
+        return matches
+
+
+class ScreeningIndex(NotifiedCache):
+    """
+    NameIndex kept in sync with the blacklist tables.
+
+    The statement triggers on the list tables (sql/08_blacklist.sql) notify
+    the `screening_index` channel, see app/core/cache.py, and the next search
+    refreshes the index: the ids of the live entries are compared with the
+    indexed ones, the missing entries are added and the deleted ones dropped.
+    Comparing id sets instead of following the highest id also picks up the
+    entries of a load that committed late. The index is also refreshed every
+    `ttl_seconds`.
+    """
+
+    channel = "screening_index"
+
+    def __init__(self, max_distance: int, ttl_seconds: float):
+        super().__init__(ttl_seconds)
+        self.index = NameIndex(max_distance)
+        # one refresh at a time, searches go on meanwhile
+        self._refresh_lock = threading.Lock()
+        self._refreshed_at: Optional[float] = None
+
+    def refresh(self, session: Session) -> int:
+        """
+        Add the new entries and drop the deleted ones. Returns how many were
+        added.
+        """
+        with self._refresh_lock:
+            generation = self._generation
+            index = self.index
+            live = set(session.scalars(LIVE_ENTRIES_QUERY))
+            indexed = index.entry_ids()
+            new_ids = live - indexed
+            # entries whose details are not committed yet are added later
+            rows = (
+                session.execute(ENTRIES_QUERY, {"ids": list(new_ids)}).all()
+                if new_ids
+                else []
+            )
+            with self._lock:
+                for blacklist_person_id in indexed - live:
+                    index.remove(blacklist_person_id)
+                for blacklist_person_id, person_type, name in rows:
+                    index.add(blacklist_person_id, person_type, name)
+                if generation == self._generation:
+                    self._refreshed_at = time.monotonic()
+            return len(rows)
+
+    def rebuild(self) -> None:
+        """
+        Drop the index, it is loaded again from scratch on the next search.
+        """
+        with self._lock:
+            self._generation += 1
+            self.index = NameIndex(self.index.max_distance)
+            self._refreshed_at = None
+
+    def _clear(self) -> None:
+        self._refreshed_at = None
+
+    def search(
+        self, session: Session, name: str, max_distance: Optional[int] = None
+    ) -> List[BlacklistNameMatch]:
+        refreshed_at = self._refreshed_at
+        if refreshed_at is None or time.monotonic() - refreshed_at >= self.ttl_seconds:
+            self.refresh(session)
+        with self._lock:
+            return self.index.search(name, max_distance)
+
+
+screening_index = ScreeningIndex(
+    max_distance=settings.SCREENING_INDEX_MAX_DISTANCE,
+    ttl_seconds=settings.SCREENING_INDEX_TTL_SECONDS,
+)
@@ -0,0 +1,124 @@
+"""
+Worker for the asynchronous screening queue (sql/13_screening_queue.sql).
+
+With the 'screening_mode' config set to 'async', inserting a natural person
+only queues it and notifies the `screening_queue` channel. The worker LISTENs
+on that channel and drains the queue in batches, one transaction per batch.
+It also polls every `poll_seconds`, so persons queued while it was down or
+whose notification was missed are picked up as well. A person whose screening
+fails is retried after `retry_seconds`, doubled after each failure, so a
+transient error does not use up its attempts.
+"""
+
+import logging
+import select
+import threading
+import time
+from typing import Optional
+
+import psycopg2
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal, listen_connection
+from app.schemas import ScreeningQueueBatch, ScreeningQueueStats
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "screening_queue"
+
+STATS_QUERY = text(
+    """
+    SELECT
+      count(*) FILTER (WHERE attempts < :max_attempts) AS depth,
+      count(*) FILTER (WHERE attempts >= :max_attempts) AS failed,
+      min(enqueued_at) FILTER (WHERE attempts < :max_attempts) AS oldest_enqueued_at,
+      coalesce(extract(EPOCH FROM clock_timestamp() - min(enqueued_at) FILTER (WHERE attempts < :max_attempts)), 0)
+        AS lag_seconds
+    FROM
+      screening_queue
+    """
+)
+
+
+def process_batch(
+    session: Session, batch_size: int, max_attempts: int, retry_seconds: float
+) -> ScreeningQueueBatch:
+    """
+    Screen one batch of queued persons and commit.
+    """
+    row = session.execute(
+        text(
+            "SELECT * FROM process_screening_queue("
+            ":batch_size, :max_attempts, :retry_seconds)"
+        ),
+        {
+            "batch_size": batch_size,
+            "max_attempts": max_attempts,
+            "retry_seconds": retry_seconds,
+        },
+    ).one()
+    session.commit()
+    return ScreeningQueueBatch(**row._mapping)
+
+
+def drain(
+    session: Session, batch_size: int, max_attempts: int, retry_seconds: float
+) -> ScreeningQueueBatch:
+    """
+    Process batches until one screens nobody: the queue is empty or
+    everything left in it is waiting for its retry.
+    """
+    total = ScreeningQueueBatch(processed=0, failed=0, matches=0, alerts=0)
+    while True:
+        batch = process_batch(session, batch_size, max_attempts, retry_seconds)
+        for field in ("processed", "failed", "matches", "alerts"):
+            setattr(total, field, getattr(total, field) + getattr(batch, field))
+        if not batch.processed:
+            return total
+
+
+def queue_stats(session: Session, max_attempts: int) -> ScreeningQueueStats:
+    """
+    Queue depth and lag; `failed` counts the persons that ran out of attempts.
+    """
+    row = session.execute(STATS_QUERY, {"max_attempts": max_attempts}).one()
+    return ScreeningQueueStats(**row._mapping)
+
+
+def run_worker(
+    batch_size: int,
+    poll_seconds: float,
+    max_attempts: int,
+    retry_seconds: float,
+    stop: Optional[threading.Event] = None,
+) -> None:
+    """
+    Drain the queue whenever a person is queued, until `stop` is set.
+    Database errors are logged and the worker reconnects after
+    `poll_seconds`.
+    """
+    stop = stop or threading.Event()
+    while not stop.is_set():
+        try:
+            with listen_connection(CHANNEL) as connection, SessionLocal() as session:
+                while not stop.is_set():
+                    started = time.perf_counter()
+                    result = drain(session, batch_size, max_attempts, retry_seconds)
+                    if result.processed or result.failed:
+                        logger.info(
+                            "Screened %d persons (%d failed), %d matches, "
+                            "%d alerts in %.2fs",
+                            result.processed,
+                            result.failed,
+                            result.matches,
+                            result.alerts,
+                            time.perf_counter() - started,
+                        )
+                    if select.select([connection], [], [], poll_seconds)[0]:
+                        connection.poll()
+                        connection.notifies.clear()
+        except (SQLAlchemyError, psycopg2.Error):
+            logger.exception("Screening worker lost its database connection")
+            stop.wait(poll_seconds)
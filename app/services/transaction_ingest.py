@@ -0,0 +1,225 @@
+"""
+Bulk ingestion of transactions from CSV or NDJSON files.
+
+Every row is validated in Python: product_id and transaction_type_id against
+the cached sets of existing ids (app/core/transaction_lookups.py), the other
+columns against their types in `transaction`. The valid rows are streamed
+through COPY in batches of `batch_size` rows, each committed on its own, and
+the invalid ones are reported per batch with their line. The foreign keys of
+`transaction` still apply to the rows COPY writes; they only reject a batch
+when the cache missed a product or transaction type deleted since it was
+loaded, and the whole batch is then reported as failed.
+"""
+
+import csv
+import re
+import time
+from datetime import date
+from itertools import islice
+from typing import IO, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import orjson
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from app.core.transaction_lookups import TransactionLookups, transaction_lookups
+from app.schemas import (
+    TransactionBatchReport,
+    TransactionIngestResult,
+    TransactionReject,
+)
+from app.services.copy import copy_rows
+
+COLUMNS = (
+    "product_id",
+    "transaction_type_id",
+    "counterpart",
+    "amount",
+    "effective_date",
+)
+# NUMERIC(10, 2)
+AMOUNT = re.compile(r"-?\d{1,8}(\.\d{1,2})?")
+COUNTERPART_MAX_LENGTH = 255
+# Rejected rows listed in each batch report, the rest are only counted
+MAX_REJECTS_PER_BATCH = 100
+
+# (line, values in COLUMNS order, error), values is None when the line could
+# not be read
+Record = Tuple[int, Optional[Sequence], Optional[str]]
+
+
+def read_csv_records(stream: IO[str]) -> Iterator[Record]:
+    """
+    Records of a CSV file with a header row naming at least COLUMNS, in any
+    order. Raises ValueError if the header lacks a column.
+    """
+    reader = csv.reader(stream)
+    header = next(reader, None)
+    if header is None:
+        return iter(())
+    positions = {column.strip().lower(): i for i, column in enumerate(header)}
+    missing = [column for column in COLUMNS if column not in positions]
+    if missing:
+        raise ValueError("Missing columns: {}".format(", ".join(missing)))
+    return _csv_records(reader, [positions[column] for column in COLUMNS])
+
+
+def _csv_records(reader, indexes: Sequence[int]) -> Iterator[Record]:
+    width = max(indexes) + 1
+    while True:
+        try:
+            row = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as e:
+            yield reader.line_num, None, str(e)
+            continue
+        if len(row) >= width:
+            yield reader.line_num, [row[i] for i in indexes], None
+        elif row:
+            yield reader.line_num, None, "expected {} columns, got {}".format(
+                width, len(row)
+            )
+
+
+def read_ndjson_records(stream: IO[bytes]) -> Iterator[Record]:
+    """
+    Records of a file with one JSON object per line keyed by COLUMNS.
+    """
+    for line, data in enumerate(stream, 1):
+        if not data.strip():
+            continue
+        try:
+            item = orjson.loads(data)
+        except orjson.JSONDecodeError as e:
+            yield line, None, "invalid JSON: {}".format(e)
+            continue
+        if not isinstance(item, dict):
+            yield line, None, "expected a JSON object"
+            continue
+        yield line, [item.get(column) for column in COLUMNS], None
+
+
+def _id(name: str, value, ids: frozenset) -> int:
+    if isinstance(value, str):
+        try:
+            value = int(value)
+        except ValueError:
+            raise ValueError("invalid {}: {!r}".format(name, value))
+    elif type(value) is not int:
+        raise ValueError("invalid {}: {!r}".format(name, value))
+    if value not in ids:
+        raise ValueError("{} {} does not exist".format(name, value))
+    return value
+
+
+def validate_transaction(values: Sequence, lookups: TransactionLookups) -> tuple:
+    """
+    The row to COPY for `values` in COLUMNS order. Raises ValueError with the
+    reason if the transaction cannot be inserted.
+    """
+    product_id, transaction_type_id, counterpart, amount, effective_date = values
+    product_id = _id("product_id", product_id, lookups.product_ids)
+    transaction_type_id = _id(
+        "transaction_type_id", transaction_type_id, lookups.transaction_type_ids
+    )
+
+    if not isinstance(counterpart, str) or not counterpart.strip():
+        raise ValueError("counterpart is required")
+    if len(counterpart) > COUNTERPART_MAX_LENGTH or "\x00" in counterpart:
+        raise ValueError("invalid counterpart")
+
+    if type(amount) is int or type(amount) is float:
+        amount = str(amount)
+    if not isinstance(amount, str) or not AMOUNT.fullmatch(amount):
+        raise ValueError("invalid amount: {!r}".format(amount))
+
+    try:
+        effective_date = date.fromisoformat(effective_date)
+    except (TypeError, ValueError):
+        raise ValueError("invalid effective_date: {!r}".format(effective_date))
+
+    return product_id, transaction_type_id, counterpart, amount, effective_date
+
+
+def _batches(records: Iterable[Record], size: int) -> Iterator[List[Record]]:
+    records = iter(records)
+    while True:
+        batch = list(islice(records, size))
+        if not batch:
+            return
+        yield batch
+
+
+def ingest_batch(
+    session: Session, number: int, records: Sequence[Record]
+) -> TransactionBatchReport:
+    """
+    COPY the valid transactions of `records` into `transaction` and commit.
+    Rows are validated as COPY reads them, so the database writes a row while
+    the next ones are validated. A batch rejected by the database is rolled
+    back and reported with `error`.
+    """
+    started = time.perf_counter()
+    lookups = transaction_lookups.lookups(session)
+    rejects: List[TransactionReject] = []
+    invalid = 0
+
+    def valid_rows() -> Iterator[tuple]:
+        nonlocal invalid
+        for line, values, error in records:
+            if error is None:
+                try:
+                    yield validate_transaction(values, lookups)
+                    continue
+                except ValueError as e:
+                    error = str(e)
+            invalid += 1
+            if len(rejects) < MAX_REJECTS_PER_BATCH:
+                rejects.append(TransactionReject(line=line, error=error))
+
+    batch_error = None
+    try:
+        copy_rows(session, "transaction", COLUMNS, valid_rows())
+        session.commit()
+        accepted = len(records) - invalid
+    except DBAPIError as e:
+        session.rollback()
+        # most likely the cache is stale
+        transaction_lookups.invalidate()
+        batch_error = str(e.orig).splitlines()[0]
+        accepted = 0
+
+    return TransactionBatchReport(
+        batch=number,
+        first_line=records[0][0],
+        last_line=records[-1][0],
+        accepted=accepted,
+        rejected=len(records) - accepted,
+        rejects=rejects,
+        error=batch_error,
+        elapsed_seconds=round(time.perf_counter() - started, 3),
+    )
+
+
+def ingest_transactions(
+    session: Session, records: Iterable[Record], batch_size: int
+) -> TransactionIngestResult:
+    """
+    Ingest `records` in batches of `batch_size`. Each batch is committed as
+    soon as it is loaded, so the batches before a failure are kept.
+    """
+    started = time.perf_counter()
+    reports = [
+        ingest_batch(session, number, batch)
+        for number, batch in enumerate(_batches(records, batch_size), 1)
+    ]
+    accepted = sum(report.accepted for report in reports)
+    elapsed = time.perf_counter() - started
+    return TransactionIngestResult(
+        accepted=accepted,
+        rejected=sum(report.rejected for report in reports),
+        batches=reports,
+        elapsed_seconds=round(elapsed, 3),
+        rows_per_second=round(accepted / elapsed, 1) if elapsed else 0.0,
+    )
@@ -0,0 +1,133 @@
+"""
+Batch creation of users and role assignments.
+
+A batch is validated with one query per kind of check for all its items,
+written with one multi-row INSERT and committed once. Items that fail a check
+are reported with the error the single-item endpoints give and the rest are
+still created. The INSERTs skip rows that conflict with rows committed by
+others since the checks (ON CONFLICT DO NOTHING), and those items are
+reported as duplicates too.
+"""
+
+from typing import Dict, List, Sequence, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Role, User, UserRole
+from app.schemas import (
+    BatchItemResult,
+    BatchResult,
+    UserCreate,
+    UserRoleAssignment,
+)
+
+
+def batch_result(items: List[BatchItemResult]) -> BatchResult:
+    items.sort(key=lambda item: item.index)
+    return BatchResult(
+        created=sum(item.error is None for item in items),
+        items=items,
+    )
+
+
+async def create_users(db: AsyncSession, users: Sequence[UserCreate]) -> BatchResult:
+    usernames = {user.username for user in users}
+    emails = {user.email for user in users}
+    taken = (
+        await db.execute(
+            select(User.username, User.email).where(
+                User.username.in_(usernames) | User.email.in_(emails)
+            )
+        )
+    ).all()
+    taken_usernames = {username for username, _ in taken}
+    taken_emails = {email for _, email in taken}
+
+    items = []
+    pending: Dict[str, int] = {}
+    for index, user in enumerate(users):
+        if user.username in taken_usernames or user.username in pending:
+            items.append(BatchItemResult(index=index, error="Username already exists"))
+        elif user.email in taken_emails:
+            items.append(BatchItemResult(index=index, error="Email already exists"))
+        else:
+            taken_emails.add(user.email)
+            pending[user.username] = index
+
+    if pending:
+        rows = (
+            await db.execute(
+                insert(User)
+                .values([users[index].dict() for index in pending.values()])
+                .on_conflict_do_nothing()
+                .returning(User.id, User.username)
+            )
+        ).all()
+        for user_id, username in rows:
+            items.append(BatchItemResult(index=pending.pop(username), id=user_id))
+        items.extend(
+            BatchItemResult(index=index, error="User already exists")
+            for index in pending.values()
+        )
+    await db.commit()
+    return batch_result(items)
+
+
+async def assign_roles(
+    db: AsyncSession, assignments: Sequence[UserRoleAssignment]
+) -> BatchResult:
+    user_ids = {a.user_id for a in assignments}
+    role_ids = {a.role_id for a in assignments}
+    found_users = set(await db.scalars(select(User.id).where(User.id.in_(user_ids))))
+    found_roles = set(await db.scalars(select(Role.id).where(Role.id.in_(role_ids))))
+    assigned = set(
+        (
+            await db.execute(
+                select(UserRole.user_id, UserRole.role_id).where(
+                    UserRole.user_id.in_(user_ids), UserRole.role_id.in_(role_ids)
+                )
+            )
+        ).all()
+    )
+
+    items = []
+    pending: Dict[Tuple[int, int], int] = {}
+    for index, assignment in enumerate(assignments):
+        key = (assignment.user_id, assignment.role_id)
+        if assignment.user_id not in found_users:
+            items.append(BatchItemResult(index=index, error="User not found"))
+        elif assignment.role_id not in found_roles:
+            items.append(BatchItemResult(index=index, error="Role not found"))
+        elif key in assigned or key in pending:
+            items.append(
+                BatchItemResult(index=index, error="Role already assigned to user")
+            )
+        else:
+            pending[key] = index
+
+    if pending:
+        rows = (
+            await db.execute(
+                insert(UserRole)
+                .values(
+                    [
+                        {"user_id": user_id, "role_id": role_id}
+                        for user_id, role_id in pending
+                    ]
+                )
+                .on_conflict_do_nothing()
+                .returning(UserRole.id, UserRole.user_id, UserRole.role_id)
+            )
+        ).all()
+        for user_role_id, user_id, role_id in rows:
+            items.append(
+                BatchItemResult(index=pending.pop((user_id, role_id)), id=user_role_id)
+            )
+        items.extend(
+            BatchItemResult(index=index, error="Role already assigned to user")
+            for index in pending.values()
+        )
+    await db.commit()
+    return batch_result(items)
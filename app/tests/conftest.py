@@ -0,0 +1,44 @@
+import os
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+# TestClient runs every request in a new event loop, see DB_ASYNC_NULL_POOL
+os.environ.setdefault("DB_ASYNC_NULL_POOL", "true")
+
+
+class QueryCounter:
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+
+@pytest.fixture
+def count_queries():
+    """
+    Context manager that records the statements both engines send to the
+    database inside it, to assert that an endpoint costs a fixed number of
+    queries whatever the number of rows (no N+1 queries).
+    """
+    from app.database import get_async_engine, get_engine
+
+    @contextmanager
+    def counter():
+        queries = QueryCounter()
+        engines = (get_engine(), get_async_engine().sync_engine)
+        for engine in engines:
+            event.listen(engine, "before_cursor_execute", queries)
+        try:
+            yield queries
+        finally:
+            for engine in engines:
+                event.remove(engine, "before_cursor_execute", queries)
+
+    return counter
@@ -0,0 +1,203 @@
+import csv
+import io
+import json
+import re
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from app.database import engine
+from app.main import app
+
+client = TestClient(app)
+
+# (table_name, operation_type, record_id, changed_data, days ago, user)
+CHANGES = [
+    ("config", "INSERT", 1, {"id": 1, "value": "3"}, 10, 0),
+    ("config", "UPDATE", 1, {"value": "4"}, 5, 1),
+    ("config", "UPDATE", 1, {"value": "5"}, 5, 0),
+    ("config", "UPDATE", 2, {"value": "1"}, 5, 0),
+    ("blacklist", "INSERT", 1, {"id": 1}, 4, 0),
+    ("config", "DELETE", 1, {"id": 1, "value": "5"}, 1, 1),
+]
+
+
+@pytest.fixture(scope="function", autouse=True)
+def setup_and_teardown():
+    yield
+    with engine.begin() as connection:
+        connection.execute(text("TRUNCATE audit_log CASCADE"))
+        connection.execute(text('TRUNCATE "user" CASCADE'))
+
+
+@pytest.fixture
+def user_ids():
+    with engine.begin() as connection:
+        user_ids = [
+            connection.execute(
+                text(
+                    'INSERT INTO "user" (username, email) '
+                    "VALUES (:name, :name || '@example.com') RETURNING id"
+                ),
+                {"name": name},
+            ).scalar_one()
+            for name in ("auditor", "analyst")
+        ]
+        for table_name, operation, record_id, data, days, user in CHANGES:
+            connection.execute(
+                text(
+                    "INSERT INTO audit_log (table_name, operation_type, record_id, "
+                    "changed_data, changed_at, changed_by) VALUES (:table_name, "
+                    ":operation, :record_id, :data, date_trunc('day', now()) "
+                    "- make_interval(days => :days), :user_id)"
+                ),
+                {
+                    "table_name": table_name,
+                    "operation": operation,
+                    "record_id": record_id,
+                    "data": json.dumps(data),
+                    "days": days,
+                    "user_id": user_ids[user],
+                },
+            )
+    return user_ids
+
+
+def read_all(params, limit):
+    items, cursor = [], None
+    while True:
+        page_params = dict(params, limit=limit)
+        if cursor is not None:
+            page_params["cursor"] = cursor
+        response = client.get("/audit/", params=page_params)
+        assert response.status_code == 200, response.text
+        page = response.json()
+        assert len(page["items"]) <= limit
+        items += page["items"]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return items
+
+
+def test_record_history(user_ids):
+    items = read_all({"table_name": "config", "record_id": 1}, limit=1)
+    assert [item["changed_data"] for item in items] == [
+        {"id": 1, "value": "3"},
+        {"value": "4"},
+        {"value": "5"},
+        {"id": 1, "value": "5"},
+    ]
+    assert [item["operation_type"] for item in items] == [
+        "INSERT",
+        "UPDATE",
+        "UPDATE",
+        "DELETE",
+    ]
+    assert items[1]["changed_by"] == user_ids[1]
+
+    updates = read_all(
+        {"table_name": "config", "record_id": 1, "operation_type": "UPDATE"}, limit=10
+    )
+    assert [item["changed_data"] for item in updates] == [
+        {"value": "4"},
+        {"value": "5"},
+    ]
+
+
+def test_user_changes_in_a_period(user_ids):
+    items = read_all({"changed_by": user_ids[0]}, limit=2)
+    assert [(item["table_name"], item["record_id"]) for item in items] == [
+        ("config", 1),
+        ("config", 1),
+        ("config", 2),
+        ("blacklist", 1),
+    ]
+
+    first = items[1]["changed_at"]
+    response = client.get(
+        "/audit/",
+        params={
+            "changed_by": user_ids[0],
+            "changed_from": first,
+            "changed_to": items[3]["changed_at"],
+        },
+    )
+    assert [item["id"] for item in response.json()["items"]] == [
+        items[1]["id"],
+        items[2]["id"],
+    ]
+
+
+def test_invalid_filters(user_ids):
+    for params in ({}, {"table_name": "config"}, {"record_id": 1, "changed_by": 1}):
+        response = client.get("/audit/", params=params)
+        assert response.status_code == 400
+        assert response.json()["detail"] == (
+            "Filter by table_name and record_id, or by changed_by"
+        )
+    for cursor in ("nope", "WyJ4IiwgMV0="):
+        response = client.get(
+            "/audit/", params={"changed_by": user_ids[0], "cursor": cursor}
+        )
+        assert response.status_code == 400
+        assert response.json()["detail"] == "invalid cursor"
+
+
+def test_export(user_ids):
+    params = {"table_name": "config", "record_id": 1}
+    response = client.get("/audit/export", params=params)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["changed_data"] for row in rows][1:3] == [
+        {"value": "4"},
+        {"value": "5"},
+    ]
+    page = client.get("/audit/", params=params).json()["items"]
+    assert [row["id"] for row in rows] == [item["id"] for item in page]
+
+    response = client.get(
+        "/audit/export", params={"changed_by": user_ids[1], "file_format": "csv"}
+    )
+    assert response.headers["content-disposition"] == (
+        'attachment; filename="audit_log.csv"'
+    )
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [json.loads(row["changed_data"]) for row in rows] == [
+        {"value": "4"},
+        {"id": 1, "value": "5"},
+    ]
+
+    response = client.get("/audit/export")
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize(
+    "condition, index",
+    [
+        (
+            "table_name = 'config' AND record_id = 1",
+            "table_name_record_id_changed_at_id_idx",
+        ),
+        ("changed_by = 1", "changed_by_changed_at_id_idx"),
+    ],
+)
+def test_pages_are_read_in_index_order(condition, index):
+    """
+    A page after a cursor is a range scan of the partition indexes merged in
+    order, without a sort.
+    """
+    with engine.connect() as connection:
+        connection.execute(text("SET LOCAL enable_seqscan = off"))
+        plan = "\n".join(
+            connection.scalars(
+                text(
+                    "EXPLAIN SELECT * FROM audit_log WHERE {} "
+                    "AND (changed_at, id) > (now() - INTERVAL '1 year', 0) "
+                    "ORDER BY changed_at, id LIMIT 101".format(condition)
+                )
+            )
+        )
+    assert not re.search(r"\bSort  \(", plan), plan
+    scans = re.findall(r"Index Scan using (\w+)", plan)
+    assert scans and all(scan.endswith(index) for scan in scans), plan
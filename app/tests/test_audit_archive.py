@@ -0,0 +1,168 @@
+import csv
+import gzip
+import re
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import text
+from app.cli import main
+from app.database import SessionLocal, engine
+from app.services.audit_archive import maintain_audit_log
+
+
+@pytest.fixture(scope="function", autouse=True)
+def setup_and_teardown():
+    yield
+    with engine.begin() as connection:
+        connection.execute(text("TRUNCATE audit_log CASCADE"))
+        # the partitions of past months created by the tests
+        for name in connection.scalars(
+            text(
+                "SELECT detach_audit_log_partitions("
+                "date_trunc('month', CURRENT_DATE)::DATE)"
+            )
+        ).all():
+            connection.execute(text("DROP TABLE " + name))
+        connection.execute(text('TRUNCATE "user" CASCADE'))
+
+
+def add_audit_rows(months_ago):
+    """
+    One audit row per entry of `months_ago`, changed that many months ago.
+    """
+    with engine.begin() as connection:
+        user_id = connection.execute(
+            text(
+                'INSERT INTO "user" (username, email) '
+                "VALUES ('auditor', 'auditor@example.com') RETURNING id"
+            )
+        ).scalar_one()
+        for months in months_ago:
+            connection.execute(
+                text(
+                    "INSERT INTO audit_log (table_name, operation_type, record_id, "
+                    "changed_data, changed_at, changed_by) VALUES ('config', 'UPDATE', "
+                    ":months, '{}', now() - make_interval(months => :months), :user_id)"
+                ),
+                {"months": months, "user_id": user_id},
+            )
+
+
+def partition(months_ago):
+    with engine.connect() as connection:
+        return connection.execute(
+            text(
+                "SELECT 'audit_log_' || to_char(now() - make_interval(months => :months)"
+                ", 'YYYYMM')"
+            ),
+            {"months": months_ago},
+        ).scalar_one()
+
+
+def attached_partitions():
+    with engine.connect() as connection:
+        return set(
+            connection.scalars(
+                text(
+                    "SELECT inhrelid::REGCLASS::TEXT FROM pg_inherits "
+                    "WHERE inhparent = 'audit_log'::REGCLASS"
+                )
+            )
+        )
+
+
+def test_maintain_audit_log(tmp_path):
+    add_audit_rows([0, 30, 40, 40])
+    old = sorted([partition(30), partition(40)])
+
+    with SessionLocal() as session:
+        result = maintain_audit_log(session, 3, 24, tmp_path)
+
+    # the old rows got their partitions out of the default one before archiving
+    assert result.archives == [tmp_path / "{}.csv.gz".format(name) for name in old]
+    assert result.rows_archived == 3
+    assert not attached_partitions() & set(old)
+    with engine.connect() as connection:
+        assert (
+            connection.execute(
+                text("SELECT to_regclass(:name)"), {"name": old[0]}
+            ).scalar_one()
+            is None
+        )
+        assert connection.scalars(text("SELECT record_id FROM audit_log")).all() == [0]
+        assert not connection.execute(
+            text("SELECT count(*) FROM audit_log_default")
+        ).scalar_one()
+
+    with gzip.open(tmp_path / "{}.csv.gz".format(partition(40)), "rt") as stream:
+        rows = list(csv.DictReader(stream))
+    assert [row["record_id"] for row in rows] == ["40", "40"]
+    assert rows[0]["table_name"] == "config"
+    assert rows[0]["changed_data"] == "{}"
+    assert not list(tmp_path.glob("*.partial"))
+
+    with SessionLocal() as session:
+        again = maintain_audit_log(session, 3, 24, tmp_path)
+    assert again.partitions_created == 0
+    assert again.archives == []
+
+
+def test_detached_partitions_are_archived_by_the_next_run(tmp_path):
+    add_audit_rows([30])
+    name = partition(30)
+    with engine.begin() as connection:
+        connection.execute(text("SELECT create_audit_log_partitions(CURRENT_DATE, 1)"))
+        connection.execute(text("ALTER TABLE audit_log DETACH PARTITION " + name))
+
+    with SessionLocal() as session:
+        result = maintain_audit_log(session, 3, 24, tmp_path)
+    assert result.archives == [tmp_path / "{}.csv.gz".format(name)]
+    assert result.rows_archived == 1
+
+
+def test_retention_zero_keeps_the_partitions(tmp_path):
+    add_audit_rows([30])
+
+    with SessionLocal() as session:
+        result = maintain_audit_log(session, 3, 0, tmp_path)
+    assert result.archives == []
+    assert partition(30) in attached_partitions()
+    assert partition(-3) in attached_partitions()
+
+
+def test_queries_bounded_by_date_read_one_partition():
+    add_audit_rows([0])
+    now = datetime.now(timezone.utc)
+    start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    with engine.connect() as connection:
+        connection.execute(text("SET TIME ZONE 'UTC'"))
+        plan = "\n".join(
+            connection.scalars(
+                text(
+                    "EXPLAIN SELECT * FROM audit_log WHERE table_name = 'config' "
+                    "AND changed_at >= :start AND changed_at < :end"
+                ),
+                {"start": start, "end": now},
+            )
+        )
+    assert set(re.findall(r" on (audit_log_\w+)", plan)) == {partition(0)}, plan
+
+
+def test_cli(tmp_path, capsys):
+    add_audit_rows([40])
+
+    assert (
+        main(
+            [
+                "audit-log-maintenance",
+                "--retention-months",
+                "24",
+                "--archive-dir",
+                str(tmp_path),
+            ]
+        )
+        == 0
+    )
+    output = capsys.readouterr().out
+    assert "archived 1 partitions with 1 rows" in output
+    assert str(tmp_path / "{}.csv.gz".format(partition(40))) in output
@@ -0,0 +1,319 @@
+import io
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from openpyxl import Workbook
+from sqlalchemy import text
+from app.database import engine
+from app.main import app
+from app.services.screening_index import screening_index
+
+client = TestClient(app)
+
+LIST_HEADER = (
+    "official_registration_number,curp,rfc,name,first_last_name,second_last_name\n"
+)
+
+
+@pytest.fixture(scope="function", autouse=True)
+def setup_and_teardown():
+    yield
+    with engine.begin() as connection:
+        connection.execute(text("TRUNCATE blacklist CASCADE"))
+        connection.execute(text("TRUNCATE person CASCADE"))
+        connection.execute(text("TRUNCATE config CASCADE"))
+        connection.execute(text("TRUNCATE audit_log CASCADE"))
+        connection.execute(text('TRUNCATE "user" CASCADE'))
+    screening_index.rebuild()
+
+
+@pytest.fixture
+def user_id():
+    response = client.post(
+        "/users/", json={"username": "analyst", "email": "analyst@example.com"}
+    )
+    return response.json()["id"]
+
+
+@pytest.fixture
+def blacklist_id(user_id):
+    with engine.begin() as connection:
+        connection.execute(text("SELECT set_current_user_id(:id)"), {"id": user_id})
+        connection.execute(
+            text(
+                "INSERT INTO config (name, value) VALUES "
+                "('max_string_distance_to_match', '3'), "
+                "('save_all_comparison_results', 'false')"
+            )
+        )
+        connection.execute(
+            text(
+                "WITH p AS (INSERT INTO person (type) VALUES ('natural') RETURNING id) "
+                "INSERT INTO natural_person_details "
+                "(person_id, curp, rfc, name, first_last_name, second_last_name) "
+                "SELECT id, 'VARD123456AAAAAA12', 'AAAA123456AAA', 'John', 'Doe', 'Smith' FROM p"
+            )
+        )
+        return connection.execute(
+            text("INSERT INTO blacklist (short_name) VALUES ('LPB') RETURNING id")
+        ).scalar_one()
+
+
+def count_matches(blacklist_id):
+    with engine.begin() as connection:
+        return connection.execute(
+            text(
+                "SELECT count(*) FROM blacklist_search bs "
+                "JOIN blacklist_person blp ON blp.id = bs.blacklist_person_id "
+                "WHERE blp.blacklist_id = :id"
+            ),
+            {"id": blacklist_id},
+        ).scalar_one()
+
+
+def test_load_blacklist_csv(user_id, blacklist_id):
+    body = (
+        LIST_HEADER
+        + "A-1,VARD123456BBBAAA12,BBBB123456AAA,Jon,Doe,Smith\n"
+        + "A-2,,,Maria,Lopez,\n"
+    )
+    response = client.post(
+        f"/blacklists/{blacklist_id}/load",
+        content=body,
+        headers={"X-User-Id": str(user_id), "Content-Type": "text/csv"},
+    )
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert data["loaded"] == 2
+    assert data["matches"] == 1
+    assert data["rows_per_second"] > 0
+    assert count_matches(blacklist_id) == 1
+
+
+def test_load_blacklist_xlsx(user_id, blacklist_id):
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(LIST_HEADER.strip().split(","))
+    sheet.append(["A-1", "VARD123456AAAAAA12", None, "Pedro", "Perez", None])
+    content = io.BytesIO()
+    workbook.save(content)
+
+    response = client.post(
+        f"/blacklists/{blacklist_id}/load?file_format=xlsx",
+        content=content.getvalue(),
+        headers={"X-User-Id": str(user_id)},
+    )
+    assert response.status_code == 200, response.text
+    assert response.json()["loaded"] == 1
+    assert count_matches(blacklist_id) == 1
+
+
+def test_load_blacklist_missing_columns(user_id, blacklist_id):
+    response = client.post(
+        f"/blacklists/{blacklist_id}/load",
+        content="name,first_last_name\nJohn,Doe\n",
+        headers={"X-User-Id": str(user_id)},
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Missing columns: official_registration_number"
+
+
+def test_load_blacklist_invalid_row(user_id, blacklist_id):
+    response = client.post(
+        f"/blacklists/{blacklist_id}/load",
+        content=LIST_HEADER + "A-1,TOO-SHORT,,John,Doe,\n",
+        headers={"X-User-Id": str(user_id)},
+    )
+    assert response.status_code == 400
+    assert count_matches(blacklist_id) == 0
+
+
+def test_load_blacklist_not_found(user_id):
+    response = client.post(
+        "/blacklists/9999/load",
+        content=LIST_HEADER,
+        headers={"X-User-Id": str(user_id)},
+    )
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Blacklist not found"
+
+
+def test_load_blacklist_invalid_user(blacklist_id):
+    response = client.post(
+        f"/blacklists/{blacklist_id}/load",
+        content=LIST_HEADER,
+        headers={"X-User-Id": "9999"},
+    )
+    assert response.status_code == 401
+
+
+def test_search_blacklists(user_id, blacklist_id):
+    client.post(
+        f"/blacklists/{blacklist_id}/load",
+        content=LIST_HEADER + "A-1,,,Jon,Doe,Smith\nA-2,,,Maria,Lopez,\n",
+        headers={"X-User-Id": str(user_id)},
+    )
+
+    response = client.get("/blacklists/search", params={"name": "John Doe Smith"})
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert len(data) == 1
+    assert data[0]["name"] == "JON DOE SMITH"
+    assert data[0]["type"] == "natural"
+    assert data[0]["distance"] == 1
+    assert data[0]["match_score"] == 0.9286
+
+    response = client.get(
+        "/blacklists/search", params={"name": "John Doe Smith", "max_distance": 0}
+    )
+    assert response.json() == []
+
+
+def test_search_index_follows_list_changes(user_id, blacklist_id):
+    def search_ids(name):
+        response = client.get("/blacklists/search", params={"name": name})
+        return [match["blacklist_person_id"] for match in response.json()]
+
+    def wait_for(name, expected):
+        deadline = time.monotonic() + 10
+        while search_ids(name) != expected and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert search_ids(name) == expected
+
+    # an id taken before the entries indexed next, as by a load that commits
+    # late
+    with engine.begin() as connection:
+        late_id = connection.execute(
+            text("SELECT nextval(pg_get_serial_sequence('blacklist_person', 'id'))")
+        ).scalar_one()
+
+    screening_index.start(poll_seconds=0.1)
+    try:
+        client.post(
+            f"/blacklists/{blacklist_id}/load",
+            content=LIST_HEADER + "A-1,,,Jon,Doe,Smith\n",
+            headers={"X-User-Id": str(user_id)},
+        )
+        (first_id,) = search_ids("Jon Doe Smith")
+
+        with engine.begin() as connection:
+            connection.execute(text("SELECT set_current_user_id(:id)"), {"id": user_id})
+            connection.execute(
+                text(
+                    "INSERT INTO blacklist_person "
+                    "(id, blacklist_id, type, official_registration_number) "
+                    "VALUES (:id, :blacklist_id, 'natural', 'A-0')"
+                ),
+                {"id": late_id, "blacklist_id": blacklist_id},
+            )
+            connection.execute(
+                text(
+                    "INSERT INTO blacklist_natural_person_details "
+                    "(id, name, first_last_name) VALUES (:id, 'Maria', 'Lopez')"
+                ),
+                {"id": late_id},
+            )
+        wait_for("Maria Lopez", [late_id])
+
+        with engine.begin() as connection:
+            connection.execute(text("SELECT set_current_user_id(:id)"), {"id": user_id})
+            connection.execute(
+                text(
+                    "UPDATE blacklist_person SET deleted_at = now(), "
+                    "official_deletion_number = 'B-1' WHERE id = :id"
+                ),
+                {"id": first_id},
+            )
+        wait_for("Jon Doe Smith", [])
+    finally:
+        screening_index.stop()
+
+
+def test_search_blacklists_distance_too_large():
+    response = client.get(
+        "/blacklists/search", params={"name": "John Doe Smith", "max_distance": 10}
+    )
+    assert response.status_code == 400
+
+
+def add_attributes(user_id, blacklist_person_id, **values):
+    with engine.begin() as connection:
+        connection.execute(text("SELECT set_current_user_id(:id)"), {"id": user_id})
+        for name, value in values.items():
+            connection.execute(
+                text(
+                    "INSERT INTO blacklist_person_attribute (attribute_name) "
+                    "VALUES (:name) ON CONFLICT (attribute_name) DO NOTHING"
+                ),
+                {"name": name},
+            )
+            connection.execute(
+                text(
+                    "INSERT INTO blacklist_person_attribute_value "
+                    "(blacklist_person_id, attribute_id, value) "
+                    "SELECT :id, id, :value FROM blacklist_person_attribute "
+                    "WHERE attribute_name = :name"
+                ),
+                {"id": blacklist_person_id, "name": name, "value": value},
+            )
+
+
+def test_read_blacklist_persons(user_id, blacklist_id):
+    client.post(
+        f"/blacklists/{blacklist_id}/load",
+        content=LIST_HEADER
+        + "A-1,VARD123456BBBAAA12,BBBB123456AAA,Jon,Doe,Smith\n"
+        + "A-2,,,Maria,Lopez,\n",
+        headers={"X-User-Id": str(user_id), "Content-Type": "text/csv"},
+    )
+    persons = client.get("/blacklists/persons").json()
+    assert [p["official_registration_number"] for p in persons] == ["A-1", "A-2"]
+    first, second = (p["id"] for p in persons)
+    assert persons[0]["name"] == "JON DOE SMITH"
+    assert persons[0]["blacklist_short_name"] == "LPB"
+    assert persons[0]["attributes"] == {}
+
+    add_attributes(user_id, first, nationality="MX", siara_number="S-1")
+    add_attributes(user_id, second, nationality="US")
+
+    response = client.get(f"/blacklists/persons/{first}")
+    assert response.status_code == 200
+    assert response.json()["attributes"] == {"nationality": "MX", "siara_number": "S-1"}
+
+    response = client.get("/blacklists/persons", params={"attribute": "nationality:US"})
+    assert [p["id"] for p in response.json()] == [second]
+    response = client.get(
+        "/blacklists/persons",
+        params={"attribute": ["nationality:MX", "siara_number:X"]},
+    )
+    assert response.json() == []
+    response = client.get("/blacklists/persons", params={"attribute": "nationality"})
+    assert response.status_code == 400
+    response = client.get("/blacklists/persons", params={"ids": [second]})
+    assert [p["id"] for p in response.json()] == [second]
+
+    with engine.begin() as connection:
+        connection.execute(text("SELECT set_current_user_id(:id)"), {"id": user_id})
+        connection.execute(
+            text(
+                "UPDATE blacklist_person_attribute SET attribute_name = 'folio_siara' "
+                "WHERE attribute_name = 'siara_number'"
+            )
+        )
+        connection.execute(
+            text(
+                "DELETE FROM blacklist_person_attribute_value "
+                "WHERE blacklist_person_id = :id"
+            ),
+            {"id": second},
+        )
+    response = client.get(f"/blacklists/persons/{first}")
+    assert response.json()["attributes"] == {"nationality": "MX", "folio_siara": "S-1"}
+    response = client.get(f"/blacklists/persons/{second}")
+    assert response.json()["attributes"] == {}
+
+
+def test_read_blacklist_person_not_found():
+    response = client.get("/blacklists/persons/9999")
+    assert response.status_code == 404
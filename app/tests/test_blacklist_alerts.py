@@ -0,0 +1,162 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from app.database import engine
+from app.main import app
+
+client = TestClient(app)
+
+NAMES = ["John", "John", "John", "Jon", "Maria"]
+
+
+@pytest.fixture(scope="function", autouse=True)
+def setup_and_teardown():
+    yield
+    with engine.begin() as connection:
+        connection.execute(text("TRUNCATE blacklist CASCADE"))
+        connection.execute(text("TRUNCATE person CASCADE"))
+        connection.execute(text("TRUNCATE config CASCADE"))
+        connection.execute(text("TRUNCATE audit_log CASCADE"))
+        connection.execute(text('TRUNCATE "user" CASCADE'))
+
+
+@pytest.fixture
+def user_id():
+    with engine.begin() as connection:
+        user_id = connection.execute(
+            text(
+                'INSERT INTO "user" (username, email) '
+                "VALUES ('analyst', 'analyst@example.com') RETURNING id"
+            )
+        ).scalar_one()
+        connection.execute(text("SELECT set_current_user_id(:id)"), {"id": user_id})
+        connection.execute(
+            text(
+                "INSERT INTO config (name, value) VALUES "
+                "('max_string_distance_to_match', '3'), "
+                "('save_all_comparison_results', 'false')"
+            )
+        )
+        blacklist_id = connection.execute(
+            text("INSERT INTO blacklist (short_name) VALUES ('LPB') RETURNING id")
+        ).scalar_one()
+        connection.execute(
+            text(
+                "WITH p AS (INSERT INTO blacklist_person "
+                "(blacklist_id, type, official_registration_number) "
+                "VALUES (:id, 'natural', 'A-1') RETURNING id) "
+                "INSERT INTO blacklist_natural_person_details "
+                "(id, name, first_last_name, second_last_name) "
+                "SELECT id, 'John', 'Doe', 'Smith' FROM p"
+            ),
+            {"id": blacklist_id},
+        )
+        for name in NAMES:
+            connection.execute(
+                text(
+                    "WITH p AS (INSERT INTO person (type) VALUES ('natural') RETURNING id) "
+                    "INSERT INTO natural_person_details "
+                    "(person_id, name, first_last_name, second_last_name) "
+                    "SELECT id, :name, 'Doe', 'Smith' FROM p"
+                ),
+                {"name": name},
+            )
+    return user_id
+
+
+def generate(user_id, **params):
+    response = client.post(
+        "/blacklists/alerts/generate",
+        params=params,
+        headers={"X-User-Id": str(user_id)},
+    )
+    assert response.status_code == 200
+    return response.json()["created"]
+
+
+def transition(user_id, alert_ids, state):
+    response = client.post(
+        "/blacklists/alerts/transitions",
+        json={"alert_ids": alert_ids, "state": state},
+        headers={"X-User-Id": str(user_id)},
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_generate_alerts_once_per_match(user_id):
+    assert generate(user_id, min_score=1) == 3
+    assert generate(user_id, min_score=1) == 0
+    # the fuzzy "Jon Doe Smith" match is below 1
+    assert generate(user_id) == 1
+    assert generate(user_id) == 0
+
+
+def test_alert_inbox_pagination(user_id):
+    generate(user_id)
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 3}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/blacklists/alerts", params=params)
+        assert response.status_code == 200
+        page = response.json()
+        seen.extend(item["id"] for item in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert len(seen) == 4
+    assert seen == sorted(seen)
+    assert all(
+        item["state"] == "pending"
+        for item in client.get("/blacklists/alerts").json()["items"]
+    )
+    assert client.get("/blacklists/alerts", params={"state": "closed"}).json() == {
+        "items": [],
+        "next_cursor": None,
+    }
+    response = client.get("/blacklists/alerts", params={"date_to": "2000-01-01"})
+    assert response.json()["items"] == []
+    response = client.get("/blacklists/alerts", params={"cursor": "not a cursor"})
+    assert response.status_code == 400
+
+
+def test_bulk_transitions(user_id):
+    generate(user_id)
+    alert_ids = [
+        item["id"] for item in client.get("/blacklists/alerts").json()["items"]
+    ]
+
+    result = transition(user_id, alert_ids[:2], "suppressed")
+    assert result == {"updated": alert_ids[:2], "skipped": []}
+
+    result = transition(user_id, alert_ids[1:3] + [0], "discarded")
+    assert result == {"updated": alert_ids[1:3], "skipped": [0]}
+
+    # discarded alerts are final
+    result = transition(user_id, alert_ids[1:3], "pending")
+    assert result == {"updated": [], "skipped": alert_ids[1:3]}
+
+    result = transition(user_id, alert_ids[:1], "pending")
+    assert result == {"updated": alert_ids[:1], "skipped": []}
+
+    page = client.get("/blacklists/alerts", params={"state": "discarded"}).json()
+    assert [item["id"] for item in page["items"]] == alert_ids[1:3]
+    assert all(item["updated_by"] == user_id for item in page["items"])
+    assert all(
+        item["blacklist_person"]["official_registration_number"] == "A-1"
+        for item in page["items"]
+    )
+    pending = client.get("/blacklists/alerts").json()["items"]
+    assert [item["id"] for item in pending] == [alert_ids[0], alert_ids[3]]
+
+
+def test_transitions_require_user(user_id):
+    response = client.post(
+        "/blacklists/alerts/transitions", json={"alert_ids": [1], "state": "closed"}
+    )
+    assert response.status_code == 422
@@ -0,0 +1,107 @@
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from app.core.config_cache import ConfigCache
+from app.database import SessionLocal, engine
+from app.main import app
+
+
+@pytest.fixture(scope="function", autouse=True)
+def setup_and_teardown():
+    with engine.begin() as connection:
+        user_id = connection.execute(
+            text(
+                'INSERT INTO "user" (username, email) '
+                "VALUES ('admin', 'admin@example.com') RETURNING id"
+            )
+        ).scalar_one()
+        connection.execute(text("SELECT set_current_user_id(:id)"), {"id": user_id})
+        connection.execute(
+            text(
+                "INSERT INTO config (name, value) VALUES "
+                "('max_string_distance_to_match', '3'), "
+                "('save_all_comparison_results', 'false'), "
+                "('name_similarity_threshold', '0.4')"
+            )
+        )
+    yield
+    with engine.begin() as connection:
+        connection.execute(text("TRUNCATE config CASCADE"))
+        connection.execute(text("TRUNCATE audit_log CASCADE"))
+        connection.execute(text('TRUNCATE "user" CASCADE'))
+
+
+def update_config(name, value):
+    with engine.begin() as connection:
+        connection.execute(text('SELECT set_current_user_id(id) FROM "user" LIMIT 1'))
+        connection.execute(
+            text("UPDATE config SET value = :value WHERE name = :name"),
+            {"name": name, "value": value},
+        )
+
+
+def test_typed_values():
+    cache = ConfigCache(ttl_seconds=60)
+    with SessionLocal() as session:
+        assert cache.get_int(session, "max_string_distance_to_match") == 3
+        assert cache.get_bool(session, "save_all_comparison_results") is False
+        assert cache.get_float(session, "name_similarity_threshold") == 0.4
+        assert cache.get(session, "missing") is None
+        assert cache.get_int(session, "missing", 7) == 7
+
+    update_config("save_all_comparison_results", "maybe")
+    cache.invalidate()
+    with SessionLocal() as session, pytest.raises(ValueError):
+        cache.get_bool(session, "save_all_comparison_results")
+
+
+def test_values_are_cached_until_invalidated():
+    cache = ConfigCache(ttl_seconds=60)
+    with SessionLocal() as session:
+        assert cache.get_int(session, "max_string_distance_to_match") == 3
+    update_config("max_string_distance_to_match", "2")
+    with SessionLocal() as session:
+        assert cache.get_int(session, "max_string_distance_to_match") == 3
+        cache.invalidate()
+        assert cache.get_int(session, "max_string_distance_to_match") == 2
+
+
+def test_listener_invalidates_on_notify():
+    cache = ConfigCache(ttl_seconds=60)
+    cache.start(poll_seconds=0.1)
+    try:
+        time.sleep(0.5)
+        with SessionLocal() as session:
+            assert cache.get_int(session, "max_string_distance_to_match") == 3
+        update_config("max_string_distance_to_match", "2")
+        deadline = time.monotonic() + 10
+        with SessionLocal() as session:
+            while (
+                cache.get_int(session, "max_string_distance_to_match") != 2
+                and time.monotonic() < deadline
+            ):
+                session.rollback()
+                time.sleep(0.05)
+            assert cache.get_int(session, "max_string_distance_to_match") == 2
+    finally:
+        cache.stop(timeout=10)
+
+
+def test_read_config_endpoints():
+    with TestClient(app) as client:
+        response = client.get("/config/max_string_distance_to_match")
+        assert response.status_code == 200
+        assert response.json() == {"name": "max_string_distance_to_match", "value": "3"}
+
+        response = client.get("/config/")
+        assert response.status_code == 200
+        assert [item["name"] for item in response.json()] == [
+            "max_string_distance_to_match",
+            "name_similarity_threshold",
+            "save_all_comparison_results",
+        ]
+
+        response = client.get("/config/missing")
+        assert response.status_code == 404
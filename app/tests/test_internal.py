@@ -0,0 +1,31 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from app.database import engine
+from app.main import app
+
+client = TestClient(app)
+
+
+def test_read_pool_metrics():
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+        in_use = client.get("/internal/pool").json()["sync"]["in_use"]
+    assert in_use >= 1
+
+    data = client.get("/internal/pool").json()
+    assert data["sync"]["pool"] == "TimedQueuePool"
+    assert data["sync"]["in_use"] == in_use - 1
+    assert data["sync"]["checkouts"] >= 1
+    assert data["sync"]["wait_seconds_max"] >= 0
+    # the suite runs the asyncpg engine without a pool, see app/tests/conftest.py
+    assert data["async"] == {
+        "pool": "NullPool",
+        "size": None,
+        "checked_in": None,
+        "in_use": None,
+        "overflow": None,
+        "checkouts": None,
+        "timeouts": None,
+        "wait_seconds_total": None,
+        "wait_seconds_max": None,
+    }
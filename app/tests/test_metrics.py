@@ -0,0 +1,89 @@
+import logging
+import re
+
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.core.metrics import RequestMetricsMiddleware, fingerprint, route_metrics
+from app.database import get_session
+from app.main import app
+
+client = TestClient(app)
+
+
+def metric(body, name, route):
+    match = re.search(
+        r'^{}{{route="{}"}} (\S+)$'.format(re.escape(name), re.escape(route)),
+        body,
+        re.MULTILINE,
+    )
+    return float(match.group(1)) if match else None
+
+
+def test_fingerprint():
+    assert (
+        fingerprint(
+            "SELECT a::TEXT FROM t\n  WHERE id IN ($1, $2) AND x = 'it''s' AND y > 10"
+        )
+        == "SELECT a::TEXT FROM t WHERE id IN (?) AND x = ? AND y > ?"
+    )
+    assert (
+        fingerprint("INSERT INTO t (a, b) VALUES (%(a_0)s, %(b_0)s), (%(a_1)s, 2)")
+        == "INSERT INTO t (a, b) VALUES (?)"
+    )
+
+
+def test_metrics_endpoint():
+    before = metric(
+        client.get("/internal/metrics").text,
+        "http_request_db_queries_count",
+        "GET /users/",
+    )
+    client.get("/users/?limit=5")
+    client.get("/users/?limit=5")
+
+    response = client.get("/internal/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert "# TYPE http_request_duration_seconds histogram" in body
+    count = metric(body, "http_request_db_queries_count", "GET /users/")
+    assert count == (before or 0) + 2
+    # one statement per request
+    assert metric(body, "http_request_db_queries_sum", "GET /users/") >= 2
+    assert metric(body, "http_request_db_seconds_sum", "GET /users/") > 0
+    assert (
+        'http_request_db_queries_bucket{route="GET /users/",le="+Inf"} '
+        + str(int(count))
+        in body
+    )
+    assert re.search(
+        r'http_route_slowest_statement_seconds\{route="GET /users/",'
+        r'statement="SELECT .*FROM \\"user\\"',
+        body,
+    )
+
+
+def test_sync_endpoint_and_slow_request_log(caplog):
+    instrumented = FastAPI()
+
+    @instrumented.get("/work")
+    def work(session: Session = Depends(get_session)):
+        for i in range(3):
+            session.execute(text("SELECT pg_sleep(0.01), :i"), {"i": i})
+        return {}
+
+    instrumented_client = TestClient(
+        RequestMetricsMiddleware(instrumented, slow_request_ms=20)
+    )
+    with caplog.at_level(logging.WARNING, logger="app.core.metrics"):
+        instrumented_client.get("/work")
+    assert len(caplog.records) == 1
+    message = caplog.records[0].getMessage()
+    assert message.startswith("Slow request GET /work:")
+    assert ", 3 statements in " in message
+    assert message.count("SELECT pg_sleep(?), ?") == 3
+
+    body = route_metrics.render()
+    assert metric(body, "http_request_db_queries_sum", "GET /work") == 3
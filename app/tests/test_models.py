@@ -0,0 +1,21 @@
+import pytest
+from sqlalchemy import inspect
+
+from app.database import Base, engine
+from app import models  # noqa: F401
+
+
+@pytest.mark.parametrize("table", Base.metadata.sorted_tables, ids=lambda t: t.name)
+def test_model_matches_schema(table):
+    """
+    The declared models have to follow the tables the sql/ scripts create.
+    """
+    columns = {c["name"]: c for c in inspect(engine).get_columns(table.name)}
+    assert list(table.columns.keys()) == list(columns)
+    for column in table.columns:
+        reflected = columns[column.name]
+        assert column.nullable == reflected["nullable"], column.name
+        assert column.type.compile(engine.dialect) == reflected["type"].compile(
+            engine.dialect
+        ), column.name
+        assert (column.computed is not None) == ("computed" in reflected), column.name
@@ -0,0 +1,130 @@
+import time
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from app.auth import require_permissions
+from app.core.permission import Permission, mask_permissions, permission_mask
+from app.core.permission_cache import PermissionCache, permission_cache
+from app.database import SessionLocal, engine
+
+secured = FastAPI()
+
+
+@secured.get("/users")
+def read_users(user_id: int = Depends(require_permissions(Permission.READ_USER))):
+    return {"user_id": user_id}
+
+
+client = TestClient(secured)
+
+
+@pytest.fixture(scope="function", autouse=True)
+def setup_and_teardown():
+    yield
+    with engine.begin() as connection:
+        connection.execute(text("TRUNCATE role CASCADE"))
+        connection.execute(text('TRUNCATE "user" CASCADE'))
+    permission_cache.invalidate()
+
+
+@pytest.fixture
+def user_id():
+    with engine.begin() as connection:
+        user_id = connection.execute(
+            text(
+                'INSERT INTO "user" (username, email) '
+                "VALUES ('reader', 'reader@example.com') RETURNING id"
+            )
+        ).scalar_one()
+        role_id = connection.execute(
+            text("INSERT INTO role (name) VALUES ('reader') RETURNING id")
+        ).scalar_one()
+        connection.execute(
+            text(
+                "INSERT INTO role_permission (role_id, permission) VALUES "
+                "(:role_id, 'read_user'), (:role_id, 'read_role')"
+            ),
+            {"role_id": role_id},
+        )
+    return user_id
+
+
+def assign_reader_role(user_id):
+    with engine.begin() as connection:
+        connection.execute(
+            text(
+                "INSERT INTO user_role (user_id, role_id) "
+                "SELECT :user_id, id FROM role WHERE name = 'reader'"
+            ),
+            {"user_id": user_id},
+        )
+
+
+def wait_for(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    return condition()
+
+
+def test_permission_mask():
+    permissions = [Permission.READ_USER, Permission.DELETE_RISK_MATRIX]
+    assert mask_permissions(permission_mask(permissions)) == permissions
+    assert permission_mask(["read_user"]) == permission_mask([Permission.READ_USER])
+    assert permission_mask([]) == 0
+    assert len({permission_mask([p]) for p in Permission}) == len(Permission)
+
+
+def test_mask_is_cached_until_invalidated(user_id):
+    cache = PermissionCache(ttl_seconds=60)
+    with SessionLocal() as session:
+        assert cache.mask(session, user_id) == 0
+        assert cache.mask(session, user_id + 1) is None
+    assign_reader_role(user_id)
+    with SessionLocal() as session:
+        assert cache.mask(session, user_id) == 0
+        cache.invalidate()
+        assert mask_permissions(cache.mask(session, user_id)) == [
+            Permission.READ_USER,
+            Permission.READ_ROLE,
+        ]
+
+
+def test_require_permissions(user_id, count_queries):
+    permission_cache.start(poll_seconds=0.1)
+    try:
+        response = client.get("/users", headers={"X-User-Id": str(user_id)})
+        assert response.status_code == 403
+        response = client.get("/users", headers={"X-User-Id": str(user_id + 1)})
+        assert response.status_code == 401
+        response = client.get("/users")
+        assert response.status_code == 422
+
+        # the listener drops the cache once the role is assigned
+        assign_reader_role(user_id)
+        assert wait_for(
+            lambda: client.get(
+                "/users", headers={"X-User-Id": str(user_id)}
+            ).status_code
+            == 200
+        )
+        with count_queries() as queries:
+            response = client.get("/users", headers={"X-User-Id": str(user_id)})
+        assert response.json() == {"user_id": user_id}
+        assert queries.count == 0
+
+        with engine.begin() as connection:
+            connection.execute(
+                text('UPDATE "user" SET is_active = FALSE WHERE id = :id'),
+                {"id": user_id},
+            )
+        assert wait_for(
+            lambda: client.get(
+                "/users", headers={"X-User-Id": str(user_id)}
+            ).status_code
+            == 401
+        )
+    finally:
+        permission_cache.stop(timeout=10)
@@ -0,0 +1,202 @@
+import pytest
+from sqlalchemy import text
+from app.database import SessionLocal, engine
+from app.services.rescreen import BlacklistMatcher, rescreen
+
+SEARCH_QUERY = text(
+    "SELECT person_id, blacklist_person_id, match, match_score, match_details "
+    "FROM blacklist_search ORDER BY person_id, blacklist_person_id"
+)
+
+PERSONS = [
+    ("John", "Doe", "Smith", "VARD123456AAAAAA12", None),
+    ("Jon", "Doe", "Smith", None, None),
+    ("Maria", "Lopez", None, None, "LOPM123456AAA"),
+    ("Mario", "Lopes", None, None, None),
+    ("Pedro", "Perez", "Garcia", None, None),
+    ("Maria", "Vazquez", "de Gonzalez", None, None),
+    ("Marya", "Gonsales", "Vasques", None, None),
+]
+
+ENTRIES = [
+    ("John", "Doe", "Smith", None, None),
+    ("Maria", "Lopez", None, None, None),
+    ("Ana", "Lopez", None, "VARD123456AAAAAA12", "LOPM123456AAA"),
+    ("María", "González", "Vázquez", None, None),
+]
+
+
+@pytest.fixture(scope="function", autouse=True)
+def setup_and_teardown():
+    yield
+    with engine.begin() as connection:
+        connection.execute(text("TRUNCATE blacklist_search_history"))
+        connection.execute(text("TRUNCATE blacklist CASCADE"))
+        connection.execute(text("TRUNCATE person CASCADE"))
+        connection.execute(text("TRUNCATE config CASCADE"))
+        connection.execute(text("TRUNCATE audit_log CASCADE"))
+        connection.execute(text('TRUNCATE "user" CASCADE'))
+
+
+def populate(connection):
+    user_id = connection.execute(
+        text(
+            'INSERT INTO "user" (username, email) '
+            "VALUES ('analyst', 'analyst@example.com') RETURNING id"
+        )
+    ).scalar_one()
+    connection.execute(text("SELECT set_current_user_id(:id)"), {"id": user_id})
+    connection.execute(
+        text(
+            "INSERT INTO config (name, value) VALUES "
+            "('max_string_distance_to_match', '3'), "
+            "('save_all_comparison_results', 'false')"
+        )
+    )
+    blacklist_id = connection.execute(
+        text("INSERT INTO blacklist (short_name) VALUES ('LPB') RETURNING id")
+    ).scalar_one()
+    for number, (name, first, second, curp, rfc) in enumerate(ENTRIES):
+        connection.execute(
+            text(
+                "WITH p AS (INSERT INTO blacklist_person "
+                "(blacklist_id, type, official_registration_number) "
+                "VALUES (:blacklist_id, 'natural', :number) RETURNING id) "
+                "INSERT INTO blacklist_natural_person_details "
+                "(id, curp, rfc, name, first_last_name, second_last_name) "
+                "SELECT id, :curp, :rfc, :name, :first, :second FROM p"
+            ),
+            dict(
+                blacklist_id=blacklist_id,
+                number=str(number),
+                curp=curp,
+                rfc=rfc,
+                name=name,
+                first=first,
+                second=second,
+            ),
+        )
+    # the triggers screen every person against the entries above
+    for name, first, second, curp, rfc in PERSONS:
+        connection.execute(
+            text(
+                "WITH p AS (INSERT INTO person (type) VALUES ('natural') RETURNING id) "
+                "INSERT INTO natural_person_details "
+                "(person_id, curp, rfc, name, first_last_name, second_last_name) "
+                "SELECT id, :curp, :rfc, :name, :first, :second FROM p"
+            ),
+            dict(curp=curp, rfc=rfc, name=name, first=first, second=second),
+        )
+    return blacklist_id
+
+
+def test_rescreen_matches_triggers():
+    with engine.begin() as connection:
+        populate(connection)
+        screened = connection.execute(SEARCH_QUERY).all()
+        connection.execute(text("DELETE FROM blacklist_search"))
+    assert screened
+
+    progress = []
+    with SessionLocal() as session:
+        result = rescreen(session, chunk_size=2, workers=2, progress=progress.append)
+        session.commit()
+
+    assert result.processed == result.total == len(PERSONS)
+    assert result.hits == len(screened)
+    assert progress[-1].processed == len(PERSONS)
+    with engine.begin() as connection:
+        assert connection.execute(SEARCH_QUERY).all() == screened
+
+
+def test_rescreen_dry_run():
+    with engine.begin() as connection:
+        populate(connection)
+        connection.execute(text("DELETE FROM blacklist_search"))
+
+    with SessionLocal() as session:
+        result = rescreen(session, workers=1, dry_run=True)
+
+    assert result.hits > 0
+    with engine.begin() as connection:
+        assert (
+            connection.execute(text("SELECT count(*) FROM blacklist_search")).scalar()
+            == 0
+        )
+
+
+def test_rescreen_keeps_one_result_per_pair():
+    with engine.begin() as connection:
+        populate(connection)
+        screened = connection.execute(SEARCH_QUERY).all()
+
+    # same day: the results of the triggers are kept as they are
+    with SessionLocal() as session:
+        rescreen(session, workers=1)
+        session.commit()
+    with engine.begin() as connection:
+        assert connection.execute(SEARCH_QUERY).all() == screened
+        connection.execute(
+            text("UPDATE blacklist_search SET search_date = CURRENT_DATE - 1")
+        )
+        history = connection.execute(
+            text("SELECT count(*) FROM blacklist_search_history")
+        ).scalar()
+
+    # later day: the results are replaced and the previous ones kept
+    with SessionLocal() as session:
+        rescreen(session, workers=1)
+        session.commit()
+    with engine.begin() as connection:
+        assert connection.execute(SEARCH_QUERY).all() == screened
+        assert connection.execute(
+            text(
+                "SELECT count(*) FROM blacklist_search "
+                "WHERE search_date = CURRENT_DATE"
+            )
+        ).scalar() == len(screened)
+        assert connection.execute(
+            text("SELECT count(*) FROM blacklist_search_history")
+        ).scalar() == history + len(screened)
+
+
+def test_matcher_exact_matches_skip_fuzzy():
+    matcher = BlacklistMatcher(
+        [
+            (1, "JOHN DOE SMITH", None, None, "DOE JOHN SMITH", "JN SM0 T"),
+            (2, "JON DOE SMITH", None, None, "DOE JON SMITH", "JN SM0 T"),
+        ],
+        max_distance=2,
+    )
+    hits = matcher.screen((10, "JOHN DOE SMITH", None, None, "DOE JOHN SMITH", "X"))
+    assert [(hit[1], hit[3]) for hit in hits] == [(1, 1)]
+
+    hits = matcher.screen((11, "JOHN DOE SMIT", None, None, "DOE JOHN SMIT", "X"))
+    assert [(hit[1], hit[3]) for hit in hits] == [(1, 0.9231), (2, 0.8462)]
+
+
+def test_matcher_phonetic_key():
+    matcher = BlacklistMatcher(
+        [
+            (
+                1,
+                "MARIA GONZALEZ VAZQUEZ",
+                None,
+                None,
+                "GONZALEZ MARIA VAZQUEZ",
+                "FSKS KNSL MR",
+            )
+        ],
+        max_distance=2,
+    )
+    hits = matcher.screen(
+        (
+            10,
+            "MARYA GONSALES VASQUES",
+            None,
+            None,
+            "GONSALES MARYA VASQUES",
+            "FSKS KNSL MR",
+        )
+    )
+    assert [(hit[1], hit[3]) for hit in hits] == [(1, 0.7727)]
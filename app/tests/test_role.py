@@ -67,6 +67,97 @@ def test_list_roles(role_data):
     assert first_role["name"] == role_data["name"]
 
 
+def test_list_roles_query_count(role_data, count_queries):
+    client.post("/roles/", json=role_data)
+    with count_queries() as one_role:
+        response = client.get("/roles/?limit=100")
+    assert len(response.json()) == 1
+
+    for i in range(20):
+        client.post("/roles/", json=dict(role_data, name="role{}".format(i)))
+    with count_queries() as many_roles:
+        response = client.get("/roles/?limit=100")
+    data = response.json()
+    assert len(data) == 21
+    assert all(len(role["permissions"]) == 3 for role in data)
+    # the roles and the permissions of all of them
+    assert many_roles.count == one_role.count == 2
+
+
+def test_list_roles_cursor_pagination(role_data):
+    for i in range(5):
+        client.post("/roles/", json=dict(role_data, name="role{}".format(i)))
+
+    response = client.get("/roles/", params={"limit": 3})
+    assert [role["name"] for role in response.json()] == ["role0", "role1", "role2"]
+    cursor = response.headers["X-Next-Cursor"]
+    response = client.get("/roles/", params={"limit": 3, "cursor": cursor})
+    assert [role["name"] for role in response.json()] == ["role3", "role4"]
+    assert "X-Next-Cursor" not in response.headers
+
+    response = client.get("/roles/", params={"cursor": "WyJ4Il0="})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "invalid cursor"
+    response = client.get("/roles/", params={"cursor": cursor, "skip": 1})
+    assert response.status_code == 400
+
+
+def test_role_endpoints_query_count(role_data, count_queries):
+    with count_queries() as queries:
+        role_id = client.post("/roles/", json=role_data).json()["id"]
+    # name check, role and permissions
+    assert queries.count == 3
+
+    with count_queries() as queries:
+        client.get(f"/roles/{role_id}")
+    assert queries.count == 2
+
+    with count_queries() as queries:
+        response = client.put(
+            f"/roles/{role_id}",
+            json=dict(role_data, permissions=[p.value for p in Permission]),
+        )
+    assert len(response.json()["permissions"]) == len(Permission)
+    # role and its permissions, name check and insert of the new permissions
+    assert queries.count == 4
+
+
+def test_update_role_permissions_by_diff(role_data):
+    role_id = client.post("/roles/", json=role_data).json()["id"]
+
+    def permission_ids():
+        with engine.connect() as connection:
+            return dict(
+                connection.execute(
+                    text(
+                        "SELECT permission::TEXT, id FROM role_permission "
+                        "WHERE role_id = :role_id"
+                    ),
+                    {"role_id": role_id},
+                ).all()
+            )
+
+    before = permission_ids()
+    response = client.put(
+        f"/roles/{role_id}",
+        json=dict(
+            role_data,
+            permissions=[Permission.CREATE_ROLE, Permission.READ_ROLE, "read_user"],
+        ),
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert set(response.json()["permissions"]) == {
+        "create_role",
+        "read_role",
+        "read_user",
+    }
+    after = permission_ids()
+    # unchanged permissions keep their rows
+    assert after["create_role"] == before["create_role"]
+    assert after["read_role"] == before["read_role"]
+    assert "delete_role" not in after
+
+
 def test_read_role():
     # First, create a role to read
     role_payload = {
@@ -0,0 +1,79 @@
+import random
+
+import pytest
+from app.services.edit_distance import levenshtein, match_score
+from app.services.screening_index import NameIndex, normalize_name
+
+
+def naive_levenshtein(a, b):
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(
+                min(
+                    previous[j] + 1,
+                    current[j - 1] + 1,
+                    previous[j - 1] + (char_a != char_b),
+                )
+            )
+        previous = current
+    return previous[-1]
+
+
+def random_name(rng):
+    return "".join(rng.choice("ABCDE ") for _ in range(rng.randint(0, 14)))
+
+
+def test_levenshtein_matches_naive_implementation():
+    rng = random.Random(1)
+    for _ in range(2000):
+        a, b = random_name(rng), random_name(rng)
+        assert levenshtein(a, b) == naive_levenshtein(a, b), (a, b)
+
+
+def test_match_score_rounds_like_numeric():
+    assert match_score("JOHN DOE SMITH", 0) == 1.0
+    assert match_score("JOHNN DOE SMITH", 1) == 0.9333
+    assert match_score("ABCDEFG", 1) == 0.8571
+
+
+@pytest.mark.parametrize("max_distance", [0, 1, 2, 3])
+def test_search_matches_brute_force(max_distance):
+    rng = random.Random(max_distance)
+    names = [random_name(rng) for _ in range(300)]
+    index = NameIndex(max_distance=3)
+    for blacklist_person_id, name in enumerate(names, 1):
+        index.add(blacklist_person_id, "natural", name)
+
+    for _ in range(50):
+        query = random_name(rng)
+        expected = {
+            blacklist_person_id
+            for blacklist_person_id, name in enumerate(names, 1)
+            if naive_levenshtein(normalize_name(name), normalize_name(query))
+            <= max_distance
+        }
+        found = {
+            match.blacklist_person_id for match in index.search(query, max_distance)
+        }
+        assert found == expected, query
+
+
+def test_search_shares_names_and_skips_removed_entries():
+    index = NameIndex(max_distance=2)
+    index.add(1, "natural", "John Doe  Smith")
+    index.add(2, "natural", "JOHN DOE SMITH")
+    index.add(3, "juridical", "ACME SA DE CV")
+    index.remove(1)
+
+    matches = index.search("johnn doe smith")
+    assert [(m.blacklist_person_id, m.distance) for m in matches] == [(2, 1)]
+    assert matches[0].match_score == match_score("JOHNN DOE SMITH", 1)
+    assert index.search("ACME SA DE C.V.")[0].type == "juridical"
+
+
+def test_search_rejects_distance_above_index_limit():
+    index = NameIndex(max_distance=1)
+    with pytest.raises(ValueError):
+        index.search("JOHN", 2)
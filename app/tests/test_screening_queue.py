@@ -0,0 +1,224 @@
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from app.core.config import settings
+from app.database import SessionLocal, engine
+from app.main import app
+from app.services import screening_queue
+from app.services.screening_queue import drain, run_worker
+
+client = TestClient(app)
+
+
+@pytest.fixture(scope="function", autouse=True)
+def setup_and_teardown():
+    with engine.begin() as connection:
+        user_id = connection.execute(
+            text(
+                'INSERT INTO "user" (username, email) '
+                "VALUES ('analyst', 'analyst@example.com') RETURNING id"
+            )
+        ).scalar_one()
+        connection.execute(text("SELECT set_current_user_id(:id)"), {"id": user_id})
+        connection.execute(
+            text(
+                "INSERT INTO config (name, value) VALUES "
+                "('max_string_distance_to_match', '3'), "
+                "('save_all_comparison_results', 'false'), "
+                "('screening_mode', 'async')"
+            )
+        )
+        blacklist_id = connection.execute(
+            text("INSERT INTO blacklist (short_name) VALUES ('LPB') RETURNING id")
+        ).scalar_one()
+        connection.execute(
+            text(
+                "WITH p AS (INSERT INTO blacklist_person "
+                "(blacklist_id, type, official_registration_number) "
+                "VALUES (:id, 'natural', 'A-1') RETURNING id) "
+                "INSERT INTO blacklist_natural_person_details "
+                "(id, name, first_last_name, second_last_name) "
+                "SELECT id, 'John', 'Doe', 'Smith' FROM p"
+            ),
+            {"id": blacklist_id},
+        )
+    yield
+    with engine.begin() as connection:
+        connection.execute(text("TRUNCATE screening_queue"))
+        connection.execute(text("TRUNCATE blacklist CASCADE"))
+        connection.execute(text("TRUNCATE person CASCADE"))
+        connection.execute(text("TRUNCATE config CASCADE"))
+        connection.execute(text("TRUNCATE audit_log CASCADE"))
+        connection.execute(text('TRUNCATE "user" CASCADE'))
+
+
+def create_person(name="John"):
+    with engine.begin() as connection:
+        return connection.execute(
+            text(
+                "WITH p AS (INSERT INTO person (type) VALUES ('natural') RETURNING id) "
+                "INSERT INTO natural_person_details "
+                "(person_id, name, first_last_name, second_last_name) "
+                "SELECT id, :name, 'Doe', 'Smith' FROM p RETURNING person_id"
+            ),
+            {"name": name},
+        ).scalar_one()
+
+
+def count(query, **params):
+    with engine.begin() as connection:
+        return connection.execute(text(query), params).scalar_one()
+
+
+def test_async_mode_queues_persons():
+    person_id = create_person()
+    assert count("SELECT count(*) FROM blacklist_search") == 0
+    assert count("SELECT person_id FROM screening_queue") == person_id
+
+    response = client.get("/screening/queue")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["depth"] == 1
+    assert data["failed"] == 0
+    assert data["lag_seconds"] >= 0
+
+
+def test_drain_screens_and_alerts():
+    person_id = create_person()
+    create_person("Jon")
+    create_person("Maria")
+
+    with SessionLocal() as session:
+        result = drain(session, batch_size=2, max_attempts=5, retry_seconds=30)
+
+    assert result.processed == 3
+    assert result.failed == 0
+    assert result.matches == 2
+    assert result.alerts == 2
+    assert count("SELECT count(*) FROM screening_queue") == 0
+    assert count("SELECT count(*) FROM blacklist_alert WHERE state = 'pending'") == 2
+    assert client.get("/screening/queue").json()["depth"] == 0
+
+    # queued again, e.g. after a crash: nothing is written twice
+    with engine.begin() as connection:
+        connection.execute(
+            text("INSERT INTO screening_queue (person_id) VALUES (:id)"),
+            {"id": person_id},
+        )
+    with SessionLocal() as session:
+        result = drain(session, batch_size=2, max_attempts=5, retry_seconds=30)
+    assert result.processed == 1
+    assert result.matches == 0
+    assert result.alerts == 0
+    assert count("SELECT count(*) FROM blacklist_search") == 2
+
+
+def test_drain_keeps_failed_persons():
+    with engine.begin() as connection:
+        connection.execute(text('SELECT set_current_user_id(id) FROM "user" LIMIT 1'))
+        connection.execute(
+            text(
+                "UPDATE config SET value = 'not a number' "
+                "WHERE name = 'max_string_distance_to_match'"
+            )
+        )
+    create_person("Maria")
+    create_person("Ana")
+    max_attempts = settings.SCREENING_QUEUE_MAX_ATTEMPTS
+    kwargs = dict(batch_size=10, max_attempts=max_attempts, retry_seconds=30)
+
+    # one attempt each, the next ones wait for their retry
+    with SessionLocal() as session:
+        result = drain(session, **kwargs)
+        assert result.processed == 0
+        assert result.failed == 2
+        assert drain(session, **kwargs).failed == 0
+    assert count("SELECT max(attempts) FROM screening_queue") == 1
+    assert count(
+        "SELECT bool_and(next_attempt_at > clock_timestamp() + interval '29 seconds') "
+        "FROM screening_queue"
+    )
+
+    with SessionLocal() as session:
+        for _ in range(max_attempts - 1):
+            with engine.begin() as connection:
+                connection.execute(
+                    text(
+                        "UPDATE screening_queue SET next_attempt_at = clock_timestamp()"
+                    )
+                )
+            drain(session, **kwargs)
+    assert count(
+        "SELECT max(next_attempt_at - clock_timestamp()) FROM screening_queue"
+    ).total_seconds() > 30 * 2 ** (max_attempts - 2)
+    assert count("SELECT min(attempts) FROM screening_queue") == max_attempts
+    assert count("SELECT min(last_error) FROM screening_queue").startswith(
+        "invalid input"
+    )
+    data = client.get("/screening/queue").json()
+    assert data["depth"] == 0
+    assert data["failed"] == 2
+
+
+def test_worker_listens_for_queued_persons():
+    stop = threading.Event()
+    worker = threading.Thread(
+        target=run_worker,
+        kwargs=dict(
+            batch_size=10, poll_seconds=30, max_attempts=5, retry_seconds=30, stop=stop
+        ),
+    )
+    worker.start()
+    try:
+        time.sleep(0.5)
+        create_person()
+        deadline = time.monotonic() + 10
+        while count("SELECT count(*) FROM screening_queue") and (
+            time.monotonic() < deadline
+        ):
+            time.sleep(0.05)
+        assert count("SELECT count(*) FROM screening_queue") == 0
+        assert count("SELECT count(*) FROM blacklist_alert") == 1
+    finally:
+        stop.set()
+        with engine.begin() as connection:
+            connection.execute(text("NOTIFY screening_queue"))
+        worker.join(timeout=10)
+
+
+def test_worker_survives_database_errors(monkeypatch):
+    calls = []
+
+    def flaky_drain(session, batch_size, max_attempts, retry_seconds):
+        calls.append(session)
+        if len(calls) == 1:
+            raise OperationalError("SELECT 1", None, Exception("connection lost"))
+        return drain(session, batch_size, max_attempts, retry_seconds)
+
+    monkeypatch.setattr(screening_queue, "drain", flaky_drain)
+    create_person()
+    stop = threading.Event()
+    worker = threading.Thread(
+        target=run_worker,
+        kwargs=dict(
+            batch_size=10, poll_seconds=0.1, max_attempts=5, retry_seconds=30, stop=stop
+        ),
+    )
+    worker.start()
+    try:
+        deadline = time.monotonic() + 10
+        while count("SELECT count(*) FROM screening_queue") and (
+            time.monotonic() < deadline
+        ):
+            time.sleep(0.05)
+        assert count("SELECT count(*) FROM screening_queue") == 0
+        assert worker.is_alive()
+        # a new session after the error
+        assert calls[1] is not calls[0]
+    finally:
+        stop.set()
+        worker.join(timeout=10)
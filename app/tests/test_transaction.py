@@ -0,0 +1,214 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from app.cli import main
+from app.core.transaction_lookups import transaction_lookups
+from app.database import SessionLocal, engine
+from app.main import app
+from app.services.transaction_ingest import ingest_transactions, read_csv_records
+
+client = TestClient(app)
+
+HEADER = "effective_date,product_id,transaction_type_id,amount,counterpart\n"
+
+
+@pytest.fixture(scope="function", autouse=True)
+def setup_and_teardown():
+    yield
+    with engine.begin() as connection:
+        connection.execute(
+            text(
+                "TRUNCATE transaction, transaction_type, product, product_type CASCADE"
+            )
+        )
+        connection.execute(text('TRUNCATE "user" CASCADE'))
+    transaction_lookups.invalidate()
+
+
+@pytest.fixture
+def user_id():
+    response = client.post(
+        "/users/", json={"username": "operator", "email": "operator@example.com"}
+    )
+    return response.json()["id"]
+
+
+@pytest.fixture
+def lookups():
+    """
+    (product_id, transaction_type_id)
+    """
+    with engine.begin() as connection:
+        product_id = connection.execute(
+            text(
+                "WITH t AS (INSERT INTO product_type (name) VALUES ('Account') "
+                "RETURNING id) INSERT INTO product (name, product_type_id) "
+                "SELECT 'Account 1', id FROM t RETURNING id"
+            )
+        ).scalar_one()
+        transaction_type_id = connection.execute(
+            text("INSERT INTO transaction_type (name) VALUES ('Deposit') RETURNING id")
+        ).scalar_one()
+    return product_id, transaction_type_id
+
+
+def stored_transactions():
+    with engine.connect() as connection:
+        return connection.execute(
+            text(
+                "SELECT counterpart, amount::TEXT, effective_date::TEXT "
+                "FROM transaction ORDER BY id"
+            )
+        ).all()
+
+
+def test_ingest_csv(user_id, lookups):
+    product_id, type_id = lookups
+    body = HEADER + "".join(
+        [
+            "2024-01-31,{},{},100.50,ACME\n".format(product_id, type_id),
+            '2024-02-01,{},{},-3,"Doe, John"\n'.format(product_id, type_id),
+            "2024-02-01,{},{},1,Unknown product\n".format(product_id + 1, type_id),
+            "2024-02-30,{},{},1,Bad date\n".format(product_id, type_id),
+            "2024-02-01,{},{},1.001,Bad amount\n".format(product_id, type_id),
+            "2024-02-01,{},{},1, \n".format(product_id, type_id),
+            "2024-02-01,{}\n".format(product_id),
+            "2024-02-02,{},{},7,Last\n".format(product_id, type_id),
+        ]
+    )
+
+    response = client.post(
+        "/transactions/ingest?batch_size=4",
+        content=body,
+        headers={"X-User-Id": str(user_id), "Content-Type": "text/csv"},
+    )
+    assert response.status_code == 200, response.text
+    result = response.json()
+    assert (result["accepted"], result["rejected"]) == (3, 5)
+    assert [
+        (batch["first_line"], batch["last_line"], batch["accepted"])
+        for batch in result["batches"]
+    ] == [(2, 5, 2), (6, 9, 1)]
+    assert [
+        (reject["line"], reject["error"])
+        for batch in result["batches"]
+        for reject in batch["rejects"]
+    ] == [
+        (4, "product_id {} does not exist".format(product_id + 1)),
+        (5, "invalid effective_date: '2024-02-30'"),
+        (6, "invalid amount: '1.001'"),
+        (7, "counterpart is required"),
+        (8, "expected 5 columns, got 2"),
+    ]
+    assert stored_transactions() == [
+        ("ACME", "100.50", "2024-01-31"),
+        ("Doe, John", "-3.00", "2024-02-01"),
+        ("Last", "7.00", "2024-02-02"),
+    ]
+
+
+def test_ingest_ndjson(user_id, lookups):
+    product_id, type_id = lookups
+    rows = [
+        {
+            "product_id": product_id,
+            "transaction_type_id": type_id,
+            "counterpart": "ACME",
+            "amount": 12.5,
+            "effective_date": "2024-01-31",
+        },
+        {
+            "product_id": product_id,
+            "transaction_type_id": type_id + 1,
+            "counterpart": "ACME",
+            "amount": "1",
+            "effective_date": "2024-01-31",
+        },
+        {"product_id": str(product_id), "transaction_type_id": type_id},
+    ]
+    body = "\n".join(json.dumps(row) for row in rows) + "\n\n{nope\n[1]\n"
+
+    response = client.post(
+        "/transactions/ingest?file_format=ndjson",
+        content=body,
+        headers={"X-User-Id": str(user_id)},
+    )
+    assert response.status_code == 200, response.text
+    (batch,) = response.json()["batches"]
+    assert batch["accepted"] == 1
+    rejects = [(reject["line"], reject["error"]) for reject in batch["rejects"]]
+    assert rejects[:2] == [
+        (2, "transaction_type_id {} does not exist".format(type_id + 1)),
+        (3, "counterpart is required"),
+    ]
+    assert rejects[2][0] == 5 and rejects[2][1].startswith("invalid JSON")
+    assert rejects[3] == (6, "expected a JSON object")
+    assert stored_transactions() == [("ACME", "12.50", "2024-01-31")]
+
+
+def test_missing_columns(user_id):
+    response = client.post(
+        "/transactions/ingest",
+        content="product_id,amount\n1,1\n",
+        headers={"X-User-Id": str(user_id)},
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == (
+        "Missing columns: transaction_type_id, counterpart, effective_date"
+    )
+
+
+def test_batch_rejected_by_the_database(lookups):
+    """
+    A product deleted after the cache was loaded fails its batch on the
+    foreign key; the other batches are kept and the cache reloaded.
+    """
+    product_id, type_id = lookups
+    with engine.begin() as connection:
+        other_id = connection.execute(
+            text(
+                "INSERT INTO product (name, product_type_id) "
+                "SELECT 'Account 2', id FROM product_type RETURNING id"
+            )
+        ).scalar_one()
+    lines = [
+        "2024-01-01,{},{},1,First\n".format(product_id, type_id),
+        "2024-01-01,{},{},1,Deleted\n".format(other_id, type_id),
+        "2024-01-01,{},{},1,Third\n".format(product_id, type_id),
+    ]
+
+    with SessionLocal() as session:
+        transaction_lookups.lookups(session)
+        session.commit()
+        # no listener runs in the tests, so the cache misses the deletion
+        with engine.begin() as connection:
+            connection.execute(
+                text("DELETE FROM product WHERE id = :id"), {"id": other_id}
+            )
+        result = ingest_transactions(session, read_csv_records([HEADER] + lines), 2)
+
+    first, second = result.batches
+    assert (first.accepted, first.rejected) == (0, 2)
+    assert "transaction_product_id_fkey" in first.error
+    assert (second.accepted, second.rejected) == (1, 0)
+    assert [row[0] for row in stored_transactions()] == ["Third"]
+
+
+def test_cli(tmp_path, lookups, capsys):
+    product_id, type_id = lookups
+    path = tmp_path / "transactions.csv"
+    path.write_text(
+        HEADER
+        + "2024-01-01,{},{},10,ACME\n".format(product_id, type_id)
+        + "2024-01-01,{},{},10,ACME\n".format(product_id, type_id + 1)
+    )
+
+    assert main(["ingest-transactions", str(path)]) == 1
+    output = capsys.readouterr()
+    assert "Ingested 1 transactions, rejected 1" in output.out
+    assert (
+        "line 3: transaction_type_id {} does not exist".format(type_id + 1)
+        in output.err
+    )
@@ -1,9 +1,15 @@
+import csv
+import io
+import json
+from datetime import datetime
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import text
 from app.core.permission import Permission
 from app.database import engine
 from app.main import app
+from app.services.pagination import encode_cursor
 
 client = TestClient(app)
 
@@ -180,6 +186,17 @@ def test_list_users():
     assert response.status_code == 200
     data = response.json()
     assert len(data) == 5
+    assert set(data[0]) == {
+        "id",
+        "username",
+        "email",
+        "name",
+        "is_active",
+        "created_at",
+        "updated_at",
+    }
+    # the list is encoded from plain rows, in the same format as the schema
+    assert data[0] == client.get(f"/users/{data[0]['id']}").json()
 
 
 def test_search_user_by_email():
@@ -304,6 +321,59 @@ def test_list_users_pagination():
     assert data[0]["username"] == "user10"
 
 
+def test_list_users_cursor_pagination():
+    for i in range(25):
+        client.post(
+            "/users/", json={"username": f"user{i}", "email": f"user{i}@example.com"}
+        )
+
+    usernames = []
+    cursor = None
+    while True:
+        params = {"limit": 10} if cursor is None else {"limit": 10, "cursor": cursor}
+        response = client.get("/users/", params=params)
+        assert response.status_code == 200
+        usernames += [user["username"] for user in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+    assert usernames == [f"user{i}" for i in range(25)]
+
+    response = client.get("/users/", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "invalid cursor"
+    # well formed, but not an id
+    response = client.get("/users/", params={"cursor": "WyJ4Il0="})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "invalid cursor"
+
+    response = client.get("/users/", params={"cursor": encode_cursor(1), "offset": 5})
+    assert response.status_code == 400
+
+
+def test_export_users(monkeypatch):
+    monkeypatch.setattr("app.services.export.EXPORT_BATCH_SIZE", 2)
+    for i in range(5):
+        client.post(
+            "/users/",
+            json={"username": f"user{i}", "email": f"user{i}@example.com"},
+        )
+
+    response = client.get("/users/export")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["username"] for row in rows] == [f"user{i}" for i in range(5)]
+    assert rows[0]["is_active"] is True
+    datetime.fromisoformat(rows[0]["created_at"])
+
+    response = client.get("/users/export", params={"file_format": "csv"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["email"] for row in rows] == [f"user{i}@example.com" for i in range(5)]
+
+
 def test_create_user_name_optional():
     user_data = {
         "username": "testuser_no_name",
@@ -543,6 +613,21 @@ def test_get_user_roles():
     assert role2["id"] in role_ids
 
 
+def test_get_user_roles_query_count(count_queries):
+    user = create_user("roleuser9", "roleuser9@example.com", "Role User 9")
+    for i in range(10):
+        role = create_role("querycount{}".format(i), permissions=list(Permission))
+        client.post(f"/users/{user['id']}/roles/{role['id']}")
+
+    with count_queries() as queries:
+        response = client.get(f"/users/{user['id']}/roles/")
+    data = response.json()
+    assert len(data) == 10
+    assert all(len(role["permissions"]) == len(Permission) for role in data)
+    # the user, the roles and the permissions of all of them
+    assert queries.count == 3
+
+
 def test_get_user_roles_no_roles():
     # Create a user without roles
     user = create_user("roleuser8", "roleuser8@example.com", "Role User 8")
@@ -560,3 +645,72 @@ def test_get_roles_for_nonexistent_user():
     assert response.status_code == 404
     data = response.json()
     assert data["detail"] == "User not found"
+
+
+def test_create_users_batch(count_queries):
+    create_user("taken", "taken@example.com")
+    users = [
+        {"username": "analyst0", "email": "analyst0@example.com"},
+        {"username": "taken", "email": "other@example.com"},
+        {"username": "analyst1", "email": "taken@example.com"},
+        {"username": "analyst0", "email": "analyst0b@example.com"},
+        {"username": "analyst2", "email": "analyst2@example.com", "name": "Ana"},
+    ]
+    with count_queries() as queries:
+        response = client.post("/users/batch", json={"users": users})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["created"] == 2
+    assert [item["error"] for item in data["items"]] == [
+        None,
+        "Username already exists",
+        "Email already exists",
+        "Username already exists",
+        None,
+    ]
+    # the check of the existing users and one insert
+    assert queries.count == 2
+
+    user = client.get(f"/users/{data['items'][4]['id']}").json()
+    assert user["username"] == "analyst2"
+    assert user["name"] == "Ana"
+
+    response = client.post("/users/batch", json={"users": []})
+    assert response.status_code == 422
+
+
+def test_assign_roles_batch(count_queries):
+    users = [create_user(f"batch{i}", f"batch{i}@example.com") for i in range(3)]
+    roles = [create_role(f"batchrole{i}") for i in range(2)]
+    client.post(f"/users/{users[0]['id']}/roles/{roles[0]['id']}")
+
+    assignments = [
+        {"user_id": user["id"], "role_id": role["id"]}
+        for user in users
+        for role in roles
+    ] + [
+        {"user_id": 9999, "role_id": roles[0]["id"]},
+        {"user_id": users[1]["id"], "role_id": 9999},
+        {"user_id": users[1]["id"], "role_id": roles[1]["id"]},
+    ]
+    with count_queries() as queries:
+        response = client.post("/users/roles/batch", json={"assignments": assignments})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["created"] == 5
+    assert [item["error"] for item in data["items"]] == [
+        "Role already assigned to user",
+        None,
+        None,
+        None,
+        None,
+        None,
+        "User not found",
+        "Role not found",
+        "Role already assigned to user",
+    ]
+    # users, roles and existing assignments, and one insert
+    assert queries.count == 4
+
+    response = client.get(f"/users/{users[2]['id']}/roles/")
+    assert {role["id"] for role in response.json()} == {role["id"] for role in roles}
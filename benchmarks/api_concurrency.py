@@ -0,0 +1,87 @@
+"""
+Benchmark: API throughput under concurrent clients.
+
+Usage:
+    uvicorn app.main:app --workers 1 --log-level warning &
+    python -m benchmarks.api_concurrency --url http://127.0.0.1:8000 --concurrency 50,200
+
+Sends --requests GET requests per concurrency level, spread over --paths, from
+that many concurrent clients, and reports requests per second, latency
+percentiles and errors. Run it against a server started from each release to
+compare them, e.g. the synchronous sessions in `async def` handlers, which
+serialize every request on the event loop, against the asyncpg stack
+(app/database.py). Start the server with `echo` off, logging every statement
+dominates the numbers otherwise.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+
+from benchmarks.screening_index import percentile
+
+
+async def run_level(url, paths, concurrency, requests):
+    latencies = []
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def client_loop(client):
+        nonlocal errors
+        for i in remaining:
+            started = time.perf_counter()
+            try:
+                response = await client.get(paths[i % len(paths)])
+                if response.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(client_loop(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(requests / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.5), 2),
+        "p99_ms": round(percentile(latencies, 0.99), 2),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--paths", default="/users/?limit=20,/roles/?limit=20")
+    parser.add_argument("--concurrency", default="50,200")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    paths = args.paths.split(",")
+    results = []
+    for concurrency in (int(c) for c in args.concurrency.split(",")):
+        result = await run_level(args.url, paths, concurrency, args.requests)
+        results.append(result)
+        print(
+            "clients={concurrency:<4} {requests_per_second:>8.1f} req/s "
+            "p50={p50_ms:.1f}ms p99={p99_ms:.1f}ms errors={errors}".format(**result)
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"paths": paths, "results": results}, f, indent=2)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
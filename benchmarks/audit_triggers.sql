@@ -0,0 +1,156 @@
+-- Benchmark: write amplification of the audit triggers, row level against statement level.
+--
+-- Usage:
+--   psql -d holocron -v rows=100000 -f benchmarks/audit_triggers.sql
+--
+-- Inserts :rows rows in one statement into an audited copy of a list table and then updates two of their columns,
+-- as a list load and a rescreen do, with:
+--   * row: the previous setup, row level triggers and one B-tree per audit_log column;
+--   * statement: statement level triggers (add_audit_triggers statement_level) and the current audit_log indexes;
+--   * statement_changes: the same, storing only the changed columns on UPDATE (changed_columns_only).
+-- Reports per statement the time, the audit_log rows written, the WAL generated and the growth of audit_log and of
+-- its indexes. Everything runs inside a transaction that is rolled back; the index swap on audit_log locks it until
+-- then, so do not run it against a database in use.
+\set ON_ERROR_STOP on
+\if :{?rows}
+\else
+  \set rows 100000
+\endif
+BEGIN;
+
+SELECT
+  set_config('bench.rows', :'rows', TRUE);
+
+WITH bench_user AS (
+INSERT INTO "user" (username, email, name)
+    VALUES ('audit_bench', 'audit_bench@example.com', 'audit bench')
+  RETURNING
+    id)
+  SELECT
+    set_current_user_id (id)
+  FROM
+    bench_user;
+
+CREATE TEMP TABLE bench_audit_result (
+  mode TEXT,
+  operation TEXT,
+  elapsed_ms NUMERIC,
+  audit_rows BIGINT,
+  wal_bytes NUMERIC,
+  audit_heap_bytes BIGINT,
+  audit_index_bytes BIGINT
+);
+
+CREATE FUNCTION pg_temp.bench_audit (_mode TEXT, _statement_level BOOLEAN, _changed_columns_only BOOLEAN)
+  RETURNS VOID
+  AS $$
+DECLARE
+  _table TEXT := 'bench_audit_' || _mode;
+  _operation TEXT;
+  _started TIMESTAMPTZ;
+  _lsn PG_LSN;
+  _heap BIGINT;
+  _index BIGINT;
+  _audit_rows BIGINT;
+BEGIN
+  EXECUTE format('
+    CREATE TEMP TABLE %I (
+      id SERIAL PRIMARY KEY,
+      blacklist_id INTEGER NOT NULL,
+      name TEXT NOT NULL,
+      alias TEXT,
+      nationality TEXT,
+      date_of_birth DATE,
+      notes TEXT,
+      created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP NOT NULL,
+      updated_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP NOT NULL
+    )', _table);
+  PERFORM
+    add_audit_triggers (ARRAY[_table], _statement_level, _changed_columns_only);
+  FOREACH _operation IN ARRAY ARRAY['INSERT', 'UPDATE'] LOOP
+    SELECT
+      count(*) INTO _audit_rows
+    FROM
+      audit_log;
+    SELECT
+      sum(pg_relation_size(relid)),
+      sum(pg_indexes_size(relid)) INTO _heap,
+      _index
+    FROM
+      pg_partition_tree('audit_log');
+    _lsn := pg_current_wal_insert_lsn ();
+    _started := clock_timestamp();
+    IF _operation = 'INSERT' THEN
+      EXECUTE format('
+        INSERT INTO %I (blacklist_id, name, alias, nationality, date_of_birth)
+        SELECT 1, ''Person '' || g, ''Alias '' || g, ''MX'', DATE ''1970-01-01'' + g %% 10000
+        FROM generate_series(1, $1) g', _table)
+      USING current_setting('bench.rows')::INTEGER;
+    ELSE
+      EXECUTE format('UPDATE %I SET notes = ''reviewed'', updated_at = clock_timestamp()', _table);
+    END IF;
+    INSERT INTO bench_audit_result
+    SELECT
+      _mode,
+      _operation,
+      round(extract(epoch FROM clock_timestamp() - _started)::NUMERIC * 1000, 1),
+      (
+        SELECT
+          count(*)
+        FROM audit_log) - _audit_rows,
+      pg_current_wal_insert_lsn () - _lsn,
+      sum(pg_relation_size(relid)) - _heap,
+      sum(pg_indexes_size(relid)) - _index
+    FROM
+      pg_partition_tree('audit_log');
+  END LOOP;
+END;
+$$
+LANGUAGE plpgsql;
+
+-- before: one B-tree per column
+DROP INDEX idx_audit_log_record_changes, idx_audit_log_user_changes, idx_audit_log_changed_at_brin;
+
+CREATE INDEX bench_audit_log_table_name ON audit_log (table_name);
+
+CREATE INDEX bench_audit_log_operation_type ON audit_log (operation_type);
+
+CREATE INDEX bench_audit_log_record_id ON audit_log (record_id);
+
+CREATE INDEX bench_audit_log_changed_by ON audit_log (changed_by);
+
+CREATE INDEX bench_audit_log_changed_at ON audit_log (changed_at);
+
+SELECT
+  pg_temp.bench_audit ('row', FALSE, FALSE);
+
+DROP INDEX bench_audit_log_table_name, bench_audit_log_operation_type, bench_audit_log_record_id,
+  bench_audit_log_changed_by, bench_audit_log_changed_at;
+
+CREATE INDEX idx_audit_log_record_changes ON audit_log (table_name, record_id, changed_at, id);
+
+CREATE INDEX idx_audit_log_user_changes ON audit_log (changed_by, changed_at, id);
+
+CREATE INDEX idx_audit_log_changed_at_brin ON audit_log USING BRIN (changed_at);
+
+SELECT
+  pg_temp.bench_audit ('statement', TRUE, FALSE);
+
+SELECT
+  pg_temp.bench_audit ('statement_changes', TRUE, TRUE);
+
+SELECT
+  mode,
+  operation,
+  elapsed_ms,
+  audit_rows,
+  pg_size_pretty(wal_bytes) AS wal,
+  pg_size_pretty(audit_heap_bytes) AS audit_heap,
+  pg_size_pretty(audit_index_bytes) AS audit_indexes
+FROM
+  bench_audit_result
+ORDER BY
+  operation,
+  mode;
+
+ROLLBACK;
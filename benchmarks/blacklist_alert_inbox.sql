@@ -0,0 +1,139 @@
+-- Benchmark: alert inbox pages, OFFSET vs keyset pagination on idx_blacklist_alert_open.
+--
+-- Usage:
+--   psql -d holocron -v alerts=2000000 -f benchmarks/blacklist_alert_inbox.sql
+--
+-- Loads :alerts alerts over the last two years, 90% of them closed, and reads a page of 50 pending alerts at the
+-- start, the middle and the end of the queue, first with OFFSET and then with the keyset condition used by the API
+-- (app/services/blacklist_alerts.py). Everything runs inside a transaction that is rolled back.
+\set ON_ERROR_STOP on
+\if :{?alerts}
+\else
+  \set alerts 2000000
+\endif
+BEGIN;
+
+-- no audit or screening of the synthetic rows, needs a superuser
+SET LOCAL session_replication_role = replica;
+
+INSERT INTO person (id, type)
+SELECT
+  i,
+  'natural'
+FROM
+  generate_series(1, :alerts) i;
+
+INSERT INTO blacklist (id, short_name)
+  VALUES (1, 'BENCH');
+
+INSERT INTO blacklist_person (id, blacklist_id, type, official_registration_number)
+  VALUES (1, 1, 'natural', 'BENCH-1');
+
+INSERT INTO blacklist_search (id, person_id, blacklist_person_id, MATCH, match_score, search_date)
+SELECT
+  i,
+  i,
+  1,
+  TRUE,
+  1,
+  CURRENT_DATE - (i % 730)
+FROM
+  generate_series(1, :alerts) i;
+
+INSERT INTO blacklist_alert (blacklist_search_id, state, date)
+SELECT
+  i,
+  CASE WHEN i % 10 = 0 THEN
+    'pending'
+  ELSE
+    'closed'
+  END::alert_state,
+  CURRENT_DATE - (i % 730)
+FROM
+  generate_series(1, :alerts) i;
+
+ANALYZE blacklist_alert, blacklist_search;
+
+CREATE TEMP TABLE bench_result (
+  rows_skipped INTEGER,
+  method TEXT,
+  elapsed_ms NUMERIC
+);
+
+DO $$
+DECLARE
+  _pending INTEGER;
+  _offset INTEGER;
+  _after RECORD;
+  _started TIMESTAMPTZ;
+BEGIN
+  SELECT
+    count(*) INTO _pending
+  FROM
+    blacklist_alert
+  WHERE
+    state = 'pending';
+  FOR _page IN 0..2 LOOP
+    _offset := greatest(_pending * _page / 2 - 50, 0);
+    _started := clock_timestamp();
+    PERFORM
+      *
+    FROM (
+      SELECT
+        ba.id
+      FROM
+        blacklist_alert ba
+        JOIN blacklist_search bs ON bs.id = ba.blacklist_search_id
+      WHERE
+        ba.state = 'pending'
+      ORDER BY
+        ba.date,
+        ba.id OFFSET _offset
+      LIMIT 50) p;
+    INSERT INTO bench_result
+      VALUES (_offset, 'offset', extract(EPOCH FROM clock_timestamp() - _started) * 1000);
+    SELECT
+      date,
+      id INTO _after
+    FROM
+      blacklist_alert
+    WHERE
+      state = 'pending'
+    ORDER BY
+      date,
+      id OFFSET greatest(_offset - 1, 0)
+    LIMIT 1;
+    _started := clock_timestamp();
+    PERFORM
+      *
+    FROM (
+      SELECT
+        ba.id
+      FROM
+        blacklist_alert ba
+        JOIN blacklist_search bs ON bs.id = ba.blacklist_search_id
+      WHERE
+        ba.state = 'pending'
+        AND (ba.date, ba.id) > (_after.date, _after.id)
+      ORDER BY
+        ba.date,
+        ba.id
+      LIMIT 50) p;
+    INSERT INTO bench_result
+      VALUES (_offset, 'keyset', extract(EPOCH FROM clock_timestamp() - _started) * 1000);
+  END LOOP;
+END;
+$$;
+
+SELECT
+  rows_skipped,
+  method,
+  round(elapsed_ms, 2) AS elapsed_ms
+FROM
+  bench_result;
+
+SELECT
+  pg_size_pretty(pg_relation_size('idx_blacklist_alert_open')) AS inbox_index_size,
+  pg_size_pretty(pg_relation_size('blacklist_alert')) AS table_size;
+
+ROLLBACK;
@@ -0,0 +1,184 @@
+-- Benchmark: blacklist_search write cost and size, one row per screening vs one row per pair.
+--
+-- Usage:
+--   psql -d holocron -v pairs=1000000 -v rounds=3 -f benchmarks/blacklist_search_storage.sql
+--
+-- Simulates :rounds daily rescreens with save_all_comparison_results on: every round writes a result for each of
+-- :pairs (person, blacklist entry) pairs, 1% of them matches.
+--   * before: the previous layout, a plain append with indexes on person_id, blacklist_person_id and match.
+--   * after: the upsert used by the screening triggers into a copy of blacklist_search (pair index, partial match
+--     indexes and the history trigger), the replaced results going to blacklist_search_history.
+-- Reports the time of each round and the final size of the tables and their indexes, plus the history after
+-- purging its non-matches (maintain_blacklist_search). Everything runs inside a transaction that is rolled back, so
+-- the rows replaced by a round cannot be vacuumed before the next one as they would between two daily rescreens.
+\set ON_ERROR_STOP on
+\if :{?pairs}
+\else
+  \set pairs 1000000
+\endif
+\if :{?rounds}
+\else
+  \set rounds 3
+\endif
+BEGIN;
+
+SELECT
+  set_config('bench.pairs', :'pairs', TRUE),
+  set_config('bench.rounds', :'rounds', TRUE);
+
+CREATE TEMP TABLE bench_search_before (
+  id SERIAL PRIMARY KEY,
+  person_id INTEGER,
+  blacklist_person_id INTEGER,
+  match BOOLEAN,
+  match_score NUMERIC(5, 4),
+  search_date DATE NOT NULL,
+  created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP NOT NULL,
+  match_details JSONB
+);
+
+CREATE INDEX ON bench_search_before (person_id);
+
+CREATE INDEX ON bench_search_before (blacklist_person_id);
+
+CREATE INDEX ON bench_search_before (MATCH);
+
+CREATE TEMP TABLE bench_search_after (
+  LIKE blacklist_search INCLUDING DEFAULTS INCLUDING INDEXES
+);
+
+ALTER TABLE bench_search_after SET (fillfactor = 80);
+
+CREATE TRIGGER bench_search_after_history_tgr
+  AFTER UPDATE ON bench_search_after
+  REFERENCING OLD TABLE AS superseded
+  FOR EACH STATEMENT
+  EXECUTE FUNCTION blacklist_search_history_tgr_fn ();
+
+-- 1000 list entries, persons numbered so that there are :pairs pairs
+CREATE TEMP TABLE bench_pair AS
+SELECT
+  i / 1000 + 1 AS person_id,
+  i % 1000 + 1 AS blacklist_person_id,
+  random() < 0.01 AS match
+FROM
+  generate_series(0, :pairs - 1) i;
+
+CREATE TEMP TABLE bench_result (
+  layout TEXT,
+  round INTEGER,
+  elapsed_ms NUMERIC
+);
+
+DO $$
+DECLARE
+  _started TIMESTAMPTZ;
+  _search_date DATE;
+BEGIN
+  FOR _round IN 1..current_setting('bench.rounds')::INTEGER LOOP
+    _search_date := CURRENT_DATE - current_setting('bench.rounds')::INTEGER + _round;
+    _started := clock_timestamp();
+    INSERT INTO bench_search_before (person_id, blacklist_person_id, MATCH, match_score, search_date, match_details)
+    SELECT
+      person_id,
+      blacklist_person_id,
+      MATCH,
+      CASE WHEN MATCH THEN
+        1
+      ELSE
+        0.5
+      END,
+      _search_date,
+      jsonb_build_object('name_match', MATCH, 'levenshtein_distance', 5)
+    FROM
+      bench_pair;
+    INSERT INTO bench_result
+      VALUES ('before', _round, extract(EPOCH FROM clock_timestamp() - _started) * 1000);
+    _started := clock_timestamp();
+    INSERT INTO bench_search_after (person_id, blacklist_person_id, MATCH, match_score, search_date, match_details)
+    SELECT
+      person_id,
+      blacklist_person_id,
+      MATCH,
+      CASE WHEN MATCH THEN
+        1
+      ELSE
+        0.5
+      END,
+      _search_date,
+      jsonb_build_object('name_match', MATCH, 'levenshtein_distance', 5)
+    FROM
+      bench_pair
+    ON CONFLICT (person_id,
+      blacklist_person_id)
+      DO UPDATE SET
+        MATCH = EXCLUDED.match,
+        match_score = EXCLUDED.match_score,
+        search_date = EXCLUDED.search_date,
+        created_at = EXCLUDED.created_at,
+        match_details = EXCLUDED.match_details
+      WHERE
+        bench_search_after.search_date < EXCLUDED.search_date;
+    INSERT INTO bench_result
+      VALUES ('after', _round, extract(EPOCH FROM clock_timestamp() - _started) * 1000);
+  END LOOP;
+END;
+$$;
+
+SELECT
+  layout,
+  round,
+  round(elapsed_ms) AS elapsed_ms
+FROM
+  bench_result
+ORDER BY
+  round,
+  layout DESC;
+
+SELECT
+  'before' AS layout,
+  'blacklist_search' AS relation,
+  (
+    SELECT
+      count(*)
+    FROM
+      bench_search_before) AS ROWS,
+  pg_size_pretty(pg_table_size('bench_search_before')) AS table_size,
+  pg_size_pretty(pg_indexes_size('bench_search_before')) AS indexes_size
+UNION ALL
+SELECT
+  'after',
+  'blacklist_search',
+  (
+    SELECT
+      count(*)
+    FROM
+      bench_search_after),
+  pg_size_pretty(pg_table_size('bench_search_after')),
+  pg_size_pretty(pg_indexes_size('bench_search_after'))
+UNION ALL
+SELECT
+  'after',
+  'blacklist_search_history',
+  (
+    SELECT
+      count(*)
+    FROM
+      blacklist_search_history),
+  pg_size_pretty(sum(pg_table_size(relid))),
+  pg_size_pretty(sum(pg_indexes_size(relid)))
+FROM
+  pg_partition_tree('blacklist_search_history');
+
+-- retention of 0 days: the non-matches of the history go away
+SELECT
+  history_deleted
+FROM
+  maintain_blacklist_search (0, 0);
+
+SELECT
+  count(*) AS history_rows_after_purge
+FROM
+  blacklist_search_history;
+
+ROLLBACK;
@@ -0,0 +1,93 @@
+"""
+Benchmark: overhead of the per-request database instrumentation.
+
+Usage:
+    python -m benchmarks.instrumentation --requests 2000 --path "/users/?limit=20"
+
+Sends --requests GET --path requests to the application with
+RequestMetricsMiddleware (app/core/metrics.py) and to the same routes
+without it, in alternating rounds so that both see the same database and
+cache state, and compares the median and p95 latencies. With --slow-log the
+middleware also keeps the statement list of each request, as it does with
+SLOW_REQUEST_LOG_MS set (the log itself is not written).
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
+
+from app.core.metrics import RequestMetricsMiddleware
+from app.main import app
+from benchmarks.screening_index import percentile
+
+
+def uninstrumented():
+    baseline = FastAPI(default_response_class=ORJSONResponse)
+    baseline.router.routes.extend(app.routes)
+    return baseline
+
+
+def client(asgi_app):
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=asgi_app), base_url="http://bench"
+    )
+
+
+async def timed(client, path, requests):
+    samples = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        (await client.get(path)).raise_for_status()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+async def run(args):
+    clients = {
+        "without middleware": client(uninstrumented()),
+        "with middleware": client(
+            RequestMetricsMiddleware(
+                uninstrumented(),
+                # a threshold no request reaches: statements kept, never logged
+                slow_request_ms=1e9 if args.slow_log else 0,
+            )
+        ),
+    }
+    per_round = max(1, args.requests // args.rounds)
+    samples = {name: [] for name in clients}
+    for name in clients:
+        await timed(clients[name], args.path, 50)
+    for _ in range(args.rounds):
+        for name in clients:
+            samples[name] += await timed(clients[name], args.path, per_round)
+
+    baseline = statistics.median(samples["without middleware"])
+    print("{}, {} requests each".format(args.path, per_round * args.rounds))
+    for name, values in samples.items():
+        median = statistics.median(values)
+        print(
+            "{:<19} median {:6.3f} ms  p95 {:6.3f} ms  overhead {:+5.1f}%".format(
+                name,
+                median,
+                percentile(values, 0.95),
+                (median / baseline - 1) * 100,
+            )
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--path", default="/users/?limit=20")
+    parser.add_argument("--slow-log", action="store_true")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
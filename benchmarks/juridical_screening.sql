@@ -0,0 +1,240 @@
+-- Benchmark: juridical-person screening on insert.
+--
+-- Usage:
+--   psql -d holocron -v rows=500000 -v probes=50 -f benchmarks/juridical_screening.sql
+--
+-- Loads :rows synthetic companies into juridical_person_details and into blacklist_juridical_person_details
+-- (triggers disabled), then inserts :probes companies on each side with the screening triggers enabled: half of
+-- them near-duplicates of loaded legal names, half random. Reports the average and worst insert latency and, for
+-- reference, the same lookup as a sequential similarity() scan without the trigram index. Everything runs inside
+-- a transaction that is rolled back, so it leaves the database untouched. Requires a superuser.
+\set ON_ERROR_STOP on
+\if :{?rows}
+\else
+  \set rows 500000
+\endif
+\if :{?probes}
+\else
+  \set probes 50
+\endif
+BEGIN;
+
+SET LOCAL session_replication_role = replica;
+
+SELECT
+  set_config('bench.probes', :'probes', TRUE);
+
+CREATE FUNCTION pg_temp.bench_pick (_items TEXT[])
+  RETURNS TEXT
+  AS $$
+  SELECT
+    _items[1 + floor(random() * array_length(_items, 1))::INTEGER];
+$$
+LANGUAGE sql
+VOLATILE;
+
+CREATE FUNCTION pg_temp.bench_legal_name ()
+  RETURNS TEXT
+  AS $$
+  SELECT
+    pg_temp.bench_pick (ARRAY['Grupo', 'Constructora', 'Servicios', 'Comercializadora', 'Inmobiliaria', 'Transportes',
+      'Distribuidora', 'Consultores', 'Alimentos', 'Tecnologia', 'Desarrollos', 'Operadora', 'Importadora',
+      'Promotora', 'Corporativo', 'Industrias', 'Logistica', 'Farmacias', 'Agricola', 'Textiles']) || ' ' ||
+      pg_temp.bench_pick (ARRAY['Hernandez', 'Garcia', 'Martinez', 'Lopez', 'Gonzalez', 'Perez', 'Rodriguez',
+      'Sanchez', 'Ramirez', 'Cruz', 'Flores', 'Gomez', 'Morales', 'Vazquez', 'Reyes', 'Jimenez', 'Torres', 'Diaz',
+      'Gutierrez', 'Ruiz', 'Mendoza', 'Aguilar', 'Ortiz', 'Moreno', 'Castillo', 'Romero', 'Alvarez', 'Mendez',
+      'Chavez', 'Rivera', 'Juarez', 'Ramos', 'Dominguez', 'Herrera', 'Medina', 'Castro', 'Vargas', 'Guzman',
+      'Velazquez', 'Munoz']) || ' ' || pg_temp.bench_pick (ARRAY['Azteca', 'del Norte', 'del Pacifico', 'del Golfo',
+      'del Bajio', 'Peninsular', 'Occidente', 'Sureste', 'Metropolitana', 'Internacional', 'Nacional',
+      'de Mexico', 'Integral', 'Global', 'Continental', 'Moderna', 'Unida', 'Central', 'Industrial', 'Comercial']) ||
+      ' ' || lpad(floor(random() * 1000)::TEXT, 3, '0') || pg_temp.bench_pick (ARRAY[', S.A. de C.V.',
+      ' SA DE CV', ', S.A.P.I. de C.V.', ', S. de R.L. de C.V.', ', S.C.', ', A.C.', ' S.A.B. de C.V.']);
+$$
+LANGUAGE sql
+VOLATILE;
+
+-- Replaces one character of _value with a random letter
+CREATE FUNCTION pg_temp.bench_typo (_value TEXT)
+  RETURNS TEXT
+  AS $$
+  SELECT
+    overlay(_value PLACING chr(65 + floor(random() * 26)::INTEGER)
+    FROM 1 + floor(random() * length(_value))::INTEGER FOR 1);
+$$
+LANGUAGE sql
+VOLATILE;
+
+WITH p AS (
+INSERT INTO person (type)
+  SELECT
+    'juridical'
+  FROM
+    generate_series(1, :rows)
+  RETURNING
+    id)
+INSERT INTO juridical_person_details (person_id, legal_name)
+SELECT
+  p.id,
+  pg_temp.bench_legal_name ()
+FROM
+  p;
+
+INSERT INTO blacklist (short_name)
+  VALUES ('bench');
+
+WITH blp AS (
+INSERT INTO blacklist_person (blacklist_id, type, official_registration_number)
+  SELECT
+    currval(pg_get_serial_sequence('blacklist', 'id')),
+    'juridical',
+    'BENCH-' || i
+  FROM
+    generate_series(1, :rows) i
+  RETURNING
+    id)
+INSERT INTO blacklist_juridical_person_details (id, legal_name)
+SELECT
+  blp.id,
+  pg_temp.bench_legal_name ()
+FROM
+  blp;
+
+ANALYZE juridical_person_details;
+
+ANALYZE blacklist_juridical_person_details;
+
+SET LOCAL session_replication_role = origin;
+
+INSERT INTO "user" (username, email)
+  VALUES ('bench', 'bench@example.com');
+
+SELECT
+  set_config('app.current_user_id', currval(pg_get_serial_sequence('"user"', 'id'))::TEXT, TRUE);
+
+INSERT INTO config (name, value)
+  VALUES ('save_all_comparison_results', 'false')
+ON CONFLICT (name)
+  DO UPDATE SET
+    value = EXCLUDED.value;
+
+-- probes for each direction, so that the second insert does not find the first one
+CREATE TEMP TABLE bench_probe AS
+SELECT
+  CASE WHEN i % 2 = 0 THEN
+    pg_temp.bench_typo ((
+      SELECT
+        upper(legal_name)
+      FROM blacklist_juridical_person_details OFFSET floor(random() * :rows)
+    LIMIT 1))
+  ELSE
+    pg_temp.bench_legal_name ()
+  END AS person_legal_name,
+  CASE WHEN i % 2 = 0 THEN
+    pg_temp.bench_typo ((
+      SELECT
+        upper(legal_name)
+      FROM juridical_person_details OFFSET floor(random() * :rows)
+    LIMIT 1))
+  ELSE
+    pg_temp.bench_legal_name ()
+  END AS blacklist_legal_name
+FROM
+  generate_series(1, current_setting('bench.probes')::INTEGER) i;
+
+CREATE TEMP TABLE bench_result (
+  direction TEXT,
+  mode TEXT,
+  elapsed_ms NUMERIC,
+  matches INTEGER
+);
+
+DO $$
+DECLARE
+  _probe RECORD;
+  _key TEXT;
+  _started TIMESTAMPTZ;
+  _person_id INTEGER;
+  _blacklist_person_id INTEGER;
+  _matches INTEGER;
+BEGIN
+  FOR _probe IN
+  SELECT
+    *
+  FROM
+    bench_probe LOOP
+      -- juridical_person_details_tgr screens the new company against the blacklist
+      INSERT INTO person (type)
+        VALUES ('juridical')
+      RETURNING
+        id INTO _person_id;
+      _started := clock_timestamp();
+      INSERT INTO juridical_person_details (person_id, legal_name)
+        VALUES (_person_id, _probe.person_legal_name);
+      INSERT INTO bench_result
+      SELECT
+        'person_vs_blacklist',
+        'trigger',
+        extract(EPOCH FROM clock_timestamp() - _started) * 1000,
+        count(*)
+      FROM
+        blacklist_search
+      WHERE
+        person_id = _person_id;
+      -- blacklist_juridical_person_details_tgr screens the new list entry against the companies
+      INSERT INTO blacklist_person (blacklist_id, type, official_registration_number)
+        VALUES (currval(pg_get_serial_sequence('blacklist', 'id')), 'juridical', 'BENCH-PROBE')
+      RETURNING
+        id INTO _blacklist_person_id;
+      _started := clock_timestamp();
+      INSERT INTO blacklist_juridical_person_details (id, legal_name)
+        VALUES (_blacklist_person_id, _probe.blacklist_legal_name);
+      INSERT INTO bench_result
+      SELECT
+        'blacklist_vs_person',
+        'trigger',
+        extract(EPOCH FROM clock_timestamp() - _started) * 1000,
+        count(*)
+      FROM
+        blacklist_search
+      WHERE
+        blacklist_person_id = _blacklist_person_id;
+    END LOOP;
+  -- reference: the same similarity lookup as a full scan
+  FOR _key IN
+  SELECT
+    legal_name_key (person_legal_name)
+  FROM
+    bench_probe
+  LIMIT 5 LOOP
+    _started := clock_timestamp();
+    SELECT
+      count(*) INTO _matches
+    FROM
+      blacklist_juridical_person_details
+    WHERE
+      similarity (legal_name_key, _key) >= 0.6;
+    INSERT INTO bench_result
+      VALUES ('person_vs_blacklist', 'seq_scan', extract(EPOCH FROM clock_timestamp() - _started) * 1000, _matches);
+  END LOOP;
+END;
+$$;
+
+SELECT
+  :rows AS ROWS,
+  direction,
+  mode,
+  count(*) AS probes,
+  round(avg(elapsed_ms), 2) AS avg_ms,
+  round(percentile_cont(0.5) WITHIN GROUP (ORDER BY elapsed_ms)::NUMERIC, 2) AS p50_ms,
+  round(max(elapsed_ms), 2) AS max_ms,
+  sum(matches) AS matches
+FROM
+  bench_result
+GROUP BY
+  direction,
+  mode
+ORDER BY
+  direction,
+  mode;
+
+ROLLBACK;
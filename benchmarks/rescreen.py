@@ -0,0 +1,207 @@
+"""
+Benchmark: batch rescreen job (app/services/rescreen.py) against the SQL path.
+
+Usage:
+    python -m benchmarks.rescreen --persons 100000 --entries 10000 --workers 4
+
+Loads synthetic persons and list entries into the configured database inside
+a transaction that is rolled back at the end (the triggers are bypassed with
+session_replication_role, so it needs a superuser). Then it times:
+
+  * sql-legacy: `levenshtein()` against every entry, as the triggers did
+    before the blocking functions (sampled, extrapolated to all persons);
+  * sql-blocking: exact matches plus blacklist_natural_person_name_candidates,
+    as the triggers do today (sampled, extrapolated to all persons);
+  * job: the whole population through the rescreen job, hits written by COPY.
+"""
+
+import argparse
+import random
+import time
+
+from sqlalchemy import text
+
+from app.database import SessionLocal
+from app.services.copy import copy_rows
+from app.services.rescreen import rescreen
+from benchmarks.synthetic import FIRST_NAMES, LAST_NAMES, typo
+
+LEGACY_QUERY = text(
+    """
+    SELECT
+      count(*)
+    FROM
+      natural_person_details npd
+      JOIN blacklist_natural_person_details bl_npd ON levenshtein (bl_npd.full_name, npd.full_name) < :min_distance
+    WHERE
+      npd.person_id = ANY (:person_ids)
+    """
+)
+
+BLOCKING_QUERY = text(
+    """
+    SELECT
+      count(*)
+    FROM
+      natural_person_details npd
+      CROSS JOIN LATERAL (
+        SELECT bl_npd.id
+        FROM blacklist_natural_person_details bl_npd
+        WHERE bl_npd.full_name = npd.full_name
+          OR bl_npd.curp = npd.curp
+          OR bl_npd.rfc = npd.rfc
+        UNION ALL
+        SELECT candidate.id
+        FROM blacklist_natural_person_name_candidates (npd.full_name, :min_distance - 1) candidate
+      ) hit
+    WHERE
+      npd.person_id = ANY (:person_ids)
+    """
+)
+
+
+def random_person(rng: random.Random):
+    first = rng.choice(FIRST_NAMES)
+    if rng.random() < 0.3:
+        first += " " + rng.choice(FIRST_NAMES)
+    return (first, rng.choice(LAST_NAMES), rng.choice(LAST_NAMES))
+
+
+def populate(session, rng, persons, entries, max_distance):
+    session.execute(text("SET LOCAL session_replication_role = replica"))
+    session.execute(
+        text(
+            "INSERT INTO config (name, value) VALUES "
+            "('max_string_distance_to_match', :value) "
+            "ON CONFLICT (name) DO UPDATE SET value = EXCLUDED.value"
+        ),
+        {"value": str(max_distance)},
+    )
+    blacklist_id = session.execute(
+        text("INSERT INTO blacklist (short_name) VALUES ('BENCH') RETURNING id")
+    ).scalar_one()
+    first_id = (
+        session.execute(
+            text(
+                "SELECT setval(pg_get_serial_sequence('blacklist_person', 'id'), "
+                "nextval(pg_get_serial_sequence('blacklist_person', 'id')) + :n)"
+            ),
+            {"n": entries},
+        ).scalar_one()
+        - entries
+    )
+    copy_rows(
+        session,
+        "blacklist_person",
+        ("id", "blacklist_id", "type", "official_registration_number"),
+        ((first_id + i, blacklist_id, "natural", str(i)) for i in range(entries)),
+    )
+    names = [random_person(rng) for _ in range(entries)]
+    copy_rows(
+        session,
+        "blacklist_natural_person_details",
+        ("id", "name", "first_last_name", "second_last_name"),
+        ((first_id + i,) + name for i, name in enumerate(names)),
+    )
+
+    first_person = (
+        session.execute(
+            text(
+                "SELECT setval(pg_get_serial_sequence('person', 'id'), "
+                "nextval(pg_get_serial_sequence('person', 'id')) + :n)"
+            ),
+            {"n": persons},
+        ).scalar_one()
+        - persons
+    )
+    copy_rows(
+        session,
+        "person",
+        ("id", "type"),
+        ((first_person + i, "natural") for i in range(persons)),
+    )
+
+    def person_names():
+        for i in range(persons):
+            if rng.random() < 0.01:
+                # about 1% of the population resembles a list entry
+                name, first, second = rng.choice(names)
+                name = typo(rng, name, rng.randint(0, 1))
+            else:
+                name, first, second = random_person(rng)
+            yield (first_person + i, name, first, second)
+
+    copy_rows(
+        session,
+        "natural_person_details",
+        ("person_id", "name", "first_last_name", "second_last_name"),
+        person_names(),
+    )
+    session.execute(text("SET LOCAL session_replication_role = origin"))
+    session.execute(text("ANALYZE natural_person_details"))
+    session.execute(text("ANALYZE blacklist_natural_person_details"))
+    return list(range(first_person, first_person + persons))
+
+
+def time_sql(session, query, person_ids, min_distance, total):
+    started = time.perf_counter()
+    session.execute(query, {"person_ids": person_ids, "min_distance": min_distance})
+    elapsed = time.perf_counter() - started
+    return elapsed * total / len(person_ids)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--persons", type=int, default=100000)
+    parser.add_argument("--entries", type=int, default=10000)
+    parser.add_argument("--sample", type=int, default=200)
+    parser.add_argument("--legacy-sample", type=int, default=20)
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--max-distance", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with SessionLocal() as session:
+        try:
+            person_ids = populate(
+                session, rng, args.persons, args.entries, args.max_distance
+            )
+            print(
+                "persons={} entries={} workers={} chunk={}".format(
+                    args.persons, args.entries, args.workers, args.chunk_size
+                )
+            )
+            for label, query, sample in (
+                ("sql-legacy", LEGACY_QUERY, args.legacy_sample),
+                ("sql-blocking", BLOCKING_QUERY, args.sample),
+            ):
+                seconds = time_sql(
+                    session,
+                    query,
+                    rng.sample(person_ids, min(sample, len(person_ids))),
+                    args.max_distance,
+                    args.persons,
+                )
+                print(
+                    "{:<13} {:>9.1f}s {:>10.0f} rows/s (extrapolated)".format(
+                        label, seconds, args.persons / seconds
+                    )
+                )
+
+            result = rescreen(session, chunk_size=args.chunk_size, workers=args.workers)
+            print(
+                "{:<13} {:>9.1f}s {:>10.0f} rows/s hits={}".format(
+                    "job",
+                    result.elapsed_seconds,
+                    result.rows_per_second,
+                    result.hits,
+                )
+            )
+        finally:
+            session.rollback()
+
+
+if __name__ == "__main__":
+    main()
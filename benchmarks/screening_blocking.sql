@@ -0,0 +1,274 @@
+-- Benchmark: natural-person name screening, legacy full scan vs. index-backed blocking.
+--
+-- Usage:
+--   psql -d holocron -v rows=100000 -v probes=20 -f benchmarks/screening_blocking.sql
+--   psql -d holocron -v rows=1000000 -v probes=20 -f benchmarks/screening_blocking.sql
+--
+-- Loads :rows synthetic persons into natural_person_details and into blacklist_natural_person_details (triggers
+-- disabled), then screens :probes near-duplicate names in both directions with:
+--   * legacy: levenshtein(full_name, probe) < max_distance over the whole table.
+--   * blocking: the *_name_candidates functions without trigram threshold (length band only, lossless).
+--   * blocking_trgm: the *_name_candidates functions with name_similarity_threshold = :threshold.
+-- Reports the average latency per probe and the recall against the legacy results. Everything runs inside a
+-- transaction that is rolled back, so it leaves the database untouched. Requires a superuser.
+\set ON_ERROR_STOP on
+\if :{?rows}
+\else
+  \set rows 100000
+\endif
+\if :{?probes}
+\else
+  \set probes 20
+\endif
+\if :{?threshold}
+\else
+  \set threshold 0.3
+\endif
+\set max_distance 3
+BEGIN;
+
+SET LOCAL session_replication_role = replica;
+
+SELECT
+  set_config('bench.probes', :'probes', TRUE),
+  set_config('bench.threshold', :'threshold', TRUE),
+  set_config('bench.max_distance', :'max_distance', TRUE);
+
+CREATE FUNCTION pg_temp.bench_pick (_items TEXT[])
+  RETURNS TEXT
+  AS $$
+  SELECT
+    _items[1 + floor(random() * array_length(_items, 1))::INTEGER];
+$$
+LANGUAGE sql
+VOLATILE;
+
+CREATE FUNCTION pg_temp.bench_first_name ()
+  RETURNS TEXT
+  AS $$
+  SELECT
+    pg_temp.bench_pick (ARRAY['Jose', 'Maria', 'Juan', 'Guadalupe', 'Francisco', 'Ana', 'Luis', 'Rosa', 'Carlos',
+      'Laura', 'Miguel', 'Patricia', 'Jorge', 'Leticia', 'Pedro', 'Gabriela', 'Alejandro', 'Veronica', 'Manuel',
+      'Adriana', 'Ricardo', 'Silvia', 'Fernando', 'Claudia', 'Roberto', 'Alejandra', 'Eduardo', 'Martha',
+      'Arturo', 'Elizabeth', 'Javier', 'Monica', 'Sergio', 'Teresa', 'Daniel', 'Josefina', 'Raul', 'Margarita',
+      'Alberto', 'Veronica', 'Jesus', 'Yolanda', 'Antonio', 'Norma', 'Hector', 'Angelica', 'Oscar', 'Sandra',
+      'Enrique', 'Lucia']) || CASE WHEN random() < 0.3 THEN
+    ' ' || pg_temp.bench_pick (ARRAY['Luis', 'Maria', 'Antonio', 'Guadalupe', 'Alberto', 'Fernanda', 'Carlos',
+      'Isabel', 'Manuel', 'Elena'])
+  ELSE
+    ''
+  END;
+$$
+LANGUAGE sql
+VOLATILE;
+
+CREATE FUNCTION pg_temp.bench_last_name ()
+  RETURNS TEXT
+  AS $$
+  SELECT
+    pg_temp.bench_pick (ARRAY['Hernandez', 'Garcia', 'Martinez', 'Lopez', 'Gonzalez', 'Perez', 'Rodriguez',
+      'Sanchez', 'Ramirez', 'Cruz', 'Flores', 'Gomez', 'Morales', 'Vazquez', 'Reyes', 'Jimenez', 'Torres', 'Diaz',
+      'Gutierrez', 'Ruiz', 'Mendoza', 'Aguilar', 'Ortiz', 'Moreno', 'Castillo', 'Romero', 'Alvarez', 'Mendez',
+      'Chavez', 'Rivera', 'Juarez', 'Ramos', 'Dominguez', 'Herrera', 'Medina', 'Castro', 'Vargas', 'Guzman',
+      'Velazquez', 'Munoz', 'Rojas', 'Contreras', 'Salazar', 'Luna', 'Ortega', 'Santiago', 'Guerrero', 'Estrada',
+      'Bautista', 'Cortes', 'Soto', 'Alvarado', 'Espinoza', 'Lara', 'Avila', 'Rios', 'Cervantes', 'Silva',
+      'Delgado', 'Vega']);
+$$
+LANGUAGE sql
+VOLATILE;
+
+-- Replaces one character of _value with a random letter
+CREATE FUNCTION pg_temp.bench_typo (_value TEXT)
+  RETURNS TEXT
+  AS $$
+  SELECT
+    overlay(_value PLACING chr(65 + floor(random() * 26)::INTEGER)
+    FROM 1 + floor(random() * length(_value))::INTEGER FOR 1);
+$$
+LANGUAGE sql
+VOLATILE;
+
+WITH p AS (
+INSERT INTO person (type)
+  SELECT
+    'natural'
+  FROM
+    generate_series(1, :rows)
+  RETURNING
+    id)
+INSERT INTO natural_person_details (person_id, name, first_last_name, second_last_name)
+SELECT
+  p.id,
+  pg_temp.bench_first_name (),
+  pg_temp.bench_last_name (),
+  pg_temp.bench_last_name ()
+FROM
+  p;
+
+INSERT INTO blacklist (short_name)
+  VALUES ('bench');
+
+WITH blp AS (
+INSERT INTO blacklist_person (blacklist_id, type, official_registration_number)
+  SELECT
+    currval(pg_get_serial_sequence('blacklist', 'id')),
+    'natural',
+    'BENCH-' || i
+  FROM
+    generate_series(1, :rows) i
+  RETURNING
+    id)
+INSERT INTO blacklist_natural_person_details (id, name, first_last_name, second_last_name)
+SELECT
+  blp.id,
+  pg_temp.bench_first_name (),
+  pg_temp.bench_last_name (),
+  pg_temp.bench_last_name ()
+FROM
+  blp;
+
+ANALYZE natural_person_details;
+
+ANALYZE blacklist_natural_person_details;
+
+CREATE TEMP TABLE bench_probe AS
+SELECT
+  pg_temp.bench_typo (upper(pg_temp.bench_first_name () || ' ' || pg_temp.bench_last_name () || ' ' ||
+    pg_temp.bench_last_name ())) AS full_name
+FROM
+  generate_series(1, current_setting('bench.probes')::INTEGER);
+
+CREATE TEMP TABLE bench_result (
+  direction TEXT,
+  mode TEXT,
+  probe TEXT,
+  elapsed_ms NUMERIC,
+  matches INTEGER[]
+);
+
+DO $$
+DECLARE
+  _probe TEXT;
+  _started TIMESTAMPTZ;
+  _matches INTEGER[];
+  _max_distance INTEGER := current_setting('bench.max_distance')::INTEGER;
+BEGIN
+  DELETE FROM config
+  WHERE name = 'name_similarity_threshold';
+  FOR _probe IN
+  SELECT
+    full_name
+  FROM
+    bench_probe LOOP
+      -- natural_person_details_tgr screens the new person against the blacklist
+      _started := clock_timestamp();
+      _matches := ARRAY (
+        SELECT
+          id
+        FROM
+          blacklist_natural_person_details
+        WHERE
+          levenshtein (full_name, _probe) < _max_distance
+        ORDER BY
+          id);
+      INSERT INTO bench_result
+        VALUES ('person_vs_blacklist', 'legacy', _probe, extract(EPOCH FROM clock_timestamp() - _started) * 1000,
+          _matches);
+      _started := clock_timestamp();
+      _matches := ARRAY (
+        SELECT
+          id
+        FROM
+          blacklist_natural_person_name_candidates (_probe, _max_distance - 1)
+        ORDER BY
+          id);
+      INSERT INTO bench_result
+        VALUES ('person_vs_blacklist', 'blocking', _probe, extract(EPOCH FROM clock_timestamp() - _started) * 1000,
+          _matches);
+      -- blacklist_natural_person_details_tgr screens the new list entry against the persons
+      _started := clock_timestamp();
+      _matches := ARRAY (
+        SELECT
+          person_id
+        FROM
+          natural_person_details
+        WHERE
+          levenshtein (full_name, _probe) < _max_distance
+        ORDER BY
+          person_id);
+      INSERT INTO bench_result
+        VALUES ('blacklist_vs_person', 'legacy', _probe, extract(EPOCH FROM clock_timestamp() - _started) * 1000,
+          _matches);
+      _started := clock_timestamp();
+      _matches := ARRAY (
+        SELECT
+          person_id
+        FROM
+          natural_person_name_candidates (_probe, _max_distance - 1)
+        ORDER BY
+          person_id);
+      INSERT INTO bench_result
+        VALUES ('blacklist_vs_person', 'blocking', _probe, extract(EPOCH FROM clock_timestamp() - _started) * 1000,
+          _matches);
+    END LOOP;
+  INSERT INTO config (name, value)
+    VALUES ('name_similarity_threshold', current_setting('bench.threshold'));
+  FOR _probe IN
+  SELECT
+    full_name
+  FROM
+    bench_probe LOOP
+      _started := clock_timestamp();
+      _matches := ARRAY (
+        SELECT
+          id
+        FROM
+          blacklist_natural_person_name_candidates (_probe, _max_distance - 1)
+        ORDER BY
+          id);
+      INSERT INTO bench_result
+        VALUES ('person_vs_blacklist', 'blocking_trgm', _probe, extract(EPOCH FROM clock_timestamp() - _started) *
+          1000, _matches);
+      _started := clock_timestamp();
+      _matches := ARRAY (
+        SELECT
+          person_id
+        FROM
+          natural_person_name_candidates (_probe, _max_distance - 1)
+        ORDER BY
+          person_id);
+      INSERT INTO bench_result
+        VALUES ('blacklist_vs_person', 'blocking_trgm', _probe, extract(EPOCH FROM clock_timestamp() - _started) *
+          1000, _matches);
+    END LOOP;
+END;
+$$;
+
+SELECT
+  :rows AS ROWS,
+  r.direction,
+  r.mode,
+  count(*) AS probes,
+  round(avg(r.elapsed_ms), 2) AS avg_ms,
+  round(max(r.elapsed_ms), 2) AS max_ms,
+  sum(cardinality(r.matches)) AS matches,
+  sum(cardinality(ARRAY (
+        SELECT
+          unnest(r.matches)
+        INTERSECT
+        SELECT
+          unnest(legacy.matches)))) AS legacy_matches_found,
+  sum(cardinality(legacy.matches)) AS legacy_matches
+FROM
+  bench_result r
+  JOIN bench_result legacy ON legacy.direction = r.direction
+    AND legacy.probe = r.probe
+    AND legacy.mode = 'legacy'
+GROUP BY
+  r.direction,
+  r.mode
+ORDER BY
+  r.direction,
+  r.mode;
+
+ROLLBACK;
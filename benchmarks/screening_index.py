@@ -0,0 +1,79 @@
+"""
+Benchmark: in-process blacklist name index (app/services/screening_index.py).
+
+Usage:
+    python -m benchmarks.screening_index --names 100000 --queries 2000
+
+Builds a NameIndex over synthetic full names and reports build time, memory
+and the latency of "names within k edits" lookups for near-duplicate queries.
+No database is needed.
+"""
+
+import argparse
+import random
+import statistics
+import time
+import tracemalloc
+
+from app.services.screening_index import NameIndex
+from benchmarks.synthetic import FIRST_NAMES, LAST_NAMES, typo
+
+
+def random_name(rng: random.Random) -> str:
+    first = rng.choice(FIRST_NAMES)
+    if rng.random() < 0.3:
+        first += " " + rng.choice(FIRST_NAMES)
+    return "{} {} {}".format(first, rng.choice(LAST_NAMES), rng.choice(LAST_NAMES))
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--names", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--max-distance", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    names = [random_name(rng) for _ in range(args.names)]
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    index = NameIndex(max_distance=args.max_distance)
+    for blacklist_person_id, name in enumerate(names, 1):
+        index.add(blacklist_person_id, "natural", name)
+    build_seconds = time.perf_counter() - started
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(
+        "names={} unique={} build={:.2f}s memory={:.1f}MB".format(
+            len(names), len(set(names)), build_seconds, memory / 1024 / 1024
+        )
+    )
+    for distance in range(args.max_distance + 1):
+        latencies = []
+        hits = 0
+        for _ in range(args.queries):
+            query = typo(rng, rng.choice(names), distance)
+            started = time.perf_counter()
+            hits += len(index.search(query, distance))
+            latencies.append((time.perf_counter() - started) * 1000)
+        print(
+            "k={} p50={:.3f}ms p99={:.3f}ms mean={:.3f}ms hits/query={:.1f}".format(
+                distance,
+                percentile(latencies, 0.5),
+                percentile(latencies, 0.99),
+                statistics.mean(latencies),
+                hits / args.queries,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
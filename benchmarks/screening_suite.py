@@ -0,0 +1,388 @@
+"""
+Benchmark suite: screening cost and accuracy on synthetic identity data.
+
+Usage:
+    python -m benchmarks.screening_suite --persons 100000 --output screening.json
+
+Meant to run at 10k, 100k and 1M persons (--persons), with one list entry per
+100 persons unless --entries is given. The data comes from benchmarks.synthetic
+and everything runs in a transaction that is rolled back at the end. The
+population is copied with the triggers disabled through
+session_replication_role, so it needs a superuser. Measures:
+
+  * bulk_load: COPY throughput of the population;
+  * accuracy: for each --distances value of max_string_distance_to_match, the
+    list load (app/services/blacklist_load.py) of the entries against the
+    population, its throughput and the precision and recall of its matches.
+    --duplicate-rate of the population are near duplicates of an entry, 0 to 3
+    typos away and some with the entry's CURP and RFC; those pairs are the
+    expected matches, so a homonym found by the screening is a false positive;
+  * trigger_latency: single-row inserts into natural_person_details and
+    blacklist_natural_person_details with the screening triggers and without
+    any trigger, with the list loaded at --latency-distance.
+
+The results are written as JSON, to stdout unless --output is given, so the
+runs of different releases can be compared.
+"""
+
+import argparse
+import json
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.database import SessionLocal
+from app.services.blacklist_load import load_blacklist
+from app.services.copy import copy_rows
+from benchmarks.screening_index import percentile
+from benchmarks.synthetic import (
+    juridical_person,
+    natural_person,
+    near_duplicate,
+)
+
+RESERVE_IDS = text(
+    "SELECT setval(pg_get_serial_sequence(:table, 'id'), "
+    "nextval(pg_get_serial_sequence(:table, 'id')) + :n)"
+)
+
+SET_CONFIG = text(
+    "INSERT INTO config (name, value) VALUES (:name, :value) "
+    "ON CONFLICT (name) DO UPDATE SET value = EXCLUDED.value"
+)
+
+MATCHES_QUERY = text(
+    """
+    SELECT
+      bs.person_id,
+      blp.official_registration_number::INTEGER
+    FROM
+      blacklist_search bs
+      JOIN blacklist_person blp ON blp.id = bs.blacklist_person_id
+    WHERE
+      blp.blacklist_id = :blacklist_id
+      AND bs.match
+    """
+)
+
+INSERT_PERSON = text(
+    """
+    WITH p AS (
+      INSERT INTO person (type) VALUES ('natural') RETURNING id
+    )
+    INSERT INTO natural_person_details
+      (person_id, curp, rfc, name, first_last_name, second_last_name, date_of_birth)
+    SELECT id, :curp, :rfc, :name, :first_last_name, :second_last_name, :date_of_birth
+    FROM p
+    """
+)
+
+INSERT_ENTRY = text(
+    """
+    WITH p AS (
+      INSERT INTO blacklist_person (blacklist_id, type, official_registration_number)
+      VALUES (:blacklist_id, 'natural', :official_registration_number)
+      RETURNING id
+    )
+    INSERT INTO blacklist_natural_person_details
+      (id, curp, rfc, name, first_last_name, second_last_name, date_of_birth)
+    SELECT id, :curp, :rfc, :name, :first_last_name, :second_last_name, :date_of_birth
+    FROM p
+    """
+)
+
+
+def reserve_ids(session, table, n):
+    """
+    Move the id sequence of `table` past `n` ids and return the first of them.
+    """
+    return session.execute(RESERVE_IDS, {"table": table, "n": n}).scalar_one() - n
+
+
+def generate(rng, persons, entries, duplicate_rate, juridical_rate):
+    """
+    Return the list entries, the natural persons with the entry each one
+    duplicates and the typos it has (None for the rest) and the juridical
+    persons.
+    """
+    listed = [natural_person(rng) for _ in range(entries)]
+    population = []
+    for _ in range(persons):
+        if rng.random() < duplicate_rate:
+            entry = rng.randrange(entries)
+            edits = rng.randint(0, 3)
+            person = near_duplicate(
+                rng, listed[entry], edits, same_ids=rng.random() < 0.3
+            )
+            population.append((person, entry, edits))
+        else:
+            population.append((natural_person(rng), None, None))
+    companies = [juridical_person(rng) for _ in range(int(persons * juridical_rate))]
+    return listed, population, companies
+
+
+def list_rows(rng, listed):
+    # about half of the entries are published with their CURP and RFC
+    for i, entry in enumerate(listed):
+        with_ids = rng.random() < 0.5
+        yield (
+            str(i),
+            entry.curp if with_ids else None,
+            entry.rfc if with_ids else None,
+            entry.name,
+            entry.first_last_name,
+            entry.second_last_name,
+            entry.date_of_birth,
+        )
+
+
+def load_population(session, population, companies):
+    started = time.perf_counter()
+    session.execute(text("SET LOCAL session_replication_role = replica"))
+    rows = len(population) + len(companies)
+    first_id = reserve_ids(session, "person", rows)
+    copy_rows(
+        session,
+        "person",
+        ("id", "type"),
+        (
+            (first_id + i, "natural" if i < len(population) else "juridical")
+            for i in range(rows)
+        ),
+    )
+    copy_rows(
+        session,
+        "natural_person_details",
+        (
+            "person_id",
+            "curp",
+            "rfc",
+            "name",
+            "first_last_name",
+            "second_last_name",
+            "date_of_birth",
+        ),
+        (
+            (
+                first_id + i,
+                p.curp,
+                p.rfc,
+                p.name,
+                p.first_last_name,
+                p.second_last_name,
+                p.date_of_birth,
+            )
+            for i, (p, _, _) in enumerate(population)
+        ),
+    )
+    copy_rows(
+        session,
+        "juridical_person_details",
+        ("person_id", "rfc", "legal_name", "incorporation_date"),
+        (
+            (first_id + len(population) + i, c.rfc, c.legal_name, c.incorporation_date)
+            for i, c in enumerate(companies)
+        ),
+    )
+    session.execute(text("SET LOCAL session_replication_role = origin"))
+    elapsed = time.perf_counter() - started
+    session.execute(text("ANALYZE person"))
+    session.execute(text("ANALYZE natural_person_details"))
+    session.execute(text("ANALYZE juridical_person_details"))
+    return first_id, {
+        "rows": rows,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(rows / elapsed, 1),
+    }
+
+
+def accuracy(session, blacklist_id, staged, expected, distance):
+    session.execute(
+        SET_CONFIG, {"name": "max_string_distance_to_match", "value": str(distance)}
+    )
+    result = load_blacklist(session, blacklist_id, staged)
+    found = {
+        tuple(row)
+        for row in session.execute(MATCHES_QUERY, {"blacklist_id": blacklist_id})
+    }
+    true_positives = len(found & expected.keys())
+    recall_by_edits = {}
+    for edits in sorted(set(expected.values())):
+        pairs = [pair for pair, e in expected.items() if e == edits]
+        recall_by_edits[str(edits)] = round(
+            sum(pair in found for pair in pairs) / len(pairs), 4
+        )
+    return {
+        "max_string_distance_to_match": distance,
+        "list_load_seconds": result.elapsed_seconds,
+        "list_load_rows_per_second": result.rows_per_second,
+        "matches": len(found),
+        "true_positives": true_positives,
+        "false_positives": len(found) - true_positives,
+        "false_negatives": len(expected) - true_positives,
+        "precision": round(true_positives / len(found), 4) if found else None,
+        "recall": round(true_positives / len(expected), 4) if expected else None,
+        "recall_by_edits": recall_by_edits,
+    }
+
+
+def latency_stats(latencies):
+    return {
+        "samples": len(latencies),
+        "mean_ms": round(statistics.mean(latencies), 3),
+        "p50_ms": round(percentile(latencies, 0.5), 3),
+        "p95_ms": round(percentile(latencies, 0.95), 3),
+        "p99_ms": round(percentile(latencies, 0.99), 3),
+    }
+
+
+def time_inserts(session, statement, rows, triggers):
+    if not triggers:
+        session.execute(text("SET LOCAL session_replication_role = replica"))
+    latencies = []
+    for row in rows:
+        started = time.perf_counter()
+        session.execute(statement, row)
+        latencies.append((time.perf_counter() - started) * 1000)
+    session.execute(text("SET LOCAL session_replication_role = origin"))
+    return latency_stats(latencies)
+
+
+def trigger_latency(session, rng, blacklist_id, samples):
+    def persons():
+        return [natural_person(rng)._asdict() for _ in range(samples)]
+
+    def entries():
+        return [
+            dict(
+                natural_person(rng)._asdict(),
+                blacklist_id=blacklist_id,
+                official_registration_number="LATENCY",
+            )
+            for _ in range(samples)
+        ]
+
+    return {
+        "natural_person_details_tgr": {
+            "with_trigger": time_inserts(session, INSERT_PERSON, persons(), True),
+            "without_triggers": time_inserts(session, INSERT_PERSON, persons(), False),
+        },
+        "blacklist_natural_person_details_tgr": {
+            "with_trigger": time_inserts(session, INSERT_ENTRY, entries(), True),
+            "without_triggers": time_inserts(session, INSERT_ENTRY, entries(), False),
+        },
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--persons", type=int, default=10000)
+    parser.add_argument("--entries", type=int)
+    parser.add_argument("--duplicate-rate", type=float, default=0.01)
+    parser.add_argument("--juridical-rate", type=float, default=0.1)
+    parser.add_argument("--distances", default="1,2,3,4")
+    parser.add_argument("--latency-distance", type=int, default=3)
+    parser.add_argument("--latency-samples", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+    entries = args.entries or max(100, args.persons // 100)
+
+    rng = random.Random(args.seed)
+    report = {
+        "benchmark": "screening_suite",
+        "version": settings.PROJECT_VERSION,
+        "commit": git_commit(),
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "parameters": dict(vars(args), entries=entries),
+    }
+    listed, population, companies = generate(
+        rng, args.persons, entries, args.duplicate_rate, args.juridical_rate
+    )
+    staged = list(list_rows(rng, listed))
+
+    with SessionLocal() as session:
+        try:
+            user_id = session.execute(
+                text(
+                    'INSERT INTO "user" (username, email) VALUES '
+                    "('screening-benchmark', 'screening-benchmark@example.com') "
+                    "RETURNING id"
+                )
+            ).scalar_one()
+            session.execute(text("SELECT set_current_user_id(:id)"), {"id": user_id})
+            for name, value in (
+                ("save_all_comparison_results", "false"),
+                ("screening_mode", "inline"),
+            ):
+                session.execute(SET_CONFIG, {"name": name, "value": value})
+            blacklist_id = session.execute(
+                text(
+                    "INSERT INTO blacklist (short_name) VALUES ('BENCHSUITE') "
+                    "RETURNING id"
+                )
+            ).scalar_one()
+
+            first_id, report["bulk_load"] = load_population(
+                session, population, companies
+            )
+            expected = {
+                (first_id + i, entry): edits
+                for i, (_, entry, edits) in enumerate(population)
+                if entry is not None
+            }
+            report["population"] = {
+                "natural_persons": len(population),
+                "juridical_persons": len(companies),
+                "list_entries": len(listed),
+                "near_duplicates": len(expected),
+            }
+
+            report["accuracy"] = []
+            for distance in (int(d) for d in args.distances.split(",")):
+                session.execute(text("SAVEPOINT accuracy"))
+                report["accuracy"].append(
+                    accuracy(session, blacklist_id, staged, expected, distance)
+                )
+                session.execute(text("ROLLBACK TO SAVEPOINT accuracy"))
+                print("distance {} done".format(distance), file=sys.stderr, flush=True)
+
+            session.execute(
+                SET_CONFIG,
+                {
+                    "name": "max_string_distance_to_match",
+                    "value": str(args.latency_distance),
+                },
+            )
+            load_blacklist(session, blacklist_id, staged)
+            report["trigger_latency"] = trigger_latency(
+                session, rng, blacklist_id, args.latency_samples
+            )
+        finally:
+            session.rollback()
+
+    output = json.dumps(report, indent=2, default=str)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Benchmark: serialization of a page of users.
+
+Usage:
+    python -m benchmarks.serialization --rows 1000 --repeat 20
+
+Inserts --rows users in a transaction that is rolled back at the end and
+times, per page of --rows users:
+
+  * orm+jsonable_encoder: ORM instances encoded by FastAPI's
+    jsonable_encoder and json.dumps, what an endpoint without a
+    response_model costs;
+  * orm+schema: ORM instances validated into UserRead and rendered by orjson;
+  * rows+orjson: plain rows of the UserRead columns encoded by orjson
+    (app/core/serialization.py), what GET /users/ does.
+
+Fetch is the query and the construction of the ORM instances or rows,
+serialize the rest up to the response body.
+"""
+
+import argparse
+import json
+import statistics
+import time
+from typing import List
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from sqlalchemy import select, text
+
+from app.core.serialization import rows_response, schema_columns
+from app.database import SessionLocal
+from app.models import User
+from app.schemas import UserRead
+
+PAGE = TypeAdapter(List[UserRead])
+
+
+def measure(repeat, fetch, serialize):
+    fetch_ms, serialize_ms = [], []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        page = fetch()
+        fetched = time.perf_counter()
+        serialize(page)
+        fetch_ms.append((fetched - started) * 1000)
+        serialize_ms.append((time.perf_counter() - fetched) * 1000)
+    return {
+        "fetch_ms": round(statistics.median(fetch_ms), 2),
+        "serialize_ms": round(statistics.median(serialize_ms), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with SessionLocal() as session:
+        try:
+            session.execute(
+                text(
+                    'INSERT INTO "user" (username, email, name) '
+                    "SELECT 'serialization' || g, 'serialization' || g || "
+                    "'@example.com', 'User ' || g FROM generate_series(1, :rows) g"
+                ),
+                {"rows": args.rows},
+            )
+            orm_page = select(User).order_by(User.id).limit(args.rows)
+            rows_page = (
+                select(*schema_columns(UserRead, User))
+                .order_by(User.id)
+                .limit(args.rows)
+            )
+
+            def fetch_orm():
+                # a new identity map per request, as in the endpoints
+                session.expunge_all()
+                return session.scalars(orm_page).all()
+
+            results = {
+                "orm+jsonable_encoder": measure(
+                    args.repeat,
+                    fetch_orm,
+                    lambda users: json.dumps(jsonable_encoder(users)).encode(),
+                ),
+                "orm+schema": measure(
+                    args.repeat,
+                    fetch_orm,
+                    lambda users: orjson.dumps(
+                        PAGE.dump_python(
+                            PAGE.validate_python(users, from_attributes=True),
+                            mode="json",
+                        )
+                    ),
+                ),
+                "rows+orjson": measure(
+                    args.repeat,
+                    lambda: session.execute(rows_page).all(),
+                    lambda rows: rows_response(rows).body,
+                ),
+            }
+        finally:
+            session.rollback()
+
+    print("{} rows, median of {} runs".format(args.rows, args.repeat))
+    for name, result in results.items():
+        print(
+            "{:<22} fetch {:>8.2f} ms  serialize {:>8.2f} ms".format(
+                name, result["fetch_ms"], result["serialize_ms"]
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark: worker startup time.
+
+Usage:
+    python -m benchmarks.startup --runs 20
+
+Starts --runs fresh interpreters and times in each of them the import of
+app.main, which is what a uvicorn worker or a test run pays before serving
+anything, and the first request (--path), which opens the first database
+connections. Run it from checkouts of different releases to compare them, e.g.
+the models reflected from the database at import against the declared ones
+(app/models.py). With --check-offline the import is also run against an
+unreachable database host, which has to succeed.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from benchmarks.screening_index import percentile
+
+PROBE = """
+import json, time
+started = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+if {path!r}:
+    from fastapi.testclient import TestClient
+    TestClient(app.main.app).get({path!r}).raise_for_status()
+print(json.dumps({{
+    "import_ms": (imported - started) * 1000,
+    "first_request_ms": (time.perf_counter() - imported) * 1000,
+}}))
+"""
+
+
+def probe(path, env=None):
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE.format(path=path)],
+        capture_output=True,
+        text=True,
+        env=env,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def summary(samples):
+    return {
+        "median_ms": round(statistics.median(samples), 1),
+        "p95_ms": round(percentile(samples, 0.95), 1),
+        "max_ms": round(max(samples), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--path", default="/users/?limit=1")
+    parser.add_argument("--check-offline", action="store_true")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    # the first run warms the bytecode and OS caches
+    probe(args.path)
+    runs = [probe(args.path) for _ in range(args.runs)]
+    report = {
+        "runs": args.runs,
+        "import": summary([run["import_ms"] for run in runs]),
+        "first_request": summary([run["first_request_ms"] for run in runs]),
+    }
+    print(
+        "import app.main: median {median_ms} ms, p95 {p95_ms} ms".format(
+            **report["import"]
+        )
+    )
+    print(
+        "first request:   median {median_ms} ms, p95 {p95_ms} ms".format(
+            **report["first_request"]
+        )
+    )
+
+    if args.check_offline:
+        env = dict(os.environ, DB_HOST="unreachable.invalid")
+        try:
+            offline = probe("", env)
+            report["offline_import_ms"] = round(offline["import_ms"], 1)
+            print("offline import:  {} ms".format(report["offline_import_ms"]))
+        except RuntimeError as error:
+            report["offline_import_error"] = str(error)
+            print("offline import:  failed, {}".format(error))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""
+Synthetic Mexican identity data for the benchmarks.
+
+Natural persons get a CURP and an RFC built from their names and date of
+birth with the official structure and check digits, juridical persons an RFC
+built from their legal name. `near_duplicate` derives a person that resembles
+a given one, as a list entry and a customer who is the same individual
+typically do.
+"""
+
+import random
+import string
+from datetime import date, timedelta
+from typing import NamedTuple, Optional
+
+FIRST_NAMES = (
+    "JOSE MARIA JUAN GUADALUPE FRANCISCO ANA LUIS ROSA CARLOS LAURA MIGUEL "
+    "PATRICIA JORGE LETICIA PEDRO GABRIELA ALEJANDRO VERONICA MANUEL ADRIANA "
+    "RICARDO SILVIA FERNANDO CLAUDIA ROBERTO ALEJANDRA EDUARDO MARTHA ARTURO "
+    "ELIZABETH JAVIER MONICA SERGIO TERESA DANIEL JOSEFINA RAUL MARGARITA"
+).split()
+LAST_NAMES = (
+    "HERNANDEZ GARCIA MARTINEZ LOPEZ GONZALEZ PEREZ RODRIGUEZ SANCHEZ RAMIREZ "
+    "CRUZ FLORES GOMEZ MORALES VAZQUEZ REYES JIMENEZ TORRES DIAZ GUTIERREZ RUIZ "
+    "MENDOZA AGUILAR ORTIZ MORENO CASTILLO ROMERO ALVAREZ MENDEZ CHAVEZ RIVERA "
+    "JUAREZ RAMOS DOMINGUEZ HERRERA MEDINA CASTRO VARGAS GUZMAN VELAZQUEZ MUNOZ"
+).split()
+COMPANY_WORDS = (
+    "GRUPO CONSTRUCTORA COMERCIALIZADORA SERVICIOS INDUSTRIAS DISTRIBUIDORA "
+    "INMOBILIARIA TRANSPORTES ALIMENTOS SOLUCIONES DESARROLLOS TECNOLOGIA "
+    "AGROPECUARIA FARMACEUTICA LOGISTICA CONSULTORES NORTE SUR PACIFICO GOLFO "
+    "AZTECA MAYA JALISCO BAJIO SIERRA VALLE CENTRAL NACIONAL INTEGRAL GLOBAL"
+).split()
+COMPANY_TYPES = (
+    "S.A. DE C.V.",
+    "S. DE R.L. DE C.V.",
+    "S.A.P.I. DE C.V.",
+    "S.C.",
+    "A.C.",
+)
+# the 32 federal entities plus NE, born abroad
+STATES = (
+    "AS BC BS CC CL CM CS CH DF DG GT GR HG JC MC MN MS NT NL OC PL QT QR SP "
+    "SL SR TC TS TL VZ YN ZS NE"
+).split()
+
+VOWELS = "AEIOU"
+LETTERS = string.ascii_uppercase
+CURP_ALPHABET = "0123456789ABCDEFGHIJKLMNÑOPQRSTUVWXYZ"
+RFC_ALPHABET = "0123456789ABCDEFGHIJKLMN&OPQRSTUVWXYZ Ñ"
+# words left out of the RFC of a company
+RFC_SKIPPED_WORDS = {"DE", "DEL", "LA", "LAS", "LOS", "Y", "EL", "EN", "CON", "PARA"}
+
+
+class NaturalPerson(NamedTuple):
+    name: str
+    first_last_name: str
+    second_last_name: Optional[str]
+    date_of_birth: date
+    curp: str
+    rfc: str
+
+    @property
+    def full_name(self) -> str:
+        return " ".join(
+            part
+            for part in (self.name, self.first_last_name, self.second_last_name)
+            if part
+        )
+
+
+class JuridicalPerson(NamedTuple):
+    legal_name: str
+    incorporation_date: date
+    rfc: str
+
+
+def _first_vowel(word: str) -> str:
+    return next((c for c in word[1:] if c in VOWELS), "X")
+
+
+def _first_consonant(word: str) -> str:
+    return next((c for c in word[1:] if c in LETTERS and c not in VOWELS), "X")
+
+
+def _given_name(name: str) -> str:
+    # JOSE and MARIA are skipped when they are not the only name
+    names = name.split()
+    if len(names) > 1 and names[0] in ("JOSE", "MARIA", "MA.", "J."):
+        return names[1]
+    return names[0]
+
+
+def curp_check_digit(curp17: str) -> str:
+    total = sum(
+        CURP_ALPHABET.index(c) * (18 - position) for position, c in enumerate(curp17)
+    )
+    return str((10 - total % 10) % 10)
+
+
+def rfc_check_digit(rfc: str) -> str:
+    rfc = rfc.rjust(12)
+    total = sum(
+        RFC_ALPHABET.index(c) * (13 - position) for position, c in enumerate(rfc)
+    )
+    digit = 11 - total % 11
+    if digit == 11:
+        return "0"
+    if digit == 10:
+        return "A"
+    return str(digit)
+
+
+def _homoclave(rng: random.Random) -> str:
+    return "".join(rng.choice(string.digits + LETTERS) for _ in range(2))
+
+
+def curp(
+    rng: random.Random,
+    name: str,
+    first_last_name: str,
+    second_last_name: Optional[str],
+    date_of_birth: date,
+) -> str:
+    given = _given_name(name)
+    second = second_last_name or "X"
+    value = (
+        first_last_name[0]
+        + _first_vowel(first_last_name)
+        + second[0]
+        + given[0]
+        + date_of_birth.strftime("%y%m%d")
+        + rng.choice("HM")
+        + rng.choice(STATES)
+        + _first_consonant(first_last_name)
+        + (_first_consonant(second) if second_last_name else "X")
+        + _first_consonant(given)
+        + rng.choice(string.digits if date_of_birth.year < 2000 else LETTERS)
+    )
+    return value + curp_check_digit(value)
+
+
+def natural_rfc(
+    rng: random.Random,
+    name: str,
+    first_last_name: str,
+    second_last_name: Optional[str],
+    date_of_birth: date,
+) -> str:
+    value = (
+        first_last_name[0]
+        + _first_vowel(first_last_name)
+        + (second_last_name or "X")[0]
+        + _given_name(name)[0]
+        + date_of_birth.strftime("%y%m%d")
+        + _homoclave(rng)
+    )
+    return value + rfc_check_digit(value)
+
+
+def juridical_rfc(rng: random.Random, legal_name: str, incorporation_date: date) -> str:
+    words = [
+        word
+        for word in legal_name.split(",")[0].split()
+        if word not in RFC_SKIPPED_WORDS
+    ]
+    initials = "".join(word[0] for word in words)[:3].ljust(3, "X")
+    value = initials + incorporation_date.strftime("%y%m%d") + _homoclave(rng)
+    return value + rfc_check_digit(value)
+
+
+def random_date(rng: random.Random, start: date, end: date) -> date:
+    return start + timedelta(days=rng.randrange((end - start).days))
+
+
+def natural_person(rng: random.Random) -> NaturalPerson:
+    name = rng.choice(FIRST_NAMES)
+    if rng.random() < 0.3:
+        name += " " + rng.choice(FIRST_NAMES)
+    first_last_name = rng.choice(LAST_NAMES)
+    # a few people have a single surname
+    second_last_name = rng.choice(LAST_NAMES) if rng.random() < 0.97 else None
+    date_of_birth = random_date(rng, date(1940, 1, 1), date(2006, 1, 1))
+    return NaturalPerson(
+        name,
+        first_last_name,
+        second_last_name,
+        date_of_birth,
+        curp(rng, name, first_last_name, second_last_name, date_of_birth),
+        natural_rfc(rng, name, first_last_name, second_last_name, date_of_birth),
+    )
+
+
+def juridical_person(rng: random.Random) -> JuridicalPerson:
+    words = rng.sample(COMPANY_WORDS, rng.randint(2, 4))
+    legal_name = "{}, {}".format(" ".join(words), rng.choice(COMPANY_TYPES))
+    incorporation_date = random_date(rng, date(1970, 1, 1), date(2024, 1, 1))
+    return JuridicalPerson(
+        legal_name,
+        incorporation_date,
+        juridical_rfc(rng, legal_name, incorporation_date),
+    )
+
+
+def typo(rng: random.Random, name: str, edits: int) -> str:
+    """
+    Apply `edits` random substitutions, insertions or deletions to `name`, so
+    the result is at most `edits` edits away from it.
+    """
+    for _ in range(edits):
+        position = rng.randrange(len(name))
+        operation = rng.random()
+        if operation < 0.6 or len(name) < 2:
+            name = name[:position] + rng.choice(LETTERS) + name[position + 1 :]
+        elif operation < 0.8:
+            name = name[:position] + rng.choice(LETTERS) + name[position:]
+        else:
+            name = name[:position] + name[position + 1 :]
+    return name
+
+
+def near_duplicate(
+    rng: random.Random, person: NaturalPerson, edits: int, same_ids: bool = False
+) -> NaturalPerson:
+    """
+    A person whose name is `person`'s with `edits` typos spread over the name
+    parts. The identifiers are `person`'s when `same_ids`, else new ones
+    derived from the misspelled name.
+    """
+    parts = [person.name, person.first_last_name, person.second_last_name]
+    for _ in range(edits):
+        position = rng.choice([i for i, part in enumerate(parts) if part])
+        parts[position] = typo(rng, parts[position], 1).strip() or parts[position]
+    name, first_last_name, second_last_name = parts
+    if same_ids:
+        return person._replace(
+            name=name,
+            first_last_name=first_last_name,
+            second_last_name=second_last_name,
+        )
+    return NaturalPerson(
+        name,
+        first_last_name,
+        second_last_name,
+        person.date_of_birth,
+        curp(rng, name, first_last_name, second_last_name, person.date_of_birth),
+        natural_rfc(rng, name, first_last_name, second_last_name, person.date_of_birth),
+    )
@@ -0,0 +1,196 @@
+"""
+Benchmark: bulk transaction ingestion (app/services/transaction_ingest.py).
+
+Usage:
+    python -m benchmarks.transaction_ingestion --rows 500000 --format csv
+
+Writes a synthetic file of --rows transactions over --products products and
+--types transaction types, about 1% of them invalid, and times:
+
+  * validate: reading and validating the file in Python, without the database;
+  * copy: COPY of the valid rows with the foreign keys of
+    sql/20_transaction.sql checked as it runs, rolled back;
+  * copy-no-fk: the same COPY without the foreign keys, the ceiling of the
+    table and its indexes, rolled back;
+  * ingest: the whole pipeline, committed batch by batch.
+
+The products, transaction types and ingested transactions are deleted at the
+end.
+"""
+
+import argparse
+import io
+import random
+import time
+from datetime import date, timedelta
+
+import orjson
+from sqlalchemy import text
+
+from app.core.transaction_lookups import transaction_lookups
+from app.database import SessionLocal
+from app.services.copy import copy_rows
+from app.services.transaction_ingest import (
+    COLUMNS,
+    ingest_transactions,
+    read_csv_records,
+    read_ndjson_records,
+    validate_transaction,
+)
+
+NO_FOREIGN_KEYS = """
+    ALTER TABLE transaction
+      DROP CONSTRAINT transaction_product_id_fkey,
+      DROP CONSTRAINT transaction_transaction_type_id_fkey
+"""
+
+
+def populate(session, products, types):
+    product_type_id = session.execute(
+        text("INSERT INTO product_type (name) VALUES ('bench') RETURNING id")
+    ).scalar_one()
+    product_ids = session.scalars(
+        text(
+            "INSERT INTO product (name, product_type_id) "
+            "SELECT 'bench ' || g, :product_type_id FROM generate_series(1, :n) g "
+            "RETURNING id"
+        ),
+        {"product_type_id": product_type_id, "n": products},
+    ).all()
+    type_ids = session.scalars(
+        text(
+            "INSERT INTO transaction_type (name) "
+            "SELECT 'bench ' || g FROM generate_series(1, :n) g RETURNING id"
+        ),
+        {"n": types},
+    ).all()
+    session.commit()
+    return product_type_id, product_ids, type_ids
+
+
+def synthetic_rows(rng, rows, product_ids, type_ids):
+    start = date(2024, 1, 1)
+    missing_product = max(product_ids) + 1
+    for i in range(rows):
+        row = [
+            rng.choice(product_ids),
+            rng.choice(type_ids),
+            "Counterpart {}".format(rng.randrange(100000)),
+            "{}.{:02d}".format(rng.randrange(100000), rng.randrange(100)),
+            (start + timedelta(days=rng.randrange(365))).isoformat(),
+        ]
+        if rng.random() < 0.01:
+            error = rng.randrange(3)
+            if error == 0:
+                row[0] = missing_product
+            elif error == 1:
+                row[3] = "1.001"
+            else:
+                row[4] = "2024-02-30"
+        yield row
+
+
+def write_file(file_format, rows):
+    if file_format == "ndjson":
+        return b"".join(orjson.dumps(dict(zip(COLUMNS, row))) + b"\n" for row in rows)
+    lines = [",".join(COLUMNS)]
+    lines += [",".join(str(value) for value in row) for row in rows]
+    return ("\n".join(lines) + "\n").encode()
+
+
+def records(file_format, data):
+    if file_format == "ndjson":
+        return read_ndjson_records(io.BytesIO(data))
+    return read_csv_records(io.StringIO(data.decode(), newline=""))
+
+
+def time_copy(session, rows, setup=None):
+    if setup is not None:
+        session.execute(text(setup))
+    started = time.perf_counter()
+    copy_rows(session, "transaction", COLUMNS, rows)
+    elapsed = time.perf_counter() - started
+    session.rollback()
+    return elapsed
+
+
+def report(label, seconds, rows):
+    print("{:<14} {:>8.2f}s {:>10.0f} rows/s".format(label, seconds, rows / seconds))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=500000)
+    parser.add_argument("--products", type=int, default=10000)
+    parser.add_argument("--types", type=int, default=20)
+    parser.add_argument("--format", choices=["csv", "ndjson"], default="csv")
+    parser.add_argument("--batch-size", type=int, default=50000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with SessionLocal() as session:
+        product_type_id, product_ids, type_ids = populate(
+            session, args.products, args.types
+        )
+        try:
+            data = write_file(
+                args.format,
+                list(synthetic_rows(rng, args.rows, product_ids, type_ids)),
+            )
+            print(
+                "rows={} format={} size={:.1f}MB batch={}".format(
+                    args.rows, args.format, len(data) / 1e6, args.batch_size
+                )
+            )
+
+            lookups = transaction_lookups.lookups(session)
+            started = time.perf_counter()
+            valid = []
+            for line, values, error in records(args.format, data):
+                if error is None:
+                    try:
+                        valid.append(validate_transaction(values, lookups))
+                    except ValueError:
+                        pass
+            report("validate", time.perf_counter() - started, args.rows)
+            session.rollback()
+
+            for label, setup in (
+                ("copy", None),
+                ("copy-no-fk", NO_FOREIGN_KEYS),
+            ):
+                report(label, time_copy(session, valid, setup), len(valid))
+
+            result = ingest_transactions(
+                session, records(args.format, data), args.batch_size
+            )
+            report("ingest", result.elapsed_seconds, args.rows)
+            print(
+                "accepted={} rejected={} batches={}".format(
+                    result.accepted, result.rejected, len(result.batches)
+                )
+            )
+        finally:
+            session.rollback()
+            session.execute(
+                text("DELETE FROM transaction WHERE product_id = ANY (:ids)"),
+                {"ids": product_ids},
+            )
+            session.execute(
+                text("DELETE FROM transaction_type WHERE id = ANY (:ids)"),
+                {"ids": type_ids},
+            )
+            session.execute(
+                text("DELETE FROM product WHERE product_type_id = :id"),
+                {"id": product_type_id},
+            )
+            session.execute(
+                text("DELETE FROM product_type WHERE id = :id"),
+                {"id": product_type_id},
+            )
+            session.commit()
+
+
+if __name__ == "__main__":
+    main()
@@ -39,3 +39,56 @@ LANGUAGE plpgsql;
 CREATE EXTENSION IF NOT EXISTS fuzzystrmatch;
 
 CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- row diffs of the statement level audit triggers
+CREATE EXTENSION IF NOT EXISTS hstore;
+
+-- Name keys for screening. Accents, punctuation, particles and token order do not change the key, so
+-- "José de la Peña Gómez" and "GOMEZ PENA JOSE" share it. translate() instead of unaccent() because generated
+-- columns need IMMUTABLE functions, and before upper() because upper() only folds ASCII under the C locale.
+CREATE OR REPLACE FUNCTION name_key (_name TEXT)
+  RETURNS TEXT
+  AS $$
+  SELECT
+    string_agg(token, ' ' ORDER BY token)
+  FROM
+    regexp_split_to_table(upper(translate(_name, 'áàâäãéèêëíìîïóòôöõúùûüñçÁÀÂÄÃÉÈÊËÍÌÎÏÓÒÔÖÕÚÙÛÜÑÇ',
+      'aaaaaeeeeiiiiooooouuuuncAAAAAEEEEIIIIOOOOOUUUUNC')), '[^A-Z0-9]+') token
+  WHERE
+    token <> ''
+    AND token <> ALL (ARRAY['DA', 'DAS', 'DE', 'DEL', 'DI', 'DO', 'DOS', 'LA', 'LAS', 'LOS', 'VAN', 'VON', 'Y']);
+$$
+LANGUAGE sql
+IMMUTABLE PARALLEL SAFE;
+
+-- Sorted Double Metaphone codes of the name_key tokens: "GONZALEZ HERNANDEZ" and "HERNANDES GONSALEZ" share it
+CREATE OR REPLACE FUNCTION name_phonetic_key (_name TEXT)
+  RETURNS TEXT
+  AS $$
+  SELECT
+    string_agg(code, ' ' ORDER BY code)
+  FROM (
+    SELECT
+      dmetaphone (token) AS code
+    FROM
+      regexp_split_to_table(name_key (_name), ' ') token) codes
+  WHERE
+    code <> '';
+$$
+LANGUAGE sql
+IMMUTABLE PARALLEL SAFE;
+
+-- Legal name key for screening: accents and punctuation folded and the trailing corporate suffixes dropped, so
+-- "Constructora Peña, S.A. de C.V." and "CONSTRUCTORA PENA SAPI DE CV" share it. Dots are removed before
+-- splitting so that "S.A." and "SA" are the same token.
+CREATE OR REPLACE FUNCTION legal_name_key (_legal_name TEXT)
+  RETURNS TEXT
+  AS $$
+  SELECT
+    nullif(regexp_replace(trim(regexp_replace(upper(translate(replace(_legal_name, '.', ''),
+      'áàâäãéèêëíìîïóòôöõúùûüñçÁÀÂÄÃÉÈÊËÍÌÎÏÓÒÔÖÕÚÙÛÜÑÇ', 'aaaaaeeeeiiiiooooouuuuncAAAAAEEEEIIIIOOOOOUUUUNC')),
+      '[^A-Z0-9]+', ' ', 'g')), '( (A|AC|ABP|C|CV|DE|EN|ENR|ER|IAP|L|R|RL|S|SA|SAB|SAPI|SAS|SC|SCL|SCP|SCS|SNC|' ||
+      'SOFOM|SOFIPO|SPR|SRL|V))+$', ''), '');
+$$
+LANGUAGE sql
+IMMUTABLE PARALLEL SAFE;
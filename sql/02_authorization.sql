@@ -103,6 +103,40 @@ END;
 $$
 LANGUAGE plpgsql;
 
+-- Notifies the 'permissions' channel when the effective permissions of a user may have changed, the Python permission
+-- cache (app/core/permission_cache.py) listens on it
+CREATE OR REPLACE FUNCTION permissions_changed_tgr_fn ()
+  RETURNS TRIGGER
+  AS $$
+BEGIN
+  PERFORM
+    pg_notify('permissions', TG_TABLE_NAME);
+  RETURN NULL;
+END;
+$$
+LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS permissions_changed_tgr ON user_role;
+
+CREATE TRIGGER permissions_changed_tgr
+  AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON user_role
+  FOR EACH STATEMENT
+  EXECUTE FUNCTION permissions_changed_tgr_fn ();
+
+DROP TRIGGER IF EXISTS permissions_changed_tgr ON role_permission;
+
+CREATE TRIGGER permissions_changed_tgr
+  AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON role_permission
+  FOR EACH STATEMENT
+  EXECUTE FUNCTION permissions_changed_tgr_fn ();
+
+DROP TRIGGER IF EXISTS permissions_changed_tgr ON "user";
+
+CREATE TRIGGER permissions_changed_tgr
+  AFTER UPDATE OF is_active OR DELETE OR TRUNCATE ON "user"
+  FOR EACH STATEMENT
+  EXECUTE FUNCTION permissions_changed_tgr_fn ();
+
 -- -- Add Audit Triggers
 -- SELECT add_audit_triggers(
 --     ARRAY[
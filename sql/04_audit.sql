@@ -17,27 +17,192 @@ END IF;
 END
 $$;
 
--- Audit Log
+-- audit_log used to be a plain table with INTEGER ids. It is renamed, without its indexes, and its rows are copied
+-- into the partitioned table below.
+DO $$
+DECLARE
+  _constraint TEXT;
+  _index TEXT;
+BEGIN
+  IF (
+    SELECT
+      relkind
+    FROM
+      pg_class
+    WHERE
+      oid = to_regclass('audit_log')) = 'r' THEN
+    ALTER TABLE audit_log RENAME TO audit_log_unpartitioned;
+    ALTER SEQUENCE audit_log_id_seq RENAME TO audit_log_unpartitioned_id_seq;
+    FOR _constraint IN
+    SELECT
+      conname
+    FROM
+      pg_constraint
+    WHERE
+      conrelid = 'audit_log_unpartitioned'::REGCLASS LOOP
+        EXECUTE format('ALTER TABLE audit_log_unpartitioned RENAME CONSTRAINT %I TO %I', _constraint,
+	  replace(_constraint, 'audit_log_', 'audit_log_unpartitioned_'));
+      END LOOP;
+    FOR _index IN
+    SELECT
+      indexrelid::REGCLASS::TEXT
+    FROM
+      pg_index
+    WHERE
+      indrelid = 'audit_log_unpartitioned'::REGCLASS
+      AND NOT indisprimary LOOP
+        EXECUTE format('DROP INDEX %s', _index);
+      END LOOP;
+  END IF;
+END
+$$;
+
+-- Audit Log, range partitioned by changed_at in monthly partitions (see create_audit_log_partitions). Queries
+-- bounded by changed_at only read the partitions of their months, and old months are detached and archived as a
+-- whole (python -m app.cli audit-log-maintenance) instead of being vacuumed with the rest of the history.
 CREATE TABLE IF NOT EXISTS audit_log (
-  id SERIAL PRIMARY KEY,
+  id BIGSERIAL NOT NULL,
   table_name VARCHAR(100) NOT NULL,
   operation_type operation_type_enum NOT NULL,
   record_id INTEGER NOT NULL,
   changed_data JSONB,
   changed_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP NOT NULL,
-  changed_by INTEGER NOT NULL REFERENCES "user" (id) ON DELETE SET NULL
-);
+  changed_by INTEGER NOT NULL REFERENCES "user" (id) ON DELETE SET NULL,
+  PRIMARY KEY (id, changed_at)
+)
+PARTITION BY RANGE (changed_at);
+
+CREATE TABLE IF NOT EXISTS audit_log_default PARTITION OF audit_log DEFAULT;
+
+-- Indexes for the audit queries (GET /audit/): the history of a record and the changes made by a user, both in
+-- (changed_at, id) order for keyset pagination, and time ranges. They replace one B-tree per column, which every
+-- audited write had to update five times.
+DROP INDEX IF EXISTS idx_audit_log_record;
 
--- Indexes to improve query performance on audit_log
-CREATE INDEX IF NOT EXISTS idx_audit_log_table_name ON audit_log (table_name);
+DROP INDEX IF EXISTS idx_audit_log_user;
 
-CREATE INDEX IF NOT EXISTS idx_audit_log_operation_type ON audit_log (operation_type);
+CREATE INDEX IF NOT EXISTS idx_audit_log_record_changes ON audit_log (table_name, record_id, changed_at, id);
+
+CREATE INDEX IF NOT EXISTS idx_audit_log_user_changes ON audit_log (changed_by, changed_at, id);
+
+-- rows are appended in changed_at order
+CREATE INDEX IF NOT EXISTS idx_audit_log_changed_at_brin ON audit_log USING BRIN (changed_at);
+
+-- Creates the monthly partitions of audit_log (audit_log_YYYYMM) from the month of _from, _months of them, plus one
+-- for every month that has rows in the default partition. Those rows are moved to their new partition. Returns
+-- the number of partitions created.
+CREATE OR REPLACE FUNCTION create_audit_log_partitions (_from DATE, _months INTEGER)
+  RETURNS INTEGER
+  AS $$
+DECLARE
+  _month DATE;
+  _partition TEXT;
+  _created INTEGER := 0;
+BEGIN
+  FOR _month IN
+  SELECT
+    generate_series(date_trunc('month', _from), date_trunc('month', _from) + (_months - 1) * INTERVAL '1 month',
+      INTERVAL '1 month')::DATE
+  UNION
+  SELECT DISTINCT
+    date_trunc('month', changed_at)::DATE
+  FROM
+    audit_log_default
+  ORDER BY
+    1 LOOP
+      _partition := 'audit_log_' || to_char(_month, 'YYYYMM');
+      CONTINUE
+      WHEN to_regclass(_partition) IS NOT NULL;
+      EXECUTE format('CREATE TABLE %I (LIKE audit_log INCLUDING DEFAULTS INCLUDING CONSTRAINTS)', _partition);
+      EXECUTE format('WITH moved AS (DELETE FROM audit_log_default WHERE changed_at >= %L AND changed_at < %L
+	RETURNING *) INSERT INTO %I SELECT * FROM moved', _month::TIMESTAMPTZ, (_month + INTERVAL '1 month')::TIMESTAMPTZ,
+	_partition);
+      EXECUTE format('ALTER TABLE audit_log ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)', _partition,
+	_month::TIMESTAMPTZ, (_month + INTERVAL '1 month')::TIMESTAMPTZ);
+      _created := _created + 1;
+    END LOOP;
+  RETURN _created;
+END;
+$$
+LANGUAGE plpgsql;
 
-CREATE INDEX IF NOT EXISTS idx_audit_log_record_id ON audit_log (record_id);
+-- rows of the unpartitioned audit_log, written straight into their monthly partitions
+DO $$
+DECLARE
+  _first_month DATE;
+BEGIN
+  IF to_regclass('audit_log_unpartitioned') IS NOT NULL THEN
+    SELECT
+      date_trunc('month', min(changed_at))::DATE INTO _first_month
+    FROM
+      audit_log_unpartitioned;
+    IF _first_month IS NOT NULL THEN
+      PERFORM
+        create_audit_log_partitions (_first_month, ((extract(year FROM age(date_trunc('month', CURRENT_DATE),
+	  _first_month)) * 12 + extract(month FROM age(date_trunc('month', CURRENT_DATE), _first_month)))::INTEGER +
+	  1));
+    END IF;
+    INSERT INTO audit_log
+    SELECT
+      *
+    FROM
+      audit_log_unpartitioned;
+    PERFORM
+      setval('audit_log_id_seq', coalesce((
+          SELECT
+            max(id)
+          FROM audit_log_unpartitioned), 0) + 1, FALSE);
+    DROP TABLE audit_log_unpartitioned;
+  END IF;
+END
+$$;
 
-CREATE INDEX IF NOT EXISTS idx_audit_log_changed_by ON audit_log (changed_by);
+SELECT
+  create_audit_log_partitions (CURRENT_DATE, 3);
 
-CREATE INDEX IF NOT EXISTS idx_audit_log_changed_at ON audit_log (changed_at);
+-- Detaches the monthly partitions of the months before the month of _before and returns every detached partition,
+-- including the ones detached by a previous call and not archived yet (app/services/audit_archive.py).
+CREATE OR REPLACE FUNCTION detach_audit_log_partitions (_before DATE)
+  RETURNS SETOF TEXT
+  AS $$
+DECLARE
+  _partition TEXT;
+BEGIN
+  FOR _partition IN
+  SELECT
+    c.relname
+  FROM
+    pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid
+  WHERE
+    i.inhparent = 'audit_log'::REGCLASS
+    AND c.relname ~ '^audit_log_\d{6}$'
+    AND to_date(right(c.relname, 6), 'YYYYMM') < date_trunc('month', _before)
+  ORDER BY
+    1 LOOP
+      EXECUTE format('ALTER TABLE audit_log DETACH PARTITION %I', _partition);
+    END LOOP;
+  RETURN QUERY
+  SELECT
+    c.relname::TEXT
+  FROM
+    pg_class c
+  WHERE
+    c.relname ~ '^audit_log_\d{6}$'
+    AND c.relkind = 'r'
+    AND pg_table_is_visible(c.oid)
+    AND NOT EXISTS (
+      SELECT
+        1
+      FROM
+        pg_inherits i
+      WHERE
+        i.inhrelid = c.oid)
+  ORDER BY
+    1;
+END;
+$$
+LANGUAGE plpgsql;
 
 -- Trigger Function for Auditing INSERT operations and setting timestamps
 CREATE OR REPLACE FUNCTION audit_insert ()
@@ -95,73 +260,142 @@ END;
 $$
 LANGUAGE plpgsql;
 
--- Create or replace the add_audit_triggers function
-CREATE OR REPLACE FUNCTION add_audit_triggers (tables TEXT[])
+-- Statement level audit: one set-based insert per statement from its transition tables (new_rows, old_rows)
+-- instead of one insert per row.
+CREATE OR REPLACE FUNCTION audit_insert_statement ()
+  RETURNS TRIGGER
+  AS $$
+BEGIN
+  INSERT INTO audit_log (table_name, operation_type, record_id, changed_data, changed_by)
+  SELECT
+    TG_TABLE_NAME,
+    'INSERT',
+    n.id,
+    to_jsonb (n),
+    current_setting('app.current_user_id')::INTEGER
+  FROM
+    new_rows n;
+  RETURN NULL;
+END;
+$$
+LANGUAGE plpgsql;
+
+-- With TRUE as argument only the changed columns of each row are stored and rows without changes are not audited.
+-- Old and new rows are matched by id.
+CREATE OR REPLACE FUNCTION audit_update_statement ()
+  RETURNS TRIGGER
+  AS $$
+BEGIN
+  IF TG_NARGS > 0 AND TG_ARGV[0]::BOOLEAN THEN
+    -- the new row without the columns whose text form did not change
+    INSERT INTO audit_log (table_name, operation_type, record_id, changed_data, changed_by)
+    SELECT
+      TG_TABLE_NAME,
+      'UPDATE',
+      n.id,
+      to_jsonb (n) - akeys(hstore (n) - akeys(hstore (n) - hstore (o))),
+      current_setting('app.current_user_id')::INTEGER
+    FROM
+      new_rows n
+      JOIN old_rows o ON o.id = n.id
+    WHERE
+      hstore (n) <> hstore (o);
+  ELSE
+    INSERT INTO audit_log (table_name, operation_type, record_id, changed_data, changed_by)
+    SELECT
+      TG_TABLE_NAME,
+      'UPDATE',
+      n.id,
+      to_jsonb (n),
+      current_setting('app.current_user_id')::INTEGER
+    FROM
+      new_rows n;
+  END IF;
+  RETURN NULL;
+END;
+$$
+LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION audit_delete_statement ()
+  RETURNS TRIGGER
+  AS $$
+BEGIN
+  INSERT INTO audit_log (table_name, operation_type, record_id, changed_data, changed_by)
+  SELECT
+    TG_TABLE_NAME,
+    'DELETE',
+    o.id,
+    to_jsonb (o),
+    current_setting('app.current_user_id')::INTEGER
+  FROM
+    old_rows o;
+  RETURN NULL;
+END;
+$$
+LANGUAGE plpgsql;
+
+-- the previous version only took the tables
+DROP FUNCTION IF EXISTS add_audit_triggers (TEXT[]);
+
+-- Installs the audit triggers of the tables, replacing the ones already installed, so a table can be switched
+-- between modes:
+--   * row level (default): one audit_log insert per row, with the whole row;
+--   * statement_level: one audit_log insert per statement, from its transition tables. With changed_columns_only
+--     updates only store the changed columns.
+CREATE OR REPLACE FUNCTION add_audit_triggers (tables TEXT[], statement_level BOOLEAN DEFAULT FALSE,
+  changed_columns_only BOOLEAN DEFAULT FALSE)
   RETURNS VOID
   AS $$
 DECLARE
   tbl TEXT;
-  trigger_name TEXT;
 BEGIN
+  IF changed_columns_only AND NOT statement_level THEN
+    RAISE EXCEPTION 'changed_columns_only requires statement_level audit triggers';
+  END IF;
   FOREACH tbl IN ARRAY tables LOOP
-    -- ***** INSERT Trigger *****
-    trigger_name := 'audit_insert_' || tbl;
-    -- Check if the INSERT trigger already exists
-    IF NOT EXISTS (
-      SELECT
-        1
-      FROM
-        pg_trigger
-      WHERE
-        tgname = trigger_name
-        AND tgrelid = tbl::REGCLASS) THEN
-    -- Create the INSERT trigger
-    EXECUTE format('
-                CREATE TRIGGER %I
+    IF statement_level THEN
+      EXECUTE format('
+                CREATE OR REPLACE TRIGGER %I
+                AFTER INSERT ON %I
+                REFERENCING NEW TABLE AS new_rows
+                FOR EACH STATEMENT
+                EXECUTE FUNCTION audit_insert_statement();
+            ', 'audit_insert_' || tbl, tbl);
+      EXECUTE format('
+                CREATE OR REPLACE TRIGGER %I
+                AFTER UPDATE ON %I
+                REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+                FOR EACH STATEMENT
+                EXECUTE FUNCTION audit_update_statement(%L);
+            ', 'audit_update_' || tbl, tbl, changed_columns_only);
+      EXECUTE format('
+                CREATE OR REPLACE TRIGGER %I
+                AFTER DELETE ON %I
+                REFERENCING OLD TABLE AS old_rows
+                FOR EACH STATEMENT
+                EXECUTE FUNCTION audit_delete_statement();
+            ', 'audit_delete_' || tbl, tbl);
+    ELSE
+      EXECUTE format('
+                CREATE OR REPLACE TRIGGER %I
                 AFTER INSERT ON %I
                 FOR EACH ROW
                 EXECUTE FUNCTION audit_insert();
-            ', trigger_name, tbl);
-  END IF;
-  -- ***** UPDATE Trigger *****
-  trigger_name := 'audit_update_' || tbl;
-  -- Check if the UPDATE trigger already exists
-  IF NOT EXISTS (
-    SELECT
-      1
-    FROM
-      pg_trigger
-    WHERE
-      tgname = trigger_name
-      AND tgrelid = tbl::REGCLASS) THEN
-  -- Create the UPDATE trigger
-  EXECUTE format('
-                CREATE TRIGGER %I
+            ', 'audit_insert_' || tbl, tbl);
+      EXECUTE format('
+                CREATE OR REPLACE TRIGGER %I
                 AFTER UPDATE ON %I
                 FOR EACH ROW
                 EXECUTE FUNCTION audit_update();
-            ', trigger_name, tbl);
-END IF;
-  -- ***** DELETE Trigger *****
-  trigger_name := 'audit_delete_' || tbl;
-  -- Check if the DELETE trigger already exists
-  IF NOT EXISTS (
-    SELECT
-      1
-    FROM
-      pg_trigger
-    WHERE
-      tgname = trigger_name
-      AND tgrelid = tbl::REGCLASS) THEN
-  -- Create the DELETE trigger
-  EXECUTE format('
-                CREATE TRIGGER %I
+            ', 'audit_update_' || tbl, tbl);
+      EXECUTE format('
+                CREATE OR REPLACE TRIGGER %I
                 AFTER DELETE ON %I
                 FOR EACH ROW
                 EXECUTE FUNCTION audit_delete();
-            ', trigger_name, tbl);
-END IF;
-END LOOP;
+            ', 'audit_delete_' || tbl, tbl);
+    END IF;
+  END LOOP;
 END;
 $$
 LANGUAGE plpgsql;
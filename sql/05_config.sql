@@ -9,3 +9,69 @@ CREATE TABLE IF NOT EXISTS config (
 -- Add Audit Trigger
 SELECT
   add_audit_triggers (ARRAY['config']);
+
+-- Config values are read by the screening triggers for every inserted row. config_value caches them in
+-- transaction-local settings (app.config.<name>), so a transaction reads each value from the table once. Every
+-- cached value is tagged with app.config_generation, which config_changed_tgr_fn bumps when the table changes, so
+-- changes made by the same transaction are seen right away. Changes committed by other sessions are seen from the
+-- next transaction on.
+CREATE OR REPLACE FUNCTION config_value (_name TEXT)
+  RETURNS TEXT
+  AS $$
+DECLARE
+  _generation TEXT;
+  _cached TEXT;
+  _value TEXT;
+BEGIN
+  _generation := coalesce(nullif (current_setting('app.config_generation', TRUE), ''), '0');
+  _cached := current_setting('app.config.' || _name, TRUE);
+  -- cached as '<generation>|n' for a missing config or '<generation>|v<value>'
+  IF split_part(_cached, '|', 1) = _generation THEN
+    _cached := substr(_cached, length(_generation) + 2);
+    IF _cached = 'n' THEN
+      RETURN NULL;
+    END IF;
+    RETURN substr(_cached, 2);
+  END IF;
+  SELECT
+    value INTO _value
+  FROM
+    config
+  WHERE
+    name = _name;
+  PERFORM
+    set_config('app.config.' || _name, _generation || '|' || coalesce('v' || _value, 'n'), TRUE);
+  RETURN _value;
+END;
+$$
+LANGUAGE plpgsql;
+
+-- Invalidates the config_value cache of the current transaction and notifies the 'config' channel, which the
+-- Python config cache (app/core/config_cache.py) listens on
+CREATE OR REPLACE FUNCTION config_changed_tgr_fn ()
+  RETURNS TRIGGER
+  AS $$
+BEGIN
+  PERFORM
+    set_config('app.config_generation', (coalesce(nullif (current_setting('app.config_generation', TRUE), ''),
+	'0')::INTEGER + 1)::TEXT, TRUE);
+  PERFORM
+    pg_notify('config', TG_OP);
+  RETURN NULL;
+END;
+$$
+LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS config_changed_tgr ON config;
+
+CREATE TRIGGER config_changed_tgr
+  AFTER INSERT OR UPDATE OR DELETE ON config
+  FOR EACH STATEMENT
+  EXECUTE FUNCTION config_changed_tgr_fn ();
+
+DROP TRIGGER IF EXISTS config_truncated_tgr ON config;
+
+CREATE TRIGGER config_truncated_tgr
+  AFTER TRUNCATE ON config
+  FOR EACH STATEMENT
+  EXECUTE FUNCTION config_changed_tgr_fn ();
@@ -29,6 +29,16 @@ CREATE TABLE IF NOT EXISTS natural_person_details (
   PRIMARY KEY (person_id)
 );
 
+-- Screening keys, see name_key and name_phonetic_key. Added with ALTER so that existing databases get them
+-- too: adding a stored generated column computes it for every existing row.
+ALTER TABLE natural_person_details
+  ADD COLUMN IF NOT EXISTS name_key TEXT GENERATED ALWAYS AS (name_key (NAME || ' ' || first_last_name || coalesce(' ' ||
+    second_last_name, ''))) STORED;
+
+ALTER TABLE natural_person_details
+  ADD COLUMN IF NOT EXISTS phonetic_key TEXT GENERATED ALWAYS AS (name_phonetic_key (NAME || ' ' || first_last_name ||
+    coalesce(' ' || second_last_name, ''))) STORED;
+
 DROP TRIGGER IF EXISTS prevent_natural_person_updates ON natural_person_details;
 
 CREATE TRIGGER prevent_natural_person_updates
@@ -44,74 +54,213 @@ CREATE INDEX IF NOT EXISTS idx_full_name_natural_details ON natural_person_detai
 
 CREATE INDEX IF NOT EXISTS idx_full_name_trgm_natural_details ON natural_person_details USING GIN (full_name gin_trgm_ops);
 
-CREATE OR REPLACE FUNCTION natural_person_details_tgr_fn ()
-  RETURNS TRIGGER
+CREATE INDEX IF NOT EXISTS idx_full_name_length_natural_details ON natural_person_details (length(full_name));
+
+CREATE INDEX IF NOT EXISTS idx_name_key_natural_details ON natural_person_details USING HASH (name_key);
+
+CREATE INDEX IF NOT EXISTS idx_phonetic_key_natural_details ON natural_person_details USING HASH (phonetic_key);
+
+-- Blocking stage for name screening: returns the persons whose full_name is within _max_distance edits of
+-- _full_name. Candidates are shortlisted through the indexes before the exact distance is computed:
+--   * length band: |length(a) - length(b)| is a lower bound of levenshtein(a, b), so it never loses matches.
+--   * trigram similarity: only when the 'name_similarity_threshold' config is set. Higher values discard more
+--     candidates through the GIN index at the cost of recall.
+CREATE OR REPLACE FUNCTION natural_person_name_candidates (_full_name TEXT, _max_distance INTEGER)
+  RETURNS TABLE (
+    person_id INTEGER,
+    distance INTEGER)
   AS $$
 DECLARE
-  _row_count INTEGER;
-  min_distance INTEGER;
-  save_all_comparison_results BOOLEAN;
+  _similarity_threshold REAL;
+  _previous_threshold TEXT;
 BEGIN
-  min_distance := (
+  _similarity_threshold := config_value ('name_similarity_threshold')::REAL;
+  IF _similarity_threshold IS NULL THEN
+    RETURN QUERY
     SELECT
-      value::INTEGER
+      npd.person_id,
+      levenshtein_less_equal (npd.full_name, _full_name, _max_distance)
     FROM
-      config
+      natural_person_details npd
     WHERE
-      name = 'max_string_distance_to_match');
-  save_all_comparison_results := (
+      length(npd.full_name) BETWEEN length(_full_name) - _max_distance AND length(_full_name) + _max_distance
+      AND levenshtein_less_equal (npd.full_name, _full_name, _max_distance) <= _max_distance;
+  ELSE
+    _previous_threshold := current_setting('pg_trgm.similarity_threshold');
+    PERFORM
+      set_config('pg_trgm.similarity_threshold', _similarity_threshold::TEXT, TRUE);
+    RETURN QUERY
     SELECT
-      value::BOOLEAN
+      npd.person_id,
+      levenshtein_less_equal (npd.full_name, _full_name, _max_distance)
     FROM
-      config
+      natural_person_details npd
     WHERE
-      name = 'save_all_comparison_results');
+      npd.full_name % _full_name
+      AND length(npd.full_name) BETWEEN length(_full_name) - _max_distance AND length(_full_name) + _max_distance
+      AND levenshtein_less_equal (npd.full_name, _full_name, _max_distance) <= _max_distance;
+    PERFORM
+      set_config('pg_trgm.similarity_threshold', _previous_threshold, TRUE);
+  END IF;
+END;
+$$
+LANGUAGE plpgsql;
+
+-- Screens a natural person against the blacklists and returns the number of blacklist_search rows written.
+-- Results replace the previous result of the pair unless it is from today, so processing a person twice on the same
+-- day is harmless.
+CREATE OR REPLACE FUNCTION screen_natural_person (_person_id INTEGER)
+  RETURNS INTEGER
+  AS $$
+DECLARE
+  _person natural_person_details;
+  _row_count INTEGER;
+  min_distance INTEGER;
+  save_all_comparison_results BOOLEAN;
+BEGIN
+  SELECT
+    * INTO _person
+  FROM
+    natural_person_details
+  WHERE
+    person_id = _person_id;
+  IF NOT FOUND THEN
+    RETURN 0;
+  END IF;
+  min_distance := config_value ('max_string_distance_to_match')::INTEGER;
+  save_all_comparison_results := config_value ('save_all_comparison_results')::BOOLEAN;
   IF save_all_comparison_results IS TRUE THEN
     INSERT INTO blacklist_search (person_id, blacklist_person_id, MATCH, match_score, search_date, match_details)
     SELECT
-      NEW.person_id,
+      _person.person_id,
       bl_npd.id,
-      TRUE,
-      1,
+      -- same rules as below: exact hits, then the name distance and the phonetic key
+      c.exact
+      OR c.distance < min_distance
+      OR bl_npd.phonetic_key = _person.phonetic_key,
+      CASE WHEN c.exact THEN
+        1
+      ELSE
+        greatest(0, 1.0 * (length(_person.full_name) - c.distance) / length(_person.full_name))
+      END,
       CURRENT_DATE,
-      json_build_object('rfc_match', bl_npd.rfc = NEW.rfc, 'curp_match', bl_npd.curp = NEW.curp,
-	'name_match', levenshtein (bl_npd.full_name, NEW.full_name) < min_distance, 'levenshtein_distance',
-	levenshtein (bl_npd.full_name, NEW.full_name))
+      json_build_object('rfc_match', bl_npd.rfc = _person.rfc, 'curp_match', bl_npd.curp = _person.curp,
+	'name_match', c.distance < min_distance, 'levenshtein_distance', c.distance)
     FROM
-      blacklist_natural_person_details bl_npd;
+      blacklist_natural_person_details bl_npd
+      CROSS JOIN LATERAL (
+        SELECT
+          levenshtein (bl_npd.full_name, _person.full_name) AS distance,
+          coalesce(bl_npd.rfc = _person.rfc OR bl_npd.curp = _person.curp, FALSE)
+          OR bl_npd.full_name = _person.full_name
+          OR bl_npd.name_key = _person.name_key AS exact) c
+    ON CONFLICT (person_id,
+      blacklist_person_id)
+      DO UPDATE SET
+        MATCH = EXCLUDED.match,
+        match_score = EXCLUDED.match_score,
+        search_date = EXCLUDED.search_date,
+        created_at = EXCLUDED.created_at,
+        match_details = EXCLUDED.match_details
+      WHERE
+        blacklist_search.search_date < EXCLUDED.search_date;
+    GET DIAGNOSTICS _row_count := ROW_COUNT;
   ELSE
     INSERT INTO blacklist_search (person_id, blacklist_person_id, MATCH, match_score, search_date, match_details)
     SELECT
-      NEW.person_id,
+      _person.person_id,
       bl_npd.id,
       TRUE,
       1,
       CURRENT_DATE,
-      json_build_object('rfc_match', bl_npd.rfc = NEW.rfc, 'curp_match', bl_npd.curp = NEW.curp,
-	'name_match', bl_npd.full_name = NEW.full_name)
+      json_build_object('rfc_match', bl_npd.rfc = _person.rfc, 'curp_match', bl_npd.curp = _person.curp,
+	'name_match', bl_npd.full_name = _person.full_name, 'name_key_match', bl_npd.name_key = _person.name_key)
     FROM
       blacklist_natural_person_details bl_npd
-    WHERE
-      bl_npd.full_name = NEW.full_name
-      OR bl_npd.curp = NEW.curp
-      OR bl_npd.rfc = NEW.rfc;
+    WHERE (bl_npd.full_name = _person.full_name
+      OR bl_npd.name_key = _person.name_key
+      OR bl_npd.curp = _person.curp
+      OR bl_npd.rfc = _person.rfc)
+    ON CONFLICT (person_id,
+      blacklist_person_id)
+      DO UPDATE SET
+        MATCH = EXCLUDED.match,
+        match_score = EXCLUDED.match_score,
+        search_date = EXCLUDED.search_date,
+        created_at = EXCLUDED.created_at,
+        match_details = EXCLUDED.match_details
+      WHERE
+        blacklist_search.search_date < EXCLUDED.search_date;
     GET DIAGNOSTICS _row_count := ROW_COUNT;
-    IF _row_count = 0 THEN
+    IF _row_count = 0 AND NOT EXISTS (
+      SELECT
+        1
+      FROM
+        blacklist_natural_person_details bl_npd
+      WHERE
+        bl_npd.full_name = _person.full_name
+        OR bl_npd.name_key = _person.name_key
+        OR bl_npd.curp = _person.curp
+        OR bl_npd.rfc = _person.rfc) THEN
       INSERT INTO blacklist_search (person_id, blacklist_person_id, MATCH, match_score, search_date, match_details)
       SELECT
-        NEW.person_id,
+        _person.person_id,
         bl_npd.id,
         TRUE,
-        1.0 * (length(NEW.full_name) - levenshtein (bl_npd.full_name, NEW.full_name)) / length(NEW.full_name),
+        greatest(0, 1.0 * (length(_person.full_name) - candidate.distance) / length(_person.full_name)),
         CURRENT_DATE,
-	json_build_object('rfc_match', bl_npd.rfc = NEW.rfc, 'curp_match', bl_npd.curp = NEW.curp,
-	  'name_match', TRUE, 'levenshtein_distance', levenshtein (bl_npd.full_name, NEW.full_name))
-      FROM
-        blacklist_natural_person_details bl_npd
-      WHERE
-        levenshtein (bl_npd.full_name, NEW.full_name) < min_distance;
+	json_build_object('rfc_match', bl_npd.rfc = _person.rfc, 'curp_match', bl_npd.curp = _person.curp,
+	  'name_match', TRUE, 'levenshtein_distance', candidate.distance, 'phonetic_match', bl_npd.phonetic_key =
+	  _person.phonetic_key)
+      FROM (
+        -- names within the distance plus the names that sound the same
+        SELECT
+          c.id,
+          c.distance
+        FROM
+          blacklist_natural_person_name_candidates (_person.full_name, min_distance - 1) c
+        UNION
+        SELECT
+          p.id,
+          levenshtein (p.full_name, _person.full_name)
+        FROM
+          blacklist_natural_person_details p
+        WHERE
+          p.phonetic_key = _person.phonetic_key) candidate
+        JOIN blacklist_natural_person_details bl_npd ON bl_npd.id = candidate.id
+      ON CONFLICT (person_id,
+        blacklist_person_id)
+        DO UPDATE SET
+          MATCH = EXCLUDED.match,
+          match_score = EXCLUDED.match_score,
+          search_date = EXCLUDED.search_date,
+          created_at = EXCLUDED.created_at,
+          match_details = EXCLUDED.match_details
+        WHERE
+          blacklist_search.search_date < EXCLUDED.search_date;
+      GET DIAGNOSTICS _row_count := ROW_COUNT;
     END IF;
   END IF;
+  RETURN _row_count;
+END;
+$$
+LANGUAGE plpgsql;
+
+-- Screening runs inline unless the 'screening_mode' config is 'async'. Then the person is queued and a worker
+-- (python -m app.cli screening-worker) screens it, see screening_queue.
+CREATE OR REPLACE FUNCTION natural_person_details_tgr_fn ()
+  RETURNS TRIGGER
+  AS $$
+BEGIN
+  IF config_value ('screening_mode') = 'async' THEN
+    INSERT INTO screening_queue (person_id)
+      VALUES (NEW.person_id);
+    PERFORM
+      pg_notify('screening_queue', NEW.person_id::TEXT);
+  ELSE
+    PERFORM
+      screen_natural_person (NEW.person_id);
+  END IF;
   RETURN NEW;
 END;
 $$
@@ -133,6 +282,10 @@ CREATE TABLE IF NOT EXISTS juridical_person_details (
   PRIMARY KEY (person_id)
 );
 
+-- Screening key, see legal_name_key
+ALTER TABLE juridical_person_details
+  ADD COLUMN IF NOT EXISTS legal_name_key TEXT GENERATED ALWAYS AS (legal_name_key (legal_name)) STORED;
+
 DROP TRIGGER IF EXISTS prevent_juridical_person_updates ON juridical_person_details;
 
 CREATE TRIGGER prevent_juridical_person_updates
@@ -141,3 +294,111 @@ CREATE TRIGGER prevent_juridical_person_updates
   EXECUTE FUNCTION prevent_updates ();
 
 CREATE INDEX IF NOT EXISTS idx_rfc_juridical_details ON juridical_person_details (rfc);
+
+CREATE INDEX IF NOT EXISTS idx_legal_name_key_juridical_details ON juridical_person_details USING HASH (legal_name_key);
+
+CREATE INDEX IF NOT EXISTS idx_legal_name_key_trgm_juridical_details ON juridical_person_details USING GIN
+  (legal_name_key gin_trgm_ops);
+
+-- Blocking stage for legal name screening: returns the persons whose legal_name_key is similar to _legal_name_key
+-- through the trigram index, so the cost depends on the number of similar names and not on the table size. The
+-- threshold is the 'legal_name_similarity_threshold' config, 0.6 when it is not set.
+CREATE OR REPLACE FUNCTION juridical_person_name_candidates (_legal_name_key TEXT)
+  RETURNS TABLE (
+    person_id INTEGER,
+    similarity REAL)
+  AS $$
+DECLARE
+  _previous_threshold TEXT;
+BEGIN
+  _previous_threshold := current_setting('pg_trgm.similarity_threshold');
+  PERFORM
+    set_config('pg_trgm.similarity_threshold', coalesce(config_value ('legal_name_similarity_threshold'), '0.6'),
+      TRUE);
+  RETURN QUERY
+  SELECT
+    jpd.person_id,
+    similarity (jpd.legal_name_key, _legal_name_key)
+  FROM
+    juridical_person_details jpd
+  WHERE
+    jpd.legal_name_key % _legal_name_key;
+  PERFORM
+    set_config('pg_trgm.similarity_threshold', _previous_threshold, TRUE);
+END;
+$$
+LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION juridical_person_details_tgr_fn ()
+  RETURNS TRIGGER
+  AS $$
+DECLARE
+  _row_count INTEGER;
+  save_all_comparison_results BOOLEAN;
+  similarity_threshold REAL;
+BEGIN
+  save_all_comparison_results := config_value ('save_all_comparison_results')::BOOLEAN;
+  IF save_all_comparison_results IS TRUE THEN
+    similarity_threshold := coalesce(config_value ('legal_name_similarity_threshold'), '0.6')::REAL;
+    INSERT INTO blacklist_search (person_id, blacklist_person_id, MATCH, match_score, search_date, match_details)
+    SELECT
+      NEW.person_id,
+      bl_jpd.id,
+      c.exact
+      OR c.similarity >= similarity_threshold,
+      CASE WHEN c.exact THEN
+        1
+      ELSE
+        c.similarity
+      END,
+      CURRENT_DATE,
+      json_build_object('rfc_match', bl_jpd.rfc = NEW.rfc, 'name_match', bl_jpd.legal_name_key =
+	NEW.legal_name_key, 'similarity', c.similarity)
+    FROM
+      blacklist_juridical_person_details bl_jpd
+      CROSS JOIN LATERAL (
+        SELECT
+          similarity (bl_jpd.legal_name_key, NEW.legal_name_key) AS similarity,
+          coalesce(bl_jpd.rfc = NEW.rfc, FALSE)
+          OR bl_jpd.legal_name_key = NEW.legal_name_key AS exact) c;
+  ELSE
+    INSERT INTO blacklist_search (person_id, blacklist_person_id, MATCH, match_score, search_date, match_details)
+    SELECT
+      NEW.person_id,
+      bl_jpd.id,
+      TRUE,
+      1,
+      CURRENT_DATE,
+      json_build_object('rfc_match', bl_jpd.rfc = NEW.rfc, 'name_match', bl_jpd.legal_name_key =
+	NEW.legal_name_key)
+    FROM
+      blacklist_juridical_person_details bl_jpd
+    WHERE
+      bl_jpd.legal_name_key = NEW.legal_name_key
+      OR bl_jpd.rfc = NEW.rfc;
+    GET DIAGNOSTICS _row_count := ROW_COUNT;
+    IF _row_count = 0 THEN
+      INSERT INTO blacklist_search (person_id, blacklist_person_id, MATCH, match_score, search_date, match_details)
+      SELECT
+        NEW.person_id,
+        bl_jpd.id,
+        TRUE,
+        candidate.similarity,
+        CURRENT_DATE,
+	json_build_object('rfc_match', bl_jpd.rfc = NEW.rfc, 'name_match', TRUE, 'similarity', candidate.similarity)
+      FROM
+        blacklist_juridical_person_name_candidates (NEW.legal_name_key) candidate
+        JOIN blacklist_juridical_person_details bl_jpd ON bl_jpd.id = candidate.id;
+    END IF;
+  END IF;
+  RETURN NEW;
+END;
+$$
+LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS juridical_person_details_tgr ON juridical_person_details;
+
+CREATE TRIGGER juridical_person_details_tgr
+  AFTER INSERT ON juridical_person_details
+  FOR EACH ROW
+  EXECUTE FUNCTION juridical_person_details_tgr_fn ();
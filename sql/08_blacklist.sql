@@ -65,6 +65,16 @@ CREATE TABLE IF NOT EXISTS blacklist_natural_person_details (
   PRIMARY KEY (id)
 );
 
+-- Screening keys, see name_key and name_phonetic_key. Added with ALTER so that existing databases get them
+-- too: adding a stored generated column computes it for every existing row.
+ALTER TABLE blacklist_natural_person_details
+  ADD COLUMN IF NOT EXISTS name_key TEXT GENERATED ALWAYS AS (name_key (NAME || ' ' || first_last_name || coalesce(' ' ||
+    second_last_name, ''))) STORED;
+
+ALTER TABLE blacklist_natural_person_details
+  ADD COLUMN IF NOT EXISTS phonetic_key TEXT GENERATED ALWAYS AS (name_phonetic_key (NAME || ' ' || first_last_name ||
+    coalesce(' ' || second_last_name, ''))) STORED;
+
 CREATE INDEX IF NOT EXISTS idx_curp_blacklist_natural_details ON blacklist_natural_person_details USING HASH (curp);
 
 CREATE INDEX IF NOT EXISTS idx_rfc_blacklist_natural_details ON blacklist_natural_person_details USING HASH (rfc);
@@ -75,6 +85,15 @@ CREATE INDEX IF NOT EXISTS idx_full_name_blacklist_natural_details ON blacklist_
 CREATE INDEX IF NOT EXISTS idx_full_name_trgm_blacklist_natural_details ON blacklist_natural_person_details
   USING GIN (full_name gin_trgm_ops);
 
+CREATE INDEX IF NOT EXISTS idx_full_name_length_blacklist_natural_details ON blacklist_natural_person_details
+  (length(full_name));
+
+CREATE INDEX IF NOT EXISTS idx_name_key_blacklist_natural_details ON blacklist_natural_person_details USING
+  HASH (name_key);
+
+CREATE INDEX IF NOT EXISTS idx_phonetic_key_blacklist_natural_details ON blacklist_natural_person_details USING
+  HASH (phonetic_key);
+
 DROP TRIGGER IF EXISTS prevent_blacklist_natural_person_updates ON blacklist_natural_person_details;
 
 CREATE TRIGGER prevent_blacklist_natural_person_updates
@@ -82,75 +101,141 @@ CREATE TRIGGER prevent_blacklist_natural_person_updates
   FOR EACH ROW
   EXECUTE FUNCTION prevent_updates ();
 
-CREATE OR REPLACE FUNCTION blacklist_natural_person_details_tgr_fn ()
-  RETURNS TRIGGER
+-- Blocking stage for name screening against the blacklist, see natural_person_name_candidates
+CREATE OR REPLACE FUNCTION blacklist_natural_person_name_candidates (_full_name TEXT, _max_distance INTEGER)
+  RETURNS TABLE (
+    id INTEGER,
+    distance INTEGER)
   AS $$
 DECLARE
-  _row_count INTEGER;
-  min_distance INTEGER;
-  save_all_comparison_results BOOLEAN;
+  _similarity_threshold REAL;
+  _previous_threshold TEXT;
 BEGIN
-  min_distance := (
+  _similarity_threshold := config_value ('name_similarity_threshold')::REAL;
+  IF _similarity_threshold IS NULL THEN
+    RETURN QUERY
     SELECT
-      value::INTEGER
+      bl_npd.id,
+      levenshtein_less_equal (bl_npd.full_name, _full_name, _max_distance)
     FROM
-      config
+      blacklist_natural_person_details bl_npd
     WHERE
-      name = 'max_string_distance_to_match');
-  save_all_comparison_results := (
+      length(bl_npd.full_name) BETWEEN length(_full_name) - _max_distance AND length(_full_name) + _max_distance
+      AND levenshtein_less_equal (bl_npd.full_name, _full_name, _max_distance) <= _max_distance;
+  ELSE
+    _previous_threshold := current_setting('pg_trgm.similarity_threshold');
+    PERFORM
+      set_config('pg_trgm.similarity_threshold', _similarity_threshold::TEXT, TRUE);
+    RETURN QUERY
     SELECT
-      value::BOOLEAN
+      bl_npd.id,
+      levenshtein_less_equal (bl_npd.full_name, _full_name, _max_distance)
     FROM
-      config
+      blacklist_natural_person_details bl_npd
     WHERE
-      name = 'save_all_comparison_results');
+      bl_npd.full_name % _full_name
+      AND length(bl_npd.full_name) BETWEEN length(_full_name) - _max_distance AND length(_full_name) + _max_distance
+      AND levenshtein_less_equal (bl_npd.full_name, _full_name, _max_distance) <= _max_distance;
+    PERFORM
+      set_config('pg_trgm.similarity_threshold', _previous_threshold, TRUE);
+  END IF;
+END;
+$$
+LANGUAGE plpgsql;
+
+-- Screens the inserted natural persons against natural_person_details with a few set-based statements, so a list
+-- load (load_blacklist_natural_person_staging) costs the same per entry as a single insert.
+CREATE OR REPLACE FUNCTION blacklist_natural_person_details_tgr_fn ()
+  RETURNS TRIGGER
+  AS $$
+DECLARE
+  min_distance INTEGER;
+  save_all_comparison_results BOOLEAN;
+BEGIN
+  min_distance := config_value ('max_string_distance_to_match')::INTEGER;
+  save_all_comparison_results := config_value ('save_all_comparison_results')::BOOLEAN;
   IF save_all_comparison_results IS TRUE THEN
     INSERT INTO blacklist_search (person_id, blacklist_person_id, MATCH, match_score, search_date, match_details)
     SELECT
       npd.person_id,
-      NEW.id,
-      TRUE,
-      1,
+      n.id,
+      -- same rules as below: exact hits, then the name distance and the phonetic key
+      c.exact
+      OR c.distance < min_distance
+      OR npd.phonetic_key = n.phonetic_key,
+      CASE WHEN c.exact THEN
+        1
+      ELSE
+        greatest(0, 1.0 * (length(n.full_name) - c.distance) / length(n.full_name))
+      END,
       CURRENT_DATE,
-      jsonb_build_object('rfc_match', npd.rfc = NEW.rfc, 'curp_match', npd.curp = NEW.curp,
-	'name_match', levenshtein (npd.full_name, NEW.full_name) < min_distance, 'levenshtein_distance', levenshtein
-	(npd.full_name, NEW.full_name))
+      jsonb_build_object('rfc_match', npd.rfc = n.rfc, 'curp_match', npd.curp = n.curp,
+	'name_match', c.distance < min_distance, 'levenshtein_distance', c.distance)
     FROM
-      natural_person_details npd;
+      new_rows n
+      CROSS JOIN natural_person_details npd
+      CROSS JOIN LATERAL (
+        SELECT
+          levenshtein (npd.full_name, n.full_name) AS distance,
+          coalesce(npd.rfc = n.rfc OR npd.curp = n.curp, FALSE)
+          OR npd.full_name = n.full_name
+          OR npd.name_key = n.name_key AS exact) c;
   ELSE
     INSERT INTO blacklist_search (person_id, blacklist_person_id, MATCH, match_score, search_date, match_details)
     SELECT
       npd.person_id,
-      NEW.id,
+      n.id,
       TRUE,
       1,
       CURRENT_DATE,
-      jsonb_build_object('rfc_match', npd.rfc = NEW.rfc, 'curp_match', npd.curp = NEW.curp,
-	'name_match', npd.full_name = NEW.full_name)
+      jsonb_build_object('rfc_match', npd.rfc = n.rfc, 'curp_match', npd.curp = n.curp,
+	'name_match', npd.full_name = n.full_name, 'name_key_match', npd.name_key = n.name_key)
+    FROM
+      new_rows n
+      JOIN natural_person_details npd ON npd.full_name = n.full_name
+        OR npd.name_key = n.name_key
+        OR npd.curp = n.curp
+        OR npd.rfc = n.rfc;
+    -- entries without exact matches fall back to the name distance and the phonetic key
+    INSERT INTO blacklist_search (person_id, blacklist_person_id, MATCH, match_score, search_date, match_details)
+    SELECT
+      npd.person_id,
+      n.id,
+      TRUE,
+      greatest(0, 1.0 * (length(n.full_name) - candidate.distance) / length(n.full_name)),
+      CURRENT_DATE,
+      jsonb_build_object('rfc_match', npd.rfc = n.rfc, 'curp_match', npd.curp = n.curp,
+	'name_match', TRUE, 'levenshtein_distance', candidate.distance, 'phonetic_match', npd.phonetic_key =
+	n.phonetic_key)
     FROM
-      natural_person_details npd
+      new_rows n
+      CROSS JOIN LATERAL (
+        -- names within the distance plus the names that sound the same
+        SELECT
+          c.person_id,
+          c.distance
+        FROM
+          natural_person_name_candidates (n.full_name, min_distance - 1) c
+        UNION
+        SELECT
+          p.person_id,
+          levenshtein (p.full_name, n.full_name)
+        FROM
+          natural_person_details p
+        WHERE
+          p.phonetic_key = n.phonetic_key) candidate
+      JOIN natural_person_details npd ON npd.person_id = candidate.person_id
     WHERE
-      npd.full_name = NEW.full_name
-      OR npd.curp = NEW.curp
-      OR npd.rfc = NEW.rfc;
-    GET DIAGNOSTICS _row_count := ROW_COUNT;
-    IF _row_count = 0 THEN
-      INSERT INTO blacklist_search (person_id, blacklist_person_id, MATCH, match_score, search_date, match_details)
-      SELECT
-        npd.person_id,
-        NEW.id,
-        TRUE,
-        1.0 * (length(NEW.full_name) - levenshtein (npd.full_name, NEW.full_name)) / length(NEW.full_name),
-        CURRENT_DATE,
-	jsonb_build_object('rfc_match', npd.rfc = NEW.rfc, 'curp_match', npd.curp = NEW.curp,
-	  'name_match', TRUE, 'levenshtein_distance', levenshtein (npd.full_name, NEW.full_name))
-      FROM
-        natural_person_details npd
-      WHERE
-        levenshtein (npd.full_name, NEW.full_name) < min_distance;
-    END IF;
+      NOT EXISTS (
+        SELECT
+          1
+        FROM
+          blacklist_search bs
+        WHERE
+          bs.blacklist_person_id = n.id
+          AND bs.match);
   END IF;
-  RETURN NEW;
+  RETURN NULL;
 END;
 $$
 LANGUAGE plpgsql;
@@ -159,7 +244,8 @@ DROP TRIGGER IF EXISTS blacklist_natural_person_details_tgr ON blacklist_natural
 
 CREATE TRIGGER blacklist_natural_person_details_tgr
   AFTER INSERT ON blacklist_natural_person_details
-  FOR EACH ROW
+  REFERENCING NEW TABLE AS new_rows
+  FOR EACH STATEMENT
   EXECUTE FUNCTION blacklist_natural_person_details_tgr_fn ();
 
 -- Juridical Person Blacklist
@@ -172,6 +258,18 @@ CREATE TABLE IF NOT EXISTS blacklist_juridical_person_details (
   PRIMARY KEY (id)
 );
 
+-- Screening key, see legal_name_key
+ALTER TABLE blacklist_juridical_person_details
+  ADD COLUMN IF NOT EXISTS legal_name_key TEXT GENERATED ALWAYS AS (legal_name_key (legal_name)) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_rfc_blacklist_juridical_details ON blacklist_juridical_person_details USING HASH (rfc);
+
+CREATE INDEX IF NOT EXISTS idx_legal_name_key_blacklist_juridical_details ON blacklist_juridical_person_details
+  USING HASH (legal_name_key);
+
+CREATE INDEX IF NOT EXISTS idx_legal_name_key_trgm_blacklist_juridical_details ON
+  blacklist_juridical_person_details USING GIN (legal_name_key gin_trgm_ops);
+
 DROP TRIGGER IF EXISTS prevent_blacklist_juridical_person_updates ON blacklist_juridical_person_details;
 
 CREATE TRIGGER prevent_blacklist_juridical_person_updates
@@ -179,7 +277,317 @@ CREATE TRIGGER prevent_blacklist_juridical_person_updates
   FOR EACH ROW
   EXECUTE FUNCTION prevent_updates ();
 
--- Add Audit Triggers
+-- Blocking stage for legal name screening against the blacklist, see juridical_person_name_candidates
+CREATE OR REPLACE FUNCTION blacklist_juridical_person_name_candidates (_legal_name_key TEXT)
+  RETURNS TABLE (
+    id INTEGER,
+    similarity REAL)
+  AS $$
+DECLARE
+  _previous_threshold TEXT;
+BEGIN
+  _previous_threshold := current_setting('pg_trgm.similarity_threshold');
+  PERFORM
+    set_config('pg_trgm.similarity_threshold', coalesce(config_value ('legal_name_similarity_threshold'), '0.6'),
+      TRUE);
+  RETURN QUERY
+  SELECT
+    bl_jpd.id,
+    similarity (bl_jpd.legal_name_key, _legal_name_key)
+  FROM
+    blacklist_juridical_person_details bl_jpd
+  WHERE
+    bl_jpd.legal_name_key % _legal_name_key;
+  PERFORM
+    set_config('pg_trgm.similarity_threshold', _previous_threshold, TRUE);
+END;
+$$
+LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION blacklist_juridical_person_details_tgr_fn ()
+  RETURNS TRIGGER
+  AS $$
+DECLARE
+  _row_count INTEGER;
+  save_all_comparison_results BOOLEAN;
+  similarity_threshold REAL;
+BEGIN
+  save_all_comparison_results := config_value ('save_all_comparison_results')::BOOLEAN;
+  IF save_all_comparison_results IS TRUE THEN
+    similarity_threshold := coalesce(config_value ('legal_name_similarity_threshold'), '0.6')::REAL;
+    INSERT INTO blacklist_search (person_id, blacklist_person_id, MATCH, match_score, search_date, match_details)
+    SELECT
+      jpd.person_id,
+      NEW.id,
+      c.exact
+      OR c.similarity >= similarity_threshold,
+      CASE WHEN c.exact THEN
+        1
+      ELSE
+        c.similarity
+      END,
+      CURRENT_DATE,
+      jsonb_build_object('rfc_match', jpd.rfc = NEW.rfc, 'name_match', jpd.legal_name_key = NEW.legal_name_key,
+	'similarity', c.similarity)
+    FROM
+      juridical_person_details jpd
+      CROSS JOIN LATERAL (
+        SELECT
+          similarity (jpd.legal_name_key, NEW.legal_name_key) AS similarity,
+          coalesce(jpd.rfc = NEW.rfc, FALSE)
+          OR jpd.legal_name_key = NEW.legal_name_key AS exact) c;
+  ELSE
+    INSERT INTO blacklist_search (person_id, blacklist_person_id, MATCH, match_score, search_date, match_details)
+    SELECT
+      jpd.person_id,
+      NEW.id,
+      TRUE,
+      1,
+      CURRENT_DATE,
+      jsonb_build_object('rfc_match', jpd.rfc = NEW.rfc, 'name_match', jpd.legal_name_key = NEW.legal_name_key)
+    FROM
+      juridical_person_details jpd
+    WHERE
+      jpd.legal_name_key = NEW.legal_name_key
+      OR jpd.rfc = NEW.rfc;
+    GET DIAGNOSTICS _row_count := ROW_COUNT;
+    IF _row_count = 0 THEN
+      INSERT INTO blacklist_search (person_id, blacklist_person_id, MATCH, match_score, search_date, match_details)
+      SELECT
+        jpd.person_id,
+        NEW.id,
+        TRUE,
+        candidate.similarity,
+        CURRENT_DATE,
+	jsonb_build_object('rfc_match', jpd.rfc = NEW.rfc, 'name_match', TRUE, 'similarity', candidate.similarity)
+      FROM
+        juridical_person_name_candidates (NEW.legal_name_key) candidate
+        JOIN juridical_person_details jpd ON jpd.person_id = candidate.person_id;
+    END IF;
+  END IF;
+  RETURN NEW;
+END;
+$$
+LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS blacklist_juridical_person_details_tgr ON blacklist_juridical_person_details;
+
+CREATE TRIGGER blacklist_juridical_person_details_tgr
+  AFTER INSERT ON blacklist_juridical_person_details
+  FOR EACH ROW
+  EXECUTE FUNCTION blacklist_juridical_person_details_tgr_fn ();
+
+-- Read model of the attributes: one JSONB object per list entry with its attribute values by attribute name, kept
+-- up to date by the triggers below. Reading an entry with its attributes is one primary key lookup instead of a
+-- join per attribute, and the GIN index answers containment filters such as attributes @> '{"nationality": "MX"}'.
+CREATE TABLE IF NOT EXISTS blacklist_person_attribute_map (
+  blacklist_person_id INTEGER PRIMARY KEY REFERENCES blacklist_person (id) ON DELETE CASCADE,
+  attributes JSONB NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_blacklist_person_attribute_map ON blacklist_person_attribute_map USING GIN (attributes
+  jsonb_path_ops);
+
+-- Rebuilds the attribute map of _blacklist_person_ids, of every entry when NULL. The entries are locked first so that
+-- two transactions changing the attributes of the same entry rebuild its map one after the other, the second one
+-- seeing the values of the first.
+CREATE OR REPLACE FUNCTION refresh_blacklist_person_attribute_map (_blacklist_person_ids INTEGER[])
+  RETURNS VOID
+  AS $$
+BEGIN
+  PERFORM
+    1
+  FROM
+    blacklist_person
+  WHERE
+    id = ANY (_blacklist_person_ids)
+  ORDER BY
+    id
+  FOR NO KEY UPDATE;
+  DELETE FROM blacklist_person_attribute_map m
+  WHERE (_blacklist_person_ids IS NULL
+      OR m.blacklist_person_id = ANY (_blacklist_person_ids))
+    AND NOT EXISTS (
+      SELECT
+        1
+      FROM
+        blacklist_person_attribute_value v
+      WHERE
+        v.blacklist_person_id = m.blacklist_person_id);
+  INSERT INTO blacklist_person_attribute_map (blacklist_person_id, attributes)
+  SELECT
+    v.blacklist_person_id,
+    jsonb_object_agg(a.attribute_name, v.value)
+  FROM
+    blacklist_person_attribute_value v
+    JOIN blacklist_person_attribute a ON a.id = v.attribute_id
+  WHERE
+    _blacklist_person_ids IS NULL
+    OR v.blacklist_person_id = ANY (_blacklist_person_ids)
+  GROUP BY
+    v.blacklist_person_id
+  ON CONFLICT (blacklist_person_id)
+    DO UPDATE SET
+      attributes = EXCLUDED.attributes
+    WHERE
+      blacklist_person_attribute_map.attributes IS DISTINCT FROM EXCLUDED.attributes;
+END;
+$$
+LANGUAGE plpgsql;
+
+-- Statement level, so loading the attributes of a whole list refreshes each entry once. Transition tables are only
+-- allowed on single-event triggers, hence one trigger per operation.
+CREATE OR REPLACE FUNCTION blacklist_person_attribute_value_map_tgr_fn ()
+  RETURNS TRIGGER
+  AS $$
+DECLARE
+  _ids INTEGER[];
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    SELECT
+      array_agg(DISTINCT blacklist_person_id) INTO _ids
+    FROM
+      new_values;
+  ELSIF TG_OP = 'UPDATE' THEN
+    SELECT
+      array_agg(DISTINCT blacklist_person_id) INTO _ids
+    FROM (
+      SELECT
+        blacklist_person_id
+      FROM
+        old_values
+      UNION ALL
+      SELECT
+        blacklist_person_id
+      FROM
+        new_values) v;
+  ELSE
+    SELECT
+      array_agg(DISTINCT blacklist_person_id) INTO _ids
+    FROM
+      old_values;
+  END IF;
+  IF _ids IS NOT NULL THEN
+    PERFORM
+      refresh_blacklist_person_attribute_map (_ids);
+  END IF;
+  RETURN NULL;
+END;
+$$
+LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS blacklist_person_attribute_value_map_insert_tgr ON blacklist_person_attribute_value;
+
+CREATE TRIGGER blacklist_person_attribute_value_map_insert_tgr
+  AFTER INSERT ON blacklist_person_attribute_value
+  REFERENCING NEW TABLE AS new_values
+  FOR EACH STATEMENT
+  EXECUTE FUNCTION blacklist_person_attribute_value_map_tgr_fn ();
+
+DROP TRIGGER IF EXISTS blacklist_person_attribute_value_map_update_tgr ON blacklist_person_attribute_value;
+
+CREATE TRIGGER blacklist_person_attribute_value_map_update_tgr
+  AFTER UPDATE ON blacklist_person_attribute_value
+  REFERENCING OLD TABLE AS old_values NEW TABLE AS new_values
+  FOR EACH STATEMENT
+  EXECUTE FUNCTION blacklist_person_attribute_value_map_tgr_fn ();
+
+DROP TRIGGER IF EXISTS blacklist_person_attribute_value_map_delete_tgr ON blacklist_person_attribute_value;
+
+CREATE TRIGGER blacklist_person_attribute_value_map_delete_tgr
+  AFTER DELETE ON blacklist_person_attribute_value
+  REFERENCING OLD TABLE AS old_values
+  FOR EACH STATEMENT
+  EXECUTE FUNCTION blacklist_person_attribute_value_map_tgr_fn ();
+
+-- Renaming an attribute renames its key in the map of every entry that has it
+CREATE OR REPLACE FUNCTION blacklist_person_attribute_map_rename_tgr_fn ()
+  RETURNS TRIGGER
+  AS $$
+BEGIN
+  PERFORM
+    refresh_blacklist_person_attribute_map (ARRAY (
+        SELECT
+          blacklist_person_id
+        FROM
+          blacklist_person_attribute_value
+        WHERE
+          attribute_id = NEW.id));
+  RETURN NULL;
+END;
+$$
+LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS blacklist_person_attribute_map_rename_tgr ON blacklist_person_attribute;
+
+CREATE TRIGGER blacklist_person_attribute_map_rename_tgr
+  AFTER UPDATE OF attribute_name ON blacklist_person_attribute
+  FOR EACH ROW
+  WHEN (OLD.attribute_name IS DISTINCT FROM NEW.attribute_name)
+  EXECUTE FUNCTION blacklist_person_attribute_map_rename_tgr_fn ();
+
+-- builds the map of the entries that existed before it
+SELECT
+  refresh_blacklist_person_attribute_map (NULL);
+
+-- A list entry as shown next to an alert: its natural or juridical details and its attributes, one row per entry
+CREATE OR REPLACE VIEW blacklist_person_detail AS
+SELECT
+  blp.id,
+  blp.blacklist_id,
+  bl.short_name AS blacklist_short_name,
+  blp.type,
+  blp.official_registration_number,
+  coalesce(bl_npd.full_name, bl_jpd.legal_name) AS name,
+  bl_npd.curp,
+  coalesce(bl_npd.rfc, bl_jpd.rfc) AS rfc,
+  bl_npd.date_of_birth,
+  bl_jpd.incorporation_date,
+  blp.deleted_at,
+  coalesce(m.attributes, '{}') AS attributes
+FROM
+  blacklist_person blp
+  JOIN blacklist bl ON bl.id = blp.blacklist_id
+  LEFT JOIN blacklist_natural_person_details bl_npd ON bl_npd.id = blp.id
+  LEFT JOIN blacklist_juridical_person_details bl_jpd ON bl_jpd.id = blp.id
+  LEFT JOIN blacklist_person_attribute_map m ON m.blacklist_person_id = blp.id;
+
+-- Notifies the 'screening_index' channel when list entries are added, deleted or renamed, the in-process name index
+-- (app/services/screening_index.py) listens on it
+CREATE OR REPLACE FUNCTION screening_index_changed_tgr_fn ()
+  RETURNS TRIGGER
+  AS $$
+BEGIN
+  PERFORM
+    pg_notify('screening_index', TG_TABLE_NAME);
+  RETURN NULL;
+END;
+$$
+LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS screening_index_changed_tgr ON blacklist_person;
+
+CREATE TRIGGER screening_index_changed_tgr
+  AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON blacklist_person
+  FOR EACH STATEMENT
+  EXECUTE FUNCTION screening_index_changed_tgr_fn ();
+
+DROP TRIGGER IF EXISTS screening_index_changed_tgr ON blacklist_natural_person_details;
+
+CREATE TRIGGER screening_index_changed_tgr
+  AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON blacklist_natural_person_details
+  FOR EACH STATEMENT
+  EXECUTE FUNCTION screening_index_changed_tgr_fn ();
+
+DROP TRIGGER IF EXISTS screening_index_changed_tgr ON blacklist_juridical_person_details;
+
+CREATE TRIGGER screening_index_changed_tgr
+  AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON blacklist_juridical_person_details
+  FOR EACH STATEMENT
+  EXECUTE FUNCTION screening_index_changed_tgr_fn ();
+
+-- Add Audit Triggers, statement level: lists are loaded and updated in bulk
 SELECT
   add_audit_triggers (ARRAY['blacklist', 'blacklist_person', 'blacklist_person_attribute', 'blacklist_person_attribute_value',
-    'blacklist_natural_person_details', 'blacklist_juridical_person_details']);
+    'blacklist_natural_person_details', 'blacklist_juridical_person_details'], statement_level => TRUE,
+    changed_columns_only => TRUE);
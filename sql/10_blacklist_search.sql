@@ -1,3 +1,6 @@
+-- Latest screening result of each (person, blacklist entry) pair. Screening the pair again on a later day updates
+-- the row in place and the previous result moves to blacklist_search_history, so the table grows with the number
+-- of pairs and not with the number of screenings.
 CREATE TABLE IF NOT EXISTS blacklist_search (
   id SERIAL PRIMARY KEY,
   person_id INTEGER REFERENCES person (id),
@@ -9,8 +12,199 @@ CREATE TABLE IF NOT EXISTS blacklist_search (
   match_details JSONB
 );
 
-CREATE INDEX IF NOT EXISTS idx_blacklist_search_person_id ON blacklist_search (person_id);
+-- Previous results, range partitioned by search_date in monthly partitions (see
+-- create_blacklist_search_history_partitions). Rows are only appended and removed by maintain_blacklist_search,
+-- so there is no foreign key to pay for on every write.
+CREATE TABLE IF NOT EXISTS blacklist_search_history (
+  blacklist_search_id INTEGER NOT NULL,
+  person_id INTEGER,
+  blacklist_person_id INTEGER,
+  match BOOLEAN,
+  match_score NUMERIC(5, 4),
+  search_date DATE NOT NULL,
+  created_at TIMESTAMPTZ NOT NULL,
+  match_details JSONB,
+  superseded_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP NOT NULL
+)
+PARTITION BY RANGE (search_date);
+
+CREATE TABLE IF NOT EXISTS blacklist_search_history_default PARTITION OF blacklist_search_history DEFAULT;
+
+CREATE INDEX IF NOT EXISTS idx_blacklist_search_history_search ON blacklist_search_history (blacklist_search_id);
+
+-- Creates the monthly partitions of blacklist_search_history from the month of _from, _months of them, plus one for
+-- every month that has rows in the default partition. Those rows are moved to their new partition. Returns the
+-- number of partitions created.
+CREATE OR REPLACE FUNCTION create_blacklist_search_history_partitions (_from DATE, _months INTEGER)
+  RETURNS INTEGER
+  AS $$
+DECLARE
+  _month DATE;
+  _partition TEXT;
+  _created INTEGER := 0;
+BEGIN
+  FOR _month IN
+  SELECT
+    generate_series(date_trunc('month', _from), date_trunc('month', _from) + (_months - 1) * INTERVAL '1 month',
+      INTERVAL '1 month')::DATE
+  UNION
+  SELECT DISTINCT
+    date_trunc('month', search_date)::DATE
+  FROM
+    blacklist_search_history_default
+  ORDER BY
+    1 LOOP
+      _partition := 'blacklist_search_history_' || to_char(_month, 'YYYYMM');
+      CONTINUE
+      WHEN to_regclass(_partition) IS NOT NULL;
+      EXECUTE format('CREATE TABLE %I (LIKE blacklist_search_history INCLUDING DEFAULTS INCLUDING CONSTRAINTS)',
+	_partition);
+      EXECUTE format('WITH moved AS (DELETE FROM blacklist_search_history_default WHERE search_date >= %L AND
+	search_date < %L RETURNING *) INSERT INTO %I SELECT * FROM moved', _month, _month + INTERVAL '1 month',
+	_partition);
+      EXECUTE format('ALTER TABLE blacklist_search_history ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+	_partition, _month, (_month + INTERVAL '1 month')::DATE);
+      _created := _created + 1;
+    END LOOP;
+  RETURN _created;
+END;
+$$
+LANGUAGE plpgsql;
+
+SELECT
+  create_blacklist_search_history_partitions (CURRENT_DATE, 3);
+
+-- One row per pair. Older duplicates move to the history and their alerts follow the latest result.
+DO $$
+BEGIN
+  IF to_regclass('idx_blacklist_search_pair') IS NULL THEN
+    CREATE TEMP TABLE blacklist_search_superseded ON COMMIT DROP AS
+    SELECT
+      id,
+      latest_id
+    FROM (
+      SELECT
+        id,
+        first_value(id) OVER (PARTITION BY person_id, blacklist_person_id ORDER BY search_date DESC, id DESC) AS
+	  latest_id
+      FROM
+        blacklist_search) s
+    WHERE
+      id <> latest_id;
+    IF to_regclass('blacklist_alert') IS NOT NULL THEN
+      UPDATE
+        blacklist_alert ba
+      SET
+        blacklist_search_id = s.latest_id
+      FROM
+        blacklist_search_superseded s
+      WHERE
+        ba.blacklist_search_id = s.id;
+    END IF;
+    INSERT INTO blacklist_search_history (blacklist_search_id, person_id, blacklist_person_id, MATCH, match_score,
+      search_date, created_at, match_details)
+    SELECT
+      s.latest_id,
+      bs.person_id,
+      bs.blacklist_person_id,
+      bs.match,
+      bs.match_score,
+      bs.search_date,
+      bs.created_at,
+      bs.match_details
+    FROM
+      blacklist_search bs
+      JOIN blacklist_search_superseded s ON s.id = bs.id;
+    DELETE FROM blacklist_search bs USING blacklist_search_superseded s
+    WHERE bs.id = s.id;
+    CREATE UNIQUE INDEX idx_blacklist_search_pair ON blacklist_search (person_id, blacklist_person_id);
+  END IF;
+END
+$$;
+
+-- the pair index covers the lookups by person; the other lookups only look for matches
+DROP INDEX IF EXISTS idx_blacklist_search_person_id;
+
+DROP INDEX IF EXISTS idx_blacklist_search_match;
+
+DROP INDEX IF EXISTS idx_blacklist_search_blacklist_person_id;
+
+CREATE INDEX IF NOT EXISTS idx_blacklist_search_match_blacklist_person_id ON blacklist_search (blacklist_person_id)
+WHERE
+  MATCH;
+
+-- Screening a pair again rewrites its row. Leaving room in the pages and not indexing search_date lets those
+-- updates be HOT updates, which do not touch the indexes.
+ALTER TABLE blacklist_search SET (fillfactor = 80);
+
+-- Keeps the results replaced by a newer screening of the same pair
+CREATE OR REPLACE FUNCTION blacklist_search_history_tgr_fn ()
+  RETURNS TRIGGER
+  AS $$
+BEGIN
+  INSERT INTO blacklist_search_history (blacklist_search_id, person_id, blacklist_person_id, MATCH, match_score,
+    search_date, created_at, match_details)
+  SELECT
+    id,
+    person_id,
+    blacklist_person_id,
+    MATCH,
+    match_score,
+    search_date,
+    created_at,
+    match_details
+  FROM
+    superseded;
+  RETURN NULL;
+END;
+$$
+LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS blacklist_search_history_tgr ON blacklist_search;
 
-CREATE INDEX IF NOT EXISTS idx_blacklist_search_blacklist_person_id ON blacklist_search (blacklist_person_id);
+CREATE TRIGGER blacklist_search_history_tgr
+  AFTER UPDATE ON blacklist_search
+  REFERENCING OLD TABLE AS superseded
+  FOR EACH STATEMENT
+  EXECUTE FUNCTION blacklist_search_history_tgr_fn ();
 
-CREATE INDEX IF NOT EXISTS idx_blacklist_search_match ON blacklist_search (MATCH);
+-- Periodic maintenance (python -m app.cli blacklist-search-maintenance): creates the history partitions for the
+-- next _months_ahead months and deletes the non-matches older than the retention, both the current results and
+-- the history. The retention is _non_match_retention_days or the 'blacklist_search_non_match_retention_days'
+-- config; without either nothing is deleted. Results with an alert are always kept.
+CREATE OR REPLACE FUNCTION maintain_blacklist_search (_months_ahead INTEGER DEFAULT 3, _non_match_retention_days
+  INTEGER DEFAULT NULL)
+  RETURNS TABLE (
+    partitions_created INTEGER,
+    searches_deleted INTEGER,
+    history_deleted INTEGER)
+  AS $$
+DECLARE
+  _cutoff DATE;
+BEGIN
+  partitions_created := create_blacklist_search_history_partitions (CURRENT_DATE, _months_ahead + 1);
+  searches_deleted := 0;
+  history_deleted := 0;
+  _cutoff := CURRENT_DATE - coalesce(_non_match_retention_days,
+    config_value ('blacklist_search_non_match_retention_days')::INTEGER);
+  IF _cutoff IS NOT NULL THEN
+    DELETE FROM blacklist_search bs
+    WHERE NOT bs.match
+      AND bs.search_date < _cutoff
+      AND NOT EXISTS (
+        SELECT
+          1
+        FROM
+          blacklist_alert ba
+        WHERE
+          ba.blacklist_search_id = bs.id);
+    GET DIAGNOSTICS searches_deleted := ROW_COUNT;
+    DELETE FROM blacklist_search_history
+    WHERE NOT MATCH
+      AND search_date < _cutoff;
+    GET DIAGNOSTICS history_deleted := ROW_COUNT;
+  END IF;
+  RETURN NEXT;
+END;
+$$
+LANGUAGE plpgsql;
@@ -0,0 +1,64 @@
+-- Bulk load of blacklist publications.
+-- The rows of a list are copied into a temporary staging table and then inserted with a few set-based statements.
+CREATE OR REPLACE FUNCTION create_blacklist_natural_person_staging ()
+  RETURNS VOID
+  AS $$
+BEGIN
+  CREATE TEMP TABLE IF NOT EXISTS blacklist_natural_person_staging (
+    id INTEGER,
+    official_registration_number TEXT NOT NULL,
+    curp VARCHAR(18),
+    rfc VARCHAR(13),
+    name TEXT NOT NULL,
+    first_last_name TEXT NOT NULL,
+    second_last_name TEXT,
+    date_of_birth DATE
+  ) ON COMMIT DROP;
+END;
+$$
+LANGUAGE plpgsql;
+
+-- Inserts the staged natural persons into _blacklist_id. The insert runs the statement level audit and screening
+-- triggers once for the whole list, so it produces the same audit_log and blacklist_search rows as inserting them
+-- one by one.
+CREATE OR REPLACE FUNCTION load_blacklist_natural_person_staging (_blacklist_id INTEGER)
+  RETURNS TABLE (
+    loaded INTEGER,
+    matches INTEGER)
+  AS $$
+BEGIN
+  UPDATE
+    blacklist_natural_person_staging
+  SET
+    id = nextval(pg_get_serial_sequence('blacklist_person', 'id'));
+  GET DIAGNOSTICS loaded := ROW_COUNT;
+  INSERT INTO blacklist_person (id, blacklist_id, type, official_registration_number)
+  SELECT
+    s.id,
+    _blacklist_id,
+    'natural',
+    s.official_registration_number
+  FROM
+    blacklist_natural_person_staging s;
+  INSERT INTO blacklist_natural_person_details (id, curp, rfc, name, first_last_name, second_last_name, date_of_birth)
+  SELECT
+    s.id,
+    s.curp,
+    s.rfc,
+    s.name,
+    s.first_last_name,
+    s.second_last_name,
+    s.date_of_birth
+  FROM
+    blacklist_natural_person_staging s;
+  SELECT
+    count(*) INTO matches
+  FROM
+    blacklist_search bs
+    JOIN blacklist_natural_person_staging s ON s.id = bs.blacklist_person_id
+  WHERE
+    bs.match;
+  RETURN NEXT;
+END;
+$$
+LANGUAGE plpgsql;
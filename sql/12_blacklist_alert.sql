@@ -28,3 +28,73 @@ CREATE TABLE IF NOT EXISTS blacklist_alert (
 );
 
 CREATE INDEX IF NOT EXISTS idx_blacklist_alert_search ON blacklist_alert (blacklist_search_id);
+
+-- User of the last state transition
+ALTER TABLE blacklist_alert
+  ADD COLUMN IF NOT EXISTS updated_by INTEGER REFERENCES "user" (id);
+
+-- The screening result the alert was raised on
+ALTER TABLE blacklist_alert
+  ADD COLUMN IF NOT EXISTS match_score NUMERIC(5, 4),
+  ADD COLUMN IF NOT EXISTS match_details JSONB;
+
+UPDATE
+  blacklist_alert ba
+SET
+  match_score = bs.match_score,
+  match_details = bs.match_details
+FROM
+  blacklist_search bs
+WHERE
+  bs.id = ba.blacklist_search_id
+  AND ba.match_score IS NULL;
+
+-- Alert inbox: the alerts still being worked, read by state in (date, id) order with keyset pagination. Closed
+-- alerts pile up over the years and stay out of the index.
+CREATE INDEX IF NOT EXISTS idx_blacklist_alert_open ON blacklist_alert (state, date, id)
+WHERE
+  state IN ('pending', 'suppressed');
+
+-- Turns the matching blacklist_search results with a match_score of at least _min_score (by default the
+-- 'blacklist_alert_min_score' config, else every match) into pending alerts, only those of _person_ids when given.
+-- A pair has one blacklist_search row, rewritten when it is screened again. It gets no new alert while it has an open
+-- one (pending or suppressed); once its alerts are discarded, closed or reported, it is only alerted again when a
+-- later screening scores it higher or matches it differently (other match_details) than every alert it had, so
+-- rescreening an unchanged pair does not bring back a dismissed alert. Returns the number of alerts created.
+CREATE OR REPLACE FUNCTION generate_blacklist_alerts (_min_score NUMERIC DEFAULT NULL, _person_ids INTEGER[] DEFAULT
+  NULL)
+  RETURNS INTEGER
+  AS $$
+DECLARE
+  _created INTEGER;
+BEGIN
+  _min_score := coalesce(_min_score, config_value ('blacklist_alert_min_score')::NUMERIC, 0);
+  INSERT INTO blacklist_alert (blacklist_search_id, state, date, match_score, match_details)
+  SELECT
+    bs.id,
+    'pending',
+    CURRENT_DATE,
+    bs.match_score,
+    bs.match_details
+  FROM
+    blacklist_search bs
+  WHERE
+    bs.match
+    AND bs.match_score >= _min_score
+    AND (_person_ids IS NULL
+      OR bs.person_id = ANY (_person_ids))
+    AND NOT EXISTS (
+      SELECT
+        1
+      FROM
+        blacklist_alert ba
+      WHERE
+        ba.blacklist_search_id = bs.id
+        AND (ba.state IN ('pending', 'suppressed')
+          OR (ba.match_score >= bs.match_score
+            AND ba.match_details IS NOT DISTINCT FROM bs.match_details)));
+  GET DIAGNOSTICS _created := ROW_COUNT;
+  RETURN _created;
+END;
+$$
+LANGUAGE plpgsql;
@@ -0,0 +1,77 @@
+-- Outbox of natural persons waiting to be screened, used when the 'screening_mode' config is 'async'.
+-- natural_person_details_tgr_fn queues the person and notifies the 'screening_queue' channel; the worker
+-- (app/services/screening_queue.py) drains the queue with process_screening_queue.
+CREATE TABLE IF NOT EXISTS screening_queue (
+  id BIGSERIAL PRIMARY KEY,
+  person_id INTEGER NOT NULL REFERENCES person (id),
+  enqueued_at TIMESTAMPTZ DEFAULT clock_timestamp() NOT NULL,
+  attempts INTEGER DEFAULT 0 NOT NULL,
+  last_error TEXT
+);
+
+-- When a failed person may be screened again, pushed back after each failure
+ALTER TABLE screening_queue
+  ADD COLUMN IF NOT EXISTS next_attempt_at TIMESTAMPTZ DEFAULT clock_timestamp() NOT NULL;
+
+-- the previous version had no retry delay
+DROP FUNCTION IF EXISTS process_screening_queue (INTEGER, INTEGER);
+
+-- Screens up to _batch_size queued persons, oldest first, and raises the alerts of their matches with
+-- generate_blacklist_alerts. Rows locked by another worker are skipped. A person is removed from the queue in the
+-- same transaction that writes its results, so a crash before the commit leaves it queued (at least once) and
+-- screen_natural_person makes a second run harmless. A person whose screening fails stays queued with the error
+-- until _max_attempts, and is not tried again for _retry_seconds, doubled after each failure, so a transient error
+-- does not use up its attempts at once.
+CREATE OR REPLACE FUNCTION process_screening_queue (_batch_size INTEGER, _max_attempts INTEGER DEFAULT 5,
+  _retry_seconds DOUBLE PRECISION DEFAULT 30)
+  RETURNS TABLE (
+    processed INTEGER,
+    failed INTEGER,
+    matches INTEGER,
+    alerts INTEGER)
+  AS $$
+DECLARE
+  _item RECORD;
+  _person_ids INTEGER[] := '{}';
+BEGIN
+  processed := 0;
+  failed := 0;
+  matches := 0;
+  FOR _item IN
+  SELECT
+    q.id,
+    q.person_id
+  FROM
+    screening_queue q
+  WHERE
+    q.attempts < _max_attempts
+    AND q.next_attempt_at <= clock_timestamp()
+  ORDER BY
+    q.id
+  LIMIT _batch_size
+  FOR UPDATE
+    SKIP LOCKED LOOP
+      BEGIN
+        matches := matches + screen_natural_person (_item.person_id);
+        DELETE FROM screening_queue
+        WHERE id = _item.id;
+        _person_ids := _person_ids || _item.person_id;
+        processed := processed + 1;
+      EXCEPTION
+        WHEN OTHERS THEN
+          UPDATE
+            screening_queue
+          SET
+            attempts = attempts + 1,
+            last_error = SQLERRM,
+            next_attempt_at = clock_timestamp() + make_interval(secs => _retry_seconds * 2 ^ attempts)
+          WHERE
+            id = _item.id;
+        failed := failed + 1;
+      END;
+  END LOOP;
+  alerts := generate_blacklist_alerts (NULL, _person_ids);
+  RETURN NEXT;
+END;
+$$
+LANGUAGE plpgsql;
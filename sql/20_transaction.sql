@@ -29,3 +29,30 @@ CREATE INDEX IF NOT EXISTS idx_transaction_type ON TRANSACTION (transaction_type
 CREATE INDEX IF NOT EXISTS idx_transaction_counterpart ON TRANSACTION (counterpart);
 
 CREATE INDEX IF NOT EXISTS idx_transaction_effective_date ON TRANSACTION (effective_date);
+
+-- Notifies the 'transaction_lookups' channel when the valid product or transaction type ids may have changed, the
+-- Python cache used by the transaction ingestion (app/core/transaction_lookups.py) listens on it
+CREATE OR REPLACE FUNCTION transaction_lookups_changed_tgr_fn ()
+  RETURNS TRIGGER
+  AS $$
+BEGIN
+  PERFORM
+    pg_notify('transaction_lookups', TG_TABLE_NAME);
+  RETURN NULL;
+END;
+$$
+LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS transaction_lookups_changed_tgr ON product;
+
+CREATE TRIGGER transaction_lookups_changed_tgr
+  AFTER INSERT OR UPDATE OF id OR DELETE OR TRUNCATE ON product
+  FOR EACH STATEMENT
+  EXECUTE FUNCTION transaction_lookups_changed_tgr_fn ();
+
+DROP TRIGGER IF EXISTS transaction_lookups_changed_tgr ON transaction_type;
+
+CREATE TRIGGER transaction_lookups_changed_tgr
+  AFTER INSERT OR UPDATE OF id OR DELETE OR TRUNCATE ON transaction_type
+  FOR EACH STATEMENT
+  EXECUTE FUNCTION transaction_lookups_changed_tgr_fn ();
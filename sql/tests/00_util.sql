@@ -69,6 +69,42 @@ END;
 $$
 LANGUAGE plpgsql;
 
+CREATE OR REPLACE FUNCTION create_test_juridical_person (_rfc TEXT DEFAULT 'AAA123456AAA', _legal_name TEXT DEFAULT
+  'Constructora Test, S.A. de C.V.')
+  RETURNS person
+  AS $$
+DECLARE
+  _person person;
+BEGIN
+  INSERT INTO person (type)
+    VALUES ('juridical')
+  RETURNING
+    * INTO _person;
+  INSERT INTO juridical_person_details (person_id, rfc, legal_name)
+    VALUES (_person.id, _rfc, _legal_name);
+  RETURN _person;
+END;
+$$
+LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION create_test_blacklist_juridical_person (_blacklist_id INTEGER, _rfc TEXT DEFAULT
+  'AAA123456AAA', _legal_name TEXT DEFAULT 'Constructora Test, S.A. de C.V.')
+  RETURNS blacklist_person
+  AS $$
+DECLARE
+  blp blacklist_person;
+BEGIN
+  INSERT INTO blacklist_person (blacklist_id, type, official_registration_number)
+    VALUES (_blacklist_id, 'juridical', '1234567890')
+  RETURNING
+    * INTO blp;
+  INSERT INTO blacklist_juridical_person_details (id, rfc, legal_name)
+    VALUES (blp.id, _rfc, _legal_name);
+  RETURN blp;
+END;
+$$
+LANGUAGE plpgsql;
+
 CREATE OR REPLACE FUNCTION insert_configs ()
   RETURNS VOID
   AS $$
@@ -0,0 +1,150 @@
+-- verifica que los triggers de auditoria a nivel sentencia registren cada renglon y en UPDATE solo las columnas
+-- modificadas
+BEGIN;
+DO $$
+DECLARE
+  _user_id INTEGER;
+  _changed JSONB;
+BEGIN
+  SELECT
+    id INTO _user_id
+  FROM
+    create_test_user ();
+  CREATE TEMP TABLE audit_test (
+    id SERIAL PRIMARY KEY,
+    name TEXT NOT NULL,
+    value INTEGER
+  );
+  PERFORM
+    add_audit_triggers (ARRAY['audit_test'], statement_level => TRUE, changed_columns_only => TRUE);
+  INSERT INTO audit_test (name, value)
+  SELECT
+    'test ' || g,
+    g
+  FROM
+    generate_series(1, 3) g;
+  IF (
+    SELECT
+      count(*)
+    FROM
+      audit_log al
+      JOIN audit_test t ON t.id = al.record_id
+    WHERE
+      al.table_name = 'audit_test'
+      AND al.operation_type = 'INSERT'
+      AND al.changed_by = _user_id
+      AND al.changed_data = to_jsonb (t)) <> 3 THEN
+    RAISE EXCEPTION 'Registros INSERT en audit_log no encontrados';
+  END IF;
+  -- el renglon 3 no cambia
+  UPDATE
+    audit_test
+  SET
+    value = CASE WHEN value < 3 THEN
+      value * 10
+    ELSE
+      value
+    END;
+  IF (
+    SELECT
+      count(*)
+    FROM
+      audit_log
+    WHERE
+      table_name = 'audit_test'
+      AND operation_type = 'UPDATE') <> 2 THEN
+    RAISE EXCEPTION 'Se esperaban 2 registros UPDATE en audit_log';
+  END IF;
+  SELECT
+    al.changed_data INTO _changed
+  FROM
+    audit_log al
+    JOIN audit_test t ON t.id = al.record_id
+  WHERE
+    al.table_name = 'audit_test'
+    AND al.operation_type = 'UPDATE'
+    AND t.name = 'test 2';
+  IF _changed IS DISTINCT FROM '{"value": 20}'::JSONB THEN
+    RAISE EXCEPTION 'UPDATE debe guardar solo las columnas modificadas: %', _changed;
+  END IF;
+  DELETE FROM audit_test
+  WHERE value <> 10;
+  IF (
+    SELECT
+      count(*)
+    FROM
+      audit_log
+    WHERE
+      table_name = 'audit_test'
+      AND operation_type = 'DELETE'
+      AND changed_data ->> 'name' IN ('test 2', 'test 3')) <> 2 THEN
+    RAISE EXCEPTION 'Registros DELETE en audit_log no encontrados';
+  END IF;
+  -- una sentencia sin renglones no lee el usuario
+  PERFORM
+    set_config('app.current_user_id', '', TRUE);
+  DELETE FROM audit_test
+  WHERE FALSE;
+END;
+$$;
+ROLLBACK;
+
+-- verifica que add_audit_triggers reemplace los triggers al cambiar de modo
+BEGIN;
+DO $$
+BEGIN
+  PERFORM
+    create_test_user ();
+  CREATE TEMP TABLE audit_test (
+    id SERIAL PRIMARY KEY,
+    name TEXT NOT NULL
+  );
+  PERFORM
+    add_audit_triggers (ARRAY['audit_test'], statement_level => TRUE);
+  PERFORM
+    add_audit_triggers (ARRAY['audit_test']);
+  IF (
+    SELECT
+      count(*)
+    FROM
+      pg_trigger
+    WHERE
+      tgrelid = 'audit_test'::REGCLASS
+      AND tgname LIKE 'audit_%'
+      -- TRIGGER_TYPE_ROW
+      AND tgtype & 1 = 1) <> 3 THEN
+    RAISE EXCEPTION 'add_audit_triggers no reemplazo los triggers a nivel sentencia';
+  END IF;
+  PERFORM
+    add_audit_triggers (ARRAY['audit_test'], statement_level => TRUE);
+  INSERT INTO audit_test (name)
+    VALUES ('a'), ('b');
+  UPDATE
+    audit_test
+  SET
+    name = name;
+  -- sin changed_columns_only se guarda el renglon completo aunque no cambie
+  IF (
+    SELECT
+      count(*)
+    FROM
+      audit_log
+    WHERE
+      table_name = 'audit_test'
+      AND changed_data ? 'id'
+      AND changed_data ? 'name') <> 4 THEN
+    RAISE EXCEPTION 'Se esperaban 4 registros en audit_log con el renglon completo';
+  END IF;
+  BEGIN
+    PERFORM
+      add_audit_triggers (ARRAY['audit_test'], changed_columns_only => TRUE);
+    RAISE EXCEPTION 'changed_columns_only sin statement_level debe fallar';
+  EXCEPTION
+    WHEN raise_exception THEN
+      IF SQLERRM NOT LIKE 'changed_columns_only requires%' THEN
+        RAISE;
+      END IF;
+  END;
+END;
+$$;
+ROLLBACK;
@@ -46,3 +46,38 @@ END IF;
 END;
 $$;
 ROLLBACK;
+
+-- verifica que config_value guarde los valores durante la transaccion y que vea los cambios hechos en ella
+BEGIN;
+DO $$
+BEGIN
+  PERFORM
+    create_test_user ();
+  IF config_value ('max_string_distance_to_match') IS NOT NULL THEN
+    RAISE EXCEPTION 'config_value debe regresar NULL si no existe la configuracion';
+  END IF;
+  INSERT INTO config (name, value)
+    VALUES ('max_string_distance_to_match', '3');
+  IF config_value ('max_string_distance_to_match')::INTEGER IS DISTINCT FROM 3 THEN
+    RAISE EXCEPTION 'config_value no regreso el valor insertado';
+  END IF;
+  IF current_setting('app.config.max_string_distance_to_match', TRUE) NOT LIKE '%|v3' THEN
+    RAISE EXCEPTION 'config_value no guardo el valor en cache';
+  END IF;
+  UPDATE
+    config
+  SET
+    value = '4'
+  WHERE
+    name = 'max_string_distance_to_match';
+  IF config_value ('max_string_distance_to_match')::INTEGER IS DISTINCT FROM 4 THEN
+    RAISE EXCEPTION 'config_value no vio la actualizacion';
+  END IF;
+  DELETE FROM config
+  WHERE name = 'max_string_distance_to_match';
+  IF config_value ('max_string_distance_to_match') IS NOT NULL THEN
+    RAISE EXCEPTION 'config_value no vio el borrado';
+  END IF;
+END;
+$$;
+ROLLBACK;
@@ -191,3 +191,231 @@ END IF;
 END;
 $$;
 ROLLBACK;
+
+-- verifica que con umbral de similitud por trigramas se sigan encontrando nombres parecidos y se descarten los lejanos
+BEGIN;
+DO $$
+DECLARE
+  _blacklist_person_id INTEGER;
+  _blacklist_id INTEGER;
+  _user_id INTEGER;
+  _person_id INTEGER;
+BEGIN
+  SELECT
+    id INTO _user_id
+  FROM
+    create_test_user ();
+  SELECT
+    id INTO _blacklist_id
+  FROM
+    create_test_blacklist ();
+  PERFORM
+    insert_configs ();
+  INSERT INTO config (name, value)
+    VALUES ('name_similarity_threshold', '0.3');
+  SELECT
+    id INTO _blacklist_person_id
+  FROM
+    create_test_blacklist_person (_blacklist_id, _curp := 'VARD123456AAAAAA11', _rfc := 'AAAA123456AAB');
+  -- diferente RFC y CURP con nombre parecido
+  SELECT
+    id INTO _person_id
+  FROM
+    create_test_person (_curp := 'VERD123456BBBAAA12', _rfc := 'AAAA123456BBB', _name := 'Johnn');
+  IF NOT EXISTS (
+    SELECT
+      *
+    FROM
+      blacklist_search
+    WHERE
+      person_id = _person_id
+      AND blacklist_person_id = _blacklist_person_id
+      AND MATCH
+      AND match_score < 1
+      AND (match_details -> 'levenshtein_distance')::INTEGER = 1) THEN
+  RAISE EXCEPTION 'Registro en blacklist_search no encontrado por nombre parecido con umbral de similitud';
+END IF;
+  -- diferente RFC, CURP y nombre
+  SELECT
+    id INTO _person_id
+  FROM
+    create_test_person (_curp := 'VERD123456CCCAAA12', _rfc := 'AAAA123456CCC', _name := 'Maria', _first_last_name
+      := 'Lopez', _second_last_name := 'Perez');
+  IF EXISTS (
+    SELECT
+      *
+    FROM
+      blacklist_search
+    WHERE
+      person_id = _person_id) THEN
+  RAISE EXCEPTION 'Registro en blacklist_search inesperado para nombre diferente';
+END IF;
+END;
+$$;
+ROLLBACK;
+-- verifica las llaves de nombre normalizada y fonética
+BEGIN;
+DO $$
+DECLARE
+  _blacklist_person_id INTEGER;
+  _blacklist_id INTEGER;
+  _user_id INTEGER;
+  _person_id INTEGER;
+BEGIN
+  SELECT
+    id INTO _user_id
+  FROM
+    create_test_user ();
+  SELECT
+    id INTO _blacklist_id
+  FROM
+    create_test_blacklist ();
+  PERFORM
+    insert_configs ();
+  IF name_key ('José de la Peña Gómez') <> name_key ('GOMEZ PENA JOSE') THEN
+    RAISE EXCEPTION 'name_key no ignora acentos, partículas u orden';
+  END IF;
+  -- mismo nombre con acentos, partículas y otro orden
+  SELECT
+    id INTO _blacklist_person_id
+  FROM
+    create_test_blacklist_person (_blacklist_id, _curp := 'VARD123456AAAAAA11', _rfc := 'AAAA123456AAB', _name :=
+      'José', _first_last_name := 'de la Peña', _second_last_name := 'Gómez');
+  SELECT
+    id INTO _person_id
+  FROM
+    create_test_person (_curp := 'VERD123456BBBAAA12', _rfc := 'AAAA123456BBB', _name := 'Jose', _first_last_name :=
+      'Gomez', _second_last_name := 'Pena');
+  IF NOT EXISTS (
+    SELECT
+      *
+    FROM
+      blacklist_search
+    WHERE
+      person_id = _person_id
+      AND blacklist_person_id = _blacklist_person_id
+      AND match_score = 1
+      AND (match_details -> 'name_key_match')::BOOLEAN IS TRUE) THEN
+  RAISE EXCEPTION 'Registro en blacklist_search no encontrado por llave de nombre';
+END IF;
+  -- nombre que suena igual pero a más de max_string_distance_to_match
+  SELECT
+    id INTO _blacklist_person_id
+  FROM
+    create_test_blacklist_person (_blacklist_id, _curp := 'VARD123456AAAAAA13', _rfc := 'AAAA123456AAD', _name :=
+      'Maria', _first_last_name := 'Gonzalez', _second_last_name := 'Vazquez');
+  SELECT
+    id INTO _person_id
+  FROM
+    create_test_person (_curp := 'VERD123456CCCAAA12', _rfc := 'AAAA123456CCC', _name := 'Marya', _first_last_name
+      := 'Gonsales', _second_last_name := 'Vasques');
+  IF NOT EXISTS (
+    SELECT
+      *
+    FROM
+      blacklist_search
+    WHERE
+      person_id = _person_id
+      AND blacklist_person_id = _blacklist_person_id
+      AND match_score < 1
+      AND (match_details -> 'phonetic_match')::BOOLEAN IS TRUE) THEN
+  RAISE EXCEPTION 'Registro en blacklist_search no encontrado por llave fonética';
+END IF;
+END;
+$$;
+ROLLBACK;
+-- verifica la búsqueda de personas morales en ambos sentidos
+BEGIN;
+DO $$
+DECLARE
+  _blacklist_person_id INTEGER;
+  _blacklist_id INTEGER;
+  _user_id INTEGER;
+  _person_id INTEGER;
+BEGIN
+  SELECT
+    id INTO _user_id
+  FROM
+    create_test_user ();
+  SELECT
+    id INTO _blacklist_id
+  FROM
+    create_test_blacklist ();
+  PERFORM
+    insert_configs ();
+  IF legal_name_key ('Grupo Peña, S.A.P.I. de C.V., SOFOM, E.N.R.') <> 'GRUPO PENA' THEN
+    RAISE EXCEPTION 'legal_name_key no elimina el sufijo corporativo';
+  END IF;
+  -- misma razón social con otro sufijo y diferente RFC
+  SELECT
+    id INTO _person_id
+  FROM
+    create_test_juridical_person (_rfc := 'AAA123456AAA', _legal_name := 'Constructora del Norte, S.A. de C.V.');
+  SELECT
+    id INTO _blacklist_person_id
+  FROM
+    create_test_blacklist_juridical_person (_blacklist_id, _rfc := 'BBB123456BBB', _legal_name :=
+      'CONSTRUCTORA DEL NORTE SAPI DE CV');
+  IF NOT EXISTS (
+    SELECT
+      *
+    FROM
+      blacklist_search
+    WHERE
+      person_id = _person_id
+      AND blacklist_person_id = _blacklist_person_id
+      AND match_score = 1
+      AND (match_details -> 'name_match')::BOOLEAN IS TRUE
+      AND (match_details -> 'rfc_match')::BOOLEAN IS FALSE) THEN
+  RAISE EXCEPTION 'Registro en blacklist_search no encontrado por razón social';
+END IF;
+  -- mismo RFC y diferente razón social
+  SELECT
+    id INTO _person_id
+  FROM
+    create_test_juridical_person (_rfc := 'BBB123456BBB', _legal_name := 'Servicios Integrales, S.C.');
+  IF NOT EXISTS (
+    SELECT
+      *
+    FROM
+      blacklist_search
+    WHERE
+      person_id = _person_id
+      AND blacklist_person_id = _blacklist_person_id
+      AND (match_details -> 'rfc_match')::BOOLEAN IS TRUE) THEN
+  RAISE EXCEPTION 'Registro en blacklist_search no encontrado por RFC de persona moral';
+END IF;
+  -- razón social parecida
+  SELECT
+    id INTO _person_id
+  FROM
+    create_test_juridical_person (_rfc := 'CCC123456CCC', _legal_name := 'Constructora Norte S. de R.L.');
+  IF NOT EXISTS (
+    SELECT
+      *
+    FROM
+      blacklist_search
+    WHERE
+      person_id = _person_id
+      AND blacklist_person_id = _blacklist_person_id
+      AND match_score < 1
+      AND (match_details -> 'similarity')::REAL >= 0.6) THEN
+  RAISE EXCEPTION 'Registro en blacklist_search no encontrado por razón social parecida';
+END IF;
+  -- razón social diferente
+  SELECT
+    id INTO _person_id
+  FROM
+    create_test_juridical_person (_rfc := 'DDD123456DDD', _legal_name := 'Alimentos del Bajío, S.A.');
+  IF EXISTS (
+    SELECT
+      *
+    FROM
+      blacklist_search
+    WHERE
+      person_id = _person_id) THEN
+  RAISE EXCEPTION 'Registro en blacklist_search inesperado para razón social diferente';
+END IF;
+END;
+$$;
+ROLLBACK;
@@ -0,0 +1,169 @@
+-- verifica que una nueva búsqueda del mismo par actualice el resultado y guarde el anterior en el historial
+BEGIN;
+DO $$
+DECLARE
+  _blacklist_id INTEGER;
+  _person_id INTEGER;
+  _search blacklist_search;
+BEGIN
+  PERFORM
+    create_test_user ();
+  PERFORM
+    insert_configs ();
+  SELECT
+    id INTO _blacklist_id
+  FROM
+    create_test_blacklist ();
+  PERFORM
+    create_test_blacklist_person (_blacklist_id);
+  SELECT
+    id INTO _person_id
+  FROM
+    create_test_person (_curp := 'VERD123456BBBAAA12', _rfc := 'AAAA123456BBB');
+  -- la misma búsqueda el mismo día no escribe nada
+  IF screen_natural_person (_person_id) <> 0 THEN
+    RAISE EXCEPTION 'La segunda búsqueda del día no debe escribir resultados';
+  END IF;
+  UPDATE
+    blacklist_search
+  SET
+    search_date = CURRENT_DATE - 40
+  WHERE
+    person_id = _person_id;
+  IF screen_natural_person (_person_id) <> 1 THEN
+    RAISE EXCEPTION 'La búsqueda de un día posterior debe actualizar el resultado';
+  END IF;
+  SELECT
+    * INTO _search
+  FROM
+    blacklist_search
+  WHERE
+    person_id = _person_id;
+  IF (
+    SELECT
+      count(*)
+    FROM
+      blacklist_search
+    WHERE
+      person_id = _person_id) <> 1 OR _search.search_date <> CURRENT_DATE THEN
+    RAISE EXCEPTION 'Debe existir un solo resultado con la fecha de hoy';
+  END IF;
+  IF NOT EXISTS (
+    SELECT
+      *
+    FROM
+      blacklist_search_history
+    WHERE
+      blacklist_search_id = _search.id
+      AND search_date = CURRENT_DATE - 40) THEN
+  RAISE EXCEPTION 'Resultado anterior no encontrado en blacklist_search_history';
+END IF;
+END;
+$$;
+ROLLBACK;
+
+-- verifica que con save_all_comparison_results los resultados sin coincidencia tengan match = false y que el
+-- mantenimiento los borre cuando superan la retención
+BEGIN;
+DO $$
+DECLARE
+  _blacklist_id INTEGER;
+  _person_id INTEGER;
+  _result RECORD;
+BEGIN
+  PERFORM
+    create_test_user ();
+  INSERT INTO config (name, value)
+    VALUES ('max_string_distance_to_match', '3'),
+    ('save_all_comparison_results', 'true');
+  SELECT
+    id INTO _blacklist_id
+  FROM
+    create_test_blacklist ();
+  PERFORM
+    create_test_blacklist_person (_blacklist_id);
+  PERFORM
+    create_test_blacklist_person (_blacklist_id, _curp := 'PERP123456AAAAAA12', _rfc := 'PERP123456AAA', _name :=
+      'Pedro', _first_last_name := 'Perez', _second_last_name := 'Garcia');
+  SELECT
+    id INTO _person_id
+  FROM
+    create_test_person (_curp := 'VERD123456BBBAAA12', _rfc := 'AAAA123456BBB');
+  IF (
+    SELECT
+      array_agg(MATCH ORDER BY MATCH)
+    FROM
+      blacklist_search
+    WHERE
+      person_id = _person_id) <> ARRAY[FALSE, TRUE] THEN
+    RAISE EXCEPTION 'Se esperaba un resultado con coincidencia y uno sin coincidencia';
+  END IF;
+  UPDATE
+    blacklist_search
+  SET
+    search_date = CURRENT_DATE - 100
+  WHERE
+    person_id = _person_id;
+  SELECT
+    * INTO _result
+  FROM
+    maintain_blacklist_search (3, 90);
+  IF _result.searches_deleted <> 1 THEN
+    RAISE EXCEPTION 'Resultado inesperado de maintain_blacklist_search: %', _result;
+  END IF;
+  IF EXISTS (
+    SELECT
+      *
+    FROM
+      blacklist_search
+    WHERE
+      person_id = _person_id
+      AND NOT MATCH) THEN
+  RAISE EXCEPTION 'El resultado sin coincidencia debió borrarse';
+END IF;
+  IF NOT EXISTS (
+    SELECT
+      *
+    FROM
+      blacklist_search
+    WHERE
+      person_id = _person_id
+      AND MATCH) THEN
+  RAISE EXCEPTION 'El resultado con coincidencia no debe borrarse';
+END IF;
+END;
+$$;
+ROLLBACK;
+
+-- verifica que se creen las particiones mensuales del historial y que los registros de la partición default se
+-- muevan a su partición
+BEGIN;
+DO $$
+BEGIN
+  INSERT INTO blacklist_search_history (blacklist_search_id, search_date, created_at)
+    VALUES (1, '2001-02-03', CURRENT_TIMESTAMP);
+  PERFORM
+    create_blacklist_search_history_partitions (CURRENT_DATE, 1);
+  IF to_regclass('blacklist_search_history_200102') IS NULL THEN
+    RAISE EXCEPTION 'Partición blacklist_search_history_200102 no creada';
+  END IF;
+  IF to_regclass('blacklist_search_history_' || to_char(CURRENT_DATE, 'YYYYMM')) IS NULL THEN
+    RAISE EXCEPTION 'Partición del mes actual no creada';
+  END IF;
+  IF EXISTS (
+    SELECT
+      *
+    FROM
+      blacklist_search_history_default) THEN
+  RAISE EXCEPTION 'Los registros de la partición default debieron moverse';
+END IF;
+  IF NOT EXISTS (
+    SELECT
+      *
+    FROM
+      blacklist_search_history_200102) THEN
+  RAISE EXCEPTION 'Registro no encontrado en blacklist_search_history_200102';
+END IF;
+END;
+$$;
+ROLLBACK;
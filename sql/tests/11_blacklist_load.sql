@@ -0,0 +1,179 @@
+-- verifica que la carga masiva de una lista genere las mismas coincidencias que la insercion registro por registro
+BEGIN;
+DO $$
+DECLARE
+  _bulk_blacklist_id INTEGER;
+  _row_blacklist_id INTEGER;
+  _user_id INTEGER;
+  _loaded INTEGER;
+  _matches INTEGER;
+BEGIN
+  SELECT
+    id INTO _user_id
+  FROM
+    create_test_user ();
+  PERFORM
+    insert_configs ();
+  PERFORM
+    create_test_person ();
+  PERFORM
+    create_test_person (_curp := 'VARD123456AAAAAA11', _rfc := 'AAAA123456AAB', _name := 'Otro');
+  PERFORM
+    create_test_person (_curp := 'VERD123456BBBAAA12', _rfc := 'AAAA123456BBB', _name := 'Johnn');
+  INSERT INTO blacklist (short_name)
+    VALUES ('bulk')
+  RETURNING
+    id INTO _bulk_blacklist_id;
+  INSERT INTO blacklist (short_name)
+    VALUES ('row')
+  RETURNING
+    id INTO _row_blacklist_id;
+  CREATE TEMP TABLE expected_entry (
+    curp VARCHAR(18),
+    rfc VARCHAR(13),
+    name TEXT,
+    first_last_name TEXT,
+    second_last_name TEXT
+  ) ON COMMIT DROP;
+  INSERT INTO expected_entry
+    VALUES ('VARD123456CCCAAA12', 'AAAA123456CCC', 'John', 'Doe', 'Smith'),
+    ('VARD123456AAAAAA11', 'AAAA123456DDD', 'Alguien', 'Doe', 'Smith'),
+    ('VARD123456EEEAAA12', 'AAAA123456BBB', 'Alguien', 'Mas', NULL),
+    ('VARD123456FFFAAA12', 'AAAA123456FFF', 'Jon', 'Doe', 'Smith'),
+    ('VARD123456GGGAAA12', 'AAAA123456GGG', 'Nadie', 'Parecido', NULL);
+  PERFORM
+    create_test_blacklist_person (_row_blacklist_id, e.curp, e.rfc, e.name, e.first_last_name, e.second_last_name)
+  FROM
+    expected_entry e;
+  PERFORM
+    create_blacklist_natural_person_staging ();
+  INSERT INTO blacklist_natural_person_staging (official_registration_number, curp, rfc, name, first_last_name,
+    second_last_name)
+  SELECT
+    '1234567890',
+    e.curp,
+    e.rfc,
+    e.name,
+    e.first_last_name,
+    e.second_last_name
+  FROM
+    expected_entry e;
+  SELECT
+    loaded,
+    matches INTO _loaded,
+    _matches
+  FROM
+    load_blacklist_natural_person_staging (_bulk_blacklist_id);
+  IF _loaded <> 5 THEN
+    RAISE EXCEPTION 'Se esperaban 5 registros cargados, se cargaron %', _loaded;
+  END IF;
+  IF _matches <> (
+    SELECT
+      count(*)
+    FROM
+      blacklist_search bs
+      JOIN blacklist_person blp ON blp.id = bs.blacklist_person_id
+    WHERE
+      blp.blacklist_id = _row_blacklist_id) THEN
+    RAISE EXCEPTION 'El numero de coincidencias de la carga masiva no coincide';
+  END IF;
+  IF EXISTS ((
+      SELECT
+        bs.person_id, bl_npd.curp, bs.match_score, bs.match_details
+      FROM
+        blacklist_search bs
+        JOIN blacklist_person blp ON blp.id = bs.blacklist_person_id
+        JOIN blacklist_natural_person_details bl_npd ON bl_npd.id = blp.id
+      WHERE
+        blp.blacklist_id = _row_blacklist_id
+      EXCEPT
+      SELECT
+        bs.person_id, bl_npd.curp, bs.match_score, bs.match_details
+      FROM
+        blacklist_search bs
+        JOIN blacklist_person blp ON blp.id = bs.blacklist_person_id
+        JOIN blacklist_natural_person_details bl_npd ON bl_npd.id = blp.id
+      WHERE
+        blp.blacklist_id = _bulk_blacklist_id)
+    UNION ALL (
+      SELECT
+        bs.person_id, bl_npd.curp, bs.match_score, bs.match_details
+      FROM
+        blacklist_search bs
+        JOIN blacklist_person blp ON blp.id = bs.blacklist_person_id
+        JOIN blacklist_natural_person_details bl_npd ON bl_npd.id = blp.id
+      WHERE
+        blp.blacklist_id = _bulk_blacklist_id
+      EXCEPT
+      SELECT
+        bs.person_id, bl_npd.curp, bs.match_score, bs.match_details
+      FROM
+        blacklist_search bs
+        JOIN blacklist_person blp ON blp.id = bs.blacklist_person_id
+        JOIN blacklist_natural_person_details bl_npd ON bl_npd.id = blp.id
+      WHERE
+        blp.blacklist_id = _row_blacklist_id)) THEN
+  RAISE EXCEPTION 'Las coincidencias de la carga masiva no coinciden con las de la insercion por registro';
+END IF;
+  IF (
+    SELECT
+      count(*)
+    FROM
+      audit_log al
+      JOIN blacklist_person blp ON blp.id = al.record_id
+    WHERE
+      al.table_name IN ('blacklist_person', 'blacklist_natural_person_details')
+      AND al.operation_type = 'INSERT'
+      AND al.changed_by = _user_id
+      AND blp.blacklist_id = _bulk_blacklist_id) <> 10 THEN
+    RAISE EXCEPTION 'Registros en audit_log de la carga masiva no encontrados';
+  END IF;
+END;
+$$;
+ROLLBACK;
+-- verifica que ninguna configuracion de la sesion evite la auditoria y la busqueda de una entrada nueva
+BEGIN;
+DO $$
+DECLARE
+  _blacklist_id INTEGER;
+  _blacklist_person_id INTEGER;
+BEGIN
+  PERFORM
+    create_test_user ();
+  PERFORM
+    insert_configs ();
+  PERFORM
+    create_test_person ();
+  SELECT
+    id INTO _blacklist_id
+  FROM
+    create_test_blacklist ();
+  PERFORM
+    set_config('app.bulk_load', 'on', TRUE);
+  SELECT
+    id INTO _blacklist_person_id
+  FROM
+    create_test_blacklist_person (_blacklist_id);
+  IF NOT EXISTS (
+    SELECT
+    FROM
+      blacklist_search
+    WHERE
+      blacklist_person_id = _blacklist_person_id
+      AND MATCH) THEN
+  RAISE EXCEPTION 'La entrada debe buscarse aunque app.bulk_load este activo';
+END IF;
+  IF (
+    SELECT
+      count(*)
+    FROM
+      audit_log
+    WHERE
+      table_name IN ('blacklist_person', 'blacklist_natural_person_details')
+      AND operation_type = 'INSERT'
+      AND record_id = _blacklist_person_id) <> 2 THEN
+    RAISE EXCEPTION 'La entrada debe auditarse aunque app.bulk_load este activo';
+  END IF;
+END;
+$$;
+ROLLBACK;
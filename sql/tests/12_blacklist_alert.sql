@@ -0,0 +1,106 @@
+-- verifica que generate_blacklist_alerts cree una alerta pendiente por coincidencia con el puntaje mínimo y que no
+-- vuelva a crearla
+BEGIN;
+DO $$
+DECLARE
+  _blacklist_id INTEGER;
+  _exact_id INTEGER;
+  _fuzzy_id INTEGER;
+BEGIN
+  PERFORM
+    create_test_user ();
+  PERFORM
+    insert_configs ();
+  SELECT
+    id INTO _blacklist_id
+  FROM
+    create_test_blacklist ();
+  PERFORM
+    create_test_blacklist_person (_blacklist_id);
+  SELECT
+    id INTO _exact_id
+  FROM
+    create_test_person (_curp := 'VERD123456BBBAAA12', _rfc := 'AAAA123456BBB');
+  SELECT
+    id INTO _fuzzy_id
+  FROM
+    create_test_person (_curp := 'VERD123456CCCAAA12', _rfc := 'AAAA123456CCC', _name := 'Jon');
+  IF generate_blacklist_alerts (1) <> 1 THEN
+    RAISE EXCEPTION 'Se esperaba solo la alerta de la coincidencia exacta';
+  END IF;
+  IF generate_blacklist_alerts (NULL, ARRAY[_exact_id]) <> 0 THEN
+    RAISE EXCEPTION 'Una coincidencia con alerta no debe generar otra';
+  END IF;
+  IF generate_blacklist_alerts () <> 1 THEN
+    RAISE EXCEPTION 'Se esperaba la alerta de la coincidencia aproximada';
+  END IF;
+  IF EXISTS (
+    SELECT
+      *
+    FROM
+      blacklist_alert ba
+      JOIN blacklist_search bs ON bs.id = ba.blacklist_search_id
+    WHERE
+      bs.person_id IN (_exact_id, _fuzzy_id)
+      AND (ba.state <> 'pending'
+        OR ba.date <> CURRENT_DATE)) THEN
+  RAISE EXCEPTION 'Las alertas deben crearse pendientes con la fecha de hoy';
+END IF;
+  -- una alerta cerrada no se repite mientras el par siga coincidiendo igual
+  UPDATE
+    blacklist_alert ba
+  SET
+    state = 'closed'
+  FROM
+    blacklist_search bs
+  WHERE
+    bs.id = ba.blacklist_search_id
+    AND bs.person_id = _exact_id;
+  IF generate_blacklist_alerts () <> 0 THEN
+    RAISE EXCEPTION 'Una coincidencia con alerta cerrada no debe generar otra';
+  END IF;
+  UPDATE
+    blacklist_search
+  SET
+    created_at = clock_timestamp()
+  WHERE
+    person_id = _exact_id
+    AND MATCH;
+  IF generate_blacklist_alerts () <> 0 THEN
+    RAISE EXCEPTION 'Reevaluar sin cambios una coincidencia con alerta cerrada no debe generar otra';
+  END IF;
+  UPDATE
+    blacklist_search
+  SET
+    match_details = match_details || '{"curp_match": true}'
+  WHERE
+    person_id = _exact_id
+    AND MATCH;
+  IF generate_blacklist_alerts () <> 1 THEN
+    RAISE EXCEPTION 'Una coincidencia distinta a la de su alerta cerrada debe generar otra';
+  END IF;
+  UPDATE
+    blacklist_search
+  SET
+    match_score = 1
+  WHERE
+    person_id = _fuzzy_id
+    AND MATCH;
+  IF generate_blacklist_alerts () <> 0 THEN
+    RAISE EXCEPTION 'Una coincidencia con alerta pendiente no debe generar otra';
+  END IF;
+  UPDATE
+    blacklist_alert ba
+  SET
+    state = 'discarded'
+  FROM
+    blacklist_search bs
+  WHERE
+    bs.id = ba.blacklist_search_id
+    AND bs.person_id = _fuzzy_id;
+  IF generate_blacklist_alerts () <> 1 THEN
+    RAISE EXCEPTION 'Una coincidencia con mayor puntaje que su alerta descartada debe generar otra';
+  END IF;
+END;
+$$;
+ROLLBACK;
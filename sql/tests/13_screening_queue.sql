@@ -0,0 +1,87 @@
+-- verifica que en modo asíncrono la persona se encole y la cola genere los resultados y alertas
+BEGIN;
+DO $$
+DECLARE
+  _blacklist_person_id INTEGER;
+  _blacklist_id INTEGER;
+  _user_id INTEGER;
+  _person_id INTEGER;
+  _result RECORD;
+BEGIN
+  SELECT
+    id INTO _user_id
+  FROM
+    create_test_user ();
+  PERFORM
+    insert_configs ();
+  INSERT INTO config (name, value)
+    VALUES ('screening_mode', 'async');
+  SELECT
+    id INTO _blacklist_id
+  FROM
+    create_test_blacklist ();
+  SELECT
+    id INTO _blacklist_person_id
+  FROM
+    create_test_blacklist_person (_blacklist_id);
+  SELECT
+    id INTO _person_id
+  FROM
+    create_test_person (_curp := 'VERD123456BBBAAA12', _rfc := 'AAAA123456BBB');
+  IF EXISTS (
+    SELECT
+      *
+    FROM
+      blacklist_search
+    WHERE
+      person_id = _person_id) THEN
+  RAISE EXCEPTION 'La búsqueda no debe ejecutarse al insertar en modo asíncrono';
+END IF;
+  IF NOT EXISTS (
+    SELECT
+      *
+    FROM
+      screening_queue
+    WHERE
+      person_id = _person_id) THEN
+  RAISE EXCEPTION 'Persona no encontrada en screening_queue';
+END IF;
+  SELECT
+    * INTO _result
+  FROM
+    process_screening_queue (10);
+  IF _result.processed <> 1 OR _result.matches <> 1 OR _result.alerts <> 1 THEN
+    RAISE EXCEPTION 'Resultado inesperado de process_screening_queue: %', _result;
+  END IF;
+  IF NOT EXISTS (
+    SELECT
+      *
+    FROM
+      blacklist_search bs
+      JOIN blacklist_alert ba ON ba.blacklist_search_id = bs.id
+    WHERE
+      bs.person_id = _person_id
+      AND bs.blacklist_person_id = _blacklist_person_id
+      AND ba.state = 'pending') THEN
+  RAISE EXCEPTION 'Alerta no encontrada para la persona encolada';
+END IF;
+  IF EXISTS (
+    SELECT
+      *
+    FROM
+      screening_queue) THEN
+  RAISE EXCEPTION 'La cola debe quedar vacía';
+END IF;
+  -- reprocesar a la misma persona no duplica resultados
+  INSERT INTO screening_queue (person_id)
+    VALUES (_person_id);
+  SELECT
+    * INTO _result
+  FROM
+    process_screening_queue (10);
+  IF _result.processed <> 1 OR _result.matches <> 0 OR _result.alerts <> 0 THEN
+    RAISE EXCEPTION 'El reproceso no debe duplicar resultados: %', _result;
+  END IF;
+END;
+$$;
+ROLLBACK;
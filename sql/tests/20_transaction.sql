@@ -0,0 +1,67 @@
+-- verifica que las llaves foraneas de transaction rechacen productos y tipos de transaccion inexistentes
+BEGIN;
+DO $$
+DECLARE
+  _product_id INTEGER;
+  _transaction_type_id INTEGER;
+  _failed BOOLEAN;
+BEGIN
+  INSERT INTO product_type (name)
+    VALUES ('Cuenta');
+  INSERT INTO product (name, product_type_id)
+    VALUES ('Cuenta 1', currval('product_type_id_seq'))
+  RETURNING
+    id INTO _product_id;
+  INSERT INTO transaction_type (name)
+    VALUES ('Deposito')
+  RETURNING
+    id INTO _transaction_type_id;
+  INSERT INTO TRANSACTION (product_id, transaction_type_id, counterpart, amount, effective_date)
+  SELECT
+    _product_id,
+    _transaction_type_id,
+    'Contraparte ' || g,
+    g,
+    CURRENT_DATE
+  FROM
+    generate_series(1, 3) g;
+  _failed := FALSE;
+  BEGIN
+    INSERT INTO TRANSACTION (product_id, transaction_type_id, counterpart, amount, effective_date)
+      VALUES (_product_id + 1, _transaction_type_id, 'Contraparte', 1, CURRENT_DATE);
+  EXCEPTION
+    WHEN foreign_key_violation THEN
+      _failed := TRUE;
+  END;
+  IF NOT _failed THEN
+    RAISE EXCEPTION 'Debe fallar el insert con un producto inexistente';
+  END IF;
+  _failed := FALSE;
+  BEGIN
+    UPDATE
+      TRANSACTION
+    SET
+      transaction_type_id = _transaction_type_id + 1
+    WHERE
+      amount = 1;
+  EXCEPTION
+    WHEN foreign_key_violation THEN
+      _failed := TRUE;
+  END;
+  IF NOT _failed THEN
+    RAISE EXCEPTION 'Debe fallar el update con un tipo de transaccion inexistente';
+  END IF;
+  _failed := FALSE;
+  BEGIN
+    DELETE FROM product
+    WHERE id = _product_id;
+  EXCEPTION
+    WHEN foreign_key_violation THEN
+      _failed := TRUE;
+  END;
+  IF NOT _failed THEN
+    RAISE EXCEPTION 'Debe fallar el borrado de un producto con transacciones';
+  END IF;
+END;
+$$;
+ROLLBACK;